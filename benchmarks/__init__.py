@@ -0,0 +1,8 @@
+"""
+Suite de rendimiento reproducible.
+
+    python -m benchmarks.run --escala 1 --salida resultados.json
+    python -m benchmarks.comparar base.json resultados.json
+
+Ver la sección "Pruebas de Rendimiento" del README.
+"""
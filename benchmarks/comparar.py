@@ -0,0 +1,75 @@
+"""
+Compara dos archivos de resultados de benchmarks.run.
+
+Marca como regresión un escenario cuya mediana empeora más que el umbral
+(y más que un mínimo absoluto, para ignorar ruido en vistas muy rápidas) o
+que ejecuta más consultas SQL. Termina con código 1 si hay regresiones, para
+poder usarlo en CI.
+
+Uso:
+    python -m benchmarks.comparar base.json nuevo.json [--umbral 0.15] [--minimo-ms 1]
+"""
+import argparse
+import json
+import sys
+
+
+# Datos que deben coincidir para que la comparación tenga sentido
+CLAVES_COMPARABLES = ('escala', 'semilla', 'base_datos')
+
+
+def cargar(ruta):
+    with open(ruta, encoding='utf-8') as archivo:
+        return json.load(archivo)
+
+
+def comparar(base, nuevo, umbral=0.15, minimo_ms=1.0):
+    """Retorna una fila por escenario común: (nombre, ms_base, ms_nuevo, variación, consultas_base, consultas_nuevo, regresion)."""
+    filas = []
+    for nombre in sorted(set(base['escenarios']) & set(nuevo['escenarios'])):
+        antes = base['escenarios'][nombre]
+        despues = nuevo['escenarios'][nombre]
+        variacion = (despues['ms_mediana'] - antes['ms_mediana']) / antes['ms_mediana'] if antes['ms_mediana'] else 0
+        mas_lento = variacion > umbral and despues['ms_mediana'] - antes['ms_mediana'] > minimo_ms
+        regresion = mas_lento or despues['consultas'] > antes['consultas']
+        filas.append((
+            nombre, antes['ms_mediana'], despues['ms_mediana'], variacion,
+            antes['consultas'], despues['consultas'], regresion,
+        ))
+    return filas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compara dos resultados de benchmarks.run.')
+    parser.add_argument('base')
+    parser.add_argument('nuevo')
+    parser.add_argument('--umbral', type=float, default=0.15, help='Empeoramiento relativo tolerado de la mediana (0.15 = 15%%)')
+    parser.add_argument('--minimo-ms', type=float, default=1.0, help='Diferencia absoluta mínima para considerar regresión')
+    argumentos = parser.parse_args(argv)
+
+    base = cargar(argumentos.base)
+    nuevo = cargar(argumentos.nuevo)
+
+    for clave in CLAVES_COMPARABLES:
+        if base['meta'].get(clave) != nuevo['meta'].get(clave):
+            print(f"[!] '{clave}' distinto: {base['meta'].get(clave)} vs {nuevo['meta'].get(clave)}")
+
+    print(f"{'escenario':<28} {'base ms':>10} {'nuevo ms':>10} {'var.':>8} {'consultas':>11}")
+    regresiones = 0
+    for nombre, ms_base, ms_nuevo, variacion, consultas_base, consultas_nuevo, regresion in comparar(
+        base, nuevo, argumentos.umbral, argumentos.minimo_ms
+    ):
+        regresiones += regresion
+        marca = '  REGRESIÓN' if regresion else ''
+        print(
+            f'{nombre:<28} {ms_base:>10.2f} {ms_nuevo:>10.2f} {variacion:>+8.1%} '
+            f'{consultas_base:>5} -> {consultas_nuevo:<4}{marca}'
+        )
+
+    if regresiones:
+        print(f'{regresiones} escenario(s) con regresión')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,344 @@
+"""
+Compara el rendimiento con muchas peticiones simultáneas de la aplicación
+servida por WSGI (gunicorn con hilos) y por ASGI (uvicorn o daphne).
+
+Genera los datos sintéticos en una base que comparten los procesos (SQLite en
+archivo o MySQL, ver benchmarks/settings.py), levanta cada servidor en un
+proceso aparte y lo carga con N conexiones HTTP/1.1 persistentes durante unos
+segundos. Las peticiones se reparten entre los endpoints de lectura con
+versión async (APIs del catálogo, carrito, horas disponibles y agenda).
+Reporta peticiones por segundo, mediana y p95 de latencia por nivel de
+concurrencia.
+
+Los servidores no están en requirements.txt:
+    pip install -r requirements-asgi.txt
+
+El generador de carga corre en este mismo proceso; con muchas conexiones
+puede ser él el límite, así que conviene comparar los servidores entre sí
+en la misma máquina y no tomar las cifras como absolutas.
+
+Uso:
+    python -m benchmarks.concurrencia [--concurrencia 10 50 200] [--duracion 10]
+                                      [--procesos 1] [--hilos 8] [--asgi uvicorn]
+                                      [--escala 1] [--salida resultados.json]
+"""
+import argparse
+import asyncio
+import importlib.util
+import itertools
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from .run import APIS_PRODUCTOS, percentil, proximo_dia_habil, version_git
+
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+# Módulo que debe estar instalado para cada servidor
+MODULOS_SERVIDOR = {'wsgi': 'gunicorn', 'uvicorn': 'uvicorn', 'daphne': 'daphne'}
+
+
+# ==================== SERVIDORES ====================
+
+def comando_servidor(servidor, puerto, argumentos):
+    if servidor == 'wsgi':
+        return [
+            sys.executable, '-m', 'gunicorn', 'inventarioVeterinariaPamela.wsgi:application',
+            '--bind', f'127.0.0.1:{puerto}', '--workers', str(argumentos.procesos),
+            '--worker-class', 'gthread', '--threads', str(argumentos.hilos), '--log-level', 'warning',
+        ]
+    if servidor == 'uvicorn':
+        return [
+            sys.executable, '-m', 'uvicorn', 'inventarioVeterinariaPamela.asgi:application',
+            '--host', '127.0.0.1', '--port', str(puerto), '--workers', str(argumentos.procesos),
+            '--log-level', 'warning', '--no-access-log',
+        ]
+    # daphne atiende con un solo proceso
+    return [
+        sys.executable, '-m', 'daphne', '-b', '127.0.0.1', '-p', str(puerto), '-v', '0',
+        'inventarioVeterinariaPamela.asgi:application',
+    ]
+
+
+def puerto_libre():
+    with socket.socket() as conexion:
+        conexion.bind(('127.0.0.1', 0))
+        return conexion.getsockname()[1]
+
+
+def esperar_servidor(proceso, puerto, limite=30):
+    """Espera a que el servidor acepte conexiones. False si terminó o no respondió a tiempo."""
+    fin = time.monotonic() + limite
+    while time.monotonic() < fin:
+        if proceso.poll() is not None:
+            return False
+        try:
+            socket.create_connection(('127.0.0.1', puerto), timeout=1).close()
+            return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def detener(proceso):
+    proceso.terminate()
+    try:
+        proceso.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        proceso.kill()
+        proceso.wait()
+
+
+# ==================== GENERADOR DE CARGA ====================
+
+async def leer_respuesta(lector):
+    """Lee una respuesta HTTP/1.1 completa. Retorna (estado, el servidor cerrará la conexión)."""
+    linea_estado = await lector.readline()
+    if not linea_estado:
+        raise ConnectionError('conexión cerrada por el servidor')
+    estado = int(linea_estado.split()[1])
+    largo, por_partes, cerrar = 0, False, False
+    while True:
+        linea = await lector.readline()
+        if linea in (b'\r\n', b''):
+            break
+        nombre, _, valor = linea.decode('latin-1').partition(':')
+        nombre, valor = nombre.strip().lower(), valor.strip().lower()
+        if nombre == 'content-length':
+            largo = int(valor)
+        elif nombre == 'transfer-encoding':
+            por_partes = 'chunked' in valor
+        elif nombre == 'connection':
+            cerrar = valor == 'close'
+
+    if por_partes:
+        while True:
+            tamano = int((await lector.readline()).split(b';')[0], 16)
+            await lector.readexactly(tamano + 2)
+            if tamano == 0:
+                break
+    elif largo:
+        await lector.readexactly(largo)
+    return estado, cerrar
+
+
+async def conexion(puerto, solicitudes, fin, latencias, contadores):
+    """Una conexión persistente que envía peticiones hasta 'fin', una a la vez."""
+    lector = escritor = None
+    for solicitud in solicitudes:
+        if time.perf_counter() >= fin:
+            break
+        try:
+            if escritor is None:
+                lector, escritor = await asyncio.open_connection('127.0.0.1', puerto)
+            inicio = time.perf_counter()
+            escritor.write(solicitud)
+            await escritor.drain()
+            estado, cerrar = await asyncio.wait_for(leer_respuesta(lector), timeout=30)
+        except (OSError, ValueError, IndexError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+            contadores['errores'] += 1
+            cerrar = True
+        else:
+            latencias.append((time.perf_counter() - inicio) * 1000)
+            if estado >= 400:
+                contadores['errores'] += 1
+        if cerrar and escritor is not None:
+            escritor.close()
+            lector = escritor = None
+    if escritor is not None:
+        escritor.close()
+
+
+async def cargar(puerto, solicitudes, concurrencia, duracion):
+    """Mantiene 'concurrencia' conexiones activas durante 'duracion' segundos."""
+    latencias, contadores = [], {'errores': 0}
+    inicio = time.perf_counter()
+    fin = inicio + duracion
+    # Cada conexión empieza en un punto distinto de la lista de peticiones
+    await asyncio.gather(*(
+        conexion(puerto, itertools.islice(itertools.cycle(solicitudes), n, None), fin, latencias, contadores)
+        for n in range(concurrencia)
+    ))
+    segundos = time.perf_counter() - inicio
+    if not latencias:
+        return {'peticiones': 0, 'errores': contadores['errores']}
+    return {
+        'peticiones': len(latencias),
+        'errores': contadores['errores'],
+        'por_segundo': round(len(latencias) / segundos, 1),
+        'ms_mediana': round(statistics.median(latencias), 3),
+        'ms_p95': round(percentil(latencias, 95), 3),
+    }
+
+
+# ==================== DATOS Y PETICIONES ====================
+
+def sesiones():
+    """Cookie de sesión de un cliente y de un veterinario sintéticos (sesiones en la base)."""
+    from django.conf import settings
+    from django.contrib.auth.models import User
+    from django.test import Client
+
+    from gestorProductos.datos_sinteticos import PREFIJO_USUARIO
+
+    cookies = {}
+    for rol, username in (('cliente', f'{PREFIJO_USUARIO}cliente0000000'), ('veterinario', f'{PREFIJO_USUARIO}vet0000')):
+        cliente = Client()
+        cliente.force_login(User.objects.get(username=username))
+        cookies[rol] = cliente.cookies[settings.SESSION_COOKIE_NAME].value
+    return cookies
+
+
+def definir_solicitudes(cookies):
+    """Peticiones GET ya serializadas, en el orden en que se repiten."""
+    from urllib.parse import urlencode
+
+    from django.conf import settings
+    from django.urls import reverse
+    from django.utils import timezone
+
+    hoy = timezone.localdate()
+    inicio_mes = hoy.replace(day=1)
+    urls = [('cliente', reverse(nombre)) for nombre in APIS_PRODUCTOS]
+    urls += [
+        ('cliente', reverse('api_carrito')),
+        ('cliente', reverse('obtener_horas_disponibles') + '?' + urlencode({'fecha': proximo_dia_habil(hoy).isoformat()})),
+        ('veterinario', reverse('vet_agenda_api') + '?' + urlencode({
+            'start': (inicio_mes - timedelta(days=7)).isoformat(),
+            'end': (inicio_mes + timedelta(days=35)).isoformat(),
+        })),
+    ]
+    return [
+        (
+            f'GET {url} HTTP/1.1\r\nHost: localhost\r\nAccept: application/json\r\n'
+            f'Cookie: {settings.SESSION_COOKIE_NAME}={cookies[rol]}\r\n\r\n'
+        ).encode('latin-1')
+        for rol, url in urls
+    ]
+
+
+def medir_servidor(servidor, solicitudes, entorno, argumentos):
+    puerto = puerto_libre()
+    with tempfile.TemporaryFile(mode='w+') as registro:
+        proceso = subprocess.Popen(
+            comando_servidor(servidor, puerto, argumentos), cwd=RAIZ, env=entorno,
+            stdout=registro, stderr=subprocess.STDOUT,
+        )
+        try:
+            if not esperar_servidor(proceso, puerto):
+                registro.seek(0)
+                raise SystemExit(f'El servidor {servidor} no inició:\n{registro.read()[-2000:]}')
+            # Calentamiento: cachés de catálogo, roles y conexiones de cada proceso
+            asyncio.run(cargar(puerto, solicitudes, min(argumentos.concurrencia), argumentos.calentamiento))
+            resultados = {}
+            for concurrencia in argumentos.concurrencia:
+                resultado = asyncio.run(cargar(puerto, solicitudes, concurrencia, argumentos.duracion))
+                resultados[str(concurrencia)] = resultado
+                aviso = f"  [!] {resultado['errores']} errores" if resultado['errores'] else ''
+                print(
+                    f"{servidor:<8} c={concurrencia:<5} {resultado.get('por_segundo', 0):>9.1f} req/s  "
+                    f"mediana {resultado.get('ms_mediana', 0):>8.2f} ms  p95 {resultado.get('ms_p95', 0):>8.2f} ms{aviso}",
+                    file=sys.stderr,
+                )
+            return resultados
+        finally:
+            detener(proceso)
+
+
+def ejecutar(argumentos):
+    import django
+    from django.core.cache import cache
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    from gestorProductos.datos_sinteticos import GeneradorDatos
+
+    setup_test_environment()
+    nombre_original = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        cache.clear()
+        totales = GeneradorDatos(
+            escala=argumentos.escala, semilla=argumentos.semilla,
+            salida=lambda mensaje: print(mensaje, file=sys.stderr),
+        ).generar()
+        solicitudes = definir_solicitudes(sesiones())
+
+        # Los servidores abren la base de prueba recién creada
+        entorno = {**os.environ, 'PYTHONPATH': os.pathsep.join(filter(None, [str(RAIZ), os.environ.get('PYTHONPATH')]))}
+        if connection.vendor == 'sqlite':
+            entorno['BENCH_DB_ARCHIVO'] = connection.settings_dict['NAME']
+        else:
+            entorno['BENCH_DB_NAME'] = connection.settings_dict['NAME']
+        connection.close()
+
+        resultados = {
+            servidor: medir_servidor(servidor, solicitudes, entorno, argumentos)
+            for servidor in ('wsgi', argumentos.asgi)
+        }
+        meta = {
+            **version_git(),
+            'fecha': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'django': django.get_version(),
+            'base_datos': connection.vendor,
+            'escala': argumentos.escala,
+            'semilla': argumentos.semilla,
+            'procesos': argumentos.procesos,
+            'hilos_wsgi': argumentos.hilos,
+            'duracion': argumentos.duracion,
+            'endpoints': len(solicitudes),
+            'datos': totales,
+        }
+        return {'meta': meta, 'servidores': resultados}
+    finally:
+        connection.creation.destroy_test_db(nombre_original, verbosity=0)
+        teardown_test_environment()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compara WSGI y ASGI con muchas peticiones simultáneas.')
+    parser.add_argument('--concurrencia', type=int, nargs='+', default=[10, 50, 200], help='Conexiones simultáneas (uno o más niveles)')
+    parser.add_argument('--duracion', type=float, default=10, help='Segundos de carga por nivel')
+    parser.add_argument('--calentamiento', type=float, default=2, help='Segundos de carga previa no medida')
+    parser.add_argument('--procesos', type=int, default=1, help='Procesos de cada servidor')
+    parser.add_argument('--hilos', type=int, default=8, help='Hilos por proceso del servidor WSGI')
+    parser.add_argument('--asgi', choices=['uvicorn', 'daphne'], default='uvicorn', help='Servidor ASGI')
+    parser.add_argument('--escala', type=float, default=1, help='Factor de tamaño de los datos (por defecto 1)')
+    parser.add_argument('--semilla', type=int, default=42, help='Semilla del generador de datos')
+    parser.add_argument('--salida', help='Archivo JSON de resultados')
+    argumentos = parser.parse_args(argv)
+
+    faltantes = [
+        MODULOS_SERVIDOR[servidor] for servidor in ('wsgi', argumentos.asgi)
+        if importlib.util.find_spec(MODULOS_SERVIDOR[servidor]) is None
+    ]
+    if faltantes:
+        parser.error(f"falta instalar {', '.join(faltantes)} (pip install -r requirements-asgi.txt)")
+
+    # Base y sesiones compartidas con los procesos de los servidores
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+    os.environ.setdefault('BENCH_DB', 'archivo')
+    os.environ['BENCH_SERVIDOR'] = '1'
+    if os.environ['BENCH_DB'] == 'sqlite':
+        parser.error('BENCH_DB=sqlite usa una base en memoria que los servidores no pueden abrir; use archivo o mysql')
+    if os.environ['BENCH_DB'] == 'archivo':
+        os.environ.setdefault('BENCH_DB_ARCHIVO', os.path.join(tempfile.gettempdir(), f'bench_concurrencia_{os.getpid()}.sqlite3'))
+    import django
+    django.setup()
+
+    resultado = ejecutar(argumentos)
+    if argumentos.salida:
+        with open(argumentos.salida, 'w', encoding='utf-8') as archivo:
+            json.dump(resultado, archivo, indent=2, ensure_ascii=False, sort_keys=True)
+        print(f'Resultados guardados en {argumentos.salida}', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,247 @@
+"""
+Ejecuta los escenarios de rendimiento y guarda los resultados en JSON.
+
+Crea una base de datos de prueba (SQLite en memoria o MySQL local, ver
+benchmarks/settings.py), la llena con GeneradorDatos y mide cada escenario
+con el cliente de pruebas de Django: no requiere servidor ni conexión a
+internet.
+
+Uso:
+    python -m benchmarks.run [--escala 1] [--semilla 42] [--repeticiones 20]
+                             [--escenarios api_] [--salida resultados.json]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+
+
+DIRECTORIO_RESULTADOS = Path(__file__).resolve().parent / 'resultados'
+
+# Endpoints JSON del catálogo (nombres de URL de gestorProductos)
+APIS_PRODUCTOS = [
+    'api_perro_adulto', 'api_perro_cachorro', 'api_perro_senior', 'api_perros_snacks',
+    'api_gato_adulto', 'api_gato_cachorro', 'api_gatos_snacks', 'api_antiparasitario',
+    'api_shampoo', 'api_medicamento', 'api_collares', 'api_camas', 'api_juguetes', 'api_aproductos',
+]
+
+
+class Escenario:
+    """Una petición a medir: nombre, usuario que la hace (rol), método, URL y datos."""
+
+    def __init__(self, nombre, rol, url, metodo='get', datos=None):
+        self.nombre = nombre
+        self.rol = rol
+        self.url = url
+        self.metodo = metodo
+        self.datos = datos or {}
+
+    def ejecutar(self, cliente):
+        return getattr(cliente, self.metodo)(self.url, self.datos)
+
+
+def proximo_dia_habil(dia):
+    dia += timedelta(days=1)
+    while dia.weekday() >= 5:
+        dia += timedelta(days=1)
+    return dia
+
+
+def definir_escenarios():
+    """Escenarios a medir. Se definen después de generar los datos (usan ids reales)."""
+    from django.urls import reverse
+    from django.utils import timezone
+
+    from gestorProductos.models import PAProductos
+
+    hoy = timezone.localdate()
+    inicio_mes = hoy.replace(day=1)
+    producto = PAProductos.objects.order_by('id').first()
+
+    escenarios = [
+        Escenario('home', 'admin', reverse('home')),
+        Escenario('vet_inventario', 'veterinario', reverse('vet_inventario')),
+        # Rango equivalente a la vista mensual de FullCalendar (6 semanas)
+        Escenario('vet_agenda_api', 'veterinario', reverse('vet_agenda_api'), datos={
+            'start': (inicio_mes - timedelta(days=7)).isoformat(),
+            'end': (inicio_mes + timedelta(days=35)).isoformat(),
+        }),
+        Escenario('obtener_horas_disponibles', 'cliente', reverse('obtener_horas_disponibles'), datos={
+            'fecha': proximo_dia_habil(hoy).isoformat(),
+        }),
+        Escenario(
+            'agregar_carrito', 'cliente', reverse('agregar_carrito', args=['pa', producto.id]),
+            metodo='post', datos={'cantidad': 1},
+        ),
+        Escenario(
+            'api_carrito_agregar', 'cliente', reverse('api_carrito_agregar', args=['pa', producto.id]),
+            metodo='post', datos={'cantidad': 1},
+        ),
+        Escenario('buscar_productos', 'cliente', reverse('buscar_productos'), datos={'q': 'royal adulto'}),
+    ]
+    escenarios += [Escenario(nombre, 'cliente', reverse(nombre)) for nombre in APIS_PRODUCTOS]
+    return escenarios
+
+
+def crear_clientes():
+    """Un cliente de pruebas autenticado por rol."""
+    from django.contrib.auth.models import User
+    from django.test import Client
+
+    from gestorProductos.datos_sinteticos import PREFIJO_USUARIO
+
+    admin = User.objects.create_superuser('bench_admin', 'admin@sintetico.local', 'clave123')
+    usuarios = {
+        'admin': admin,
+        'veterinario': User.objects.get(username=f'{PREFIJO_USUARIO}vet0000'),
+        'cliente': User.objects.get(username=f'{PREFIJO_USUARIO}cliente0000000'),
+    }
+    clientes = {}
+    for rol, usuario in usuarios.items():
+        clientes[rol] = Client()
+        clientes[rol].force_login(usuario)
+    return clientes
+
+
+def percentil(valores, porcentaje):
+    """Percentil por rango más cercano."""
+    ordenados = sorted(valores)
+    indice = max(0, -(-len(ordenados) * porcentaje // 100) - 1)
+    return ordenados[int(indice)]
+
+
+def medir(escenario, cliente, repeticiones, calentamiento):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    # Las consultas se cuentan en la última pasada de calentamiento; los tiempos se miden sin capturarlas
+    for _ in range(max(calentamiento - 1, 0)):
+        escenario.ejecutar(cliente)
+    with CaptureQueriesContext(connection) as capturadas:
+        respuesta = escenario.ejecutar(cliente)
+    # Contar ahora: las peticiones siguientes reinician el registro de consultas de la conexión
+    consultas = len(capturadas.captured_queries)
+
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        escenario.ejecutar(cliente)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+
+    return {
+        'estado': respuesta.status_code,
+        'bytes': len(respuesta.content),
+        'consultas': consultas,
+        'ms_min': round(min(tiempos), 3),
+        'ms_mediana': round(statistics.median(tiempos), 3),
+        'ms_p95': round(percentil(tiempos, 95), 3),
+        'ms_media': round(statistics.fmean(tiempos), 3),
+    }
+
+
+def version_git():
+    raiz = Path(__file__).resolve().parent.parent
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=raiz, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        cambios = subprocess.run(
+            ['git', 'status', '--porcelain', '--untracked-files=no'], cwd=raiz, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return {'commit': None, 'cambios_sin_commit': None}
+    return {'commit': commit, 'cambios_sin_commit': bool(cambios)}
+
+
+def metadatos(argumentos, totales):
+    import django
+    from django.db import connection
+
+    version_db = getattr(connection.Database, 'sqlite_version', None) or getattr(connection, 'mysql_server_info', None)
+    return {
+        **version_git(),
+        'fecha': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'plataforma': platform.platform(),
+        'base_datos': connection.vendor,
+        'version_base_datos': version_db,
+        'escala': argumentos.escala,
+        'semilla': argumentos.semilla,
+        'repeticiones': argumentos.repeticiones,
+        'calentamiento': argumentos.calentamiento,
+        'datos': totales,
+    }
+
+
+def ejecutar(argumentos):
+    from django.core.cache import cache
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    from gestorProductos.datos_sinteticos import GeneradorDatos
+
+    setup_test_environment()
+    nombre_original = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        cache.clear()
+        inicio = time.perf_counter()
+        totales = GeneradorDatos(
+            escala=argumentos.escala, semilla=argumentos.semilla,
+            salida=lambda mensaje: print(mensaje, file=sys.stderr),
+        ).generar()
+        print(f'Datos generados en {time.perf_counter() - inicio:.1f} s', file=sys.stderr)
+
+        clientes = crear_clientes()
+        resultados = {}
+        for escenario in definir_escenarios():
+            if argumentos.escenarios and not any(filtro in escenario.nombre for filtro in argumentos.escenarios):
+                continue
+            resultado = medir(escenario, clientes[escenario.rol], argumentos.repeticiones, argumentos.calentamiento)
+            resultados[escenario.nombre] = resultado
+            aviso = '' if resultado['estado'] < 400 else f"  [!] HTTP {resultado['estado']}"
+            print(
+                f"{escenario.nombre:<28} {resultado['ms_mediana']:>9.2f} ms  "
+                f"p95 {resultado['ms_p95']:>9.2f} ms  {resultado['consultas']:>4} consultas{aviso}",
+                file=sys.stderr,
+            )
+        return {'meta': metadatos(argumentos, totales), 'escenarios': resultados}
+    finally:
+        connection.creation.destroy_test_db(nombre_original, verbosity=0)
+        teardown_test_environment()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Mide los escenarios de rendimiento sobre datos sintéticos.')
+    parser.add_argument('--escala', type=float, default=1, help='Factor de tamaño de los datos (por defecto 1)')
+    parser.add_argument('--semilla', type=int, default=42, help='Semilla del generador de datos')
+    parser.add_argument('--repeticiones', type=int, default=20, help='Mediciones por escenario')
+    parser.add_argument('--calentamiento', type=int, default=2, help='Ejecuciones previas no medidas')
+    parser.add_argument('--escenarios', nargs='*', help='Medir solo los escenarios que contengan estos textos')
+    parser.add_argument('--salida', help='Archivo JSON de resultados (por defecto benchmarks/resultados/<commit>.json)')
+    argumentos = parser.parse_args(argv)
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+    import django
+    django.setup()
+
+    resultado = ejecutar(argumentos)
+
+    salida = argumentos.salida
+    if not salida:
+        DIRECTORIO_RESULTADOS.mkdir(exist_ok=True)
+        commit = (resultado['meta']['commit'] or 'sin_git')[:10]
+        salida = DIRECTORIO_RESULTADOS / f"{commit}_{resultado['meta']['base_datos']}_x{argumentos.escala:g}.json"
+    with open(salida, 'w', encoding='utf-8') as archivo:
+        json.dump(resultado, archivo, indent=2, ensure_ascii=False, sort_keys=True)
+    print(f'Resultados guardados en {salida}', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Settings para la suite de rendimiento.
+
+Parte de los settings del proyecto y cambia solo lo necesario para medir:
+base de datos elegida con BENCH_DB, DEBUG desactivado (como en producción) y
+sin la instrumentación por vista, que agregaría su propio costo a cada petición.
+
+    BENCH_DB=sqlite  (por defecto) base SQLite temporal en memoria
+    BENCH_DB=mysql   MySQL/MariaDB local; usa BENCH_DB_NAME, BENCH_DB_USER,
+                     BENCH_DB_PASSWORD, BENCH_DB_HOST y BENCH_DB_PORT.
+                     Se crea y elimina la base 'test_<BENCH_DB_NAME>'.
+    BENCH_DB=archivo SQLite en el archivo BENCH_DB_ARCHIVO, para que otros
+                     procesos (los servidores de benchmarks.concurrencia) lean
+                     la misma base.
+
+BENCH_SERVIDOR=1 guarda las sesiones en la base de datos: los usuarios se
+autentican en el proceso que genera los datos y las peticiones las atiende
+otro proceso, que no comparte la caché en memoria.
+"""
+import os
+
+from inventarioVeterinariaPamela.settings import *  # noqa: F401,F403
+
+
+BENCH_DB = os.environ.get('BENCH_DB', 'sqlite')
+
+if BENCH_DB == 'mysql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'inventarioVeterinariaPamela.mariadb',
+            'NAME': os.environ.get('BENCH_DB_NAME', 'veterinaria_pamela'),
+            'USER': os.environ.get('BENCH_DB_USER', 'root'),
+            'PASSWORD': os.environ.get('BENCH_DB_PASSWORD', ''),
+            'HOST': os.environ.get('BENCH_DB_HOST', 'localhost'),
+            'PORT': os.environ.get('BENCH_DB_PORT', '3306'),
+            'OPTIONS': {
+                'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
+            },
+        }
+    }
+elif BENCH_DB == 'archivo':
+    ARCHIVO = os.environ.get('BENCH_DB_ARCHIVO', str(BASE_DIR / 'benchmarks' / 'bench.sqlite3'))
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': ARCHIVO,
+            # create_test_db usa el mismo archivo que abren los servidores
+            'TEST': {'NAME': ARCHIVO},
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': ':memory:',
+        }
+    }
+
+DEBUG = False
+ALLOWED_HOSTS = ['testserver', 'localhost', '127.0.0.1']
+
+PERF_INSTRUMENTACION = False
+
+# Los usuarios se autentican con force_login; el hash de la clave no es parte de lo medido
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+if os.environ.get('BENCH_SERVIDOR') == '1':
+    SESSION_ENGINE = 'django.contrib.sessions.backends.db'
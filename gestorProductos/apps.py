@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class GestorproductosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'gestorProductos'
+
+    def ready(self):
+        from . import checks  # noqa: F401  (registra las verificaciones de despliegue)
+        from .signals import conectar_senales
+        conectar_senales()
@@ -0,0 +1,81 @@
+"""
+Bundles de JS/CSS declarados en settings.BUNDLES.
+
+Cada bundle agrupa los archivos que una página necesita; los templates los
+cargan con {% bundle_css 'nombre' %} y {% bundle_js 'nombre' %} (ver
+templatetags/bundles.py). 'python manage.py construir_bundles' concatena y
+minifica los archivos locales de cada bundle en static/bundles/, antes de
+collectstatic. Las URLs externas (CDN) se cargan tal cual.
+"""
+import posixpath
+import re
+
+from django.conf import settings
+
+
+DIRECTORIO_BUNDLES = 'bundles'
+
+_URL_CSS = re.compile(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)')
+_COMENTARIO_CSS = re.compile(r'/\*(?!!).*?\*/', re.S)
+_MAPA_FUENTE_JS = re.compile(r'^//# sourceMappingURL=.*$', re.M)
+
+
+def es_externo(ruta):
+    return ruta.startswith(('http://', 'https://', '//'))
+
+
+def obtener_bundle(nombre):
+    try:
+        return settings.BUNDLES[nombre]
+    except KeyError:
+        raise ValueError(f"Bundle desconocido: '{nombre}'. Ver settings.BUNDLES") from None
+
+
+def ruta_bundle(nombre, tipo):
+    """Ruta (relativa a static/) del archivo compilado del bundle."""
+    return f'{DIRECTORIO_BUNDLES}/{nombre}.min.{tipo}'
+
+
+def archivos_locales(nombre, tipo):
+    return [ruta for ruta in obtener_bundle(nombre).get(tipo, []) if not es_externo(ruta)]
+
+
+def reescribir_urls_css(contenido, origen, destino):
+    """Ajusta las url() relativas de un CSS que se mueve de 'origen' a 'destino' (rutas de static/)."""
+    def reemplazar(coincidencia):
+        url = coincidencia.group(2).strip()
+        if es_externo(url) or url.startswith(('data:', '/', '#')):
+            return coincidencia.group(0)
+        # Los fragmentos ?v=... o #iefix de las fuentes se conservan
+        ruta, sufijo = url, ''
+        corte = re.search(r'[?#]', url)
+        if corte:
+            ruta, sufijo = url[:corte.start()], url[corte.start():]
+        absoluta = posixpath.normpath(posixpath.join(posixpath.dirname(origen), ruta))
+        relativa = posixpath.relpath(absoluta, posixpath.dirname(destino))
+        return f'url("{relativa}{sufijo}")'
+    return _URL_CSS.sub(reemplazar, contenido)
+
+
+def minificar_css(contenido):
+    # Se conservan los comentarios /*! ... */ (licencias)
+    contenido = _COMENTARIO_CSS.sub('', contenido)
+    contenido = re.sub(r'\s+', ' ', contenido)
+    return re.sub(r'\s*([{};,>])\s*', r'\1', contenido).strip()
+
+
+def minificar_js(contenido):
+    # Los archivos de los bundles ya vienen minificados (.min.js): solo se quitan las
+    # referencias a source maps, que no aplican al archivo concatenado
+    return _MAPA_FUENTE_JS.sub('', contenido).strip()
+
+
+def compilar(partes, tipo, destino):
+    """
+    Une los archivos de un bundle. 'partes' es una lista de (ruta en static/, contenido).
+    Retorna el contenido del archivo compilado.
+    """
+    if tipo == 'css':
+        return '\n'.join(minificar_css(reescribir_urls_css(contenido, ruta, destino)) for ruta, contenido in partes) + '\n'
+    # ';' entre archivos: un archivo sin ';' final no debe unirse con la expresión siguiente
+    return '\n;\n'.join(minificar_js(contenido) for ruta, contenido in partes) + '\n'
@@ -0,0 +1,201 @@
+"""
+Búsqueda global de productos sobre un índice invertido propio.
+
+El índice (ProductoIndexado + TerminoIndice) se actualiza al guardar o eliminar
+cualquier producto mediante señales (ver signals.py). Las consultas solo tocan
+las tablas del índice: un rango por prefijo sobre 'termino' (indexado) y una
+agregación por producto para calcular el puntaje.
+
+Para reconstruir el índice completo: python manage.py reindexar_productos
+"""
+import re
+import unicodedata
+
+from django.db import transaction
+from django.db.models import Case, Count, IntegerField, Max, Q, Sum, When
+
+from .catalogo import MODELOS_PRODUCTO, tipo_de_modelo
+from .models import ProductoIndexado, TerminoIndice
+
+
+# Peso de un término según el campo donde aparece
+PESOS_CAMPOS = (
+    ('codigo', 8),
+    ('nombre', 4),
+    ('marca', 2),
+    ('descripcion', 1),
+)
+
+# Palabras muy frecuentes que no aportan a la búsqueda
+PALABRAS_VACIAS = {
+    'de', 'del', 'la', 'el', 'los', 'las', 'y', 'o', 'para', 'con', 'en', 'un', 'una', 'por',
+}
+
+LARGO_MAXIMO_TERMINO = 50
+MAXIMO_TERMINOS_CONSULTA = 6
+
+
+def normalizar(texto):
+    """Convierte el texto a minúsculas y sin tildes ('Perro Pequeño' -> 'perro pequeno')."""
+    if not texto:
+        return ''
+    texto = unicodedata.normalize('NFKD', str(texto))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return texto.lower()
+
+
+def tokenizar(texto):
+    """Divide un texto normalizado en términos, descartando palabras vacías."""
+    terminos = []
+    for termino in re.split(r'[^0-9a-z]+', normalizar(texto)):
+        if termino and termino not in PALABRAS_VACIAS:
+            terminos.append(termino[:LARGO_MAXIMO_TERMINO])
+    return terminos
+
+
+def terminos_producto(producto):
+    """Retorna {termino: peso} para un producto, sumando el peso de cada campo donde aparece."""
+    pesos = {}
+    for campo, peso in PESOS_CAMPOS:
+        for termino in set(tokenizar(getattr(producto, campo, ''))):
+            pesos[termino] = pesos.get(termino, 0) + peso
+    return pesos
+
+
+@transaction.atomic
+def indexar_producto(producto, tipo=None):
+    """Crea o actualiza la entrada del índice para un producto."""
+    tipo = tipo or tipo_de_modelo(producto)
+    if tipo is None:
+        return None
+
+    entrada, _ = ProductoIndexado.objects.update_or_create(
+        tipo=tipo,
+        producto_id=producto.pk,
+        defaults={
+            'codigo': producto.codigo or '',
+            'nombre': producto.nombre or '',
+            'marca': getattr(producto, 'marca', '') or '',
+            'precio': producto.precio or 0,
+            'stock': producto.stock or 0,
+        }
+    )
+
+    # Reemplazar los términos del producto
+    entrada.terminos.all().delete()
+    TerminoIndice.objects.bulk_create([
+        TerminoIndice(termino=termino, producto=entrada, peso=peso)
+        for termino, peso in terminos_producto(producto).items()
+    ])
+    return entrada
+
+
+def desindexar_producto(producto, tipo=None):
+    """Elimina un producto del índice (sus términos se borran en cascada)."""
+    tipo = tipo or tipo_de_modelo(producto)
+    if tipo is not None:
+        ProductoIndexado.objects.filter(tipo=tipo, producto_id=producto.pk).delete()
+
+
+def reindexar_todo(tamano_lote=500):
+    """
+    Reconstruye el índice completo a partir de las 15 tablas de productos.
+    Retorna la cantidad de productos indexados.
+    """
+    total = 0
+    with transaction.atomic():
+        TerminoIndice.objects.all().delete()
+        ProductoIndexado.objects.all().delete()
+
+        for tipo, modelo in MODELOS_PRODUCTO.items():
+            consulta = modelo.objects.order_by('pk').iterator(chunk_size=tamano_lote)
+            for producto_lote in _lotes(consulta, tamano_lote):
+                entradas = ProductoIndexado.objects.bulk_create([
+                    ProductoIndexado(
+                        tipo=tipo,
+                        producto_id=p.pk,
+                        codigo=p.codigo or '',
+                        nombre=p.nombre or '',
+                        marca=getattr(p, 'marca', '') or '',
+                        precio=p.precio or 0,
+                        stock=p.stock or 0,
+                    )
+                    for p in producto_lote
+                ])
+                # Algunos backends (MariaDB < 10.5) no devuelven los ids del bulk_create
+                ids = dict(
+                    ProductoIndexado.objects.filter(
+                        tipo=tipo, producto_id__in=[p.pk for p in producto_lote]
+                    ).values_list('producto_id', 'id')
+                )
+                TerminoIndice.objects.bulk_create([
+                    TerminoIndice(termino=termino, producto_id=ids[p.pk], peso=peso)
+                    for p in producto_lote
+                    for termino, peso in terminos_producto(p).items()
+                ], batch_size=tamano_lote)
+                total += len(entradas)
+    return total
+
+
+def _lotes(iterable, tamano):
+    lote = []
+    for elemento in iterable:
+        lote.append(elemento)
+        if len(lote) >= tamano:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def buscar_productos(consulta='', tipo=None):
+    """
+    Busca productos en el índice.
+
+    Cada término de la consulta se compara por prefijo ("roy can" encuentra
+    "Royal Canin") y un producto debe coincidir con todos los términos.
+    Con consulta, los resultados vienen ordenados por puntaje (suma de pesos);
+    sin consulta, se listan todos los productos (opcionalmente de un tipo).
+
+    Retorna un queryset de ProductoIndexado (con 'puntaje' si hubo consulta).
+    """
+    terminos = tokenizar(consulta)[:MAXIMO_TERMINOS_CONSULTA]
+
+    resultados = ProductoIndexado.objects.all()
+    if tipo:
+        resultados = resultados.filter(tipo=tipo)
+
+    if not terminos:
+        return resultados.order_by('nombre', 'id')
+
+    # Un filtro OR sobre el mismo join: las anotaciones siguientes usan solo los términos coincidentes
+    coincide_alguno = Q()
+    for termino in terminos:
+        coincide_alguno |= Q(terminos__termino__startswith=termino)
+    resultados = resultados.filter(coincide_alguno)
+
+    # Marcar qué términos de la consulta coincidieron para exigir que estén todos
+    marcas = {
+        f'_t{i}': Max(Case(
+            When(terminos__termino__startswith=termino, then=1),
+            default=0,
+            output_field=IntegerField(),
+        ))
+        for i, termino in enumerate(terminos)
+    }
+    resultados = resultados.annotate(puntaje=Sum('terminos__peso'), **marcas)
+    resultados = resultados.filter(**{nombre: 1 for nombre in marcas})
+
+    return resultados.order_by('-puntaje', 'nombre', 'id')
+
+
+def facetas(resultados):
+    """Cuenta los resultados por tipo de producto: {tipo: cantidad}."""
+    ids = resultados.values('id')
+    conteo = (
+        ProductoIndexado.objects.filter(id__in=ids)
+        .values('tipo')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    return {fila['tipo']: fila['total'] for fila in conteo}
@@ -0,0 +1,161 @@
+"""
+Versiones de caché del catálogo por categoría.
+
+Las grillas de productos de las páginas de la tienda se guardan con
+{% cache %} usando como clave el tipo de producto y su versión. Al guardar o
+eliminar un producto o una imagen se incrementa la versión de su tipo (ver
+signals.py), por lo que los fragmentos anteriores dejan de usarse sin tener
+que buscarlos ni borrarlos.
+
+La versión y la fecha de la última modificación de cada categoría también
+sirven para las peticiones condicionales (ETag / Last-Modified): con
+@condicion_api y @condicion_pagina el navegador recibe un 304 sin cuerpo si
+la categoría no cambió desde su última visita.
+
+Las versiones y fechas viven en la caché 'catalogo' (settings.CACHES), que
+con varios procesos debe ser compartida (Redis): si cada proceso tuviera las
+suyas, uno seguiría sirviendo la grilla anterior y respondiendo 304 después
+de que otro guardara un cambio. Los fragmentos de la grilla pueden quedar en
+la caché local de cada proceso porque su clave incluye la versión.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import caches
+from django.db import transaction
+from django.middleware.csrf import get_token
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.connection import ConnectionProxy
+from django.views.decorators.http import condition
+
+from .catalogo import MODELOS_PRODUCTO
+
+
+ALIAS_VERSIONES = 'catalogo'
+# Igual que django.core.cache.cache, pero para el alias de las versiones
+versiones = ConnectionProxy(caches, ALIAS_VERSIONES)
+
+CLAVE_VERSION = 'catalogo:version:{tipo}'
+CLAVE_MODIFICACION = 'catalogo:modificado:{tipo}'
+
+
+def duracion_cache_catalogo():
+    return getattr(settings, 'CATALOGO_CACHE_SEGUNDOS', 3600)
+
+
+def duracion_http_catalogo():
+    return getattr(settings, 'CATALOGO_HTTP_MAX_AGE', 60)
+
+
+def version_catalogo(tipo):
+    """Versión actual de la categoría."""
+    clave = CLAVE_VERSION.format(tipo=tipo)
+    version = versiones.get(clave)
+    if version is None:
+        # Partir desde la hora actual: si la clave se perdió (reinicio, expulsión de la caché)
+        # la nueva versión no coincide con la de fragmentos guardados antes
+        versiones.add(clave, int(time.time() * 1000), timeout=None)
+        version = versiones.get(clave)
+    return version
+
+
+def ultima_modificacion(tipo):
+    """Fecha de la última escritura en productos o imágenes de la categoría."""
+    clave = CLAVE_MODIFICACION.format(tipo=tipo)
+    modificado = versiones.get(clave)
+    if modificado is None:
+        # Sin registro no se sabe cuándo cambió: se asume ahora (los clientes descargan de nuevo una vez)
+        versiones.add(clave, timezone.now(), timeout=None)
+        modificado = versiones.get(clave)
+    return modificado
+
+
+def incrementar_version(tipo):
+    """Invalida los fragmentos cacheados de la categoría y registra la fecha de modificación."""
+    versiones.set(CLAVE_MODIFICACION.format(tipo=tipo), timezone.now(), timeout=None)
+    try:
+        versiones.incr(CLAVE_VERSION.format(tipo=tipo))
+    except ValueError:
+        # No había versión: la inicial ya es distinta a cualquier anterior
+        version_catalogo(tipo)
+
+
+def invalidar_categoria(tipo):
+    """Incrementa la versión cuando se confirma la transacción en curso (así no se cachean datos sin confirmar)."""
+    transaction.on_commit(lambda: incrementar_version(tipo))
+
+
+def invalidar_todo():
+    """Para cargas masivas (bulk_create no dispara las señales)."""
+    for tipo in MODELOS_PRODUCTO:
+        incrementar_version(tipo)
+
+
+# ==================== PETICIONES CONDICIONALES ====================
+
+def condicion_api(tipo):
+    """
+    Decorador para los endpoints JSON de una categoría: ETag y Last-Modified
+    según la versión de la categoría (304 si no cambió) y Cache-Control
+    público, ya que la respuesta es igual para todos los usuarios.
+    Acepta vistas síncronas y async.
+    """
+    def decorador(vista):
+        vista_condicional = condition(
+            etag_func=lambda request, *args, **kwargs: f'{tipo}-{version_catalogo(tipo)}',
+            last_modified_func=lambda request, *args, **kwargs: ultima_modificacion(tipo),
+        )(vista)
+
+        if iscoroutinefunction(vista):
+            @wraps(vista)
+            async def envoltura_async(request, *args, **kwargs):
+                response = await vista_condicional(request, *args, **kwargs)
+                patch_cache_control(response, public=True, max_age=duracion_http_catalogo())
+                return response
+            return envoltura_async
+
+        @wraps(vista)
+        def envoltura(request, *args, **kwargs):
+            response = vista_condicional(request, *args, **kwargs)
+            patch_cache_control(response, public=True, max_age=duracion_http_catalogo())
+            return response
+        return envoltura
+    return decorador
+
+
+def _etag_pagina(request, tipo):
+    # Con mensajes pendientes la página no se puede reutilizar: debe mostrarlos
+    if len(get_messages(request)):
+        return None
+    # La página incluye el usuario (menú) y un token CSRF ligado a la cookie. get_token asegura
+    # que la cookie exista desde la primera visita, así el ETag no cambia en la segunda.
+    get_token(request)
+    usuario = request.user.pk if request.user.is_authenticated else ''
+    datos = f"{tipo}:{version_catalogo(tipo)}:{usuario}:{request.META['CSRF_COOKIE']}"
+    return hashlib.md5(datos.encode(), usedforsecurity=False).hexdigest()
+
+
+def condicion_pagina(tipo):
+    """
+    Decorador para las páginas HTML del catálogo: ETag según la versión de
+    la categoría y el usuario, y Cache-Control privado con revalidación en
+    cada visita (la página muestra datos del usuario). No usa Last-Modified
+    porque la fecha no cambia al iniciar o cerrar sesión.
+    """
+    def decorador(vista):
+        vista_condicional = condition(
+            etag_func=lambda request, *args, **kwargs: _etag_pagina(request, tipo),
+        )(vista)
+
+        @wraps(vista)
+        def envoltura(request, *args, **kwargs):
+            response = vista_condicional(request, *args, **kwargs)
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
+        return envoltura
+    return decorador
@@ -0,0 +1,198 @@
+"""
+Carrito de compras guardado en la sesión.
+
+request.session['carrito'] guarda solo {clave: cantidad}, con clave
+'<tipo>_<id>' (tipos de catalogo.py). Nombre, precio e imagen se obtienen al
+mostrar el carrito (lineas_carrito): una consulta por categoría presente,
+con una caché corta por producto ligada a la versión de la categoría
+(cache_catalogo.py), así que al editar un producto el carrito muestra el
+precio nuevo.
+
+Las vistas de formularios y la API JSON del carrito lo modifican solo a
+través de estas funciones (la API, que es async, con las versiones 'a...').
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db.models import OuterRef, Subquery
+
+from .cache_catalogo import version_catalogo
+from .catalogo import modelo_por_tipo
+from .models import ImagenProducto
+
+
+CLAVE_SESION = 'carrito'
+CLAVE_CACHE_PRODUCTO = 'carrito:producto:{tipo}:{version}:{id}'
+
+
+def obtener_carrito(request):
+    """{clave: cantidad} tal como está en la sesión."""
+    carrito = request.session.get(CLAVE_SESION, {})
+    # Las sesiones anteriores guardaban la línea completa
+    return {
+        clave: valor['cantidad'] if isinstance(valor, dict) else valor
+        for clave, valor in carrito.items()
+    }
+
+
+def guardar_carrito(request, carrito):
+    request.session[CLAVE_SESION] = carrito
+    request.session.modified = True
+
+
+def vaciar_carrito(request):
+    if CLAVE_SESION in request.session:
+        del request.session[CLAVE_SESION]
+        request.session.modified = True
+
+
+def clave_linea(tipo, producto_id):
+    return f'{tipo}_{producto_id}'
+
+
+def separar_clave(clave):
+    """(tipo, id) de una clave del carrito, o (None, None) si no es válida."""
+    tipo, _, producto_id = clave.rpartition('_')
+    try:
+        return tipo, int(producto_id)
+    except ValueError:
+        return None, None
+
+
+def leer_cantidad(valor, por_defecto=1):
+    """Cantidad enviada por el usuario; por_defecto si no es un entero válido. Mínimo 1."""
+    try:
+        return max(int(valor), 1)
+    except (TypeError, ValueError):
+        return por_defecto
+
+
+# ==================== MODIFICACIÓN ====================
+
+def agregar_al_carrito(request, tipo, producto_id, cantidad):
+    """Suma 'cantidad' unidades del producto al carrito. Retorna la clave de la línea."""
+    carrito = obtener_carrito(request)
+    clave = clave_linea(tipo, producto_id)
+    carrito[clave] = carrito.get(clave, 0) + cantidad
+    guardar_carrito(request, carrito)
+    return clave
+
+
+def fijar_cantidad(request, clave, cantidad):
+    """Cambia la cantidad de una línea. Retorna False si no está en el carrito."""
+    carrito = obtener_carrito(request)
+    if clave not in carrito:
+        return False
+    carrito[clave] = max(cantidad, 1)
+    guardar_carrito(request, carrito)
+    return True
+
+
+def cambiar_cantidad(request, clave, diferencia):
+    """Suma (o resta) unidades a una línea sin bajar de 1. Retorna False si no está en el carrito."""
+    cantidad = obtener_carrito(request).get(clave)
+    if cantidad is None:
+        return False
+    return fijar_cantidad(request, clave, cantidad + diferencia)
+
+
+def eliminar_linea(request, clave):
+    """Quita una línea del carrito. Retorna False si no estaba."""
+    carrito = obtener_carrito(request)
+    if clave not in carrito:
+        return False
+    del carrito[clave]
+    guardar_carrito(request, carrito)
+    return True
+
+
+# ==================== DATOS DE LOS PRODUCTOS ====================
+
+def duracion_cache_precios():
+    return getattr(settings, 'CARRITO_PRECIOS_SEGUNDOS', 300)
+
+
+def datos_productos(tipo, ids):
+    """
+    {id: {'nombre', 'precio', 'imagen'}} de los productos de una categoría que
+    existen. Los que no están en caché se leen con una sola consulta.
+    """
+    modelo = modelo_por_tipo(tipo)
+    if modelo is None:
+        return {}
+    version = version_catalogo(tipo)
+    claves = {CLAVE_CACHE_PRODUCTO.format(tipo=tipo, version=version, id=producto_id): producto_id for producto_id in ids}
+    en_cache = cache.get_many(claves)
+    datos = {claves[clave]: valor for clave, valor in en_cache.items()}
+
+    faltantes = [producto_id for clave, producto_id in claves.items() if clave not in en_cache]
+    if faltantes:
+        # Primera imagen del producto (mismo orden que en el catálogo) en la misma consulta
+        imagen = ImagenProducto.objects.filter(
+            content_type=ContentType.objects.get_for_model(modelo), object_id=OuterRef('pk'),
+        ).order_by('orden', 'fecha_creacion').values('url_imagen')[:1]
+        nuevos = {}
+        for producto in modelo.objects.filter(id__in=faltantes).annotate(imagen=Subquery(imagen)).only('id', 'nombre', 'precio'):
+            datos[producto.id] = nuevos[CLAVE_CACHE_PRODUCTO.format(tipo=tipo, version=version, id=producto.id)] = {
+                'nombre': producto.nombre,
+                'precio': producto.precio or 0,
+                'imagen': producto.imagen or '',
+            }
+        cache.set_many(nuevos, duracion_cache_precios())
+    return datos
+
+
+def lineas_carrito(request):
+    """
+    {clave: línea} del carrito con nombre, precio e imagen actuales (en el
+    orden en que se agregaron). Los productos que ya no existen se quitan.
+    """
+    carrito = obtener_carrito(request)
+    ids_por_tipo = {}
+    for clave in carrito:
+        tipo, producto_id = separar_clave(clave)
+        ids_por_tipo.setdefault(tipo, []).append(producto_id)
+    datos_por_tipo = {tipo: datos_productos(tipo, ids) for tipo, ids in ids_por_tipo.items() if tipo}
+
+    lineas = {}
+    for clave, cantidad in carrito.items():
+        tipo, producto_id = separar_clave(clave)
+        datos = datos_por_tipo.get(tipo, {}).get(producto_id)
+        if datos is None:
+            continue
+        lineas[clave] = {
+            'tipo': tipo,
+            'id': producto_id,
+            **datos,
+            'cantidad': cantidad,
+            'subtotal': datos['precio'] * cantidad,
+        }
+    if len(lineas) != len(carrito):
+        guardar_carrito(request, {clave: carrito[clave] for clave in lineas})
+    return lineas
+
+
+def total_carrito(lineas):
+    return sum(linea['subtotal'] for linea in lineas.values())
+
+
+def resumen_carrito(lineas):
+    """Totales del carrito para la API y el contador de la barra de navegación."""
+    return {
+        'total': total_carrito(lineas),
+        'cantidad_productos': sum(linea['cantidad'] for linea in lineas.values()),
+        'lineas': len(lineas),
+    }
+
+
+# ==================== VERSIONES ASYNC ====================
+# Para las vistas async de la API. En Django 5.0 la sesión solo tiene API
+# síncrona, así que se usa en un hilo (el mismo para toda la petición).
+
+alineas_carrito = sync_to_async(lineas_carrito)
+adatos_productos = sync_to_async(datos_productos)
+aagregar_al_carrito = sync_to_async(agregar_al_carrito)
+afijar_cantidad = sync_to_async(fijar_cantidad)
+acambiar_cantidad = sync_to_async(cambiar_cantidad)
+aeliminar_linea = sync_to_async(eliminar_linea)
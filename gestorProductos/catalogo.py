@@ -0,0 +1,90 @@
+"""
+Registro central de tipos de producto.
+
+Cada uno de los 15 modelos de producto se identifica con un código corto
+(el mismo que ya usa el carrito en la sesión: "pa", "snackg", "med", ...).
+Las vistas, la búsqueda y los comandos usan este registro en lugar de
+repetir el mapeo modelo <-> código en cada función.
+"""
+from django.db.models import CharField, F, Value
+
+from .models import (
+    Productos, PCProductos, PAProductos, PSProductos, AProductos,
+    AGAProductos, AGCProductos, SnackGProductos, SnackPProductos,
+    Antiparasitario, Medicamento, Shampoo, Cama, Collar, Juguete
+)
+
+
+# Código de tipo -> modelo
+MODELOS_PRODUCTO = {
+    "pa": PAProductos,
+    "pc": PCProductos,
+    "ps": PSProductos,
+    "a": AProductos,
+    "p": Productos,
+    "ap": Antiparasitario,
+    "aga": AGAProductos,
+    "agc": AGCProductos,
+    "snackp": SnackPProductos,
+    "snackg": SnackGProductos,
+    "med": Medicamento,
+    "shampoo": Shampoo,
+    "cama": Cama,
+    "collar": Collar,
+    "juguete": Juguete,
+}
+
+# Código de tipo -> nombre de la categoría para mostrar
+CATEGORIAS_PRODUCTO = {
+    "pa": "Alimento Perro Adulto",
+    "pc": "Alimento Perro Cachorro",
+    "ps": "Alimento Perro Senior",
+    "a": "Alimento General",
+    "p": "Producto General",
+    "ap": "Antiparasitario",
+    "aga": "Alimento Gato Adulto",
+    "agc": "Alimento Gato Cachorro",
+    "snackp": "Snack Perro",
+    "snackg": "Snack Gato",
+    "med": "Medicamento",
+    "shampoo": "Shampoo",
+    "cama": "Cama",
+    "collar": "Collar",
+    "juguete": "Juguete",
+}
+
+# Modelo -> código de tipo (mapeo inverso)
+TIPOS_POR_MODELO = {modelo: tipo for tipo, modelo in MODELOS_PRODUCTO.items()}
+
+
+def modelo_por_tipo(tipo):
+    """Retorna el modelo asociado al código de tipo, o None si no existe."""
+    return MODELOS_PRODUCTO.get(tipo)
+
+
+def tipo_de_modelo(modelo):
+    """Retorna el código de tipo de un modelo (o instancia) de producto, o None."""
+    if not isinstance(modelo, type):
+        modelo = type(modelo)
+    return TIPOS_POR_MODELO.get(modelo)
+
+
+def productos_union(filtro=None):
+    """
+    Las 15 tablas de productos en una sola consulta UNION ALL, como
+    diccionarios con id, codigo, nombre, precio, stock, tipo_producto y
+    marca_producto ('' en los modelos sin marca). Se puede ordenar y
+    cortar como cualquier queryset: el ORDER BY y el LIMIT aplican al
+    resultado completo. 'filtro' es un Q que se aplica en cada tabla.
+    """
+    consultas = []
+    for tipo, modelo in MODELOS_PRODUCTO.items():
+        consulta = modelo.objects.all() if filtro is None else modelo.objects.filter(filtro)
+        # Todas las columnas extra como anotaciones, para que queden en el mismo orden en cada SELECT
+        tiene_marca = any(campo.name == 'marca' for campo in modelo._meta.fields)
+        consultas.append(consulta.annotate(
+            tipo_producto=Value(tipo, output_field=CharField()),
+            marca_producto=F('marca') if tiene_marca else Value('', output_field=CharField()),
+        ).values('id', 'codigo', 'nombre', 'precio', 'stock', 'tipo_producto', 'marca_producto'))
+    primera, *resto = consultas
+    return primera.union(*resto, all=True)
@@ -0,0 +1,30 @@
+"""
+Verificaciones de configuración (python manage.py check --deploy).
+"""
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+from .cache_catalogo import ALIAS_VERSIONES
+
+
+# Backends que guardan los datos en cada proceso por separado
+CACHES_LOCALES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches, deploy=True)
+def revisar_cache_catalogo(app_configs, **kwargs):
+    """Con varios procesos, las versiones del catálogo deben estar en una caché compartida."""
+    backend = settings.CACHES.get(ALIAS_VERSIONES, {}).get('BACKEND')
+    if backend is None or backend in CACHES_LOCALES:
+        return [Warning(
+            f"La caché '{ALIAS_VERSIONES}' de las versiones del catálogo no es compartida entre procesos.",
+            hint=(
+                'Con más de un worker un proceso puede servir la grilla anterior y responder 304 '
+                'después de que otro guarde un cambio. Defina CACHE_CATALOGO_REDIS (ver README).'
+            ),
+            id='gestorProductos.W001',
+        )]
+    return []
@@ -0,0 +1,37 @@
+"""
+Convertidor de rutas para el tipo de producto.
+
+'<tipo_producto:tipo>' acepta los códigos de catalogo.py ("pa", "ap", "med",
+...) y también los nombres que usaban las URLs anteriores (crear/alimentopa/,
+editar/antiparasitario/<codigo>/, ...), para que los enlaces guardados sigan
+funcionando. La vista siempre recibe el código.
+"""
+from .catalogo import MODELOS_PRODUCTO
+
+
+# Nombre usado en las URLs anteriores -> código de tipo
+TIPOS_ANTERIORES = {
+    "alimentopa": "pa",
+    "alimentopc": "pc",
+    "alimentops": "ps",
+    "alimentoga": "aga",
+    "alimentogc": "agc",
+    "antiparasitario": "ap",
+    "medicamento": "med",
+    "medicamentos": "med",
+    "collares": "collar",
+    "camas": "cama",
+    "juguetes": "juguete",
+}
+
+
+class TipoProductoConverter:
+    regex = "|".join(sorted([*MODELOS_PRODUCTO, *TIPOS_ANTERIORES], key=len, reverse=True))
+
+    def to_python(self, valor):
+        return TIPOS_ANTERIORES.get(valor, valor)
+
+    def to_url(self, valor):
+        if valor not in MODELOS_PRODUCTO:
+            raise ValueError(f"Tipo de producto desconocido: {valor}")
+        return valor
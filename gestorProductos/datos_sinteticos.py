@@ -0,0 +1,396 @@
+"""
+Generador de datos sintéticos para pruebas de rendimiento y ambientes de carga.
+
+Crea clientes, veterinarios, mascotas, citas, consultas y productos de los
+15 tipos (con sus imágenes) en cantidades proporcionales a 'escala', usando
+bulk_create por lotes. Con la misma semilla y escala genera siempre los
+mismos datos (las fechas son relativas al día de ejecución), sin importar
+la cantidad de procesos usados.
+
+Las tablas de productos no dependen de las de pacientes: con procesos > 1
+cada tipo de producto se genera en un proceso aparte mientras el proceso
+principal crea usuarios, mascotas, citas y consultas.
+
+Todos los registros generados se identifican por un prefijo (usernames
+'sint_...' y códigos 'SINT-...') para poder eliminarlos con limpiar().
+
+Uso:
+    from gestorProductos.datos_sinteticos import GeneradorDatos
+    GeneradorDatos(escala=2, semilla=42).generar()
+
+    python manage.py poblar_db --scale 100 --workers 4
+"""
+import multiprocessing
+import random
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from itertools import islice
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+from gestorUser.models import CitaMedica, Consulta, Mascota, VeterinarioProfile
+from .busqueda import reindexar_todo
+from .cache_catalogo import invalidar_todo
+from .catalogo import MODELOS_PRODUCTO
+from .models import ImagenProducto
+
+
+PREFIJO_USUARIO = 'sint_'
+PREFIJO_CODIGO = 'SINT-'
+CLAVE_USUARIOS = 'clave123'
+
+# Cantidades para escala = 1
+CLIENTES_POR_ESCALA = 200
+VETERINARIOS_POR_ESCALA = 5
+PRODUCTOS_POR_TIPO_POR_ESCALA = 40
+DIAS_HISTORIAL_POR_ESCALA = 120
+DIAS_FUTUROS = 30
+# La clínica atiende una cita por hora: la agenda crece con los días, no con los clientes
+MAXIMO_DIAS_HISTORIAL = 3 * 365
+
+# Horario de atención (igual a obtener_horas_disponibles): 9:00 a 18:00, lunes a viernes.
+# Las mañanas se llenan antes que las tardes y los lunes son los días más pedidos.
+PESOS_HORAS = {9: 10, 10: 12, 11: 12, 12: 9, 13: 4, 14: 6, 15: 8, 16: 8, 17: 6, 18: 3}
+FACTOR_DIA_SEMANA = {0: 1.15, 1: 1.0, 2: 1.0, 3: 0.95, 4: 0.9}
+OCUPACION_PASADA = 0.6
+OCUPACION_FUTURA = 0.35
+
+# Imágenes por producto: cantidad -> peso (la mayoría tiene una o dos)
+PESOS_IMAGENES = {0: 15, 1: 40, 2: 25, 3: 12, 4: 5, 5: 3}
+URL_IMAGEN = 'https://example.com/productos/{codigo}/{orden}.jpg'
+
+NOMBRES_MASCOTAS = [
+    'Max', 'Luna', 'Rocky', 'Bella', 'Toby', 'Nala', 'Simba', 'Coco', 'Milo', 'Kira',
+    'Bruno', 'Lola', 'Thor', 'Canela', 'Firulais', 'Pelusa', 'Manchas', 'Chispa', 'Oreo', 'Mía',
+]
+RAZAS = {
+    'perro': ['Labrador', 'Poodle', 'Pastor Alemán', 'Quiltro', 'Beagle', 'Golden Retriever'],
+    'gato': ['Siamés', 'Persa', 'Común Europeo', 'Maine Coon'],
+    'ave': ['Canario', 'Periquito'],
+    'conejo': ['Belier', 'Rex'],
+    'hamster': ['Sirio', 'Ruso'],
+    'otro': [''],
+}
+# Proporción aproximada de pacientes por especie
+PESOS_ESPECIES = {'perro': 55, 'gato': 35, 'ave': 3, 'conejo': 3, 'hamster': 2, 'otro': 2}
+NOMBRES_PERSONAS = ['Juan', 'María', 'Pedro', 'Camila', 'José', 'Valentina', 'Diego', 'Fernanda', 'Pablo', 'Javiera']
+APELLIDOS = ['González', 'Muñoz', 'Rojas', 'Díaz', 'Pérez', 'Soto', 'Contreras', 'Silva', 'Martínez', 'Sepúlveda']
+MOTIVOS = ['Control anual', 'Vacunación', 'Vómitos', 'Cojera', 'Dermatitis', 'Desparasitación', 'Otitis', 'Chequeo']
+MARCAS = ['Royal Canin', 'Pro Plan', 'Hills', 'Acana', 'Brit', 'Drontal', 'Bravecto', 'Kong', 'Vetnova']
+PALABRAS_PRODUCTO = ['Premium', 'Adulto', 'Cachorro', 'Senior', 'Light', 'Plus', 'Natural', 'Control', 'Mini', 'Max']
+
+
+def _escalar(base, escala):
+    return max(1, int(round(base * escala)))
+
+
+def _lotes(iterable, tamano):
+    iterador = iter(iterable)
+    while lote := list(islice(iterador, tamano)):
+        yield lote
+
+
+def _crear_productos_en_proceso(escala, semilla, tamano_lote, tipo):
+    return GeneradorDatos(escala, semilla, tamano_lote).crear_productos_tipo(tipo)
+
+
+class GeneradorDatos:
+    """Genera un conjunto de datos reproducible según 'escala' y 'semilla'."""
+
+    def __init__(self, escala=1, semilla=42, tamano_lote=1000, procesos=1, salida=None):
+        self.escala = escala
+        self.semilla = semilla
+        self.tamano_lote = tamano_lote
+        self.procesos = procesos
+        self.salida = salida
+        self.hoy = timezone.localdate()
+
+    def log(self, mensaje):
+        if self.salida is not None:
+            self.salida(mensaje)
+
+    def aleatorio(self, nombre):
+        """Generador aleatorio propio de cada tabla: el resultado no depende del orden ni del proceso."""
+        return random.Random(f'{self.semilla}:{nombre}')
+
+    # ==================== ORQUESTACIÓN ====================
+
+    def generar(self):
+        """Crea todos los datos y reconstruye los índices de búsqueda. Retorna {tabla: cantidad}."""
+        from gestorUser.busqueda import reindexar_mascotas
+
+        procesos = self.procesos
+        if procesos > 1 and connection.vendor == 'sqlite':
+            # SQLite admite un solo escritor a la vez: los procesos solo se bloquearían entre sí
+            self.log('  [-] SQLite no admite escrituras en paralelo; se usa un solo proceso')
+            procesos = 1
+
+        if procesos > 1:
+            totales = self.generar_en_paralelo(procesos)
+        else:
+            totales = self.crear_pacientes()
+            for tipo in MODELOS_PRODUCTO:
+                self._sumar(totales, self.crear_productos_tipo(tipo))
+
+        # bulk_create no dispara señales: los índices y la caché del catálogo se actualizan al final
+        reindexar_todo(tamano_lote=self.tamano_lote)
+        reindexar_mascotas(tamano_lote=self.tamano_lote)
+        invalidar_todo()
+        return totales
+
+    def generar_en_paralelo(self, procesos):
+        # Procesos nuevos (spawn, igual en Windows y Linux): cada uno configura Django y abre su propia
+        # conexión. django.setup debe ser el inicializador porque este módulo importa modelos.
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=procesos - 1,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=django.setup,
+        ) as pool:
+            pendientes = [
+                pool.submit(_crear_productos_en_proceso, self.escala, self.semilla, self.tamano_lote, tipo)
+                for tipo in MODELOS_PRODUCTO
+            ]
+            totales = self.crear_pacientes()
+            for futuro in pendientes:
+                self._sumar(totales, futuro.result())
+        return totales
+
+    @staticmethod
+    def _sumar(totales, parciales):
+        for tabla, cantidad in parciales.items():
+            totales[tabla] = totales.get(tabla, 0) + cantidad
+
+    def crear_pacientes(self):
+        """Usuarios, mascotas, citas y consultas (cada tabla depende de los ids de la anterior)."""
+        with transaction.atomic():
+            return {
+                'usuarios': self.crear_usuarios(),
+                'mascotas': self.crear_mascotas(),
+                'citas': self.crear_citas(),
+                'consultas': self.crear_consultas(),
+            }
+
+    @classmethod
+    def limpiar(cls):
+        """Elimina los datos generados anteriormente (identificados por su prefijo)."""
+        with transaction.atomic():
+            # Mascotas, citas y consultas se eliminan en cascada con sus usuarios
+            User.objects.filter(username__startswith=PREFIJO_USUARIO).delete()
+            for modelo in MODELOS_PRODUCTO.values():
+                productos = modelo.objects.filter(codigo__startswith=PREFIJO_CODIGO)
+                ImagenProducto.objects.filter(
+                    content_type=ContentType.objects.get_for_model(modelo),
+                    object_id__in=productos.values('id'),
+                ).delete()
+                productos.delete()
+        reindexar_todo()
+
+    @classmethod
+    def existen_datos(cls):
+        return User.objects.filter(username__startswith=PREFIJO_USUARIO).exists()
+
+    def _crear(self, modelo, objetos, etiqueta=None):
+        """Inserta los objetos (lista o generador) por lotes, sin tenerlos todos en memoria."""
+        total = 0
+        for lote in _lotes(objetos, self.tamano_lote):
+            modelo.objects.bulk_create(lote)
+            total += len(lote)
+        self.log(f'  [OK] {total} {etiqueta or modelo.__name__}')
+        return total
+
+    # ==================== USUARIOS ====================
+
+    def crear_usuarios(self):
+        rng = self.aleatorio('usuarios')
+        clave = make_password(CLAVE_USUARIOS)  # un solo hash para todos los usuarios
+        usuarios = []
+        for i in range(_escalar(VETERINARIOS_POR_ESCALA, self.escala)):
+            usuarios.append(User(
+                username=f'{PREFIJO_USUARIO}vet{i:04d}', password=clave,
+                first_name=rng.choice(NOMBRES_PERSONAS), last_name=rng.choice(APELLIDOS),
+                email=f'vet{i}@sintetico.local',
+            ))
+        total = self._crear(User, usuarios, 'veterinarios')
+        total += self._crear(User, (
+            User(
+                username=f'{PREFIJO_USUARIO}cliente{i:07d}', password=clave,
+                first_name=rng.choice(NOMBRES_PERSONAS), last_name=rng.choice(APELLIDOS),
+                email=f'cliente{i}@sintetico.local',
+            )
+            for i in range(_escalar(CLIENTES_POR_ESCALA, self.escala))
+        ), 'clientes')
+
+        # Algunos backends (MariaDB < 10.5) no devuelven los ids del bulk_create
+        self.veterinarios = list(
+            User.objects.filter(username__startswith=f'{PREFIJO_USUARIO}vet')
+            .order_by('username').values_list('id', flat=True)
+        )
+        self.clientes = list(
+            User.objects.filter(username__startswith=f'{PREFIJO_USUARIO}cliente')
+            .order_by('username').values_list('id', flat=True)
+        )
+        self._crear(VeterinarioProfile, [
+            VeterinarioProfile(user_id=vet_id, es_veterinario=True) for vet_id in self.veterinarios
+        ])
+        return total
+
+    # ==================== PACIENTES Y AGENDA ====================
+
+    def crear_mascotas(self):
+        rng = self.aleatorio('mascotas')
+        especies = list(PESOS_ESPECIES)
+        pesos = list(PESOS_ESPECIES.values())
+
+        def mascotas():
+            for cliente_id in self.clientes:
+                # La mayoría de los clientes tiene una mascota; algunos, varias
+                for _ in range(rng.choices([1, 2, 3, 4], weights=[60, 25, 10, 5])[0]):
+                    especie = rng.choices(especies, weights=pesos)[0]
+                    yield Mascota(
+                        propietario_id=cliente_id,
+                        nombre=rng.choice(NOMBRES_MASCOTAS),
+                        tipo_mascota=especie,
+                        raza=rng.choice(RAZAS[especie]) or None,
+                        sexo=rng.choice(['macho', 'hembra']),
+                        edad=f'{rng.randint(1, 15)} años',
+                        peso=Decimal(rng.randint(5, 400)) / 10,
+                    )
+
+        total = self._crear(Mascota, mascotas())
+
+        self.mascotas_por_cliente = {}
+        consulta = (
+            Mascota.objects.filter(propietario__username__startswith=PREFIJO_USUARIO)
+            .order_by('id').values_list('id', 'propietario_id', 'nombre', 'tipo_mascota')
+        )
+        for mascota_id, cliente_id, nombre, especie in consulta.iterator(chunk_size=self.tamano_lote):
+            self.mascotas_por_cliente.setdefault(cliente_id, []).append((mascota_id, nombre, especie))
+        return total
+
+    @property
+    def dias_historial(self):
+        return min(_escalar(DIAS_HISTORIAL_POR_ESCALA, self.escala), MAXIMO_DIAS_HISTORIAL)
+
+    def dias_agenda(self):
+        """Días hábiles cubiertos por la agenda: historial según la escala y DIAS_FUTUROS hacia adelante."""
+        for desplazamiento in range(-self.dias_historial, DIAS_FUTUROS + 1):
+            dia = self.hoy + timedelta(days=desplazamiento)
+            if dia.weekday() < 5:
+                yield dia
+
+    def crear_citas(self):
+        """Una cita como máximo por día y hora (igual que la validación de CitaMedica)."""
+        rng = self.aleatorio('citas')
+        maximo_peso = max(PESOS_HORAS.values())
+        clientes_con_mascota = sorted(self.mascotas_por_cliente)
+
+        def citas():
+            for dia in self.dias_agenda():
+                ocupacion = OCUPACION_PASADA if dia < self.hoy else OCUPACION_FUTURA
+                ocupacion *= FACTOR_DIA_SEMANA[dia.weekday()]
+                for hora, peso in PESOS_HORAS.items():
+                    if rng.random() >= ocupacion * peso / maximo_peso * 1.5:
+                        continue
+                    cliente_id = rng.choice(clientes_con_mascota)
+                    mascota_id, nombre, especie = rng.choice(self.mascotas_por_cliente[cliente_id])
+                    yield CitaMedica(
+                        user_id=cliente_id, paciente_id=mascota_id, mascota=nombre, tipo_mascota=especie,
+                        fecha=dia, hora=time(hora, 0), motivo=rng.choice(MOTIVOS),
+                    )
+
+        total = self._crear(CitaMedica, citas())
+
+        self.citas_pasadas = list(
+            CitaMedica.objects.filter(user__username__startswith=PREFIJO_USUARIO, fecha__lte=self.hoy)
+            .order_by('fecha', 'hora').values_list('id', 'paciente_id', 'fecha', 'hora')
+        )
+        return total
+
+    def crear_consultas(self):
+        """La mayoría de las citas pasadas terminaron en consulta; el resto son atenciones sin cita."""
+        rng = self.aleatorio('consultas')
+        mascotas = [
+            mascota_id
+            for cliente in sorted(self.mascotas_por_cliente)
+            for mascota_id, _, _ in self.mascotas_por_cliente[cliente]
+        ]
+
+        def consultas():
+            for cita_id, mascota_id, fecha, hora in self.citas_pasadas:
+                if rng.random() > 0.8:
+                    continue
+                yield self._consulta(rng, mascota_id, timezone.make_aware(datetime.combine(fecha, hora)), cita_id)
+
+            for _ in range(len(mascotas)):
+                momento = timezone.make_aware(datetime.combine(
+                    self.hoy - timedelta(days=rng.randint(0, self.dias_historial)),
+                    time(rng.randint(9, 18), rng.choice([0, 15, 30, 45]))
+                ))
+                yield self._consulta(rng, rng.choice(mascotas), momento)
+
+        return self._crear(Consulta, consultas())
+
+    def _consulta(self, rng, mascota_id, momento, cita_id=None):
+        completada = momento.date() < self.hoy
+        return Consulta(
+            cita_id=cita_id,
+            mascota_id=mascota_id,
+            veterinario_id=rng.choice(self.veterinarios),
+            fecha_consulta=momento,
+            motivo=rng.choice(MOTIVOS),
+            diagnostico='Sin hallazgos relevantes' if completada else None,
+            estado='completada' if completada else rng.choice(['pendiente', 'en_proceso']),
+            costo=rng.choice([15000, 20000, 25000, 35000, 50000]),
+            pagada=completada and rng.random() < 0.9,
+        )
+
+    # ==================== PRODUCTOS ====================
+
+    def crear_productos_tipo(self, tipo):
+        """Crea los productos de un tipo y sus imágenes. Retorna {'productos': n, 'imagenes': m}."""
+        modelo = MODELOS_PRODUCTO[tipo]
+        rng = self.aleatorio(f'productos:{tipo}')
+        campos = {campo.name for campo in modelo._meta.get_fields()}
+
+        def productos():
+            for i in range(_escalar(PRODUCTOS_POR_TIPO_POR_ESCALA, self.escala)):
+                datos = {
+                    'codigo': f'{PREFIJO_CODIGO}{tipo.upper()}-{i:07d}',
+                    'nombre': f'{rng.choice(MARCAS)} {rng.choice(PALABRAS_PRODUCTO)} {i}',
+                    'precio': rng.randint(20, 900) * 100,
+                    # Algunos productos quedan con stock bajo o agotados para las alertas de inventario
+                    'stock': rng.choices([0, rng.randint(1, 9), rng.randint(10, 200)], weights=[5, 15, 80])[0],
+                    'descripcion': f'Producto sintético {tipo} {i}',
+                }
+                if 'marca' in campos:
+                    datos['marca'] = rng.choice(MARCAS)
+                yield modelo(**datos)
+
+        cantidades = list(PESOS_IMAGENES)
+        pesos = list(PESOS_IMAGENES.values())
+        tipo_contenido = ContentType.objects.get_for_model(modelo)
+
+        def imagenes():
+            creados = (
+                modelo.objects.filter(codigo__startswith=PREFIJO_CODIGO)
+                .order_by('codigo').values_list('id', 'codigo')
+            )
+            for producto_id, codigo in creados.iterator(chunk_size=self.tamano_lote):
+                for orden in range(rng.choices(cantidades, weights=pesos)[0]):
+                    yield ImagenProducto(
+                        content_type=tipo_contenido, object_id=producto_id, orden=orden,
+                        url_imagen=URL_IMAGEN.format(codigo=codigo, orden=orden),
+                    )
+
+        with transaction.atomic():
+            return {
+                'productos': self._crear(modelo, productos()),
+                'imagenes': self._crear(ImagenProducto, imagenes(), f'imágenes de {modelo.__name__}'),
+            }
@@ -0,0 +1,126 @@
+"""
+Limpieza de códigos de producto repetidos.
+
+Antes de que 'codigo' fuera único en todas las tablas de productos se podían
+guardar dos productos con el mismo código (y editar o eliminar por código
+fallaba con MultipleObjectsReturned). Dos códigos se consideran el mismo si
+solo difieren en mayúsculas o espacios en los extremos ('ABC', 'abc' y
+'ABC '), como los compara MySQL en el índice único. Para cada código repetido:
+
+- Las filas que son el mismo producto (igual nombre, marca y precio) se
+  fusionan en la más antigua: se suma el stock y se le pasan las imágenes y
+  los carritos de las copias, que luego se eliminan.
+- Las demás conservan sus datos y reciben un código nuevo: '<codigo>-2',
+  '<codigo>-3', ... (o '<TIPO>-<id>' si el código estaba vacío), que no
+  repite ningún código de la tabla y cabe en el largo máximo del campo.
+
+La usa el comando deduplicar_codigos. La migración que agrega los índices
+únicos (0006) tiene su propia copia con los modelos históricos.
+"""
+from collections import defaultdict
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import Lower, Trim
+
+from .catalogo import MODELOS_PRODUCTO
+from .models import Carrito, ImagenProducto
+
+
+def _normalizar(valor):
+    return str(valor if valor is not None else '').strip().lower()
+
+
+def _clave_producto(producto):
+    """Filas con la misma clave se consideran el mismo producto."""
+    return (_normalizar(producto.nombre), _normalizar(getattr(producto, 'marca', '')), producto.precio)
+
+
+def _con_clave(modelo):
+    return modelo.objects.annotate(clave=Lower(Trim('codigo')))
+
+
+def codigos_repetidos(modelo):
+    """Códigos normalizados (sin espacios en los extremos y en minúsculas) que usa más de un producto."""
+    return list(
+        _con_clave(modelo).values('clave').annotate(total=Count('id')).filter(total__gt=1)
+        .order_by('clave').values_list('clave', flat=True)
+    )
+
+
+def codigo_libre(base, ocupados, largo_maximo):
+    """
+    'base' si no está en 'ocupados'; si no, el primero libre de 'base-2',
+    'base-3', ... La base se recorta para que el código con el sufijo quepa en
+    largo_maximo. 'ocupados' tiene los códigos normalizados con _normalizar.
+    """
+    candidato = base[:largo_maximo]
+    n = 1
+    while _normalizar(candidato) in ocupados:
+        n += 1
+        sufijo = f'-{n}'
+        candidato = base[:largo_maximo - len(sufijo)] + sufijo
+    return candidato
+
+
+def deduplicar_codigos(tipos=None, simular=False):
+    """
+    Fusiona o renombra los productos con código repetido.
+    Retorna la lista de acciones: dicts con tipo, accion ('fusionado' o
+    'renombrado'), producto_id, codigo y destino (id conservado o código nuevo).
+    Con simular=True no modifica la base de datos.
+    """
+    acciones = []
+    for tipo, modelo in MODELOS_PRODUCTO.items():
+        if tipos and tipo not in tipos:
+            continue
+        repetidos = codigos_repetidos(modelo)
+        if not repetidos:
+            continue
+        ct = ContentType.objects.get_for_model(modelo)
+
+        with transaction.atomic():
+            # Todos los códigos de la tabla: los nuevos no pueden repetir ninguno
+            ocupados = {_normalizar(codigo) for codigo in modelo.objects.values_list('codigo', flat=True)}
+            largo_maximo = modelo._meta.get_field('codigo').max_length
+            productos = _con_clave(modelo).filter(clave__in=repetidos).order_by('id')
+            por_codigo = defaultdict(list)
+            for producto in productos:
+                por_codigo[_normalizar(producto.codigo)].append(producto)
+
+            for filas in por_codigo.values():
+                grupos = defaultdict(list)
+                for producto in filas:
+                    grupos[_clave_producto(producto)].append(producto)
+
+                conservados = []
+                for conservado, *copias in grupos.values():
+                    conservados.append(conservado)
+                    if not copias:
+                        continue
+                    ids_copias = [copia.id for copia in copias]
+                    acciones.extend(
+                        {'tipo': tipo, 'accion': 'fusionado', 'producto_id': copia.id, 'codigo': copia.codigo, 'destino': conservado.id}
+                        for copia in copias
+                    )
+                    if simular:
+                        continue
+                    conservado.stock = (conservado.stock or 0) + sum(copia.stock or 0 for copia in copias)
+                    conservado.save(update_fields=['stock'])
+                    ImagenProducto.objects.filter(content_type=ct, object_id__in=ids_copias).update(object_id=conservado.id)
+                    Carrito.objects.filter(producto_tipo=ct, producto_id__in=ids_copias).update(producto_id=conservado.id)
+                    for copia in copias:
+                        copia.delete()
+
+                # El más antiguo mantiene el código; el resto recibe uno nuevo
+                for producto in sorted(conservados, key=lambda p: p.id)[1:]:
+                    base = producto.codigo.strip() or f'{tipo.upper()}-{producto.id}'
+                    nuevo = codigo_libre(base, ocupados, largo_maximo)
+                    ocupados.add(_normalizar(nuevo))
+                    acciones.append({'tipo': tipo, 'accion': 'renombrado', 'producto_id': producto.id, 'codigo': producto.codigo, 'destino': nuevo})
+                    if not simular:
+                        producto.codigo = nuevo
+                        producto.save(update_fields=['codigo'])
+
+    return acciones
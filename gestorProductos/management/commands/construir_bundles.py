@@ -0,0 +1,51 @@
+"""
+Comando para generar los bundles de JS/CSS de settings.BUNDLES.
+Concatena y minifica los archivos locales de cada bundle en static/bundles/.
+Se ejecuta antes de collectstatic en cada despliegue.
+Uso: python manage.py construir_bundles [--solo admin tablas]
+"""
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand, CommandError
+
+from gestorProductos.bundles import archivos_locales, compilar, ruta_bundle
+
+
+class Command(BaseCommand):
+    help = 'Concatena y minifica los bundles de JS/CSS declarados en settings.BUNDLES'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--solo', nargs='*', help='Generar solo estos bundles')
+
+    def handle(self, *args, **options):
+        nombres = options['solo'] or list(settings.BUNDLES)
+        desconocidos = set(nombres) - set(settings.BUNDLES)
+        if desconocidos:
+            raise CommandError(f"Bundles desconocidos: {', '.join(sorted(desconocidos))}")
+
+        directorio = Path(settings.STATICFILES_DIRS[0])
+        for nombre in nombres:
+            for tipo in ('css', 'js'):
+                locales = archivos_locales(nombre, tipo)
+                if not locales:
+                    continue
+                partes = []
+                for ruta in locales:
+                    origen = finders.find(ruta)
+                    if not origen:
+                        raise CommandError(f"Bundle '{nombre}': no se encontró el archivo estático '{ruta}'")
+                    partes.append((ruta, Path(origen).read_text(encoding='utf-8')))
+
+                destino = ruta_bundle(nombre, tipo)
+                contenido = compilar(partes, tipo, destino)
+                archivo = directorio / destino
+                archivo.parent.mkdir(parents=True, exist_ok=True)
+                archivo.write_text(contenido, encoding='utf-8')
+
+                tamano_original = sum(len(texto.encode()) for _, texto in partes)
+                self.stdout.write(self.style.SUCCESS(
+                    f'  [OK] {destino}: {len(partes)} archivos, '
+                    f'{tamano_original / 1024:.0f} KB -> {len(contenido.encode()) / 1024:.0f} KB'
+                ))
@@ -0,0 +1,39 @@
+"""
+Comando para limpiar los códigos de producto repetidos (ver deduplicacion.py).
+Uso: python manage.py deduplicar_codigos [--simular] [--tipo pa --tipo collar ...]
+
+Conviene ejecutarlo con --simular antes de aplicar la migración que hace
+único el código; la migración aplica la misma limpieza si aún quedan repetidos.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from gestorProductos.catalogo import MODELOS_PRODUCTO
+from gestorProductos.deduplicacion import deduplicar_codigos
+
+
+class Command(BaseCommand):
+    help = 'Fusiona o renombra los productos que comparten código'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--simular', action='store_true', help='Muestra los cambios sin aplicarlos')
+        parser.add_argument('--tipo', action='append', dest='tipos', help='Solo este tipo de producto (se puede repetir)')
+
+    def handle(self, *args, **options):
+        tipos = options['tipos']
+        desconocidos = set(tipos or []) - set(MODELOS_PRODUCTO)
+        if desconocidos:
+            raise CommandError(f"Tipos desconocidos: {', '.join(sorted(desconocidos))}")
+
+        acciones = deduplicar_codigos(tipos=tipos, simular=options['simular'])
+        for accion in acciones:
+            if accion['accion'] == 'fusionado':
+                detalle = f"fusionado en #{accion['destino']}"
+            else:
+                detalle = f"nuevo código '{accion['destino']}'"
+            self.stdout.write(f"  {accion['tipo']} #{accion['producto_id']} ({accion['codigo']!r}): {detalle}")
+
+        prefijo = '[SIMULACIÓN] ' if options['simular'] else ''
+        fusionados = sum(1 for a in acciones if a['accion'] == 'fusionado')
+        self.stdout.write(self.style.SUCCESS(
+            f'  [OK] {prefijo}{fusionados} productos fusionados, {len(acciones) - fusionados} renombrados'
+        ))
@@ -0,0 +1,90 @@
+"""
+Comando para ver las vistas más costosas según las mediciones de RendimientoMiddleware.
+Uso: python manage.py perf_report [--orden consultas|total|db|plantillas|bytes] [--limite 15] [--limpiar]
+"""
+from django.core.management.base import BaseCommand
+
+from gestorProductos.rendimiento import obtener_almacen, presupuesto_consultas
+
+
+COLUMNAS_ORDEN = {
+    'consultas': 'consultas_p95',
+    'total': 'ms_total_p95',
+    'db': 'ms_db_prom',
+    'plantillas': 'ms_plantillas_prom',
+    'bytes': 'bytes_prom',
+}
+
+
+def percentil(valores, p):
+    valores = sorted(valores)
+    indice = min(len(valores) - 1, int(round(p / 100 * (len(valores) - 1))))
+    return valores[indice]
+
+
+def resumir(filas):
+    """Agrupa las mediciones por vista y calcula promedios y percentiles."""
+    por_vista = {}
+    for fila in filas:
+        por_vista.setdefault(fila['vista'], []).append(fila)
+
+    resumen = []
+    for vista, mediciones in por_vista.items():
+        n = len(mediciones)
+        consultas = [m['consultas'] for m in mediciones]
+        totales = [m['ms_total'] for m in mediciones]
+        resumen.append({
+            'vista': vista,
+            'peticiones': n,
+            'consultas_prom': sum(consultas) / n,
+            'consultas_p95': percentil(consultas, 95),
+            'consultas_max': max(consultas),
+            'ms_db_prom': sum(m['ms_db'] for m in mediciones) / n,
+            'ms_plantillas_prom': sum(m['ms_plantillas'] for m in mediciones) / n,
+            'ms_total_p50': percentil(totales, 50),
+            'ms_total_p95': percentil(totales, 95),
+            'bytes_prom': sum(m['bytes'] for m in mediciones) / n,
+        })
+    return resumen
+
+
+class Command(BaseCommand):
+    help = 'Muestra las vistas con más consultas SQL o mayor latencia'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orden', choices=sorted(COLUMNAS_ORDEN), default='consultas', help='Criterio para ordenar las vistas')
+        parser.add_argument('--limite', type=int, default=15, help='Cantidad de vistas a mostrar')
+        parser.add_argument('--limpiar', action='store_true', help='Borra las mediciones guardadas')
+
+    def handle(self, *args, **options):
+        almacen = obtener_almacen()
+
+        if options['limpiar']:
+            almacen.limpiar()
+            self.stdout.write(self.style.SUCCESS('[OK] Mediciones eliminadas'))
+            return
+
+        filas = almacen.filas()
+        if not filas:
+            self.stdout.write('No hay mediciones. Activa PERF_INSTRUMENTACION y navega el sitio.')
+            return
+
+        columna = COLUMNAS_ORDEN[options['orden']]
+        resumen = sorted(resumir(filas), key=lambda r: r[columna], reverse=True)[:options['limite']]
+
+        self.stdout.write(f'{len(filas)} peticiones medidas en {almacen.archivo}\n')
+        self.stdout.write(
+            f"{'Vista':<40} {'Pet.':>6} {'SQL prom':>9} {'SQL p95':>8} {'SQL máx':>8} "
+            f"{'DB ms':>8} {'Tpl ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'KB':>8}"
+        )
+        for r in resumen:
+            linea = (
+                f"{r['vista'][:40]:<40} {r['peticiones']:>6} {r['consultas_prom']:>9.1f} "
+                f"{r['consultas_p95']:>8} {r['consultas_max']:>8} {r['ms_db_prom']:>8.1f} "
+                f"{r['ms_plantillas_prom']:>8.1f} {r['ms_total_p50']:>8.1f} {r['ms_total_p95']:>8.1f} "
+                f"{r['bytes_prom'] / 1024:>8.1f}"
+            )
+            limite = presupuesto_consultas(r['vista'])
+            if limite is not None and r['consultas_max'] > limite:
+                linea = self.style.WARNING(f'{linea}  (presupuesto: {limite})')
+            self.stdout.write(linea)
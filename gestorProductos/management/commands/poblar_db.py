@@ -1,22 +1,46 @@
 """
 Comando de gestión para poblar la base de datos con datos iniciales.
-Uso: python manage.py poblar_db
+Uso: python manage.py poblar_db [--scale 0] [--batch-size 1000] [--workers 1] [--seed 42] [--limpiar]
+
+Sin --scale crea solo los usuarios y productos de ejemplo. Con --scale N
+agrega además datos sintéticos (clientes, mascotas, citas, consultas,
+productos e imágenes) proporcionales a N, ver gestorProductos/datos_sinteticos.py.
+Como referencia, --scale 500 genera alrededor de un millón de filas.
 """
-from django.core.management.base import BaseCommand
+import time
+
+from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth.models import User
 from gestorProductos.models import (
     Productos, PCProductos, PAProductos, PSProductos, AProductos,
     AGAProductos, AGCProductos, SnackGProductos, SnackPProductos,
     Antiparasitario, Medicamento, Shampoo, Cama, Collar, Juguete
 )
+from gestorProductos.busqueda import reindexar_todo
+from gestorProductos.cache_catalogo import invalidar_todo
+from gestorProductos.datos_sinteticos import GeneradorDatos
 from gestorUser.models import VeterinarioProfile
 
 
 class Command(BaseCommand):
     help = 'Pobla la base de datos con datos iniciales de ejemplo'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=0,
+                            help='Genera datos sintéticos proporcionales a este factor (1 = ~3.000 filas)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Filas por INSERT (bulk_create)')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Procesos para generar las tablas de productos en paralelo (no aplica en SQLite)')
+        parser.add_argument('--seed', type=int, default=42, help='Semilla: la misma semilla genera los mismos datos')
+        parser.add_argument('--limpiar', action='store_true',
+                            help='Elimina los datos sintéticos de una ejecución anterior antes de generar')
+
     def handle(self, *args, **options):
+        if options['scale'] > 0 and GeneradorDatos.existen_datos() and not options['limpiar']:
+            raise CommandError('Ya existen datos sintéticos; use --limpiar para reemplazarlos.')
+
         self.stdout.write(self.style.SUCCESS('Iniciando población de base de datos...'))
+        self.productos_creados = 0
 
         # Crear usuarios de ejemplo
         self.crear_usuarios()
@@ -30,8 +54,46 @@ class Command(BaseCommand):
         # Crear accesorios
         self.crear_accesorios()
 
+        # Los productos se insertan con bulk_create (sin señales): el índice de búsqueda y la caché
+        # del catálogo se actualizan una sola vez al final (GeneradorDatos.generar ya lo hace)
+        if options['scale'] > 0:
+            self.crear_datos_sinteticos(options)
+        elif self.productos_creados:
+            reindexar_todo(tamano_lote=options['batch_size'])
+            invalidar_todo()
+
         self.stdout.write(self.style.SUCCESS('¡Base de datos poblada exitosamente!'))
 
+    def crear_faltantes(self, modelo, filas, etiqueta):
+        """Inserta en un solo bulk_create las filas cuyo código aún no existe."""
+        existentes = set(
+            modelo.objects.filter(codigo__in=[f['codigo'] for f in filas]).values_list('codigo', flat=True)
+        )
+        nuevos = [modelo(**f) for f in filas if f['codigo'] not in existentes]
+        modelo.objects.bulk_create(nuevos)
+        self.productos_creados += len(nuevos)
+        self.stdout.write(self.style.SUCCESS(f'  [OK] {len(nuevos)} {etiqueta}'))
+
+    def crear_datos_sinteticos(self, options):
+        """Genera datos sintéticos a escala con GeneradorDatos."""
+        if GeneradorDatos.existen_datos():
+            self.stdout.write('Eliminando datos sintéticos anteriores...')
+            GeneradorDatos.limpiar()
+
+        self.stdout.write(f"Generando datos sintéticos (escala {options['scale']:g}, semilla {options['seed']})...")
+        inicio = time.perf_counter()
+        totales = GeneradorDatos(
+            escala=options['scale'],
+            semilla=options['seed'],
+            tamano_lote=options['batch_size'],
+            procesos=options['workers'],
+            salida=self.stdout.write,
+        ).generar()
+        segundos = time.perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f'  [OK] {sum(totales.values())} filas generadas en {segundos:.1f} s'
+        ))
+
     def crear_usuarios(self):
         """Crea usuarios de ejemplo"""
         self.stdout.write('Creando usuarios...')
@@ -89,9 +151,7 @@ class Command(BaseCommand):
             {'codigo': 'PA003', 'nombre': 'Eukanuba Adult', 'marca': 'Eukanuba', 
              'precio': 23000, 'stock': 35, 'descripcion': 'Nutrición completa para adultos'},
         ]
-        for p in productos_pa:
-            PAProductos.objects.get_or_create(codigo=p['codigo'], defaults=p)
-        self.stdout.write(self.style.SUCCESS(f'  [OK] {len(productos_pa)} productos PA creados'))
+        self.crear_faltantes(PAProductos, productos_pa, 'productos PA creados')
 
         # Alimentos para perros cachorros
         productos_pc = [
@@ -100,18 +160,14 @@ class Command(BaseCommand):
             {'codigo': 'PC002', 'nombre': 'Pro Plan Puppy', 'marca': 'Purina', 
              'precio': 24000, 'stock': 30, 'descripcion': 'Nutrición para cachorros'},
         ]
-        for p in productos_pc:
-            PCProductos.objects.get_or_create(codigo=p['codigo'], defaults=p)
-        self.stdout.write(self.style.SUCCESS(f'  [OK] {len(productos_pc)} productos PC creados'))
+        self.crear_faltantes(PCProductos, productos_pc, 'productos PC creados')
 
         # Alimentos para perros senior
         productos_ps = [
             {'codigo': 'PS001', 'nombre': 'Royal Canin Senior', 'marca': 'Royal Canin', 
              'precio': 25000, 'stock': 25, 'descripcion': 'Alimento para perros senior'},
         ]
-        for p in productos_ps:
-            PSProductos.objects.get_or_create(codigo=p['codigo'], defaults=p)
-        self.stdout.write(self.style.SUCCESS(f'  [OK] {len(productos_ps)} productos PS creados'))
+        self.crear_faltantes(PSProductos, productos_ps, 'productos PS creados')
 
         # Alimentos para gatos adultos
         productos_aga = [
@@ -120,18 +176,14 @@ class Command(BaseCommand):
             {'codigo': 'AGA002', 'nombre': 'Pro Plan Cat', 'marca': 'Purina', 
              'precio': 18000, 'stock': 35, 'descripcion': 'Nutrición completa para gatos'},
         ]
-        for p in productos_aga:
-            AGAProductos.objects.get_or_create(codigo=p['codigo'], defaults=p)
-        self.stdout.write(self.style.SUCCESS(f'  [OK] {len(productos_aga)} productos AGA creados'))
+        self.crear_faltantes(AGAProductos, productos_aga, 'productos AGA creados')
 
         # Alimentos para gatos cachorros
         productos_agc = [
             {'codigo': 'AGC001', 'nombre': 'Royal Canin Kitten', 'marca': 'Royal Canin', 
              'precio': 21000, 'stock': 30, 'descripcion': 'Alimento para gatitos'},
         ]
-        for p in productos_agc:
-            AGCProductos.objects.get_or_create(codigo=p['codigo'], defaults=p)
-        self.stdout.write(self.style.SUCCESS(f'  [OK] {len(productos_agc)} productos AGC creados'))
+        self.crear_faltantes(AGCProductos, productos_agc, 'productos AGC creados')
 
         # Snacks para perros
         snacks_p = [
@@ -140,18 +192,14 @@ class Command(BaseCommand):
             {'codigo': 'SNP002', 'nombre': 'Premios Training', 'marca': 'Royal Canin', 
              'precio': 4500, 'stock': 50, 'descripcion': 'Premios para entrenamiento'},
         ]
-        for p in snacks_p:
-            SnackPProductos.objects.get_or_create(codigo=p['codigo'], defaults=p)
-        self.stdout.write(self.style.SUCCESS(f'  [OK] {len(snacks_p)} snacks perro creados'))
+        self.crear_faltantes(SnackPProductos, snacks_p, 'snacks perro creados')
 
         # Snacks para gatos
         snacks_g = [
             {'codigo': 'SNG001', 'nombre': 'Snacks Gato Premium', 'marca': 'Whiskas', 
              'precio': 4000, 'stock': 55, 'descripcion': 'Snacks deliciosos para gatos'},
         ]
-        for p in snacks_g:
-            SnackGProductos.objects.get_or_create(codigo=p['codigo'], defaults=p)
-        self.stdout.write(self.style.SUCCESS(f'  [OK] {len(snacks_g)} snacks gato creados'))
+        self.crear_faltantes(SnackGProductos, snacks_g, 'snacks gato creados')
 
     def crear_medicamentos(self):
         """Crea medicamentos y antiparasitarios"""
@@ -166,9 +214,7 @@ class Command(BaseCommand):
             {'codigo': 'ANT003', 'nombre': 'Frontline', 'descripcion': 'Antiparasitario tópico', 
              'precio': 15000, 'stock': 30, 'tipo': 'antiparasitario'},
         ]
-        for a in antiparasitarios:
-            Antiparasitario.objects.get_or_create(codigo=a['codigo'], defaults=a)
-        self.stdout.write(self.style.SUCCESS(f'  [OK] {len(antiparasitarios)} antiparasitarios creados'))
+        self.crear_faltantes(Antiparasitario, antiparasitarios, 'antiparasitarios creados')
 
         # Medicamentos
         medicamentos = [
@@ -177,9 +223,7 @@ class Command(BaseCommand):
             {'codigo': 'MED002', 'nombre': 'Calcio Plus', 'descripcion': 'Suplemento de calcio', 
              'precio': 10000, 'stock': 35, 'tipo': 'vitamina'},
         ]
-        for m in medicamentos:
-            Medicamento.objects.get_or_create(codigo=m['codigo'], defaults=m)
-        self.stdout.write(self.style.SUCCESS(f'  [OK] {len(medicamentos)} medicamentos creados'))
+        self.crear_faltantes(Medicamento, medicamentos, 'medicamentos creados')
 
     def crear_accesorios(self):
         """Crea accesorios (shampoos, camas, collares, juguetes)"""
@@ -192,9 +236,7 @@ class Command(BaseCommand):
             {'codigo': 'SHM002', 'nombre': 'Shampoo Hipoalergénico', 'marca': 'Vet', 
              'precio': 7500, 'stock': 20, 'descripcion': 'Shampoo para piel sensible'},
         ]
-        for s in shampoos:
-            Shampoo.objects.get_or_create(codigo=s['codigo'], defaults=s)
-        self.stdout.write(self.style.SUCCESS(f'  [OK] {len(shampoos)} shampoos creados'))
+        self.crear_faltantes(Shampoo, shampoos, 'shampoos creados')
 
         # Camas
         camas = [
@@ -205,9 +247,7 @@ class Command(BaseCommand):
              'precio': 20000, 'stock': 15, 'descripcion': 'Cama suave para perros medianos', 
              'tamaño': 'Mediana', 'material': 'Algodón'},
         ]
-        for c in camas:
-            Cama.objects.get_or_create(codigo=c['codigo'], defaults=c)
-        self.stdout.write(self.style.SUCCESS(f'  [OK] {len(camas)} camas creadas'))
+        self.crear_faltantes(Cama, camas, 'camas creadas')
 
         # Collares
         collares = [
@@ -218,9 +258,7 @@ class Command(BaseCommand):
              'precio': 25000, 'stock': 20, 'descripcion': 'Collar con protección antipulgas', 
              'tamaño': 'Ajustable', 'material': 'Plástico'},
         ]
-        for c in collares:
-            Collar.objects.get_or_create(codigo=c['codigo'], defaults=c)
-        self.stdout.write(self.style.SUCCESS(f'  [OK] {len(collares)} collares creados'))
+        self.crear_faltantes(Collar, collares, 'collares creados')
 
         # Juguetes
         juguetes = [
@@ -231,7 +269,5 @@ class Command(BaseCommand):
              'precio': 10000, 'stock': 30, 'descripcion': 'Hueso para masticar', 
              'tipo': 'Hueso'},
         ]
-        for j in juguetes:
-            Juguete.objects.get_or_create(codigo=j['codigo'], defaults=j)
-        self.stdout.write(self.style.SUCCESS(f'  [OK] {len(juguetes)} juguetes creados'))
+        self.crear_faltantes(Juguete, juguetes, 'juguetes creados')
 
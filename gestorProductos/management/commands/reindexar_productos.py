@@ -0,0 +1,19 @@
+"""
+Comando para reconstruir el índice de búsqueda de productos.
+Uso: python manage.py reindexar_productos [--lote 500]
+"""
+from django.core.management.base import BaseCommand
+
+from gestorProductos.busqueda import reindexar_todo
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el índice de búsqueda a partir de todas las tablas de productos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=500, help='Cantidad de productos procesados por lote')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Reconstruyendo índice de búsqueda...')
+        total = reindexar_todo(tamano_lote=options['lote'])
+        self.stdout.write(self.style.SUCCESS(f'[OK] {total} productos indexados'))
@@ -0,0 +1,45 @@
+"""
+Comando para comparar las unidades recetadas y egresadas de cada medicamento por mes.
+Uso: python manage.py reporte_medicamentos [--meses 6]
+
+Solo cuenta las prescripciones y egresos vinculados con un producto del
+catálogo (ver vincular_medicamentos).
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from gestorUser.medicamentos import consumo_mensual
+
+
+class Command(BaseCommand):
+    help = 'Unidades recetadas vs egresadas por medicamento y mes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--meses', type=int, default=6, help='Meses hacia atrás (6 por defecto, 0 = todo)')
+
+    def handle(self, *args, **options):
+        meses = options['meses']
+        if meses < 0:
+            raise CommandError('--meses no puede ser negativo')
+
+        desde = None
+        if meses:
+            # Primer día del mes, 'meses' - 1 meses antes del actual
+            desde = timezone.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+            for _ in range(meses - 1):
+                desde = (desde - timedelta(days=1)).replace(day=1)
+
+        filas = consumo_mensual(desde)
+        if not filas:
+            self.stdout.write('No hay prescripciones ni egresos vinculados en el período.')
+            return
+
+        self.stdout.write(f"{'Mes':<8} {'Código':<12} {'Producto':<35} {'Recetado':>9} {'Egresado':>9} {'Diferencia':>10}")
+        for fila in filas:
+            self.stdout.write(
+                f"{fila['mes']:%Y-%m} {fila['codigo'][:12]:<12} {fila['nombre'][:35]:<35} "
+                f"{fila['recetado']:>9} {fila['egresado']:>9} {fila['egresado'] - fila['recetado']:>10}"
+            )
+        self.stdout.write(self.style.SUCCESS(f'  [OK] {len(filas)} filas'))
@@ -0,0 +1,74 @@
+"""
+Comando para vincular las citas antiguas con la mascota registrada (CitaMedica.paciente).
+Uso: python manage.py vincular_citas_mascotas [--lote 500] [--simular]
+
+Antes las citas solo guardaban el nombre de la mascota como texto. Para cada
+cita sin paciente se busca, entre las mascotas del mismo usuario, la que tiene
+ese nombre (sin distinguir mayúsculas ni espacios al inicio o final). Si hay
+más de una mascota con el mismo nombre la cita se deja sin vincular, para no
+asignarla al animal equivocado.
+
+Las citas se procesan por lotes: una consulta para las citas, otra para las
+mascotas de sus dueños y un bulk_update por lote.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from gestorUser.models import CitaMedica, Mascota
+
+
+class Command(BaseCommand):
+    help = 'Vincula las citas médicas con la mascota registrada del mismo usuario'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=500, help='Citas procesadas por lote (500 por defecto)')
+        parser.add_argument('--simular', action='store_true', help='Muestra los resultados sin guardar cambios')
+
+    def handle(self, *args, **options):
+        lote = options['lote']
+        simular = options['simular']
+        if lote < 1:
+            raise CommandError('--lote debe ser mayor que 0')
+
+        vinculadas = ambiguas = sin_mascota = 0
+        ultimo_id = 0
+        while True:
+            # Paginación por id: las citas vinculadas dejan de cumplir el filtro,
+            # así que no se usa OFFSET
+            citas = list(
+                CitaMedica.objects.filter(paciente__isnull=True, id__gt=ultimo_id)
+                .order_by('id').only('id', 'user_id', 'mascota')[:lote]
+            )
+            if not citas:
+                break
+            ultimo_id = citas[-1].id
+
+            # Mascotas de los dueños del lote: (propietario, nombre) -> [ids]
+            mascotas = {}
+            for mascota in Mascota.objects.filter(
+                propietario_id__in={cita.user_id for cita in citas}
+            ).only('id', 'propietario_id', 'nombre'):
+                clave = (mascota.propietario_id, mascota.nombre.strip().lower())
+                mascotas.setdefault(clave, []).append(mascota.id)
+
+            actualizar = []
+            for cita in citas:
+                candidatas = mascotas.get((cita.user_id, (cita.mascota or '').strip().lower()), [])
+                if len(candidatas) == 1:
+                    cita.paciente_id = candidatas[0]
+                    actualizar.append(cita)
+                elif candidatas:
+                    ambiguas += 1
+                    self.stdout.write(f'  Cita #{cita.id} ({cita.mascota!r}): {len(candidatas)} mascotas con ese nombre, se omite')
+                else:
+                    sin_mascota += 1
+
+            if actualizar and not simular:
+                with transaction.atomic():
+                    CitaMedica.objects.bulk_update(actualizar, ['paciente'], batch_size=lote)
+            vinculadas += len(actualizar)
+
+        prefijo = '[SIMULACIÓN] ' if simular else ''
+        self.stdout.write(self.style.SUCCESS(
+            f'  [OK] {prefijo}{vinculadas} citas vinculadas, {ambiguas} ambiguas, {sin_mascota} sin mascota registrada'
+        ))
@@ -0,0 +1,32 @@
+"""
+Comando para vincular las prescripciones y egresos antiguos con el producto del catálogo.
+Uso: python manage.py vincular_medicamentos [--lote 500] [--simular]
+
+Compara el texto del medicamento con el código y el nombre de los medicamentos
+y antiparasitarios (ver gestorUser/medicamentos.py). Las líneas cuyo nombre
+coincide con más de un producto se dejan sin vincular.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from gestorUser.medicamentos import vincular_lineas
+from gestorUser.models import EgresoMedicamento, Prescripcion
+
+
+class Command(BaseCommand):
+    help = 'Vincula prescripciones y egresos de medicamentos con los productos del inventario'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=500, help='Líneas procesadas por lote (500 por defecto)')
+        parser.add_argument('--simular', action='store_true', help='Muestra los resultados sin guardar cambios')
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError('--lote debe ser mayor que 0')
+
+        prefijo = '[SIMULACIÓN] ' if options['simular'] else ''
+        for modelo in (Prescripcion, EgresoMedicamento):
+            resultado = vincular_lineas(modelo, lote=options['lote'], simular=options['simular'])
+            self.stdout.write(self.style.SUCCESS(
+                f"  [OK] {prefijo}{modelo._meta.verbose_name_plural}: {resultado['vinculadas']} vinculadas, "
+                f"{resultado['ambiguas']} ambiguas, {resultado['sin_coincidencia']} sin coincidencia"
+            ))
@@ -0,0 +1,108 @@
+# Generated by Django 5.0.1 on 2026-10-19 13:55
+
+import re
+import unicodedata
+from itertools import islice
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Copia fija de gestorProductos/busqueda.py al crear el índice: la migración no
+# debe cambiar si después cambia el código de la búsqueda o los modelos.
+TIPOS_PRODUCTO = {
+    'pa': 'PAProductos', 'pc': 'PCProductos', 'ps': 'PSProductos', 'a': 'AProductos',
+    'p': 'Productos', 'ap': 'Antiparasitario', 'aga': 'AGAProductos', 'agc': 'AGCProductos',
+    'snackp': 'SnackPProductos', 'snackg': 'SnackGProductos', 'med': 'Medicamento',
+    'shampoo': 'Shampoo', 'cama': 'Cama', 'collar': 'Collar', 'juguete': 'Juguete',
+}
+PESOS_CAMPOS = (('codigo', 8), ('nombre', 4), ('marca', 2), ('descripcion', 1))
+PALABRAS_VACIAS = {'de', 'del', 'la', 'el', 'los', 'las', 'y', 'o', 'para', 'con', 'en', 'un', 'una', 'por'}
+LARGO_MAXIMO_TERMINO = 50
+TAMANO_LOTE = 500
+
+
+def tokenizar(texto):
+    texto = unicodedata.normalize('NFKD', str(texto or ''))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+    return [
+        termino[:LARGO_MAXIMO_TERMINO]
+        for termino in re.split(r'[^0-9a-z]+', texto)
+        if termino and termino not in PALABRAS_VACIAS
+    ]
+
+
+def terminos_producto(producto):
+    pesos = {}
+    for campo, peso in PESOS_CAMPOS:
+        for termino in set(tokenizar(getattr(producto, campo, ''))):
+            pesos[termino] = pesos.get(termino, 0) + peso
+    return pesos
+
+
+def poblar_indice(apps, schema_editor):
+    producto_indexado = apps.get_model('gestorProductos', 'ProductoIndexado')
+    termino_indice = apps.get_model('gestorProductos', 'TerminoIndice')
+    for tipo, nombre_modelo in TIPOS_PRODUCTO.items():
+        productos = apps.get_model('gestorProductos', nombre_modelo).objects.order_by('pk').iterator(chunk_size=TAMANO_LOTE)
+        while lote := list(islice(productos, TAMANO_LOTE)):
+            producto_indexado.objects.bulk_create([
+                producto_indexado(
+                    tipo=tipo, producto_id=p.pk, codigo=p.codigo or '', nombre=p.nombre or '',
+                    marca=getattr(p, 'marca', '') or '', precio=p.precio or 0, stock=p.stock or 0,
+                )
+                for p in lote
+            ])
+            # Algunos backends (MariaDB < 10.5) no devuelven los ids del bulk_create
+            ids = dict(
+                producto_indexado.objects.filter(tipo=tipo, producto_id__in=[p.pk for p in lote])
+                .values_list('producto_id', 'id')
+            )
+            termino_indice.objects.bulk_create([
+                termino_indice(termino=termino, producto_id=ids[p.pk], peso=peso)
+                for p in lote
+                for termino, peso in terminos_producto(p).items()
+            ], batch_size=TAMANO_LOTE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestorProductos', '0003_imagenproducto'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductoIndexado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(db_index=True, max_length=10)),
+                ('producto_id', models.PositiveIntegerField()),
+                ('codigo', models.CharField(max_length=100)),
+                ('nombre', models.CharField(db_index=True, max_length=100)),
+                ('marca', models.CharField(blank=True, default='', max_length=100)),
+                ('precio', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('stock', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Producto Indexado',
+                'verbose_name_plural': 'Productos Indexados',
+                'unique_together': {('tipo', 'producto_id')},
+            },
+        ),
+        migrations.CreateModel(
+            name='TerminoIndice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('termino', models.CharField(max_length=50)),
+                ('peso', models.PositiveSmallIntegerField(default=1)),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terminos', to='gestorProductos.productoindexado')),
+            ],
+            options={
+                'verbose_name': 'Término del Índice',
+                'verbose_name_plural': 'Términos del Índice',
+                'unique_together': {('termino', 'producto')},
+            },
+        ),
+        migrations.RunPython(poblar_indice, migrations.RunPython.noop),
+    ]
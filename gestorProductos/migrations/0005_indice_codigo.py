@@ -0,0 +1,78 @@
+# Generated by Django 5.0.1 on 2026-10-19 14:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestorProductos', '0004_indice_busqueda'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='agaproductos',
+            name='codigo',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='agcproductos',
+            name='codigo',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='aproductos',
+            name='codigo',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='cama',
+            name='codigo',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='collar',
+            name='codigo',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='juguete',
+            name='codigo',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='paproductos',
+            name='codigo',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='pcproductos',
+            name='codigo',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='productos',
+            name='codigo',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='psproductos',
+            name='codigo',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='shampoo',
+            name='codigo',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='snackgproductos',
+            name='codigo',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='snackpproductos',
+            name='codigo',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+    ]
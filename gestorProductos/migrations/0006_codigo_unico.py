@@ -0,0 +1,229 @@
+# Generated by Django 5.0.1 on 2026-10-19 14:38
+
+import re
+import unicodedata
+from collections import defaultdict
+from itertools import islice
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Lower, Trim
+
+
+# Copia fija de gestorProductos/deduplicacion.py y de la reconstrucción del
+# índice de búsqueda (busqueda.py) al hacer único el código: la migración no
+# debe cambiar si después cambia ese código o los modelos.
+TIPOS_PRODUCTO = {
+    'pa': 'PAProductos', 'pc': 'PCProductos', 'ps': 'PSProductos', 'a': 'AProductos',
+    'p': 'Productos', 'ap': 'Antiparasitario', 'aga': 'AGAProductos', 'agc': 'AGCProductos',
+    'snackp': 'SnackPProductos', 'snackg': 'SnackGProductos', 'med': 'Medicamento',
+    'shampoo': 'Shampoo', 'cama': 'Cama', 'collar': 'Collar', 'juguete': 'Juguete',
+}
+PESOS_CAMPOS = (('codigo', 8), ('nombre', 4), ('marca', 2), ('descripcion', 1))
+PALABRAS_VACIAS = {'de', 'del', 'la', 'el', 'los', 'las', 'y', 'o', 'para', 'con', 'en', 'un', 'una', 'por'}
+LARGO_MAXIMO_TERMINO = 50
+TAMANO_LOTE = 500
+
+
+# ==================== DEDUPLICACIÓN ====================
+
+def _normalizar_valor(valor):
+    return str(valor if valor is not None else '').strip().lower()
+
+
+def _clave_producto(producto):
+    return (_normalizar_valor(producto.nombre), _normalizar_valor(getattr(producto, 'marca', '')), producto.precio)
+
+
+def _codigo_libre(base, ocupados, largo_maximo):
+    candidato = base[:largo_maximo]
+    n = 1
+    while _normalizar_valor(candidato) in ocupados:
+        n += 1
+        sufijo = f'-{n}'
+        candidato = base[:largo_maximo - len(sufijo)] + sufijo
+    return candidato
+
+
+def deduplicar_codigos(apps):
+    """Fusiona las copias de un mismo producto y renombra los demás códigos repetidos. Retorna True si cambió algo."""
+    content_type = apps.get_model('contenttypes', 'ContentType')
+    imagen_producto = apps.get_model('gestorProductos', 'ImagenProducto')
+    carrito = apps.get_model('gestorProductos', 'Carrito')
+
+    hubo_cambios = False
+    for tipo, nombre_modelo in TIPOS_PRODUCTO.items():
+        modelo = apps.get_model('gestorProductos', nombre_modelo)
+        # Sin distinguir mayúsculas ni espacios en los extremos, como el índice único de MySQL
+        con_clave = modelo.objects.annotate(clave=Lower(Trim('codigo')))
+        repetidos = list(
+            con_clave.values('clave').annotate(total=Count('id')).filter(total__gt=1)
+            .order_by('clave').values_list('clave', flat=True)
+        )
+        if not repetidos:
+            continue
+        hubo_cambios = True
+        ct = content_type.objects.filter(app_label='gestorProductos', model=nombre_modelo.lower()).first()
+        ocupados = {_normalizar_valor(codigo) for codigo in modelo.objects.values_list('codigo', flat=True)}
+        largo_maximo = modelo._meta.get_field('codigo').max_length
+
+        por_codigo = defaultdict(list)
+        for producto in con_clave.filter(clave__in=repetidos).order_by('id'):
+            por_codigo[_normalizar_valor(producto.codigo)].append(producto)
+
+        for filas in por_codigo.values():
+            grupos = defaultdict(list)
+            for producto in filas:
+                grupos[_clave_producto(producto)].append(producto)
+
+            conservados = []
+            for conservado, *copias in grupos.values():
+                conservados.append(conservado)
+                if not copias:
+                    continue
+                ids_copias = [copia.id for copia in copias]
+                conservado.stock = (conservado.stock or 0) + sum(copia.stock or 0 for copia in copias)
+                conservado.save(update_fields=['stock'])
+                if ct is not None:
+                    imagen_producto.objects.filter(content_type=ct, object_id__in=ids_copias).update(object_id=conservado.id)
+                    carrito.objects.filter(producto_tipo=ct, producto_id__in=ids_copias).update(producto_id=conservado.id)
+                modelo.objects.filter(id__in=ids_copias).delete()
+
+            # El más antiguo mantiene el código; el resto recibe uno nuevo
+            for producto in sorted(conservados, key=lambda p: p.id)[1:]:
+                base = producto.codigo.strip() or f'{tipo.upper()}-{producto.id}'
+                producto.codigo = _codigo_libre(base, ocupados, largo_maximo)
+                ocupados.add(_normalizar_valor(producto.codigo))
+                producto.save(update_fields=['codigo'])
+    return hubo_cambios
+
+
+# ==================== ÍNDICE DE BÚSQUEDA ====================
+
+def tokenizar(texto):
+    texto = unicodedata.normalize('NFKD', str(texto or ''))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+    return [
+        termino[:LARGO_MAXIMO_TERMINO]
+        for termino in re.split(r'[^0-9a-z]+', texto)
+        if termino and termino not in PALABRAS_VACIAS
+    ]
+
+
+def terminos_producto(producto):
+    pesos = {}
+    for campo, peso in PESOS_CAMPOS:
+        for termino in set(tokenizar(getattr(producto, campo, ''))):
+            pesos[termino] = pesos.get(termino, 0) + peso
+    return pesos
+
+
+def reindexar(apps):
+    producto_indexado = apps.get_model('gestorProductos', 'ProductoIndexado')
+    termino_indice = apps.get_model('gestorProductos', 'TerminoIndice')
+    termino_indice.objects.all().delete()
+    producto_indexado.objects.all().delete()
+    for tipo, nombre_modelo in TIPOS_PRODUCTO.items():
+        productos = apps.get_model('gestorProductos', nombre_modelo).objects.order_by('pk').iterator(chunk_size=TAMANO_LOTE)
+        while lote := list(islice(productos, TAMANO_LOTE)):
+            producto_indexado.objects.bulk_create([
+                producto_indexado(
+                    tipo=tipo, producto_id=p.pk, codigo=p.codigo or '', nombre=p.nombre or '',
+                    marca=getattr(p, 'marca', '') or '', precio=p.precio or 0, stock=p.stock or 0,
+                )
+                for p in lote
+            ])
+            # Algunos backends (MariaDB < 10.5) no devuelven los ids del bulk_create
+            ids = dict(
+                producto_indexado.objects.filter(tipo=tipo, producto_id__in=[p.pk for p in lote])
+                .values_list('producto_id', 'id')
+            )
+            termino_indice.objects.bulk_create([
+                termino_indice(termino=termino, producto_id=ids[p.pk], peso=peso)
+                for p in lote
+                for termino, peso in terminos_producto(p).items()
+            ], batch_size=TAMANO_LOTE)
+
+
+def deduplicar(apps, schema_editor):
+    # Sin esto el índice único no se puede crear si hay códigos repetidos
+    if deduplicar_codigos(apps):
+        # Los modelos históricos no disparan las señales que mantienen el índice
+        reindexar(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('gestorProductos', '0005_indice_codigo'),
+    ]
+
+    operations = [
+        migrations.RunPython(deduplicar, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='agaproductos',
+            name='codigo',
+            field=models.CharField(max_length=100, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='agcproductos',
+            name='codigo',
+            field=models.CharField(max_length=100, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='aproductos',
+            name='codigo',
+            field=models.CharField(max_length=100, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='cama',
+            name='codigo',
+            field=models.CharField(max_length=100, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='collar',
+            name='codigo',
+            field=models.CharField(max_length=100, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='juguete',
+            name='codigo',
+            field=models.CharField(max_length=100, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='paproductos',
+            name='codigo',
+            field=models.CharField(max_length=100, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='pcproductos',
+            name='codigo',
+            field=models.CharField(max_length=100, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='productos',
+            name='codigo',
+            field=models.CharField(max_length=100, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='psproductos',
+            name='codigo',
+            field=models.CharField(max_length=100, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='shampoo',
+            name='codigo',
+            field=models.CharField(max_length=100, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='snackgproductos',
+            name='codigo',
+            field=models.CharField(max_length=100, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='snackpproductos',
+            name='codigo',
+            field=models.CharField(max_length=100, unique=True),
+        ),
+    ]
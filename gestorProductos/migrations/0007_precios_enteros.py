@@ -0,0 +1,36 @@
+# Generated by Django 5.0.1 on 2026-10-19 14:40
+
+from django.db import migrations, models
+from django.db.models.functions import Round
+
+
+def redondear_precios(apps, schema_editor):
+    # Los precios son pesos chilenos: se redondean antes de quitar los decimales
+    for modelo in ('Antiparasitario', 'Medicamento', 'ProductoIndexado'):
+        apps.get_model('gestorProductos', modelo).objects.update(precio=Round('precio'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestorProductos', '0006_codigo_unico'),
+    ]
+
+    operations = [
+        migrations.RunPython(redondear_precios, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='antiparasitario',
+            name='precio',
+            field=models.IntegerField(),
+        ),
+        migrations.AlterField(
+            model_name='medicamento',
+            name='precio',
+            field=models.IntegerField(),
+        ),
+        migrations.AlterField(
+            model_name='productoindexado',
+            name='precio',
+            field=models.IntegerField(default=0),
+        ),
+    ]
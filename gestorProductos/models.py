@@ -9,7 +9,7 @@ from django.contrib.contenttypes.fields import GenericForeignKey
 # -------------------------------
 
 class Productos(models.Model):
-    codigo = models.CharField(max_length=100)
+    codigo = models.CharField(max_length=100, unique=True)
     nombre = models.CharField(max_length=100)
     marca = models.CharField(max_length=100)
     precio = models.IntegerField()
@@ -21,7 +21,7 @@ class Productos(models.Model):
 
 
 class PCProductos(models.Model):
-    codigo = models.CharField(max_length=100)
+    codigo = models.CharField(max_length=100, unique=True)
     nombre = models.CharField(max_length=100)
     marca = models.CharField(max_length=100)
     precio = models.IntegerField()
@@ -33,7 +33,7 @@ class PCProductos(models.Model):
 
 
 class PAProductos(models.Model):
-    codigo = models.CharField(max_length=100)
+    codigo = models.CharField(max_length=100, unique=True)
     nombre = models.CharField(max_length=100)
     marca = models.CharField(max_length=100)
     precio = models.IntegerField()
@@ -45,7 +45,7 @@ class PAProductos(models.Model):
 
 
 class PSProductos(models.Model):
-    codigo = models.CharField(max_length=100)
+    codigo = models.CharField(max_length=100, unique=True)
     nombre = models.CharField(max_length=100)
     marca = models.CharField(max_length=100)
     precio = models.IntegerField()
@@ -57,7 +57,7 @@ class PSProductos(models.Model):
 
 
 class AProductos(models.Model):
-    codigo = models.CharField(max_length=100)
+    codigo = models.CharField(max_length=100, unique=True)
     nombre = models.CharField(max_length=100)
     marca = models.CharField(max_length=100)
     precio = models.IntegerField()
@@ -90,7 +90,7 @@ class Categoria(models.Model):
 # -------------------------------
 
 class AGAProductos(models.Model):
-    codigo = models.CharField(max_length=100)
+    codigo = models.CharField(max_length=100, unique=True)
     nombre = models.CharField(max_length=100)
     marca = models.CharField(max_length=100)
     precio = models.IntegerField()
@@ -102,7 +102,7 @@ class AGAProductos(models.Model):
 
 
 class AGCProductos(models.Model):
-    codigo = models.CharField(max_length=100)
+    codigo = models.CharField(max_length=100, unique=True)
     nombre = models.CharField(max_length=100)
     marca = models.CharField(max_length=100)
     precio = models.IntegerField()
@@ -118,7 +118,7 @@ class AGCProductos(models.Model):
 # -------------------------------
 
 class SnackGProductos(models.Model):
-    codigo = models.CharField(max_length=100)
+    codigo = models.CharField(max_length=100, unique=True)
     nombre = models.CharField(max_length=100)
     marca = models.CharField(max_length=100)
     precio = models.IntegerField()
@@ -130,7 +130,7 @@ class SnackGProductos(models.Model):
 
 
 class SnackPProductos(models.Model):
-    codigo = models.CharField(max_length=100)
+    codigo = models.CharField(max_length=100, unique=True)
     nombre = models.CharField(max_length=100)
     marca = models.CharField(max_length=100)
     precio = models.IntegerField()
@@ -149,7 +149,7 @@ class Antiparasitario(models.Model):
     codigo = models.CharField(max_length=50, unique=True)
     nombre = models.CharField(max_length=100)
     descripcion = models.TextField()
-    precio = models.DecimalField(max_digits=10, decimal_places=2)
+    precio = models.IntegerField()
     stock = models.PositiveIntegerField(default=0)
     tipo = models.CharField(
         max_length=50,
@@ -172,7 +172,7 @@ class Medicamento(models.Model):
     codigo = models.CharField(max_length=50, unique=True)
     nombre = models.CharField(max_length=100)
     descripcion = models.TextField()
-    precio = models.DecimalField(max_digits=10, decimal_places=2)
+    precio = models.IntegerField()
     stock = models.PositiveIntegerField(default=0)
     tipo = models.CharField(
         max_length=50,
@@ -193,7 +193,7 @@ class Medicamento(models.Model):
 # -------------------------------
 
 class Shampoo(models.Model):
-    codigo = models.CharField(max_length=100)
+    codigo = models.CharField(max_length=100, unique=True)
     nombre = models.CharField(max_length=100)
     marca = models.CharField(max_length=100)
     precio = models.IntegerField()
@@ -209,7 +209,7 @@ class Shampoo(models.Model):
 # -------------------------------
 
 class Cama(models.Model):
-    codigo = models.CharField(max_length=100)
+    codigo = models.CharField(max_length=100, unique=True)
     nombre = models.CharField(max_length=100)
     marca = models.CharField(max_length=100)
     precio = models.IntegerField()
@@ -227,7 +227,7 @@ class Cama(models.Model):
 # -------------------------------
 
 class Collar(models.Model):
-    codigo = models.CharField(max_length=100)
+    codigo = models.CharField(max_length=100, unique=True)
     nombre = models.CharField(max_length=100)
     marca = models.CharField(max_length=100)
     precio = models.IntegerField()
@@ -245,7 +245,7 @@ class Collar(models.Model):
 # -------------------------------
 
 class Juguete(models.Model):
-    codigo = models.CharField(max_length=100)
+    codigo = models.CharField(max_length=100, unique=True)
     nombre = models.CharField(max_length=100)
     marca = models.CharField(max_length=100)
     precio = models.IntegerField()
@@ -295,4 +295,48 @@ class ImagenProducto(models.Model):
         verbose_name_plural = "Imágenes de Productos"
     
     def __str__(self):
-        return f"Imagen de {self.producto} (Orden: {self.orden})"
\ No newline at end of file
+        return f"Imagen de {self.producto} (Orden: {self.orden})"
+
+# -------------------------------
+# ÍNDICE DE BÚSQUEDA DE PRODUCTOS
+# -------------------------------
+
+class ProductoIndexado(models.Model):
+    """
+    Copia desnormalizada de cada producto del catálogo para la búsqueda global.
+    Se mantiene mediante señales al guardar/eliminar productos (ver busqueda.py),
+    así la búsqueda no necesita consultar las 15 tablas de productos.
+    """
+    tipo = models.CharField(max_length=10, db_index=True)
+    producto_id = models.PositiveIntegerField()
+    codigo = models.CharField(max_length=100)
+    nombre = models.CharField(max_length=100, db_index=True)
+    marca = models.CharField(max_length=100, blank=True, default='')
+    precio = models.IntegerField(default=0)
+    stock = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('tipo', 'producto_id')
+        verbose_name = "Producto Indexado"
+        verbose_name_plural = "Productos Indexados"
+
+    def __str__(self):
+        return f"{self.tipo}:{self.producto_id} {self.nombre}"
+
+
+class TerminoIndice(models.Model):
+    """
+    Índice invertido: un registro por término normalizado y producto.
+    El peso indica dónde aparece el término (código > nombre > marca > descripción).
+    """
+    termino = models.CharField(max_length=50)
+    producto = models.ForeignKey(ProductoIndexado, on_delete=models.CASCADE, related_name='terminos')
+    peso = models.PositiveSmallIntegerField(default=1)
+
+    class Meta:
+        unique_together = ('termino', 'producto')
+        verbose_name = "Término del Índice"
+        verbose_name_plural = "Términos del Índice"
+
+    def __str__(self):
+        return f"{self.termino} -> {self.producto_id}"
@@ -0,0 +1,297 @@
+"""
+Instrumentación de rendimiento por vista.
+
+RendimientoMiddleware mide en cada petición:
+- cantidad de consultas SQL y tiempo total en la base de datos
+- tiempo de renderizado de templates (backend DjangoTemplatesMedidas)
+- tiempo total y tamaño de la respuesta
+
+Los valores se agregan como cabecera Server-Timing (visible en la pestaña
+Network del navegador) y se guardan en un archivo SQLite propio, separado de
+la base de datos de la aplicación, que conserva las últimas
+PERF_STATS_MAX_FILAS peticiones. El comando 'manage.py perf_report' muestra
+las vistas más costosas.
+
+Presupuestos de consultas por vista (nombre de URL), por ejemplo:
+
+    PERF_PRESUPUESTO_CONSULTAS = {'vet_paciente_detalle': 10, '*': 40}
+    PERF_PRESUPUESTO_EXCEDIDO = 'log'   # o 'raise' (útil en los tests)
+"""
+import atexit
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.backends.django import DjangoTemplates
+
+
+logger = logging.getLogger(__name__)
+
+# Medición de la petición en curso (None fuera del middleware)
+_medicion_actual = ContextVar('medicion_rendimiento', default=None)
+
+
+class PresupuestoConsultasExcedido(AssertionError):
+    """Una vista ejecutó más consultas SQL que las permitidas en PERF_PRESUPUESTO_CONSULTAS."""
+
+
+class Medicion:
+    """Acumula los tiempos de una petición."""
+
+    def __init__(self):
+        self.consultas = 0
+        self.tiempo_db = 0.0
+        self.tiempo_plantillas = 0.0
+        self.inicio = time.perf_counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        # Se usa como connection.execute_wrapper: cuenta y mide cada consulta
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.tiempo_db += time.perf_counter() - inicio
+            self.consultas += 1
+
+
+# ==================== TEMPLATES ====================
+
+class PlantillaMedida:
+    """Envuelve un template del backend para medir su tiempo de renderizado."""
+
+    def __init__(self, plantilla):
+        self.plantilla = plantilla
+
+    def __getattr__(self, nombre):
+        return getattr(self.plantilla, nombre)
+
+    def render(self, context=None, request=None):
+        medicion = _medicion_actual.get()
+        if medicion is None:
+            return self.plantilla.render(context, request)
+        inicio = time.perf_counter()
+        try:
+            return self.plantilla.render(context, request)
+        finally:
+            medicion.tiempo_plantillas += time.perf_counter() - inicio
+
+
+class DjangoTemplatesMedidas(DjangoTemplates):
+    """Backend DjangoTemplates que informa el tiempo de renderizado a RendimientoMiddleware."""
+
+    def from_string(self, template_code):
+        return PlantillaMedida(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return PlantillaMedida(super().get_template(template_name))
+
+
+# ==================== ALMACÉN DE ESTADÍSTICAS ====================
+
+class AlmacenEstadisticas:
+    """
+    Guarda las mediciones en un archivo SQLite.
+
+    Las filas se acumulan en memoria y se escriben en lotes para no agregar
+    una escritura a disco en cada petición. Solo se conservan las últimas
+    'max_filas' mediciones.
+    """
+
+    def __init__(self, archivo, max_filas=50000, tamano_lote=50):
+        self.archivo = str(archivo)
+        self.max_filas = max_filas
+        self.tamano_lote = tamano_lote
+        self._pendientes = []
+        self._lock = threading.Lock()
+        self._tabla_creada = False
+
+    @contextmanager
+    def conectar(self):
+        """Conexión al archivo de estadísticas; confirma los cambios y la cierra al salir."""
+        conexion = sqlite3.connect(self.archivo, timeout=5)
+        try:
+            if not self._tabla_creada:
+                conexion.execute(
+                    'CREATE TABLE IF NOT EXISTS mediciones ('
+                    ' id INTEGER PRIMARY KEY AUTOINCREMENT,'
+                    ' fecha REAL NOT NULL,'
+                    ' vista TEXT NOT NULL,'
+                    ' metodo TEXT NOT NULL,'
+                    ' estado INTEGER NOT NULL,'
+                    ' consultas INTEGER NOT NULL,'
+                    ' ms_db REAL NOT NULL,'
+                    ' ms_plantillas REAL NOT NULL,'
+                    ' ms_total REAL NOT NULL,'
+                    ' bytes INTEGER NOT NULL)'
+                )
+                conexion.execute('CREATE INDEX IF NOT EXISTS mediciones_vista ON mediciones (vista)')
+                self._tabla_creada = True
+            yield conexion
+            conexion.commit()
+        finally:
+            conexion.close()
+
+    def registrar(self, fila):
+        with self._lock:
+            self._pendientes.append(fila)
+            if len(self._pendientes) < self.tamano_lote:
+                return
+            pendientes, self._pendientes = self._pendientes, []
+        self._escribir(pendientes)
+
+    def vaciar(self):
+        """Escribe las mediciones pendientes en el archivo."""
+        with self._lock:
+            pendientes, self._pendientes = self._pendientes, []
+        if pendientes:
+            self._escribir(pendientes)
+
+    def _escribir(self, filas):
+        try:
+            with self.conectar() as conexion:
+                conexion.executemany(
+                    'INSERT INTO mediciones (fecha, vista, metodo, estado, consultas,'
+                    ' ms_db, ms_plantillas, ms_total, bytes) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    filas
+                )
+                # Mantener solo las últimas max_filas mediciones
+                conexion.execute(
+                    'DELETE FROM mediciones WHERE id <= (SELECT MAX(id) FROM mediciones) - ?',
+                    (self.max_filas,)
+                )
+        except sqlite3.Error:
+            logger.exception('No se pudieron guardar las mediciones de rendimiento en %s', self.archivo)
+
+    def filas(self):
+        """Retorna todas las mediciones guardadas como diccionarios."""
+        self.vaciar()
+        with self.conectar() as conexion:
+            conexion.row_factory = sqlite3.Row
+            return [dict(fila) for fila in conexion.execute('SELECT * FROM mediciones ORDER BY id')]
+
+    def limpiar(self):
+        with self._lock:
+            self._pendientes = []
+        with self.conectar() as conexion:
+            conexion.execute('DELETE FROM mediciones')
+
+
+_almacen = None
+_almacen_lock = threading.Lock()
+
+
+def obtener_almacen():
+    """Almacén configurado en settings (PERF_STATS_ARCHIVO, PERF_STATS_MAX_FILAS)."""
+    global _almacen
+    with _almacen_lock:
+        archivo = str(getattr(settings, 'PERF_STATS_ARCHIVO', settings.BASE_DIR / 'perf_stats.sqlite3'))
+        if _almacen is None or _almacen.archivo != archivo:
+            _almacen = AlmacenEstadisticas(
+                archivo,
+                max_filas=getattr(settings, 'PERF_STATS_MAX_FILAS', 50000),
+            )
+            # Escribir lo pendiente al terminar el proceso
+            atexit.register(_almacen.vaciar)
+        return _almacen
+
+
+# ==================== MIDDLEWARE ====================
+
+def nombre_vista(request):
+    """Nombre de URL de la vista resuelta ('vet_paciente_detalle'), o su ruta si no tiene nombre."""
+    coincidencia = getattr(request, 'resolver_match', None)
+    if coincidencia is None:
+        return 'sin_ruta'
+    return coincidencia.view_name or coincidencia._func_path
+
+
+def presupuesto_consultas(vista):
+    presupuestos = getattr(settings, 'PERF_PRESUPUESTO_CONSULTAS', {})
+    return presupuestos.get(vista, presupuestos.get('*'))
+
+
+class RendimientoMiddleware:
+    """
+    Mide consultas SQL, tiempo de base de datos, de templates y total por vista.
+    Debe ir primero en MIDDLEWARE para medir la petición completa.
+    Se activa con PERF_INSTRUMENTACION (por defecto, igual a DEBUG).
+    Funciona con WSGI y con ASGI (vistas síncronas y async).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PERF_INSTRUMENTACION', settings.DEBUG):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        medicion = Medicion()
+        token = _medicion_actual.set(medicion)
+        try:
+            with ExitStack() as pila:
+                self.instrumentar_conexiones(pila, medicion)
+                response = self.get_response(request)
+        finally:
+            _medicion_actual.reset(token)
+        return self.registrar(request, response, medicion)
+
+    async def __acall__(self, request):
+        medicion = Medicion()
+        token = _medicion_actual.set(medicion)
+        try:
+            with ExitStack() as pila:
+                # Las conexiones son por hilo: se instrumentan las del hilo en que el ORM async
+                # y las vistas síncronas ejecutan las consultas de esta petición
+                await sync_to_async(self.instrumentar_conexiones)(pila, medicion)
+                response = await self.get_response(request)
+        finally:
+            _medicion_actual.reset(token)
+        return await sync_to_async(self.registrar)(request, response, medicion)
+
+    @staticmethod
+    def instrumentar_conexiones(pila, medicion):
+        for conexion in connections.all():
+            pila.enter_context(conexion.execute_wrapper(medicion))
+
+    def registrar(self, request, response, medicion):
+        """Agrega Server-Timing a la respuesta, guarda la medición y revisa el presupuesto."""
+        ms_total = (time.perf_counter() - medicion.inicio) * 1000
+        ms_db = medicion.tiempo_db * 1000
+        ms_plantillas = medicion.tiempo_plantillas * 1000
+        tamano = 0 if response.streaming else len(response.content)
+        vista = nombre_vista(request)
+
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={ms_db:.1f};desc="SQL ({medicion.consultas})"',
+            f'tpl;dur={ms_plantillas:.1f};desc="Templates"',
+            f'total;dur={ms_total:.1f}',
+        ])
+
+        obtener_almacen().registrar((
+            time.time(), vista, request.method, response.status_code, medicion.consultas,
+            round(ms_db, 2), round(ms_plantillas, 2), round(ms_total, 2), tamano,
+        ))
+
+        self.verificar_presupuesto(vista, medicion.consultas)
+        return response
+
+    def verificar_presupuesto(self, vista, consultas):
+        limite = presupuesto_consultas(vista)
+        if limite is None or consultas <= limite:
+            return
+        mensaje = f'La vista {vista} ejecutó {consultas} consultas SQL (presupuesto: {limite})'
+        if getattr(settings, 'PERF_PRESUPUESTO_EXCEDIDO', 'log') == 'raise':
+            raise PresupuestoConsultasExcedido(mensaje)
+        logger.warning(mensaje)
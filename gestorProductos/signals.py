@@ -0,0 +1,58 @@
+"""
+Señales de gestorProductos.
+
+Mantienen el índice de búsqueda (ver busqueda.py) sincronizado con las
+15 tablas de productos cada vez que un producto se guarda o se elimina, e
+invalidan los fragmentos cacheados del catálogo (ver cache_catalogo.py)
+cuando cambian los productos o sus imágenes.
+"""
+from django.db.models.signals import post_delete, post_save
+
+from .busqueda import desindexar_producto, indexar_producto
+from .cache_catalogo import invalidar_categoria
+from .catalogo import MODELOS_PRODUCTO, tipo_de_modelo
+from .models import ImagenProducto
+
+
+def actualizar_indice_producto(sender, instance, raw=False, **kwargs):
+    # Las cargas con loaddata (raw) se indexan luego con reindexar_productos
+    if raw:
+        return
+    indexar_producto(instance)
+
+
+def quitar_producto_del_indice(sender, instance, **kwargs):
+    desindexar_producto(instance)
+
+
+def invalidar_cache_producto(sender, instance, **kwargs):
+    invalidar_categoria(tipo_de_modelo(sender))
+
+
+def invalidar_cache_imagen(sender, instance, **kwargs):
+    tipo = tipo_de_modelo(instance.content_type.model_class())
+    if tipo is not None:
+        invalidar_categoria(tipo)
+
+
+def conectar_senales():
+    post_save.connect(invalidar_cache_imagen, sender=ImagenProducto, dispatch_uid='cache_catalogo_imagen_guardar')
+    post_delete.connect(invalidar_cache_imagen, sender=ImagenProducto, dispatch_uid='cache_catalogo_imagen_eliminar')
+
+    for tipo, modelo in MODELOS_PRODUCTO.items():
+        post_save.connect(
+            invalidar_cache_producto, sender=modelo,
+            dispatch_uid=f'cache_catalogo_guardar_{tipo}',
+        )
+        post_delete.connect(
+            invalidar_cache_producto, sender=modelo,
+            dispatch_uid=f'cache_catalogo_eliminar_{tipo}',
+        )
+        post_save.connect(
+            actualizar_indice_producto, sender=modelo,
+            dispatch_uid=f'indice_busqueda_guardar_{tipo}',
+        )
+        post_delete.connect(
+            quitar_producto_del_indice, sender=modelo,
+            dispatch_uid=f'indice_busqueda_eliminar_{tipo}',
+        )
@@ -0,0 +1,58 @@
+"""
+{% bundle_css 'nombre' %} y {% bundle_js 'nombre' %}: etiquetas <link>/<script>
+de un bundle de settings.BUNDLES.
+
+Con BUNDLES_COMPILADOS (por defecto en producción) los archivos locales se
+reemplazan por el archivo generado con construir_bundles; si no se generó, se
+cargan por separado. Los bundles con 'diferido': True (o diferido=True en la
+etiqueta) usan <script defer>: se ejecutan después de leer el HTML, antes de
+$(document).ready.
+"""
+import logging
+
+from django import template
+from django.conf import settings
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+
+from gestorProductos.bundles import archivos_locales, es_externo, obtener_bundle, ruta_bundle
+
+
+logger = logging.getLogger(__name__)
+register = template.Library()
+
+
+def urls_bundle(nombre, tipo):
+    archivos = obtener_bundle(nombre).get(tipo, [])
+    locales = archivos_locales(nombre, tipo)
+    compilado = None
+    if locales and getattr(settings, 'BUNDLES_COMPILADOS', not settings.DEBUG):
+        try:
+            compilado = static(ruta_bundle(nombre, tipo))
+        except ValueError:
+            # Falta en el manifiesto de collectstatic: no se ejecutó construir_bundles
+            logger.warning("Bundle '%s' (%s) sin compilar; se cargan sus archivos por separado", nombre, tipo)
+
+    urls = []
+    for ruta in archivos:
+        if es_externo(ruta):
+            urls.append(ruta)
+        elif compilado is None:
+            urls.append(static(ruta))
+        elif compilado not in urls:
+            # El archivo compilado ocupa el lugar del primer archivo local
+            urls.append(compilado)
+    return urls
+
+
+@register.simple_tag
+def bundle_css(nombre):
+    return format_html_join('\n', '<link href="{}" rel="stylesheet">', ((url,) for url in urls_bundle(nombre, 'css')))
+
+
+@register.simple_tag
+def bundle_js(nombre, diferido=None):
+    if diferido is None:
+        diferido = obtener_bundle(nombre).get('diferido', False)
+    etiqueta = '<script src="{}" defer></script>' if diferido else '<script src="{}"></script>'
+    return format_html_join('\n', etiqueta, ((url,) for url in urls_bundle(nombre, 'js')))
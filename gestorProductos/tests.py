@@ -1,3 +1,545 @@
-from django.test import TestCase
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.sessions.backends.cache import SessionStore
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db.models import F
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import resolve, reverse
+
+from gestorUser.models import CitaMedica, Mascota
+from inventarioVeterinariaPamela import replicas
+from inventarioVeterinariaPamela.mariadb.pool import PoolConexiones
+from .bundles import reescribir_urls_css
+from .busqueda import buscar_productos, facetas, reindexar_todo
+from .cache_catalogo import ALIAS_VERSIONES, incrementar_version
+from .checks import revisar_cache_catalogo
+from .datos_sinteticos import GeneradorDatos
+from .deduplicacion import codigo_libre, deduplicar_codigos
+from .models import Carrito, Collar, ImagenProducto, Medicamento, PAProductos, PCProductos, ProductoIndexado
+from .rendimiento import PresupuestoConsultasExcedido
+from .templatetags.bundles import bundle_js
+
+
+# Estadísticas de las pruebas fuera del repositorio (el almacén escribe por lotes y al terminar el proceso)
+ARCHIVO_ESTADISTICAS_PRUEBAS = os.path.join(tempfile.gettempdir(), f'perf_stats_pruebas_{os.getpid()}.sqlite3')
+
+
+@override_settings(
+    PERF_INSTRUMENTACION=True,
+    PERF_STATS_ARCHIVO=ARCHIVO_ESTADISTICAS_PRUEBAS,
+    PERF_PRESUPUESTO_EXCEDIDO='raise',
+)
+class PresupuestoConsultasTests(TestCase):
+    """RendimientoMiddleware informa los tiempos y hace cumplir los presupuestos de consultas."""
+
+    def test_cabecera_server_timing(self):
+        respuesta = self.client.get(reverse('buscar_productos'), {'q': 'royal'})
+        self.assertIn('db;dur=', respuesta['Server-Timing'])
+
+    @override_settings(PERF_PRESUPUESTO_CONSULTAS={'buscar_productos': 0})
+    def test_presupuesto_excedido_lanza_error(self):
+        with self.assertRaises(PresupuestoConsultasExcedido):
+            self.client.get(reverse('buscar_productos'), {'q': 'royal'})
+
+
+class BusquedaProductosTests(TestCase):
+    """El índice invertido busca por prefijo en todas las categorías, ordena por relevancia y cuenta facetas."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.adulto = PAProductos.objects.create(
+            codigo='PA-1', nombre='Royal Canin Adulto', marca='Royal Canin', precio=25000, stock=5, descripcion='-'
+        )
+        cls.cachorro = PCProductos.objects.create(
+            codigo='ROYAL-PC', nombre='Cachorro Premium', marca='Purina', precio=26000, stock=3, descripcion='-'
+        )
+        cls.collar = Collar.objects.create(
+            codigo='COL-1', nombre='Collar Royal', marca='PetSafe', precio=12000, stock=8,
+            descripcion='-', tamaño='Mediano', material='Nylon'
+        )
+        cls.vitamina = Medicamento.objects.create(
+            codigo='MED-1', nombre='Vitamina Royalty', descripcion='-', precio=9000, stock=2, tipo='vitamina'
+        )
+
+    def buscar(self, **params):
+        respuesta = self.client.get(reverse('buscar_productos'), params)
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta.json()
+
+    def codigos(self, consulta, tipo=None):
+        return [entrada.codigo for entrada in buscar_productos(consulta, tipo)]
+
+    def test_prefijo_y_relevancia(self):
+        # Código (8) > nombre + marca (4 + 2) > nombre (4); 'royal' también es prefijo de 'royalty'
+        self.assertEqual(self.codigos('royal'), ['ROYAL-PC', 'PA-1', 'COL-1', 'MED-1'])
+        self.assertEqual(self.codigos('roy'), self.codigos('royal'))
+        self.assertEqual(self.codigos('royalty'), ['MED-1'])
+        self.assertEqual(self.codigos('Vitamína'), ['MED-1'])
+
+    def test_exige_todos_los_terminos(self):
+        self.assertEqual(self.codigos('royal canin'), ['PA-1'])
+        self.assertEqual(self.codigos('roy pur'), ['ROYAL-PC'])
+        self.assertEqual(self.codigos('canin collar'), [])
+
+    def test_facetas_con_y_sin_tipo(self):
+        self.assertEqual(facetas(buscar_productos('royal')), {'pa': 1, 'pc': 1, 'collar': 1, 'med': 1})
+        self.assertEqual(facetas(buscar_productos('royal', 'pa')), {'pa': 1})
+
+        datos = self.buscar(q='royal', tipo='pa')
+        self.assertEqual((datos['total'], [r['codigo'] for r in datos['resultados']]), (1, ['PA-1']))
+        # Las facetas de la respuesta cubren todas las categorías para poder cambiar de filtro
+        self.assertEqual({f['tipo']: f['total'] for f in datos['facetas']}, {'pa': 1, 'pc': 1, 'collar': 1, 'med': 1})
+
+    def test_tipo_invalido(self):
+        respuesta = self.client.get(reverse('buscar_productos'), {'q': 'royal', 'tipo': 'desconocido'})
+        self.assertEqual(respuesta.status_code, 400)
+
+    def test_protocolo_datatables(self):
+        datos = self.buscar(**{'draw': '3', 'search[value]': 'royal canin', 'start': '0', 'length': '10'})
+        self.assertEqual((datos['draw'], datos['recordsTotal'], datos['recordsFiltered']), (3, 4, 1))
+        self.assertEqual([fila['codigo'] for fila in datos['data']], ['PA-1'])
+
+        ordenados = self.buscar(**{
+            'draw': '1', 'columns[2][data]': 'precio', 'order[0][column]': '2', 'order[0][dir]': 'desc',
+        })
+        self.assertEqual([fila['precio'] for fila in ordenados['data']], [26000, 25000, 12000, 9000])
+        self.assertEqual(ordenados['recordsFiltered'], 4)
+
+        # start negativo vale 0; length fuera de rango se limita a [1, MAXIMO_RESULTADOS_POR_PAGINA]
+        self.assertEqual(len(self.buscar(draw='1', start='-5', length='0')['data']), 1)
+        self.assertEqual(len(self.buscar(draw='1', start='-5', length='5000')['data']), 4)
+        self.assertEqual(len(self.buscar(draw='1', start='3', length='10')['data']), 1)
+
+    def test_indice_se_actualiza_al_guardar_y_eliminar(self):
+        self.collar.nombre = 'Collar Reflectante'
+        self.collar.save()
+        self.assertEqual(self.codigos('reflectante'), ['COL-1'])
+        self.assertNotIn('COL-1', self.codigos('royal'))
+
+        self.vitamina.delete()
+        self.assertEqual(self.codigos('vitamina'), [])
+        self.assertFalse(ProductoIndexado.objects.filter(tipo='med').exists())
+
+
+class CacheCatalogoTests(TestCase):
+    """La grilla del catálogo se sirve desde caché y se invalida al guardar un producto."""
+
+    def setUp(self):
+        cache.clear()
+        caches[ALIAS_VERSIONES].clear()
+        self.producto = PAProductos.objects.create(
+            codigo='PA-1', nombre='Royal Adulto', marca='Royal', precio=1000, stock=5, descripcion='-'
+        )
+
+    def test_segunda_visita_sin_consultar_productos(self):
+        self.client.get(reverse('perro_adulto'))
+        with self.assertNumQueries(0):
+            respuesta = self.client.get(reverse('perro_adulto'))
+        self.assertContains(respuesta, 'Royal Adulto')
+
+    def test_guardar_producto_invalida_la_grilla(self):
+        self.client.get(reverse('perro_adulto'))
+        self.producto.nombre = 'Royal Adulto Light'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.producto.save()
+
+        self.assertContains(self.client.get(reverse('perro_adulto')), 'Royal Adulto Light')
+
+    def test_api_responde_304_hasta_que_cambia_la_categoria(self):
+        respuesta = self.client.get(reverse('api_perro_adulto'))
+        self.assertIn('public', respuesta['Cache-Control'])
+
+        repetida = self.client.get(reverse('api_perro_adulto'), HTTP_IF_NONE_MATCH=respuesta['ETag'])
+        self.assertEqual(repetida.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.producto.save()
+        cambiada = self.client.get(reverse('api_perro_adulto'), HTTP_IF_NONE_MATCH=respuesta['ETag'])
+        self.assertEqual(cambiada.status_code, 200)
+
+    def test_pagina_304_y_carrito_sin_cache(self):
+        respuesta = self.client.get(reverse('perro_adulto'))
+        self.assertIn('private', respuesta['Cache-Control'])
+        repetida = self.client.get(reverse('perro_adulto'), HTTP_IF_NONE_MATCH=respuesta['ETag'])
+        self.assertEqual(repetida.status_code, 304)
+
+        self.assertIn('no-store', self.client.get(reverse('ver_carrito'))['Cache-Control'])
+
+    def test_check_deploy_avisa_si_las_versiones_no_son_compartidas(self):
+        self.assertEqual([aviso.id for aviso in revisar_cache_catalogo(None)], ['gestorProductos.W001'])
+        compartida = {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://127.0.0.1:6379/1'}
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+                                       ALIAS_VERSIONES: compartida}):
+            self.assertEqual(revisar_cache_catalogo(None), [])
+
+
+class CarritoApiTests(TestCase):
+    """La API del carrito responde la línea modificada y los totales; los formularios siguen funcionando."""
+
+    def setUp(self):
+        cache.clear()
+        self.producto = PAProductos.objects.create(
+            codigo='PA-1', nombre='Royal Adulto', marca='Royal', precio=1000, stock=5, descripcion='-'
+        )
+
+    def agregar(self, cantidad):
+        return self.client.post(reverse('api_carrito_agregar', args=['pa', self.producto.id]), {'cantidad': cantidad})
+
+    def test_agregar_y_cambiar_cantidad(self):
+        datos = self.agregar(2).json()
+        self.assertEqual(datos['clave'], f'pa_{self.producto.id}')
+        self.assertEqual(datos['linea']['subtotal'], 2000)
+
+        datos = self.client.post(reverse('api_carrito_cantidad', args=[datos['clave']]), {'accion': 'incrementar'}).json()
+        self.assertEqual((datos['linea']['cantidad'], datos['total'], datos['cantidad_productos']), (3, 3000, 3))
+
+        datos = self.client.post(reverse('api_carrito_cantidad', args=[datos['clave']]), {'cantidad': 1}).json()
+        self.assertEqual(datos['total'], 1000)
+
+    def test_eliminar_y_resumen(self):
+        self.agregar(1)
+        respuesta = self.client.post(reverse('api_carrito_eliminar', args=['pa', self.producto.id]))
+        self.assertIsNone(respuesta.json()['linea'])
+        self.assertEqual(self.client.get(reverse('api_carrito')).json()['items'], [])
+
+        respuesta = self.client.post(reverse('api_carrito_eliminar', args=['pa', self.producto.id]))
+        self.assertEqual(respuesta.status_code, 404)
+
+    def test_formulario_sin_javascript(self):
+        respuesta = self.client.post(reverse('agregar_carrito', args=['pa', self.producto.id]), {'cantidad': 2})
+        self.assertEqual(respuesta.status_code, 302)
+        self.assertEqual(self.client.get(reverse('api_carrito')).json()['cantidad_productos'], 2)
+
+    def test_sesion_guarda_solo_cantidades(self):
+        self.agregar(2)
+        self.assertEqual(self.client.session['carrito'], {f'pa_{self.producto.id}': 2})
+
+    def test_precio_actualizado_al_editar_producto(self):
+        self.agregar(2)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.producto.precio = 1500
+            self.producto.save()
+
+        self.assertEqual(self.client.get(reverse('api_carrito')).json()['total'], 3000)
+
+    def test_una_consulta_por_categoria(self):
+        self.agregar(1)
+        otro = PAProductos.objects.create(codigo='PA-2', nombre='Royal Cachorro', marca='Royal', precio=800, stock=5, descripcion='-')
+        self.client.post(reverse('api_carrito_agregar', args=['pa', otro.id]))
+        incrementar_version('pa')
+
+        # Una sola consulta para los dos productos de la categoría (la sesión está en caché)
+        with self.assertNumQueries(1):
+            datos = self.client.get(reverse('api_carrito')).json()
+        self.assertEqual(datos['total'], 1800)
+
+
+class ApiAsyncTests(TestCase):
+    """Los endpoints JSON async responden igual bajo ASGI (AsyncClient recorre los middlewares en modo async)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.producto = PAProductos.objects.create(
+            codigo='PA-1', nombre='Royal Adulto', marca='Royal', precio=1000, stock=5, descripcion='-'
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    async def test_api_catalogo(self):
+        respuesta = await self.async_client.get(reverse('api_perro_adulto'))
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual([fila['codigo'] for fila in respuesta.json()['data']], ['PA-1'])
+
+        # Misma versión de la categoría: 304 sin leer la tabla
+        respuesta = await self.async_client.get(reverse('api_perro_adulto'), headers={'if-none-match': respuesta['ETag']})
+        self.assertEqual(respuesta.status_code, 304)
+
+    async def test_carrito_con_sesion(self):
+        url = reverse('api_carrito_agregar', args=['pa', self.producto.id])
+        datos = (await self.async_client.post(url, {'cantidad': 2})).json()
+        self.assertEqual(datos['total'], 2000)
+
+        datos = (await self.async_client.get(reverse('api_carrito'))).json()
+        self.assertEqual([item['clave'] for item in datos['items']], [f'pa_{self.producto.id}'])
+
+        respuesta = await self.async_client.post(reverse('api_carrito_agregar', args=['pa', self.producto.id + 1]))
+        self.assertEqual(respuesta.status_code, 404)
+
+
+class AdministrarProductosTests(TestCase):
+    """Crear, editar y eliminar usan una ruta por acción para todos los tipos de producto."""
+
+    def test_crear_editar_y_eliminar(self):
+        datos = {'codigo': 'COL-1', 'nombre': 'Collar Rojo', 'marca': 'Pet', 'precio': 5000, 'stock': 3, 'descripcion': '-'}
+        respuesta = self.client.post(reverse('crear_producto', args=['collar']), datos)
+        self.assertRedirects(respuesta, reverse('datatable4'), fetch_redirect_response=False)
+
+        datos['precio'] = 4500
+        self.client.post(reverse('editar_producto', args=['collar', 'COL-1']), datos)
+        self.assertEqual(Collar.objects.get(codigo='COL-1').precio, 4500)
+
+        # Un GET (enlace, prefetch del navegador) no elimina
+        respuesta = self.client.get(reverse('eliminar_producto', args=['collar', 'COL-1']))
+        self.assertEqual(respuesta.status_code, 405)
+        self.assertTrue(Collar.objects.exists())
+
+        self.client.post(reverse('eliminar_producto', args=['collar', 'COL-1']))
+        self.assertFalse(Collar.objects.exists())
+
+    def test_codigo_repetido_rechazado(self):
+        Collar.objects.create(codigo='COL-1', nombre='Collar Rojo', marca='Pet', precio=5000, stock=3, descripcion='-')
+        datos = {'codigo': 'COL-1', 'nombre': 'Otro', 'marca': 'Pet', 'precio': 1, 'stock': 1, 'descripcion': '-'}
+        respuesta = self.client.post(reverse('crear_producto', args=['collar']), datos)
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn('codigo', respuesta.context['form'].errors)
+        self.assertEqual(Collar.objects.count(), 1)
+
+    def test_urls_anteriores_siguen_resolviendo(self):
+        self.assertEqual(resolve('/productos/crear/alimentopa/').kwargs, {'tipo': 'pa'})
+        self.assertEqual(resolve('/productos/editar/antiparasitario/AP-1/').kwargs, {'tipo': 'ap', 'codigo': 'AP-1'})
+        self.assertEqual(self.client.get('/productos/crear/desconocido/').status_code, 404)
+
+
+class CodigoLibreTests(TestCase):
+    """Los códigos nuevos de deduplicar_codigos no repiten uno existente y caben en el campo."""
+
+    def test_no_repite_codigos_existentes(self):
+        # Un producto sin código cuyo '<TIPO>-<id>' ya lo usa otro producto
+        self.assertEqual(codigo_libre('PA-7', {'pa-7', 'pa-7-2'}, 100), 'PA-7-3')
+        self.assertEqual(codigo_libre('PA-7', {'x'}, 100), 'PA-7')
+
+    def test_recorta_la_base_para_el_sufijo(self):
+        base = 'A' * 100
+        nuevo = codigo_libre(base, {base.lower()}, 100)
+        self.assertEqual(nuevo, 'A' * 98 + '-2')
+
+
+class DeduplicarCodigosTests(TestCase):
+    """Los códigos que solo difieren en mayúsculas o espacios se fusionan o se renombran."""
+
+    def crear(self, codigo, nombre='Royal Adulto', stock=5):
+        return PAProductos.objects.create(
+            codigo=codigo, nombre=nombre, marca='Royal', precio=1000, stock=stock, descripcion='-'
+        )
+
+    def test_fusiona_el_mismo_producto(self):
+        original = self.crear('ABC', stock=5)
+        copia = self.crear('abc ', stock=3)
+        ct = ContentType.objects.get_for_model(PAProductos)
+        imagen = ImagenProducto.objects.create(content_type=ct, object_id=copia.id, url_imagen='https://x.cl/a.png')
+        usuario = User.objects.create_user('cliente', password='x')
+        linea = Carrito.objects.create(usuario=usuario, producto_tipo=ct, producto_id=copia.id, cantidad=2)
+
+        acciones = deduplicar_codigos()
+
+        self.assertEqual([(a['accion'], a['producto_id'], a['destino']) for a in acciones],
+                         [('fusionado', copia.id, original.id)])
+        self.assertEqual(list(PAProductos.objects.values_list('id', 'codigo', 'stock')), [(original.id, 'ABC', 8)])
+        imagen.refresh_from_db()
+        linea.refresh_from_db()
+        self.assertEqual((imagen.object_id, linea.producto_id), (original.id, original.id))
+
+    def test_renombra_productos_distintos(self):
+        original = self.crear('ABC')
+        otro = self.crear('abc', nombre='Royal Cachorro')
+        self.crear('abc-2', nombre='Pro Plan')
+
+        acciones = deduplicar_codigos()
+
+        self.assertEqual([(a['accion'], a['producto_id'], a['destino']) for a in acciones],
+                         [('renombrado', otro.id, 'abc-3')])
+        self.assertEqual(PAProductos.objects.get(id=original.id).codigo, 'ABC')
+        self.assertEqual(PAProductos.objects.get(id=otro.id).codigo, 'abc-3')
+
+    def test_simular_no_modifica(self):
+        self.crear('ABC')
+        self.crear('Abc')
+
+        self.assertEqual(len(deduplicar_codigos(simular=True)), 1)
+        self.assertEqual(PAProductos.objects.count(), 2)
+
+
+class PreciosEnterosTests(TestCase):
+    """Los montos son pesos enteros en todas las tablas y se suman en SQL."""
+
+    def test_valor_inventario_en_pesos(self):
+        PAProductos.objects.create(codigo='PA-1', nombre='Royal', marca='Royal', precio=1000, stock=5, descripcion='-')
+        Medicamento.objects.create(codigo='MED-1', nombre='Vitamina', descripcion='-', precio=2490, stock=2)
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'clave'))
+
+        respuesta = self.client.get(reverse('home'))
+        self.assertEqual(respuesta.context['valor_inventario'], 5000 + 4980)
+        self.assertIsInstance(respuesta.context['valor_inventario'], int)
+        self.assertEqual(respuesta.context['total_stock'], 7)
+
+
+class PanelInicioTests(TestCase):
+    """Los paneles de productos recientes y con stock bajo combinan las 15 tablas en una consulta."""
+
+    def test_stock_bajo_ordenado_entre_tablas(self):
+        PAProductos.objects.create(codigo='PA-1', nombre='Royal', marca='Royal', precio=1000, stock=4, descripcion='-')
+        PAProductos.objects.create(codigo='PA-2', nombre='Pro Plan', marca='Purina', precio=1000, stock=50, descripcion='-')
+        Medicamento.objects.create(codigo='MED 1', nombre='Vitamina', descripcion='-', precio=2490, stock=1)
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'clave'))
+
+        filas = self.client.get(reverse('home')).context['productos_stock_bajo']
+        self.assertEqual([f['codigo'] for f in filas], ['MED 1', 'PA-1'])
+        self.assertEqual(filas[0]['url_editar'], reverse('editar_producto', args=['med', 'MED 1']))
+        self.assertEqual(filas[0]['marca'], '')
+
+
+class BundlesTests(TestCase):
+    """Los bundles cargan sus archivos por separado hasta que se compilan."""
+
+    @override_settings(BUNDLES_COMPILADOS=False)
+    def test_sin_compilar_carga_cada_archivo(self):
+        html = bundle_js('tablas')
+        self.assertIn('vendor/datatables/jquery.dataTables.min.js', html)
+        self.assertEqual(html.count('defer'), 2)
+
+    def test_urls_css_relativas_al_bundle(self):
+        css = reescribir_urls_css(
+            'src:url(../webfonts/fa.woff2?v=1) url(data:image/png;base64,AA)',
+            'vendor/fontawesome-free/css/all.min.css', 'bundles/admin.min.css',
+        )
+        self.assertIn('url("../vendor/fontawesome-free/webfonts/fa.woff2?v=1")', css)
+        self.assertIn('url(data:image/png;base64,AA)', css)
+
+
+class GeneradorDatosTests(TestCase):
+    """El generador de datos sintéticos es reproducible y deja los índices de búsqueda al día."""
+
+    def resumen(self):
+        return (
+            list(Mascota.objects.order_by('id').values_list('nombre', 'tipo_mascota')),
+            list(CitaMedica.objects.order_by('fecha', 'hora').values_list('fecha', 'hora', 'mascota')),
+            list(PAProductos.objects.order_by('id').values_list('codigo', 'nombre', 'precio', 'stock')),
+        )
+
+    def test_misma_semilla_mismos_datos(self):
+        GeneradorDatos(escala=0.05, semilla=7).generar()
+        primero = self.resumen()
+        GeneradorDatos.limpiar()
+        GeneradorDatos(escala=0.05, semilla=7).generar()
+
+        self.assertEqual(self.resumen(), primero)
+
+    def test_indices_de_busqueda_reconstruidos(self):
+        totales = GeneradorDatos(escala=0.05).generar()
+
+        self.assertEqual(ProductoIndexado.objects.count(), totales['productos'])
+        self.assertFalse(Mascota.objects.filter(clave_busqueda='').exists())
+
+    def test_citas_vinculadas_a_la_mascota(self):
+        GeneradorDatos(escala=0.05).generar()
+
+        self.assertTrue(CitaMedica.objects.exists())
+        self.assertFalse(CitaMedica.objects.filter(paciente__isnull=True).exists())
+        # El paciente es del mismo cliente y coincide con el nombre guardado en la cita
+        self.assertFalse(CitaMedica.objects.exclude(paciente__propietario=F('user')).exists())
+        self.assertFalse(CitaMedica.objects.exclude(paciente__nombre=F('mascota')).exists())
+
+    def test_poblar_db_reindexa_una_sola_vez(self):
+        with mock.patch('gestorProductos.datos_sinteticos.reindexar_todo', wraps=reindexar_todo) as generador, \
+                mock.patch('gestorProductos.management.commands.poblar_db.reindexar_todo') as comando:
+            call_command('poblar_db', scale=0.05, stdout=StringIO())
+        self.assertEqual((generador.call_count, comando.call_count), (1, 0))
+        self.assertTrue(ProductoIndexado.objects.filter(codigo='PA001').exists())
+
+        # Sin productos nuevos no hay nada que reindexar
+        with mock.patch('gestorProductos.management.commands.poblar_db.reindexar_todo') as comando:
+            call_command('poblar_db', stdout=StringIO())
+        comando.assert_not_called()
+
+
+class ConexionFalsa:
+    """Conexión mínima con la interfaz que usa PoolConexiones."""
+
+    def __init__(self, viva=True):
+        self.viva = viva
+        self.cerrada = False
+
+    def ping(self, reconnect=False):
+        if not self.viva:
+            raise ConnectionError('conexión caída')
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.cerrada = True
+
+
+class PoolConexionesTests(TestCase):
+    """El pool reutiliza conexiones vivas y descarta las caídas o sobrantes."""
+
+    def test_reutiliza_conexion_devuelta(self):
+        pool = PoolConexiones(tamano=2)
+        conexion = ConexionFalsa()
+        pool.devolver(conexion)
+
+        self.assertIs(pool.obtener(ConexionFalsa), conexion)
+
+    def test_descarta_conexion_caida(self):
+        pool = PoolConexiones(tamano=2)
+        caida = ConexionFalsa(viva=False)
+        pool.devolver(caida)
+
+        nueva = pool.obtener(ConexionFalsa)
+        self.assertIsNot(nueva, caida)
+        self.assertTrue(caida.cerrada)
+
+    def test_cierra_conexiones_sobrantes(self):
+        pool = PoolConexiones(tamano=1)
+        primera, segunda = ConexionFalsa(), ConexionFalsa()
+        pool.devolver(primera)
+        pool.devolver(segunda)
+
+        self.assertFalse(primera.cerrada)
+        self.assertTrue(segunda.cerrada)
+
+
+@mock.patch.object(replicas, 'replica_configurada', return_value=True)
+class ReplicasTests(TestCase):
+    """Las vistas de solo lectura leen de la réplica salvo que el usuario haya escrito hace poco."""
+
+    def peticion(self, sesion):
+        request = RequestFactory().get('/')
+        request.session = sesion
+        return request
+
+    def test_lecturas_en_replica_solo_en_vistas_marcadas(self, _):
+        router = replicas.RouterReplicas()
+        self.assertEqual(router.db_for_read(PAProductos), 'default')
+        with replicas.lectura_en_replica():
+            self.assertEqual(router.db_for_read(PAProductos), 'replica')
+            self.assertEqual(router.db_for_write(PAProductos), 'default')
+
+    def test_escritura_fija_lecturas_en_primaria(self, _):
+        sesion = SessionStore()
+        alias_leidos = []
+
+        def escribe(request):
+            User.objects.create_user('replica_test')
+            return HttpResponse()
+
+        def lee(request):
+            with replicas.lectura_en_replica():
+                alias_leidos.append(replicas.alias_lectura())
+            return HttpResponse()
+
+        replicas.ReplicaMiddleware(lee)(self.peticion(sesion))
+        replicas.ReplicaMiddleware(escribe)(self.peticion(sesion))
+        replicas.ReplicaMiddleware(lee)(self.peticion(sesion))
+
+        self.assertIn(replicas.CLAVE_SESION, sesion)
+        self.assertEqual(alias_leidos, ['replica', 'default'])
@@ -3,11 +3,18 @@ from django.contrib.auth import authenticate, logout
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.contenttypes.models import ContentType
-from django.http import JsonResponse, HttpResponse, HttpResponseBadRequest, HttpResponseRedirect
+from django.http import Http404, JsonResponse, HttpResponse, HttpResponseBadRequest, HttpResponseRedirect
 from django.urls import reverse
+from django.views import View
+from django.views.generic.edit import CreateView, UpdateView
+from django.views.decorators.cache import never_cache
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
+from django.db.models import BigIntegerField, Count, F, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils.functional import SimpleLazyObject
 import json
+from urllib.parse import quote
 from .forms import (
     CategoriaRegistroForm, ProductosRegistroForm, PCProductosForm, PAProductosForm,
     PSProductosForm, AProductosForm, AGAProductosForm, AGCProductosForm,
@@ -24,8 +31,17 @@ from .models import (
     AProductos, AGAProductos, AGCProductos, SnackGProductos, SnackPProductos,
     Antiparasitario, Medicamento, Shampoo, Cama, Collar, Juguete
 )
+from .busqueda import buscar_productos as buscar_en_indice, facetas
+from .carrito import (
+    aagregar_al_carrito, acambiar_cantidad, adatos_productos, aeliminar_linea, afijar_cantidad, alineas_carrito,
+    agregar_al_carrito, cambiar_cantidad, clave_linea, eliminar_linea, fijar_cantidad,
+    leer_cantidad, lineas_carrito, obtener_carrito, resumen_carrito, total_carrito, vaciar_carrito,
+)
+from .cache_catalogo import condicion_api, condicion_pagina, duracion_cache_catalogo, version_catalogo
+from .catalogo import CATEGORIAS_PRODUCTO, MODELOS_PRODUCTO, modelo_por_tipo, productos_union
 from gestorUser.forms import CitaMedicaForm
 from gestorUser.models import CitaMedica
+from inventarioVeterinariaPamela.replicas import solo_lectura
 
 # Create your views here.
 
@@ -103,6 +119,23 @@ def agregar_imagenes_a_productos(productos_queryset, model_class):
     
     return productos_list
 
+def contexto_catalogo(tipo, nombre_variable, *orden):
+    """
+    Contexto de una página del catálogo: los productos (con imágenes) bajo
+    'nombre_variable' y los datos para cachear la grilla con {% cache %}.
+
+    Los productos se cargan recién cuando el template los recorre, así que si
+    el fragmento está en caché no se consulta la base de datos.
+    """
+    modelo = modelo_por_tipo(tipo)
+    productos = modelo.objects.all().order_by(*orden)
+    return {
+        nombre_variable: SimpleLazyObject(lambda: agregar_imagenes_a_productos(productos, modelo)),
+        'tipo_catalogo': tipo,
+        'version_catalogo': version_catalogo(tipo),
+        'cache_catalogo_segundos': duracion_cache_catalogo(),
+    }
+
 # ===========================
 # VISTAS DE SESIÓN
 # ===========================
@@ -113,7 +146,7 @@ def vetInicio(request):
 
     # Get user's citas and appointment form
     citas_usuario = []
-    formulario_cita = CitaMedicaForm()
+    formulario_cita = CitaMedicaForm(usuario=request.user)
     if request.user.is_authenticated:
         citas_usuario = CitaMedica.objects.filter(user=request.user).order_by('fecha', 'hora')
         
@@ -202,891 +235,252 @@ def sobreData(request):
 # ===========================
 # VISTAS DE ALIMENTO PERRO
 # ===========================
+@condicion_pagina('pa')
 def alimentoPerroAData(request):
-    # Mostrar todos los productos sin límite
-    paproductos = PAProductos.objects.all().order_by('-id')
-    paproductos = agregar_imagenes_a_productos(paproductos, PAProductos)
-    return render(request, 'gestorProductos/alimentoPAdulto.html', {'paproductos': paproductos})
+    return render(request, 'gestorProductos/alimentoPAdulto.html', contexto_catalogo('pa', 'paproductos', '-id'))
 
+@condicion_pagina('pc')
 def alimentoPerroCData(request):
-    # Mostrar todos los productos sin límite
-    pcproductos = PCProductos.objects.all().order_by('-id')
-    pcproductos = agregar_imagenes_a_productos(pcproductos, PCProductos)
-    return render(request, 'gestorProductos/alimentoPCachorro.html', {'pcproductos': pcproductos})
+    return render(request, 'gestorProductos/alimentoPCachorro.html', contexto_catalogo('pc', 'pcproductos', '-id'))
 
+@condicion_pagina('ps')
 def alimentoPerroSData(request):
-    # Mostrar todos los productos sin límite
-    psproductos = PSProductos.objects.all().order_by('-id')
-    psproductos = agregar_imagenes_a_productos(psproductos, PSProductos)
-    return render(request, 'gestorProductos/alimentoPSenior.html', {'psproductos': psproductos})
+    return render(request, 'gestorProductos/alimentoPSenior.html', contexto_catalogo('ps', 'psproductos', '-id'))
 
 def antipulgasData(request):
     aproductos = AProductos.objects.all().order_by('-id')
     return render(request, 'gestorProductos/antipulgas.html', {'aproductos': aproductos})
 
 # ======================================
-# VISTAS DE ELIMINAR Y EDITAR PRODUCTOS
+# ADMINISTRACIÓN DE PRODUCTOS (CREAR, EDITAR, ELIMINAR)
 # ======================================
-def eliminarProducto(request, codigo):
-    try:
-        # Convertir codigo a string ya que en el modelo es CharField pero la URL puede venir como int
-        codigo_str = str(codigo)
-        producto = Productos.objects.get(codigo=codigo_str)
-        # Aquí va el código para eliminar el producto
-        producto.delete()
-        messages.success(request, "Producto eliminado correctamente.")
-        return redirect('datatable')  # Redirige a la lista de productos
-    except Productos.DoesNotExist:
-        messages.error(request, f"Producto con código {codigo} no encontrado.")
-        return redirect('datatable')  # Redirige a una página donde se pueda ver el error
-    except Exception as e:
-        messages.error(request, f"Error al eliminar el producto: {str(e)}")
-        return redirect('datatable')
-
-
-def editarProducto(request, id):
-    # Busca el producto según el id
-    producto = get_object_or_404(Productos, id=id)
-
-    if request.method == 'POST':
-        # Crea el formulario con datos enviados y la instancia del producto
-        form = DatatableProductosForm(request.POST, instance=producto)
-        if form.is_valid():
-            form.save()  # Guarda los cambios en el modelo
-            return redirect('datatable')  # Redirige a la lista de productos
-    else:
-        # Crea el formulario con la instancia del producto existente
-        form = DatatableProductosForm(instance=producto)
-
-    return render(request, 'gestorProductos/editarProducto.html', {'form': form, 'producto': producto})
-
-# ============================================
-# VISTAS DE ELIMINAR Y EDITAR PERRO CACHORRO
-# ============================================
-def eliminarProductoPC(request, codigo):
-    try:
-        pcproducto = PCProductos.objects.get(codigo=codigo)
-        # Aquí va el código para eliminar el producto
-        pcproducto.delete()
-        messages.success(request, "Producto eliminado correctamente.")
-        return redirect('datatable')  # Redirige al catálogo de perros
-    except PCProductos.DoesNotExist:
-        messages.error(request, f"Producto con código {codigo} no encontrado.")
-        return redirect('datatable')  # Redirige al catálogo de perros
-
-
-
-# ===========================================
-# VISTAS DE ELIMINAR Y EDITAR PERRO ADULTO
-# ===========================================
-def eliminarProductoPA(request, codigo):
-    try:
-        paproducto = PAProductos.objects.get(codigo=codigo)
-        paproducto.delete()
-        messages.success(request, "Producto eliminado correctamente.")
-        return redirect('datatable')  # Ajusta con el nombre de tu vista de lista
-    except PAProductos.DoesNotExist:
-        messages.error(request, f"Producto con codigo {codigo} no encontrado.")
-        return redirect('datatable')
-
-# EDITAR PRODUCTO
-def editarProductoPA(request, codigo):
-    paproducto = get_object_or_404(PAProductos, codigo=codigo)
-    imagenes_existentes = obtener_imagenes_producto(paproducto, PAProductos)
-
-    if request.method == 'POST':
-        form = DatatableProductosPAForm(request.POST, instance=paproducto)
-        if form.is_valid():
-            producto = form.save()
-            procesar_imagenes_producto(request, producto, PAProductos)
-            messages.success(request, "Producto actualizado correctamente.")
-            return redirect('datatable')
-        else:
-            messages.error(request, "Error al actualizar el producto.")
-    else:
-        form = DatatableProductosPAForm(instance=paproducto)
-
-    return render(request, 'gestorProductos/editarProductoPA.html', {
-        'form': form, 
-        'paproducto': paproducto,
-        'imagenes': imagenes_existentes
-    })
-
-def editarProductoPC(request, codigo):
-    pcproducto = get_object_or_404(PCProductos, codigo=codigo)
-    imagenes_existentes = obtener_imagenes_producto(pcproducto, PCProductos)
-
-    if request.method == 'POST':
-        form = DatatableProductosPCForm(request.POST, instance=pcproducto)
-        if form.is_valid():
-            producto = form.save()
-            procesar_imagenes_producto(request, producto, PCProductos)
-            messages.success(request, "Producto actualizado correctamente.")
-            return redirect('datatable')
-        else:
-            messages.error(request, "Error al actualizar el producto.")
-    else:
-        form = DatatableProductosPCForm(instance=pcproducto)
-
-    return render(request, 'gestorProductos/editarProductoPC.html', {
-        'form': form, 
-        'pcproducto': pcproducto,
-        'imagenes': imagenes_existentes
-    })
-
-def editarProductoPS(request, codigo):
-    psproducto = get_object_or_404(PSProductos, codigo=codigo)
-    imagenes_existentes = obtener_imagenes_producto(psproducto, PSProductos)
-
-    if request.method == 'POST':
-        form = DatatableProductosPSForm(request.POST, instance=psproducto)
-        if form.is_valid():
-            producto = form.save()
-            procesar_imagenes_producto(request, producto, PSProductos)
-            messages.success(request, "Producto actualizado correctamente.")
-            return redirect('datatable')
-        else:
-            messages.error(request, "Error al actualizar el producto.")
-    else:
-        form = DatatableProductosPSForm(instance=psproducto)
-
-    return render(request, 'gestorProductos/editarProductoPS.html', {
-        'form': form, 
-        'psproducto': psproducto,
-        'imagenes': imagenes_existentes
-    })
-
-# ==========================================
-# VISTAS DE ELIMINAR Y EDITAR PERRO SENIOR
-# ==========================================
-def eliminarProductoPS(request, codigo):
-    try:
-        psproducto = PSProductos.objects.get(codigo=codigo)
-        # Aquí va el código para eliminar el producto
-        psproducto.delete()
-        messages.success(request, "Producto eliminado correctamente.")
-        return redirect('datatable')  # Redirige al catálogo de perros
-    except PSProductos.DoesNotExist:
-        messages.error(request, f"Producto con código {codigo} no encontrado.")
-        return redirect('datatable')  # Redirige al catálogo de perros
-
-
-
-# ========================================
-# VISTAS DE ELIMINAR Y EDITAR ANTIPULGAS
-# ========================================
-def eliminarProductoA(request, codigo):
-    try:
-        aproducto = AProductos.objects.get(codigo=codigo)
-        aproducto.delete()
-        messages.success(request, "Producto eliminado correctamente.")
-        return redirect('datatable')  # Redirige al catálogo de perros
-    except AProductos.DoesNotExist:
-        messages.error(request, f"Producto con código {codigo} no encontrado.")
-        return redirect('datatable')  # Redirige al catálogo de perros
-
-def editarProductoA(request, codigo):
-    aproducto = get_object_or_404(AProductos, codigo=codigo)
-    imagenes_existentes = obtener_imagenes_producto(aproducto, AProductos)
-    
-    if request.method == 'POST':
-        form = DatatableProductosAForm(request.POST, instance=aproducto)
-        if form.is_valid():
-            producto = form.save()
-            procesar_imagenes_producto(request, producto, AProductos)
-            messages.success(request, "Producto actualizado correctamente.")
-            return redirect('datatable')
-        else:
-            messages.error(request, "Error al actualizar el producto.")
-    else:
-        form = DatatableProductosAForm(instance=aproducto)
-    
-    return render(request, 'gestorProductos/editarProductoA.html', {
-        'form': form, 
-        'aproducto': aproducto,
-        'imagenes': imagenes_existentes
-    })
-
-# ========================================
-# VISTAS DE ELIMINAR Y EDITAR GATO ADULTO
-# ========================================
-def eliminarProductoAGA(request, codigo):
-    try:
-        agaproducto = AGAProductos.objects.get(codigo=codigo)
-        agaproducto.delete()
-        messages.success(request, "Producto eliminado correctamente.")
-        return redirect('datatable2')  # Redirige al catálogo de gatos
-    except AGAProductos.DoesNotExist:
-        messages.error(request, f"Producto con código {codigo} no encontrado.")
-        return redirect('datatable2')  # Redirige al catálogo de gatos
-
-def editarProductoAGA(request, codigo):
-    agaproducto = get_object_or_404(AGAProductos, codigo=codigo)
-    imagenes_existentes = obtener_imagenes_producto(agaproducto, AGAProductos)
-    
-    if request.method == 'POST':
-        form = DatatableAGAForm(request.POST, instance=agaproducto)
-        if form.is_valid():
-            producto = form.save()
-            procesar_imagenes_producto(request, producto, AGAProductos)
-            messages.success(request, "Producto actualizado correctamente.")
-            return redirect('datatable2')
-        else:
-            messages.error(request, "Error al actualizar el producto.")
-    else:
-        form = DatatableAGAForm(instance=agaproducto)
-    
-    return render(request, 'gestorProductos/editarProductoAGA.html', {
-        'form': form, 
-        'agaproducto': agaproducto,
-        'imagenes': imagenes_existentes
-    })
-
-# ========================================
-# VISTAS DE ELIMINAR Y EDITAR GATO CACHORRO
-# ========================================
-def eliminarProductoAGC(request, codigo):
-    try:
-        agcproducto = AGCProductos.objects.get(codigo=codigo)
-        agcproducto.delete()
-        messages.success(request, "Producto eliminado correctamente.")
-        return redirect('datatable2')  # Redirige al catálogo de gatos
-    except AGCProductos.DoesNotExist:
-        messages.error(request, f"Producto con código {codigo} no encontrado.")
-        return redirect('datatable2')  # Redirige al catálogo de gatos
-
-def editarProductoAGC(request, codigo):
-    agcproducto = get_object_or_404(AGCProductos, codigo=codigo)
-    imagenes_existentes = obtener_imagenes_producto(agcproducto, AGCProductos)
-    
-    if request.method == 'POST':
-        form = DatatableAGCForm(request.POST, instance=agcproducto)
-        if form.is_valid():
-            producto = form.save()
-            procesar_imagenes_producto(request, producto, AGCProductos)
-            messages.success(request, "Producto actualizado correctamente.")
-            return redirect('datatable2')
-        else:
-            messages.error(request, "Error al actualizar el producto.")
-    else:
-        form = DatatableAGCForm(instance=agcproducto)
-    
-    return render(request, 'gestorProductos/editarProductoAGC.html', {
-        'form': form, 
-        'agcproducto': agcproducto,
-        'imagenes': imagenes_existentes
-    })
-
-# ========================================
-# VISTAS DE ELIMINAR Y EDITAR SNACK GATO
-# ========================================
-def eliminarProductoSnackG(request, codigo):
-    try:
-        snackgproducto = SnackGProductos.objects.get(codigo=codigo)
-        snackgproducto.delete()
-        messages.success(request, "Producto eliminado correctamente.")
-        return redirect('datatable2')  # Redirige al catálogo de gatos
-    except SnackGProductos.DoesNotExist:
-        messages.error(request, f"Producto con código {codigo} no encontrado.")
-        return redirect('datatable2')  # Redirige al catálogo de gatos
-
-def editarProductoSnackG(request, codigo):
-    snackgproducto = get_object_or_404(SnackGProductos, codigo=codigo)
-    imagenes_existentes = obtener_imagenes_producto(snackgproducto, SnackGProductos)
-    
-    if request.method == 'POST':
-        form = DatatableSnackGForm(request.POST, instance=snackgproducto)
-        if form.is_valid():
-            producto = form.save()
-            procesar_imagenes_producto(request, producto, SnackGProductos)
-            messages.success(request, "Producto actualizado correctamente.")
-            return redirect('datatable2')
-        else:
-            messages.error(request, "Error al actualizar el producto.")
-    else:
-        form = DatatableSnackGForm(instance=snackgproducto)
-    
-    return render(request, 'gestorProductos/editarProductoSnackG.html', {
-        'form': form, 
-        'snackgproducto': snackgproducto,
-        'imagenes': imagenes_existentes
-    })
-
-# ========================================
-# VISTAS DE ELIMINAR Y EDITAR SNACK PERRO
-# ========================================
-def eliminarProductoSnackP(request, codigo):
-    try:
-        snackpproducto = SnackPProductos.objects.get(codigo=codigo)
-        snackpproducto.delete()
-        messages.success(request, "Producto eliminado correctamente.")
-        return redirect('datatable')  # Redirige al catálogo de perros
-    except SnackPProductos.DoesNotExist:
-        messages.error(request, f"Producto con código {codigo} no encontrado.")
-        return redirect('datatable')  # Redirige al catálogo de perros
-
-def editarProductoSnackP(request, codigo):
-    snackpproducto = get_object_or_404(SnackPProductos, codigo=codigo)
-    imagenes_existentes = obtener_imagenes_producto(snackpproducto, SnackPProductos)
-    
-    if request.method == 'POST':
-        form = DatatableSnackPForm(request.POST, instance=snackpproducto)
-        if form.is_valid():
-            producto = form.save()
-            procesar_imagenes_producto(request, producto, SnackPProductos)
-            messages.success(request, "Producto actualizado correctamente.")
-            return redirect('datatable')
-        else:
-            messages.error(request, "Error al actualizar el producto.")
-    else:
-        form = DatatableSnackPForm(instance=snackpproducto)
-    
-    return render(request, 'gestorProductos/editarProductoSnackP.html', {
-        'form': form, 
-        'snackpproducto': snackpproducto,
-        'imagenes': imagenes_existentes
-    })
-
-# ========================================
-# VISTAS DE ELIMINAR Y EDITAR ANTIPARASITARIO
-# ========================================
-def eliminarProductoAntiparasitario(request, codigo):
-    try:
-        antiparasitario = Antiparasitario.objects.get(codigo=codigo)
-        antiparasitario.delete()
-        messages.success(request, "Producto eliminado correctamente.")
-        return redirect('datatable3')  # Redirige al catálogo de medicamentos
-    except Antiparasitario.DoesNotExist:
-        messages.error(request, f"Producto con código {codigo} no encontrado.")
-        return redirect('datatable3')  # Redirige al catálogo de medicamentos
-
-def editarProductoAntiparasitario(request, codigo):
-    antiparasitario = get_object_or_404(Antiparasitario, codigo=codigo)
-    imagenes_existentes = obtener_imagenes_producto(antiparasitario, Antiparasitario)
-    
-    if request.method == 'POST':
-        form = DatatableAntiparasitarioForm(request.POST, instance=antiparasitario)
-        if form.is_valid():
-            producto = form.save()
-            procesar_imagenes_producto(request, producto, Antiparasitario)
-            messages.success(request, "Producto actualizado correctamente.")
-            return redirect('datatable3')
-        else:
-            messages.error(request, "Error al actualizar el producto.")
-    else:
-        form = DatatableAntiparasitarioForm(instance=antiparasitario)
-    
-    return render(request, 'gestorProductos/editarProductoAntiparasitario.html', {
-        'form': form, 
-        'antiparasitario': antiparasitario,
-        'imagenes': imagenes_existentes
-    })
-
-# ========================================
-# VISTAS DE ELIMINAR Y EDITAR MEDICAMENTO
-# ========================================
-def eliminarProductoMedicamento(request, codigo):
-    try:
-        medicamento = Medicamento.objects.get(codigo=codigo)
-        medicamento.delete()
-        messages.success(request, "Producto eliminado correctamente.")
-        return redirect('datatable3')  # Redirige al catálogo de medicamentos
-    except Medicamento.DoesNotExist:
-        messages.error(request, f"Producto con código {codigo} no encontrado.")
-        return redirect('datatable3')  # Redirige al catálogo de medicamentos
-
-def editarProductoMedicamento(request, codigo):
-    medicamento = get_object_or_404(Medicamento, codigo=codigo)
-    imagenes_existentes = obtener_imagenes_producto(medicamento, Medicamento)
-    
-    if request.method == 'POST':
-        form = DatatableMedicamentoForm(request.POST, instance=medicamento)
-        if form.is_valid():
-            producto = form.save()
-            procesar_imagenes_producto(request, producto, Medicamento)
-            messages.success(request, "Producto actualizado correctamente.")
-            return redirect('datatable3')
-        else:
-            messages.error(request, "Error al actualizar el producto.")
-    else:
-        form = DatatableMedicamentoForm(instance=medicamento)
-    
-    return render(request, 'gestorProductos/editarProductoMedicamento.html', {
-        'form': form, 
-        'medicamento': medicamento,
-        'imagenes': imagenes_existentes
-    })
-
-# ========================================
-# VISTAS DE ELIMINAR Y EDITAR SHAMPOO
-# ========================================
-def eliminarProductoShampoo(request, codigo):
-    try:
-        shampoo = Shampoo.objects.get(codigo=codigo)
-        shampoo.delete()
-        messages.success(request, "Producto eliminado correctamente.")
-        return redirect('datatable3')  # Redirige al catálogo de medicamentos
-    except Shampoo.DoesNotExist:
-        messages.error(request, f"Producto con código {codigo} no encontrado.")
-        return redirect('datatable3')  # Redirige al catálogo de medicamentos
-
-def editarProductoShampoo(request, codigo):
-    shampoo = get_object_or_404(Shampoo, codigo=codigo)
-    imagenes_existentes = obtener_imagenes_producto(shampoo, Shampoo)
-    
-    if request.method == 'POST':
-        form = DatatableShampooForm(request.POST, instance=shampoo)
-        if form.is_valid():
-            producto = form.save()
-            procesar_imagenes_producto(request, producto, Shampoo)
-            messages.success(request, "Producto actualizado correctamente.")
-            return redirect('datatable3')
-        else:
-            messages.error(request, "Error al actualizar el producto.")
-    else:
-        form = DatatableShampooForm(instance=shampoo)
-    
-    return render(request, 'gestorProductos/editarProductoShampoo.html', {
-        'form': form, 
-        'shampoo': shampoo, 
-        'is_creating': False,
-        'imagenes': imagenes_existentes
-    })
-
-# ========================================
-# VISTAS DE ELIMINAR Y EDITAR COLLAR
-# ========================================
-def eliminarProductoCollar(request, codigo):
-    try:
-        collar = Collar.objects.get(codigo=codigo)
-        collar.delete()
-        messages.success(request, "Producto eliminado correctamente.")
-        return redirect('datatable4')  # Redirige al catálogo de accesorios
-    except Collar.DoesNotExist:
-        messages.error(request, f"Producto con código {codigo} no encontrado.")
-        return redirect('datatable4')  # Redirige al catálogo de accesorios
-
-def editarProductoCollar(request, codigo):
-    collar = get_object_or_404(Collar, codigo=codigo)
-    imagenes_existentes = obtener_imagenes_producto(collar, Collar)
-    
-    if request.method == 'POST':
-        form = DatatableCollarForm(request.POST, instance=collar)
-        if form.is_valid():
-            producto = form.save()
-            procesar_imagenes_producto(request, producto, Collar)
-            messages.success(request, "Producto actualizado correctamente.")
-            return redirect('datatable4')
-        else:
-            messages.error(request, "Error al actualizar el producto.")
-    else:
-        form = DatatableCollarForm(instance=collar)
-    
-    return render(request, 'gestorProductos/editarProductoCollar.html', {
-        'form': form, 
-        'collar': collar,
-        'imagenes': imagenes_existentes
-    })
-
-# ========================================
-# VISTAS DE ELIMINAR Y EDITAR CAMA
-# ========================================
-def eliminarProductoCama(request, codigo):
-    try:
-        cama = Cama.objects.get(codigo=codigo)
-        cama.delete()
-        messages.success(request, "Producto eliminado correctamente.")
-        return redirect('datatable4')  # Redirige al catálogo de accesorios
-    except Cama.DoesNotExist:
-        messages.error(request, f"Producto con código {codigo} no encontrado.")
-        return redirect('datatable4')  # Redirige al catálogo de accesorios
-
-def editarProductoCama(request, codigo):
-    cama = get_object_or_404(Cama, codigo=codigo)
-    imagenes_existentes = obtener_imagenes_producto(cama, Cama)
-    
-    if request.method == 'POST':
-        form = DatatableCamaForm(request.POST, instance=cama)
-        if form.is_valid():
-            producto = form.save()
-            procesar_imagenes_producto(request, producto, Cama)
-            messages.success(request, "Producto actualizado correctamente.")
-            return redirect('datatable4')
-        else:
-            messages.error(request, "Error al actualizar el producto.")
-    else:
-        form = DatatableCamaForm(instance=cama)
-    
-    return render(request, 'gestorProductos/editarProductoCama.html', {
-        'form': form, 
-        'cama': cama,
-        'imagenes': imagenes_existentes
-    })
-
-# ========================================
-# VISTAS DE ELIMINAR Y EDITAR JUGUETE
-# ========================================
-def eliminarProductoJuguete(request, codigo):
-    try:
-        juguete = Juguete.objects.get(codigo=codigo)
-        juguete.delete()
-        messages.success(request, "Producto eliminado correctamente.")
-        return redirect('datatable4')  # Redirige al catálogo de accesorios
-    except Juguete.DoesNotExist:
-        messages.error(request, f"Producto con código {codigo} no encontrado.")
-        return redirect('datatable4')  # Redirige al catálogo de accesorios
-
-def editarProductoJuguete(request, codigo):
-    juguete = get_object_or_404(Juguete, codigo=codigo)
-    imagenes_existentes = obtener_imagenes_producto(juguete, Juguete)
-    
-    if request.method == 'POST':
-        form = DatatableJugueteForm(request.POST, instance=juguete)
-        if form.is_valid():
-            producto = form.save()
-            procesar_imagenes_producto(request, producto, Juguete)
-            messages.success(request, "Producto actualizado correctamente.")
-            return redirect('datatable4')
-        else:
-            messages.error(request, "Error al actualizar el producto.")
-    else:
-        form = DatatableJugueteForm(instance=juguete)
-    
-    return render(request, 'gestorProductos/editarProductoJuguete.html', {
-        'form': form, 
-        'juguete': juguete,
-        'imagenes': imagenes_existentes
-    })
-
-# ========================================
-# REGISTRAR LOS DATOS EN FORMULARIOS
-# ========================================
-def crear_alimentopa(request):
-    form = PAProductosForm()
-    if request.method == "POST":
-        form = PAProductosForm(request.POST)
-        if form.is_valid():
-            producto = form.save()
-            procesar_imagenes_producto(request, producto, PAProductos)
-            messages.success(request, "Producto creado correctamente.")
-            return redirect('datatable')
-        else:
-            messages.error(request, "Error al crear el producto. Verifica los datos.")
-    return render(request, 'gestorProductos/crearProductoPA.html', {'form': form})
-
-def crear_alimentopc(request):
-    form = PCProductosForm()
-    if request.method == "POST":
-        form = PCProductosForm(request.POST)
-        if form.is_valid():
-            producto = form.save()
-            procesar_imagenes_producto(request, producto, PCProductos)
-            messages.success(request, "Producto creado correctamente.")
-            return redirect('datatable')
-        else:
-            messages.error(request, "Error al crear el producto. Verifica los datos.")
-    return render(request, 'gestorProductos/crearProductoPC.html', {'form': form})
-
-def crear_alimentops(request):
-    form = PSProductosForm()
-    if request.method == "POST":
-        form = PSProductosForm(request.POST)
-        if form.is_valid():
-            producto = form.save()
-            procesar_imagenes_producto(request, producto, PSProductos)
-            messages.success(request, "Producto creado correctamente.")
-            return redirect('datatable')
-        else:
-            messages.error(request, "Error al crear el producto. Verifica los datos.")
-    return render(request, 'gestorProductos/crearProductoPS.html', {'form': form})
-
-def crear_snackp(request):
-    form = SnackPProductosForm()
-    if request.method == "POST":
-        form = SnackPProductosForm(request.POST)
-        if form.is_valid():
-            producto = form.save()
-            procesar_imagenes_producto(request, producto, SnackPProductos)
-            messages.success(request, "Producto creado correctamente.")
-            return redirect('datatable')
-        else:
-            messages.error(request, "Error al crear el producto. Verifica los datos.")
-    return render(request, 'gestorProductos/crearSnackPerro.html', {'form': form})
-
-def crear_alimentoga(request):
-    form = AGAProductosForm()
-    if request.method == "POST":
-        form = AGAProductosForm(request.POST)
-        if form.is_valid():
-            producto = form.save()
-            procesar_imagenes_producto(request, producto, AGAProductos)
-            messages.success(request, "Producto creado correctamente.")
-            return redirect('datatable2')
-        else:
-            messages.error(request, "Error al crear el producto. Verifica los datos.")
-    return render(request, 'gestorProductos/crearAlimentoGA.html', {'form': form})
-
-def crear_alimentogc(request):
-    form = AGCProductosForm()
-    if request.method == "POST":
-        form = AGCProductosForm(request.POST)
-        if form.is_valid():
-            producto = form.save()
-            procesar_imagenes_producto(request, producto, AGCProductos)
-            messages.success(request, "Producto creado correctamente.")
-            return redirect('datatable2')
-        else:
-            messages.error(request, "Error al crear el producto. Verifica los datos.")
-    return render(request, 'gestorProductos/crearAlimentoGC.html', {'form': form})
-
-def crear_snackg(request):
-    form = SnackGProductosForm()
-    if request.method == "POST":
-        form = SnackGProductosForm(request.POST)
-        if form.is_valid():
-            producto = form.save()
-            procesar_imagenes_producto(request, producto, SnackGProductos)
-            messages.success(request, "Producto creado correctamente.")
-            return redirect('datatable2')
-        else:
-            messages.error(request, "Error al crear el producto. Verifica los datos.")
-    return render(request, 'gestorProductos/crearSnackGato.html', {'form': form})
-
-def crear_antiparasitario(request):
-    form = AntiparasitarioForm()
-    if request.method == "POST":
-        form = AntiparasitarioForm(request.POST)
-        if form.is_valid():
-            producto = form.save()
-            procesar_imagenes_producto(request, producto, Antiparasitario)
-            messages.success(request, "Producto creado correctamente.")
-            return redirect('datatable3')
-        else:
-            messages.error(request, "Error al crear el producto. Verifica los datos.")
-    return render(request, 'gestorProductos/crearAntiparasitario.html', {'form': form})
-
-def crear_shampoo(request):
-    if request.method == "POST":
-        form = ShampooForm(request.POST)
-        if form.is_valid():
-            producto = form.save()
-            procesar_imagenes_producto(request, producto, Shampoo)
-            messages.success(request, "Shampoo creado correctamente.", extra_tags='shampoo')
-            return redirect('datatable3')
-        else:
-            messages.error(request, "Error al crear el shampoo. Verifica los datos.", extra_tags='shampoo')
-    else:
-        form = ShampooForm()
-    return render(request, 'gestorProductos/crearShampoo.html', {'form': form, 'is_creating': True})
-
-def crear_medicamentos(request):
-    if request.method == "POST":
-        form = MedicamentoForm(request.POST)
-        if form.is_valid():
-            producto = form.save()
-            procesar_imagenes_producto(request, producto, Medicamento)
-            messages.success(request, "Medicamento creado correctamente.", extra_tags='medicamento')
-            return redirect('datatable3')
-        else:
-            messages.error(request, "Error al crear el medicamento. Verifica los datos.", extra_tags='medicamento')
-    else:
-        form = MedicamentoForm()
-    return render(request, 'gestorProductos/crearMedicamentos.html', {'form': form})
-
-def crear_collares(request):
-    form = CollarForm()
-    if request.method == "POST":
-        form = CollarForm(request.POST)
-        if form.is_valid():
-            producto = form.save()
-            procesar_imagenes_producto(request, producto, Collar)
-            messages.success(request, "Collar creado correctamente.")
-            return redirect('datatable4')
-        else:
-            messages.error(request, "Error al crear el collar. Verifica los datos.")
-    return render(request, 'gestorProductos/crearCollares.html', {'form': form})
-
-def crear_camas(request):
-    form = CamaForm()
-    if request.method == "POST":
-        form = CamaForm(request.POST)
-        if form.is_valid():
-            producto = form.save()
-            procesar_imagenes_producto(request, producto, Cama)
-            messages.success(request, "Cama creada correctamente.")
-            return redirect('datatable4')
-        else:
-            messages.error(request, "Error al crear la cama. Verifica los datos.")
-    return render(request, 'gestorProductos/crearCamas.html', {'form': form})
-
-def crear_juguetes(request):
-    form = JugueteForm()
-    if request.method == "POST":
-        form = JugueteForm(request.POST)
-        if form.is_valid():
-            producto = form.save()
-            procesar_imagenes_producto(request, producto, Juguete)
-            messages.success(request, "Juguete creado correctamente.")
-            return redirect('datatable4')
-        else:
-            messages.error(request, "Error al crear el juguete. Verifica los datos.")
-    return render(request, 'gestorProductos/crearJuguetes.html', {'form': form})
-
-def ProductoPCRegistro(request):
-    form = PCProductosForm()
-    if request.method == "POST":
-        form = PCProductosForm(request.POST)
-        if form.is_valid():
-            form.save()
-            messages.success(request, "Producto creado correctamente.")
-            return redirect('datatable')  # Redirige al catálogo de perros
-        else:
-            messages.error(request, "Error al crear el producto. Verifica los datos.")
-    return render(request, 'gestorProductos/crearProductoPC.html', {'form': form})
-
-def ProductoPARegistro(request):
-    form = PAProductosForm()
-    if request.method == "POST":
-        form = PAProductosForm(request.POST)
-        if form.is_valid():
-            form.save()
-            messages.success(request, "Producto creado correctamente.")
-            return redirect('datatable')  # Redirige al catálogo de perros
-        else:
-            messages.error(request, "Error al crear el producto. Verifica los datos.")
-    return render(request, 'gestorProductos/crearProductoPA.html', {'form': form})
-
-def ProductoPSRegistro(request):
-    form = PSProductosForm()
-    if request.method == "POST":
-        form = PSProductosForm(request.POST)
-        if form.is_valid():
-            form.save()
-            messages.success(request, "Producto creado correctamente.")
-            return redirect('datatable')  # Redirige al catálogo de perros
-        else:
-            messages.error(request, "Error al crear el producto. Verifica los datos.")
-    return render(request, 'gestorProductos/crearProductoPS.html', {'form': form})
-
-def AProductoRegistro(request):
-    form = AProductosForm()
-    if request.method == "POST":
-        form = AProductosForm(request.POST)
-        if form.is_valid():
-            form.save()
-            messages.success(request, "Producto creado correctamente.")
-            return redirect('datatable')  # Redirige al catálogo de perros
+# Una sola ruta por acción para los 15 tipos de producto: crear/<tipo>/,
+# editar/<tipo>/<codigo>/ y eliminar/<tipo>/<codigo>/ (convertidor 'tipo_producto',
+# ver converters.py). Lo que cambia entre tipos (formularios, templates, tabla
+# a la que se vuelve) está en ADMIN_PRODUCTOS, con el código de catalogo.py.
+
+ADMIN_PRODUCTOS = {
+    "pa": {
+        "form_crear": PAProductosForm, "form_editar": DatatableProductosPAForm,
+        "plantilla_crear": "crearProductoPA.html", "plantilla_editar": "editarProductoPA.html",
+        "variable": "paproducto", "lista": "datatable",
+    },
+    "pc": {
+        "form_crear": PCProductosForm, "form_editar": DatatableProductosPCForm,
+        "plantilla_crear": "crearProductoPC.html", "plantilla_editar": "editarProductoPC.html",
+        "variable": "pcproducto", "lista": "datatable",
+    },
+    "ps": {
+        "form_crear": PSProductosForm, "form_editar": DatatableProductosPSForm,
+        "plantilla_crear": "crearProductoPS.html", "plantilla_editar": "editarProductoPS.html",
+        "variable": "psproducto", "lista": "datatable",
+    },
+    "a": {
+        "form_crear": AProductosForm, "form_editar": DatatableProductosAForm,
+        "plantilla_crear": None, "plantilla_editar": "editarProductoA.html",
+        "variable": "aproducto", "lista": "datatable",
+    },
+    "p": {
+        "form_crear": ProductosRegistroForm, "form_editar": DatatableProductosForm,
+        "plantilla_crear": None, "plantilla_editar": None,
+        "variable": "producto", "lista": "datatable",
+    },
+    "snackp": {
+        "form_crear": SnackPProductosForm, "form_editar": DatatableSnackPForm,
+        "plantilla_crear": "crearSnackPerro.html", "plantilla_editar": "editarProductoSnackP.html",
+        "variable": "snackpproducto", "lista": "datatable",
+    },
+    "aga": {
+        "form_crear": AGAProductosForm, "form_editar": DatatableAGAForm,
+        "plantilla_crear": "crearAlimentoGA.html", "plantilla_editar": "editarProductoAGA.html",
+        "variable": "agaproducto", "lista": "datatable2",
+    },
+    "agc": {
+        "form_crear": AGCProductosForm, "form_editar": DatatableAGCForm,
+        "plantilla_crear": "crearAlimentoGC.html", "plantilla_editar": "editarProductoAGC.html",
+        "variable": "agcproducto", "lista": "datatable2",
+    },
+    "snackg": {
+        "form_crear": SnackGProductosForm, "form_editar": DatatableSnackGForm,
+        "plantilla_crear": "crearSnackGato.html", "plantilla_editar": "editarProductoSnackG.html",
+        "variable": "snackgproducto", "lista": "datatable2",
+    },
+    "ap": {
+        "form_crear": AntiparasitarioForm, "form_editar": DatatableAntiparasitarioForm,
+        "plantilla_crear": "crearAntiparasitario.html", "plantilla_editar": "editarProductoAntiparasitario.html",
+        "variable": "antiparasitario", "lista": "datatable3",
+    },
+    "shampoo": {
+        "form_crear": ShampooForm, "form_editar": DatatableShampooForm,
+        "plantilla_crear": "crearShampoo.html", "plantilla_editar": "editarProductoShampoo.html",
+        "variable": "shampoo", "lista": "datatable3",
+        "nombre": "shampoo", "etiqueta": "shampoo",
+    },
+    "med": {
+        "form_crear": MedicamentoForm, "form_editar": DatatableMedicamentoForm,
+        "plantilla_crear": "crearMedicamentos.html", "plantilla_editar": "editarProductoMedicamento.html",
+        "variable": "medicamento", "lista": "datatable3",
+        "nombre": "medicamento", "etiqueta": "medicamento",
+    },
+    "collar": {
+        "form_crear": CollarForm, "form_editar": DatatableCollarForm,
+        "plantilla_crear": "crearCollares.html", "plantilla_editar": "editarProductoCollar.html",
+        "variable": "collar", "lista": "datatable4", "nombre": "collar",
+    },
+    "cama": {
+        "form_crear": CamaForm, "form_editar": DatatableCamaForm,
+        "plantilla_crear": "crearCamas.html", "plantilla_editar": "editarProductoCama.html",
+        "variable": "cama", "lista": "datatable4", "nombre": "cama", "femenino": True,
+    },
+    "juguete": {
+        "form_crear": JugueteForm, "form_editar": DatatableJugueteForm,
+        "plantilla_crear": "crearJuguetes.html", "plantilla_editar": "editarProductoJuguete.html",
+        "variable": "juguete", "lista": "datatable4", "nombre": "juguete",
+    },
+}
+
+
+class ProductoAdminMixin:
+    """Toma el tipo de la URL y carga su modelo y su configuración de ADMIN_PRODUCTOS."""
+    plantilla = None  # "plantilla_crear" o "plantilla_editar"
+    accion = None     # "form_crear" o "form_editar"
+
+    def dispatch(self, request, *args, **kwargs):
+        self.tipo = kwargs["tipo"]
+        self.config = ADMIN_PRODUCTOS[self.tipo]
+        self.model = modelo_por_tipo(self.tipo)
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_form_class(self):
+        return self.config[self.accion]
+
+    def get_template_names(self):
+        plantilla = self.config[self.plantilla]
+        if plantilla is None:
+            raise Http404("Este tipo de producto no tiene formulario para esta acción.")
+        return [f"gestorProductos/{plantilla}"]
+
+    def get_success_url(self):
+        return reverse(self.config["lista"])
+
+    def mensaje(self, nivel, texto):
+        getattr(messages, nivel)(self.request, texto, extra_tags=self.config.get("etiqueta", ""))
+
+
+class CrearProductoView(ProductoAdminMixin, CreateView):
+    plantilla = "plantilla_crear"
+    accion = "form_crear"
+    extra_context = {"is_creating": True}
+
+    def form_valid(self, form):
+        respuesta = super().form_valid(form)
+        procesar_imagenes_producto(self.request, self.object, self.model)
+        nombre = self.config.get("nombre", "producto")
+        genero = "a" if self.config.get("femenino") else "o"
+        self.mensaje("success", f"{nombre.capitalize()} cread{genero} correctamente.")
+        return respuesta
+
+    def form_invalid(self, form):
+        articulo = "la" if self.config.get("femenino") else "el"
+        self.mensaje("error", f"Error al crear {articulo} {self.config.get('nombre', 'producto')}. Verifica los datos.")
+        return super().form_invalid(form)
+
+
+class EditarProductoView(ProductoAdminMixin, UpdateView):
+    plantilla = "plantilla_editar"
+    accion = "form_editar"
+    extra_context = {"is_creating": False}
+
+    def get_object(self, queryset=None):
+        # 'codigo' es único (con índice) en todas las tablas de productos
+        return get_object_or_404(self.model, codigo=self.kwargs["codigo"])
+
+    def get_context_object_name(self, obj):
+        return self.config["variable"]
+
+    def get_context_data(self, **kwargs):
+        kwargs["imagenes"] = obtener_imagenes_producto(self.object, self.model)
+        return super().get_context_data(**kwargs)
+
+    def form_valid(self, form):
+        respuesta = super().form_valid(form)
+        procesar_imagenes_producto(self.request, self.object, self.model)
+        messages.success(self.request, "Producto actualizado correctamente.")
+        return respuesta
+
+    def form_invalid(self, form):
+        messages.error(self.request, "Error al actualizar el producto.")
+        return super().form_invalid(form)
+
+
+class EliminarProductoView(ProductoAdminMixin, View):
+    # Solo POST (con token CSRF): los botones de las tablas y del panel envían un formulario
+    http_method_names = ["post"]
+
+    def post(self, request, tipo, codigo):
+        producto = self.model.objects.filter(codigo=codigo).first()
+        if producto is None:
+            messages.error(request, f"Producto con código {codigo} no encontrado.")
         else:
-            messages.error(request, "Error al crear el producto. Verifica los datos.")
-    return render(request, 'gestorProductos/crearProductoA.html', {'form': form})
-
-def SnackPerroRegistro(request):
-    form = SnackPProductosForm()
-    if request.method == "POST":
-        form = SnackPProductosForm(request.POST)
-        if form.is_valid():
-            form.save()
-            messages.success(request, "Producto creado correctamente.")
-            return redirect('datatable')  # Redirige al catálogo de perros
-        else:
-            messages.error(request, "Error al crear el producto. Verifica los datos.")
-    return render(request, 'gestorProductos/crearSnackPerro.html', {'form': form})
-
-def AlimentoGARegistro(request):
-    form = AGAProductosForm()
-    if request.method == "POST":
-        form = AGAProductosForm(request.POST)
-        if form.is_valid():
-            form.save()
-            messages.success(request, "Producto creado correctamente.")
-            return redirect('datatable2')  # Redirige al catálogo de gatos
-        else:
-            messages.error(request, "Error al crear el producto. Verifica los datos.")
-    return render(request, 'gestorProductos/crearAlimentoGA.html', {'form': form})
-
-def AlimentoGCRegistro(request):
-    form = AGCProductosForm()
-    if request.method == "POST":
-        form = AGCProductosForm(request.POST)
-        if form.is_valid():
-            form.save()
-            messages.success(request, "Producto creado correctamente.")
-            return redirect('datatable2')  # Redirige al catálogo de gatos
-        else:
-            messages.error(request, "Error al crear el producto. Verifica los datos.")
-    return render(request, 'gestorProductos/crearAlimentoGC.html', {'form': form})
-
-def SnackGatoRegistro(request):
-    form = SnackGProductosForm()
-    if request.method == "POST":
-        form = SnackGProductosForm(request.POST)
-        if form.is_valid():
-            form.save()
-            messages.success(request, "Producto creado correctamente.")
-            return redirect('datatable2')  # Redirige al catálogo de gatos
-        else:
-            messages.error(request, "Error al crear el producto. Verifica los datos.")
-    return render(request, 'gestorProductos/crearSnackGato.html', {'form': form})
-
-def antiparasitarioRegistro(request):
-    form = AntiparasitarioForm()
-    if request.method == "POST":
-        form = AntiparasitarioForm(request.POST)
-        if form.is_valid():
-            form.save()
-            messages.success(request, "Producto creado correctamente.")
-            return redirect('datatable3')  # Redirige al catálogo de medicamentos
-        else:
-            messages.error(request, "Error al crear el producto. Verifica los datos.")
-    return render(request, 'gestorProductos/crearAntiparasitario.html', {'form': form})
-
-def shampooRegistro(request):
-    # Usar la misma lógica que crear_shampoo para evitar duplicación
-    return crear_shampoo(request)
+            producto.delete()
+            messages.success(request, "Producto eliminado correctamente.")
+        return redirect(self.config["lista"])
+
+# Categoría que muestra el panel de inicio para cada tipo de producto
+CATEGORIAS_PANEL = {
+    'pa': 'Alimento Perro Adulto',
+    'pc': 'Alimento Perro Cachorro',
+    'ps': 'Alimento Perro Senior',
+    'aga': 'Alimento Gato Adulto',
+    'agc': 'Alimento Gato Cachorro',
+    'snackp': 'Snack Perro',
+    'snackg': 'Snack Gato',
+    'ap': 'Medicamento',
+    'med': 'Medicamento',
+    'shampoo': 'Accesorio',
+    'cama': 'Accesorio',
+    'collar': 'Accesorio',
+    'juguete': 'Accesorio',
+    'p': 'General',
+    'a': 'General',
+}
+
+
+def plantillas_url(nombre_url):
+    """
+    {tipo: URL con '{codigo}'} de una ruta 'nombre_url' con argumentos (tipo, codigo).
+    Permite armar las URLs de muchas filas con format() en lugar de llamar a reverse() por fila.
+    """
+    marcador = '__codigo__'
+    return {
+        tipo: reverse(nombre_url, args=[tipo, marcador]).replace(marcador, '{codigo}')
+        for tipo in MODELOS_PRODUCTO
+    }
 
-def medicamentosRegistro(request):
-    # Usar la misma lógica que crear_medicamentos para evitar duplicación
-    return crear_medicamentos(request)
 
-def camasRegistro(request):
-    form = CamaForm()
-    if request.method == "POST":
-        form = CamaForm(request.POST)
-        if form.is_valid():
-            form.save()
-            messages.success(request, "Producto creado correctamente.")
-            return redirect('datatable4')  # Redirige al catálogo de accesorios
-        else:
-            messages.error(request, "Error al crear el producto. Verifica los datos.")
-    return render(request, 'gestorProductos/crearCamas.html', {'form': form})
+def _filas_panel(filas):
+    """Filas de productos_union() con la categoría y las URLs de editar y eliminar."""
+    editar = plantillas_url('editar_producto')
+    eliminar = plantillas_url('eliminar_producto')
+    resultado = []
+    for fila in filas:
+        tipo = fila['tipo_producto']
+        codigo = quote(fila['codigo'], safe='')
+        resultado.append({
+            **fila,
+            'marca': fila['marca_producto'],
+            'categoria_nombre': CATEGORIAS_PANEL.get(tipo, 'Otros'),
+            # Los tipos sin formulario de edición no muestran el botón
+            'url_editar': editar[tipo].format(codigo=codigo) if ADMIN_PRODUCTOS[tipo]['plantilla_editar'] else '',
+            'url_eliminar': eliminar[tipo].format(codigo=codigo),
+        })
+    return resultado
 
-def collaresRegistro(request):
-    form = CollarForm()
-    if request.method == "POST":
-        form = CollarForm(request.POST)
-        if form.is_valid():
-            form.save()
-            messages.success(request, "Producto creado correctamente.")
-            return redirect('datatable4')  # Redirige al catálogo de accesorios
-        else:
-            messages.error(request, "Error al crear el producto. Verifica los datos.")
-    return render(request, 'gestorProductos/crearCollares.html', {'form': form})
-
-def juguetesRegistro(request):
-    form = JugueteForm()
-    if request.method == "POST":
-        form = JugueteForm(request.POST)
-        if form.is_valid():
-            form.save()
-            messages.success(request, "Producto creado correctamente.")
-            return redirect('datatable4')  # Redirige al catálogo de accesorios
-        else:
-            messages.error(request, "Error al crear el producto. Verifica los datos.")
-    return render(request, 'gestorProductos/crearJuguetes.html', {'form': form})
 
 # ========================================
 
 # ========================================
+@solo_lectura
 def home(request):
     # Si el usuario no está autenticado, redirigir al login
     if not request.user.is_authenticated:
@@ -1097,207 +491,37 @@ def home(request):
 
     # KPIs solo para superusuarios (admin)
     if request.user.is_superuser:
-        # Total productos
-        total_productos = (
-            Productos.objects.count() +
-            PCProductos.objects.count() +
-            PAProductos.objects.count() +
-            PSProductos.objects.count() +
-            AProductos.objects.count() +
-            AGAProductos.objects.count() +
-            AGCProductos.objects.count() +
-            SnackGProductos.objects.count() +
-            SnackPProductos.objects.count() +
-            Antiparasitario.objects.count() +
-            Medicamento.objects.count() +
-            Shampoo.objects.count() +
-            Cama.objects.count() +
-            Collar.objects.count() +
-            Juguete.objects.count()
-        )
-
-        # Total stock
-        total_stock = (
-            sum(Productos.objects.values_list('stock', flat=True)) +
-            sum(PCProductos.objects.values_list('stock', flat=True)) +
-            sum(PAProductos.objects.values_list('stock', flat=True)) +
-            sum(PSProductos.objects.values_list('stock', flat=True)) +
-            sum(AProductos.objects.values_list('stock', flat=True)) +
-            sum(AGAProductos.objects.values_list('stock', flat=True)) +
-            sum(AGCProductos.objects.values_list('stock', flat=True)) +
-            sum(SnackGProductos.objects.values_list('stock', flat=True)) +
-            sum(SnackPProductos.objects.values_list('stock', flat=True)) +
-            sum(Antiparasitario.objects.values_list('stock', flat=True)) +
-            sum(Medicamento.objects.values_list('stock', flat=True)) +
-            sum(Shampoo.objects.values_list('stock', flat=True)) +
-            sum(Cama.objects.values_list('stock', flat=True)) +
-            sum(Collar.objects.values_list('stock', flat=True)) +
-            sum(Juguete.objects.values_list('stock', flat=True))
-        )
-
-        # Valor inventario (suma precio * stock)
-        valor_inventario = (
-            sum(p.precio * p.stock for p in Productos.objects.all()) +
-            sum(p.precio * p.stock for p in PCProductos.objects.all()) +
-            sum(p.precio * p.stock for p in PAProductos.objects.all()) +
-            sum(p.precio * p.stock for p in PSProductos.objects.all()) +
-            sum(p.precio * p.stock for p in AProductos.objects.all()) +
-            sum(p.precio * p.stock for p in AGAProductos.objects.all()) +
-            sum(p.precio * p.stock for p in AGCProductos.objects.all()) +
-            sum(p.precio * p.stock for p in SnackGProductos.objects.all()) +
-            sum(p.precio * p.stock for p in SnackPProductos.objects.all()) +
-            sum(p.precio * p.stock for p in Antiparasitario.objects.all()) +
-            sum(p.precio * p.stock for p in Medicamento.objects.all()) +
-            sum(p.precio * p.stock for p in Shampoo.objects.all()) +
-            sum(p.precio * p.stock for p in Cama.objects.all()) +
-            sum(p.precio * p.stock for p in Collar.objects.all()) +
-            sum(p.precio * p.stock for p in Juguete.objects.all())
-        )
+        # Cantidad, stock y valor (precio * stock) de cada tabla en una sola consulta.
+        # Precio y stock son enteros (pesos chilenos), así que la suma se hace en SQL y es exacta.
+        totales = {
+            tipo: modelo.objects.aggregate(
+                productos=Count('id'),
+                unidades=Coalesce(Sum('stock'), 0),
+                valor=Coalesce(Sum(F('precio') * F('stock'), output_field=BigIntegerField()), 0),
+            )
+            for tipo, modelo in MODELOS_PRODUCTO.items()
+        }
+        total_productos = sum(t['productos'] for t in totales.values())
+        total_stock = sum(t['unidades'] for t in totales.values())
+        valor_inventario = sum(t['valor'] for t in totales.values())
 
         # Datos para gráficos
+        def contar(*tipos):
+            return sum(totales[tipo]['productos'] for tipo in tipos)
+
         categorias_count = {
-            'Alimentos_Perro': PAProductos.objects.count() + PCProductos.objects.count() + PSProductos.objects.count(),
-            'Alimentos_Gato': AGAProductos.objects.count() + AGCProductos.objects.count(),
-            'Snacks': SnackPProductos.objects.count() + SnackGProductos.objects.count(),
-            'Medicamentos': Antiparasitario.objects.count() + Medicamento.objects.count(),
-            'Accesorios': Shampoo.objects.count() + Cama.objects.count() + Collar.objects.count() + Juguete.objects.count(),
-            'Otros': Productos.objects.count() + AProductos.objects.count()
+            'Alimentos_Perro': contar('pa', 'pc', 'ps'),
+            'Alimentos_Gato': contar('aga', 'agc'),
+            'Snacks': contar('snackp', 'snackg'),
+            'Medicamentos': contar('ap', 'med'),
+            'Accesorios': contar('shampoo', 'cama', 'collar', 'juguete'),
+            'Otros': contar('p', 'a'),
         }
 
-        # Productos recientes (últimos 5 agregados)
-        productos_recientes = []
-        categorias_map = {
-            'PAProductos': 'Alimento Perro Adulto',
-            'PCProductos': 'Alimento Perro Cachorro',
-            'PSProductos': 'Alimento Perro Senior',
-            'AGAProductos': 'Alimento Gato Adulto',
-            'AGCProductos': 'Alimento Gato Cachorro',
-            'SnackPProductos': 'Snack Perro',
-            'SnackGProductos': 'Snack Gato',
-            'Antiparasitario': 'Medicamento',
-            'Medicamento': 'Medicamento',
-            'Shampoo': 'Accesorio',
-            'Cama': 'Accesorio',
-            'Collar': 'Accesorio',
-            'Juguete': 'Accesorio',
-            'Productos': 'General',
-            'AProductos': 'General'
-        }
-        
-        # Mapeo de modelos a URLs de editar y eliminar
-        # Formato: (nombre_modelo, (edit_url_name, edit_param_type, delete_url_name, delete_param_type))
-        urls_map = {
-            'Productos': ('editarProducto', 'id', 'eliminarProducto', 'codigo_int'),
-            'PCProductos': ('editarProductoPC', 'codigo', 'eliminarProductoPC', 'codigo'),
-            'PAProductos': ('editarProductoPA', 'codigo', 'eliminarProductoPA', 'codigo'),
-            'PSProductos': ('editarProductoPS', 'codigo', 'eliminarProductoPS', 'codigo'),
-            'AProductos': ('editarProductoA', 'codigo', 'eliminarProductoA', 'codigo'),
-            'AGAProductos': ('editarProductoAGA', 'codigo', 'eliminarProductoAGA', 'codigo'),
-            'AGCProductos': ('editarProductoAGC', 'codigo', 'eliminarProductoAGC', 'codigo'),
-            'SnackPProductos': ('editarProductoSnackP', 'codigo', 'eliminarProductoSnackP', 'codigo'),
-            'SnackGProductos': ('editarProductoSnackG', 'codigo', 'eliminarProductoSnackG', 'codigo'),
-            'Antiparasitario': ('editarProductoAntiparasitario', 'codigo', 'eliminarProductoAntiparasitario', 'codigo'),
-            'Medicamento': ('editarProductoMedicamento', 'codigo', 'eliminarProductoMedicamento', 'codigo'),
-            'Shampoo': ('editarProductoShampoo', 'codigo', 'eliminarProductoShampoo', 'codigo'),
-            'Cama': ('editarProductoCama', 'codigo', 'eliminarProductoCama', 'codigo'),
-            'Collar': ('editarProductoCollar', 'codigo', 'eliminarProductoCollar', 'codigo'),
-            'Juguete': ('editarProductoJuguete', 'codigo', 'eliminarProductoJuguete', 'codigo'),
-        }
-        
-        from django.urls import reverse
-        for model in [Productos, PCProductos, PAProductos, PSProductos, AProductos, AGAProductos, AGCProductos, SnackGProductos, SnackPProductos, Antiparasitario, Medicamento, Shampoo, Cama, Collar, Juguete]:
-            model_name = model.__name__
-            url_config = urls_map.get(model_name, (None, None, None, None))
-            edit_url_name, edit_param, delete_url_name, delete_param = url_config
-            
-            for producto in model.objects.order_by('-id')[:5]:
-                producto.categoria_nombre = categorias_map.get(model_name, 'Otros')
-                # Agregar URLs de editar y eliminar
-                if edit_url_name and delete_url_name:
-                    try:
-                        # Construir URL de editar
-                        if edit_param == 'id':
-                            producto.url_editar = reverse(edit_url_name, args=[producto.id])
-                        elif edit_param == 'codigo' and hasattr(producto, 'codigo'):
-                            producto.url_editar = reverse(edit_url_name, args=[producto.codigo])
-                        else:
-                            producto.url_editar = '#'
-                        
-                        # Construir URL de eliminar
-                        if delete_param == 'codigo_int' and hasattr(producto, 'codigo'):
-                            # Productos usa código como int en la URL pero el código puede ser string
-                            try:
-                                # Intentar convertir a int si es posible, si no usar el código tal cual
-                                codigo_int = int(producto.codigo)
-                                producto.url_eliminar = reverse(delete_url_name, args=[codigo_int])
-                            except (ValueError, TypeError):
-                                # Si no se puede convertir a int, usar el código como string (aunque la URL espera int)
-                                # Esto puede causar un error 404, pero es mejor que no tener URL
-                                try:
-                                    producto.url_eliminar = reverse(delete_url_name, args=[producto.codigo])
-                                except:
-                                    producto.url_eliminar = '#'
-                        elif delete_param == 'codigo' and hasattr(producto, 'codigo'):
-                            producto.url_eliminar = reverse(delete_url_name, args=[producto.codigo])
-                        else:
-                            producto.url_eliminar = '#'
-                    except Exception as e:
-                        # Si hay algún error al construir las URLs, usar '#'
-                        producto.url_editar = '#'
-                        producto.url_eliminar = '#'
-                else:
-                    producto.url_editar = '#'
-                    producto.url_eliminar = '#'
-                
-                productos_recientes.append(producto)
-
-        productos_recientes = sorted(productos_recientes, key=lambda x: x.id, reverse=True)[:5]
-        
-        # Productos con stock bajo (menos de 10 unidades) - más útil para gestión
-        productos_stock_bajo = []
-        for model in [Productos, PCProductos, PAProductos, PSProductos, AProductos, AGAProductos, AGCProductos, SnackGProductos, SnackPProductos, Antiparasitario, Medicamento, Shampoo, Cama, Collar, Juguete]:
-            model_name = model.__name__
-            url_config = urls_map.get(model_name, (None, None, None, None))
-            edit_url_name, edit_param, delete_url_name, delete_param = url_config
-            
-            for producto in model.objects.filter(stock__lt=10).order_by('stock')[:20]:  # Top 20 con menor stock
-                producto.categoria_nombre = categorias_map.get(model_name, 'Otros')
-                producto.modelo_nombre = model_name
-                
-                # Agregar URLs de editar y eliminar
-                if edit_url_name and delete_url_name:
-                    try:
-                        if edit_param == 'id':
-                            producto.url_editar = reverse(edit_url_name, args=[producto.id])
-                        elif edit_param == 'codigo' and hasattr(producto, 'codigo'):
-                            producto.url_editar = reverse(edit_url_name, args=[producto.codigo])
-                        else:
-                            producto.url_editar = '#'
-                        
-                        if delete_param == 'codigo_int' and hasattr(producto, 'codigo'):
-                            try:
-                                codigo_int = int(producto.codigo)
-                                producto.url_eliminar = reverse(delete_url_name, args=[codigo_int])
-                            except (ValueError, TypeError):
-                                try:
-                                    producto.url_eliminar = reverse(delete_url_name, args=[producto.codigo])
-                                except:
-                                    producto.url_eliminar = '#'
-                        elif delete_param == 'codigo' and hasattr(producto, 'codigo'):
-                            producto.url_eliminar = reverse(delete_url_name, args=[producto.codigo])
-                        else:
-                            producto.url_eliminar = '#'
-                    except Exception as e:
-                        producto.url_editar = '#'
-                        producto.url_eliminar = '#'
-                else:
-                    producto.url_editar = '#'
-                    producto.url_eliminar = '#'
-                
-                productos_stock_bajo.append(producto)
-        
-        # Ordenar por stock (menor primero)
-        productos_stock_bajo = sorted(productos_stock_bajo, key=lambda x: x.stock)[:20]
+        # Productos recientes (últimos 5 agregados) y con stock bajo (menos de 10 unidades):
+        # una consulta UNION ALL sobre las 15 tablas cada uno, ordenada y cortada en SQL
+        productos_recientes = _filas_panel(productos_union().order_by('-id')[:5])
+        productos_stock_bajo = _filas_panel(productos_union(Q(stock__lt=10)).order_by('stock', 'nombre')[:20])
 
         context = {
             'categorias': categorias,
@@ -1334,81 +558,69 @@ def guardar_producto(request):
 # =================================
 # VISTAS DE ALIMENTO Y SNACK GATO
 # =================================
+@condicion_pagina('aga')
 def alimentoGatoAData(request):
-    # Mostrar todos los productos sin límite
-    agaproductos = AGAProductos.objects.all().order_by()
-    agaproductos = agregar_imagenes_a_productos(agaproductos, AGAProductos)
-    return render(request, 'gestorProductos/alimentoGAdulto.html', {'agaproductos': agaproductos})
+    return render(request, 'gestorProductos/alimentoGAdulto.html', contexto_catalogo('aga', 'agaproductos'))
 
+@condicion_pagina('agc')
 def alimentoGatoCData(request):
-    # Mostrar todos los productos sin límite
-    agcproductos = AGCProductos.objects.all().order_by()
-    agcproductos = agregar_imagenes_a_productos(agcproductos, AGCProductos)
-    return render(request, 'gestorProductos/alimentoGCachorro.html', {'agcproductos': agcproductos})
+    return render(request, 'gestorProductos/alimentoGCachorro.html', contexto_catalogo('agc', 'agcproductos'))
 
+@condicion_pagina('snackg')
 def Snack_gato(request):
-    snackgproductos = SnackGProductos.objects.all().order_by()
-    snackgproductos = agregar_imagenes_a_productos(snackgproductos, SnackGProductos)
-    return render(request, 'gestorProductos/snackGato.html', {'snackgproductos': snackgproductos})
+    return render(request, 'gestorProductos/snackGato.html', contexto_catalogo('snackg', 'snackgproductos'))
 
 # ===========================
 # VISTAS DE SNACK PERRO
 # ===========================
 
+@condicion_pagina('snackp')
 def Snack_Perro(request):
-    snackpproductos = SnackPProductos.objects.all().order_by()
-    snackpproductos = agregar_imagenes_a_productos(snackpproductos, SnackPProductos)
-    return render(request, 'gestorProductos/snackPerro.html', {'snackpproductos': snackpproductos})
+    return render(request, 'gestorProductos/snackPerro.html', contexto_catalogo('snackp', 'snackpproductos'))
 
 # ===========================
 # VISTAS DE OTROS PRODUCTOS
 # ===========================
+@condicion_pagina('med')
 def medicamentos(request):
-    medicamento = Medicamento.objects.all().order_by()
-    medicamento = agregar_imagenes_a_productos(medicamento, Medicamento)
-    return render(request, 'gestorProductos/medicamentos.html', {'medicamento': medicamento})
+    return render(request, 'gestorProductos/Medicamentos.html', contexto_catalogo('med', 'medicamento'))
 
+@condicion_pagina('ap')
 def antiparasitarios(request):
-    antiparasitario = Antiparasitario.objects.all().order_by()
-    antiparasitario = agregar_imagenes_a_productos(antiparasitario, Antiparasitario)
-    return render(request, 'gestorProductos/antiparasitario.html', {'antiparasitario': antiparasitario})
+    return render(request, 'gestorProductos/antiparasitario.html', contexto_catalogo('ap', 'antiparasitario'))
 
 
+@condicion_pagina('shampoo')
 def shampoos(request):
-    shampoo = Shampoo.objects.all().order_by()
-    shampoo = agregar_imagenes_a_productos(shampoo, Shampoo)
-    return render(request, 'gestorProductos/shampoo.html', {'shampoo': shampoo})
+    return render(request, 'gestorProductos/shampoo.html', contexto_catalogo('shampoo', 'shampoo'))
 
+@condicion_pagina('cama')
 def camas(request):
-    cama = Cama.objects.all().order_by()
-    cama = agregar_imagenes_a_productos(cama, Cama)
-    return render(request, 'gestorProductos/camas.html', {'cama': cama})
+    return render(request, 'gestorProductos/camas.html', contexto_catalogo('cama', 'cama'))
 
+@condicion_pagina('collar')
 def collares(request):
-    collar = Collar.objects.all().order_by()
-    collar = agregar_imagenes_a_productos(collar, Collar)
-    return render(request, 'gestorProductos/collares.html', {'collar': collar})
+    return render(request, 'gestorProductos/collares.html', contexto_catalogo('collar', 'collar'))
 
+@condicion_pagina('juguete')
 def juguetes(request):
-    juguete = Juguete.objects.all().order_by()
-    juguete = agregar_imagenes_a_productos(juguete, Juguete)
-    return render(request, 'gestorProductos/juguetes.html', {'juguete': juguete})
+    return render(request, 'gestorProductos/juguetes.html', contexto_catalogo('juguete', 'juguete'))
 
 # ===========================
 # VISTAS DEL CARRITO
 # ===========================
 
 # --- VER CARRITO ---
+@never_cache
 def ver_carrito(request):
     if request.GET.get("clear") == "1":
-        if "carrito" in request.session:
-            del request.session["carrito"]
-            request.session.modified = True
+        if obtener_carrito(request):
+            vaciar_carrito(request)
             messages.success(request, "Carrito vaciado correctamente.")
         return redirect("ver_carrito")
 
-    carrito = request.session.get("carrito", {})
-    total = sum(item["subtotal"] for item in carrito.values())
+    carrito = lineas_carrito(request)
+    total = total_carrito(carrito)
 
     # Guardar la URL anterior si no viene del propio carrito
     url_anterior = request.META.get("HTTP_REFERER")
@@ -1425,11 +637,13 @@ def ver_carrito(request):
 
 # --- AGREGAR AL CARRITO ---
 
+@never_cache
 def agregar_carrito(request, tipo, producto_id):
     """
     Añade un producto al carrito guardado en session.
     URL: carrito/agregar/<str:tipo>/<int:producto_id>/
     Se espera un POST con campo 'cantidad'. Si no es POST, redirige atrás.
+    Con JavaScript, las páginas usan api_carrito_agregar en su lugar (static/js/carrito.js).
     """
     # Solo aceptar POST para añadir
     if request.method != "POST":
@@ -1437,71 +651,15 @@ def agregar_carrito(request, tipo, producto_id):
         referer = request.META.get("HTTP_REFERER") or '/'
         return redirect(referer)
 
-    # Mapeo de tipos (ajusta claves si usas otras abreviaciones)
-    modelos = {
-        "pa": PAProductos,
-        "pc": PCProductos,
-        "ps": PSProductos,
-        "a": AProductos,
-        "p": Productos,
-        "ap": Antiparasitario,
-        "aga": AGAProductos,
-        "agc": AGCProductos,
-        "snackp": SnackPProductos,
-        "snackg": SnackGProductos,
-        "med": Medicamento,
-        "shampoo": Shampoo,
-        "cama": Cama,
-        "collar": Collar,
-        "juguete": Juguete,
-    }
-
-    modelo = modelos.get(tipo)
+    modelo = modelo_por_tipo(tipo)
     if not modelo:
         messages.error(request, "Tipo de producto inválido.")
         # preferible volver a la página previa
         return redirect(request.META.get("HTTP_REFERER", "/"))
 
     producto = get_object_or_404(modelo, id=producto_id)
-
-    # obtener cantidad del POST (validar)
-    try:
-        cantidad = int(request.POST.get("cantidad", 1))
-        if cantidad < 1:
-            cantidad = 1
-    except (ValueError, TypeError):
-        cantidad = 1
-
-    # Obtener imagen principal del producto
-    imagenes = obtener_imagenes_producto(producto, modelo)
-    imagen_url = imagenes[0].url_imagen if imagenes else ""
-
-    # session cart
-    carrito = request.session.get("carrito", {})
-
-    # usar una key que incluya tipo para evitar colisiones entre modelos
-    key = f"{tipo}_{producto.id}"
-
-    precio_unit = float(producto.precio) if producto.precio is not None else 0.0
-
-    if key not in carrito:
-        carrito[key] = {
-            "tipo": tipo,
-            "id": producto.id,
-            "nombre": producto.nombre,
-            "precio": precio_unit,
-            "cantidad": cantidad,
-            "subtotal": round(precio_unit * cantidad, 2),
-            # Imagen desde ImagenProducto
-            "imagen": imagen_url,
-        }
-    else:
-        # sumar cantidad
-        carrito[key]["cantidad"] += cantidad
-        carrito[key]["subtotal"] = round(carrito[key]["cantidad"] * carrito[key]["precio"], 2)
-
-    request.session["carrito"] = carrito
-    request.session.modified = True
+    cantidad = leer_cantidad(request.POST.get("cantidad", 1))
+    agregar_al_carrito(request, tipo, producto.id, cantidad)
 
     messages.success(request, f"Se agregó {cantidad} x {producto.nombre} al carrito.")
 
@@ -1512,61 +670,35 @@ def agregar_carrito(request, tipo, producto_id):
     return redirect("vet_inicio")
 
 # --- ACTUALIZAR CANTIDADES ---
+@never_cache
 def actualizar_carrito(request):
     if request.method == "POST":
-        carrito = request.session.get("carrito", {})
-
-        for key in carrito.keys():
-            nueva_cantidad = int(request.POST.get(f"cantidad_{key}", 1))
-            carrito[key]["cantidad"] = nueva_cantidad
-            carrito[key]["subtotal"] = nueva_cantidad * carrito[key]["precio"]
-
-        request.session["carrito"] = carrito
+        for key in list(obtener_carrito(request)):
+            fijar_cantidad(request, key, leer_cantidad(request.POST.get(f"cantidad_{key}", 1)))
 
     return redirect("ver_carrito")
 
 # --- ACTUALIZAR CANTIDAD DE UN PRODUCTO (INCREMENTAR/DECREMENTAR) ---
+@never_cache
 def actualizar_cantidad_producto(request, key):
     """
     Actualiza la cantidad de un producto específico en el carrito.
     Espera un parámetro 'accion' que puede ser 'incrementar' o 'decrementar'.
     """
     from urllib.parse import unquote
-    
+
     if request.method == "POST":
-        carrito = request.session.get("carrito", {})
-        
         # Decodificar la key en caso de que esté codificada
-        key_decoded = unquote(key)
-        
-        if key_decoded in carrito:
-            accion = request.POST.get("accion", "incrementar")
-            
-            if accion == "incrementar":
-                carrito[key_decoded]["cantidad"] += 1
-            elif accion == "decrementar":
-                # No permitir cantidades menores a 1
-                if carrito[key_decoded]["cantidad"] > 1:
-                    carrito[key_decoded]["cantidad"] -= 1
-            
-            # Recalcular subtotal
-            carrito[key_decoded]["subtotal"] = round(carrito[key_decoded]["cantidad"] * carrito[key_decoded]["precio"], 2)
-            
-            request.session["carrito"] = carrito
-            request.session.modified = True
-    
+        accion = request.POST.get("accion", "incrementar")
+        cambiar_cantidad(request, unquote(key), -1 if accion == "decrementar" else 1)
+
     return redirect("ver_carrito")
 
 # --- ELIMINAR PRODUCTO ---
 
+@never_cache
 def eliminar_carrito(request, tipo, producto_id):
-    carrito = request.session.get("carrito", {})
-    key = f"{tipo}_{producto_id}"
-
-    if key in carrito:
-        del carrito[key]
-        request.session["carrito"] = carrito
-        request.session.modified = True
+    if eliminar_linea(request, clave_linea(tipo, producto_id)):
         messages.success(request, "Producto eliminado correctamente del carrito.")
     else:
         messages.error(request, "Producto no encontrado en el carrito.")
@@ -1574,17 +706,84 @@ def eliminar_carrito(request, tipo, producto_id):
     return redirect("ver_carrito")
 
 
+# ===========================
+# API DEL CARRITO (JSON)
+# ===========================
+# Mismas operaciones que las vistas anteriores, respondiendo la línea modificada y los
+# totales en lugar de redirigir. Las URLs repiten las de los formularios bajo carrito/api/.
+# Son vistas async: bajo ASGI no ocupan un worker mientras esperan la sesión o la base
+# de datos (ver las versiones 'a...' de carrito.py).
+
+async def _respuesta_carrito(request, clave=None, mensaje=None):
+    carrito = await alineas_carrito(request)
+    return JsonResponse({
+        "clave": clave,
+        "linea": carrito.get(clave) if clave else None,
+        "mensaje": mensaje,
+        **resumen_carrito(carrito),
+    })
+
+
+@never_cache
+@require_http_methods(["GET"])
+async def api_carrito(request):
+    carrito = await alineas_carrito(request)
+    return JsonResponse({
+        "items": [{"clave": clave, **linea} for clave, linea in carrito.items()],
+        **resumen_carrito(carrito),
+    })
+
+
+@never_cache
+@require_http_methods(["POST"])
+async def api_carrito_agregar(request, tipo, producto_id):
+    if not modelo_por_tipo(tipo):
+        return JsonResponse({"error": "Tipo de producto inválido."}, status=400)
+    # Mismos datos (en caché) que usa el carrito al mostrarse
+    producto = (await adatos_productos(tipo, [producto_id])).get(producto_id)
+    if producto is None:
+        return JsonResponse({"error": "Producto no encontrado."}, status=404)
+
+    cantidad = leer_cantidad(request.POST.get("cantidad", 1))
+    clave = await aagregar_al_carrito(request, tipo, producto_id, cantidad)
+    return await _respuesta_carrito(request, clave, f"Se agregó {cantidad} x {producto['nombre']} al carrito.")
+
+
+@never_cache
+@require_http_methods(["POST"])
+async def api_carrito_cantidad(request, key):
+    """POST 'cantidad' fija la cantidad; sin ella, 'accion' = incrementar | decrementar."""
+    if "cantidad" in request.POST:
+        encontrada = await afijar_cantidad(request, key, leer_cantidad(request.POST["cantidad"]))
+    else:
+        encontrada = await acambiar_cantidad(request, key, -1 if request.POST.get("accion") == "decrementar" else 1)
+    if not encontrada:
+        return JsonResponse({"error": "Producto no encontrado en el carrito."}, status=404)
+    return await _respuesta_carrito(request, key)
+
+
+@never_cache
+@require_http_methods(["POST"])
+async def api_carrito_eliminar(request, tipo, producto_id):
+    clave = clave_linea(tipo, producto_id)
+    if not await aeliminar_linea(request, clave):
+        return JsonResponse({"error": "Producto no encontrado en el carrito."}, status=404)
+    return await _respuesta_carrito(request, clave, "Producto eliminado correctamente del carrito.")
+
+
 # ===========================
 # CHECKOUT Y PROCESO DE COMPRA
 # ===========================
 
+@never_cache
 @login_required
 def procesar_checkout(request):
     """
     Procesa el formulario de checkout y simula el proceso de pago.
     En una implementación real, aquí se integraría con una pasarela de pago.
     """
-    carrito = request.session.get("carrito", {})
+    # Precios actuales de los productos, no los del momento en que se agregaron
+    carrito = lineas_carrito(request)
     
     # Validar que el carrito no esté vacío
     if not carrito:
@@ -1599,7 +798,7 @@ def procesar_checkout(request):
             datos_cliente = form.cleaned_data
             
             # Calcular total
-            total = sum(item["subtotal"] for item in carrito.values())
+            total = total_carrito(carrito)
             
             # En una implementación real, aquí se procesaría el pago con la pasarela
             # Por ahora, simulamos un proceso exitoso
@@ -1613,7 +812,7 @@ def procesar_checkout(request):
                 "ciudad": datos_cliente["ciudad"],
                 "codigo_postal": datos_cliente["codigo_postal"],
                 "metodo_pago": datos_cliente["metodo_pago"],
-                "total": float(total),
+                "total": total,
                 "carrito": carrito.copy(),  # Copia del carrito
             }
             
@@ -1624,8 +823,7 @@ def procesar_checkout(request):
             request.session["compra_datos"]["numero_orden"] = numero_orden
             
             # Vaciar el carrito después de procesar
-            del request.session["carrito"]
-            request.session.modified = True
+            vaciar_carrito(request)
             
             messages.success(request, f"¡Compra procesada exitosamente! Número de orden: {numero_orden}")
             return redirect("confirmar_compra")
@@ -1645,7 +843,7 @@ def procesar_checkout(request):
         form = CheckoutForm(initial=initial_data)
     
     # Calcular total para mostrar en el template
-    total = sum(item["subtotal"] for item in carrito.values())
+    total = total_carrito(carrito)
     
     return render(request, "gestorProductos/checkout.html", {
         "form": form,
@@ -1654,6 +852,7 @@ def procesar_checkout(request):
     })
 
 
+@never_cache
 @login_required
 def confirmar_compra(request):
     """
@@ -1688,68 +887,173 @@ def confirmar_compra(request):
 # ===========================
 # APIS
 # ===========================
-def api_perros_adulto(request):
-    productos = PAProductos.objects.filter()
-    data = list(productos.values())
-    return JsonResponse({"data": data})
-
-def api_perros_cachorro(request):
-    productos = PCProductos.objects.filter()
-    data = list(productos.values())
-    return JsonResponse({"data": data})
-
-def api_perros_senior(request):
-    productos = PSProductos.objects.filter()
-    data = list(productos.values())
-    return JsonResponse({"data": data})
-
-def api_perros_snacks(request):
-    productos = SnackPProductos.objects.filter()
-    data = list(productos.values())
-    return JsonResponse({"data": data})
-
-def api_gatos_adulto(request):
-    productos = AGAProductos.objects.filter()
-    data = list(productos.values())
-    return JsonResponse({"data": data})
-
-def api_gatos_cachorro(request):
-    productos = AGCProductos.objects.filter()
-    data = list(productos.values())
-    return JsonResponse({"data": data})
-
-def api_gatos_snacks(request):
-    productos = SnackGProductos.objects.filter()
-    data = list(productos.values())
-    return JsonResponse({"data": data})
-
-def api_antiparasitario(request):
-    productos = Antiparasitario.objects.filter()
-    return JsonResponse({"data": list(productos.values())})
-
-def api_shampoo(request):
-    productos = Shampoo.objects.filter()
-    return JsonResponse({"data": list(productos.values())})
-
-def api_medicamento(request):
-    productos = Medicamento.objects.filter()
-    return JsonResponse({"data": list(productos.values())})
-
-def api_collares(request):
-    productos = Collar.objects.filter()
-    return JsonResponse({"data": list(productos.values())})
-
-def api_camas(request):
-    productos = Cama.objects.filter()
-    return JsonResponse({"data": list(productos.values())})
-
-def api_juguetes(request):
-    productos = Juguete.objects.filter()
-    return JsonResponse({"data": list(productos.values())})
-
-def api_aproductos(request):
-    productos = AProductos.objects.filter()
-    return JsonResponse({"data": list(productos.values())})
+# Tablas (DataTables) de cada categoría. Son async: las filas se leen con el ORM async
+# y, bajo ASGI, la petición no ocupa un worker mientras espera a la base de datos.
+
+async def _respuesta_api(modelo):
+    return JsonResponse({"data": [fila async for fila in modelo.objects.values()]})
+
+@condicion_api('pa')
+@solo_lectura
+async def api_perros_adulto(request):
+    return await _respuesta_api(PAProductos)
+
+@condicion_api('pc')
+@solo_lectura
+async def api_perros_cachorro(request):
+    return await _respuesta_api(PCProductos)
+
+@condicion_api('ps')
+@solo_lectura
+async def api_perros_senior(request):
+    return await _respuesta_api(PSProductos)
+
+@condicion_api('snackp')
+@solo_lectura
+async def api_perros_snacks(request):
+    return await _respuesta_api(SnackPProductos)
+
+@condicion_api('aga')
+@solo_lectura
+async def api_gatos_adulto(request):
+    return await _respuesta_api(AGAProductos)
+
+@condicion_api('agc')
+@solo_lectura
+async def api_gatos_cachorro(request):
+    return await _respuesta_api(AGCProductos)
+
+@condicion_api('snackg')
+@solo_lectura
+async def api_gatos_snacks(request):
+    return await _respuesta_api(SnackGProductos)
+
+@condicion_api('ap')
+@solo_lectura
+async def api_antiparasitario(request):
+    return await _respuesta_api(Antiparasitario)
+
+@condicion_api('shampoo')
+@solo_lectura
+async def api_shampoo(request):
+    return await _respuesta_api(Shampoo)
+
+@condicion_api('med')
+@solo_lectura
+async def api_medicamento(request):
+    return await _respuesta_api(Medicamento)
+
+@condicion_api('collar')
+@solo_lectura
+async def api_collares(request):
+    return await _respuesta_api(Collar)
+
+@condicion_api('cama')
+@solo_lectura
+async def api_camas(request):
+    return await _respuesta_api(Cama)
+
+@condicion_api('juguete')
+@solo_lectura
+async def api_juguetes(request):
+    return await _respuesta_api(Juguete)
+
+@condicion_api('a')
+@solo_lectura
+async def api_aproductos(request):
+    return await _respuesta_api(AProductos)
+
+# ===========================
+# BÚSQUEDA GLOBAL DE PRODUCTOS
+# ===========================
+RESULTADOS_POR_PAGINA = 20
+MAXIMO_RESULTADOS_POR_PAGINA = 100
+
+# Columnas por las que DataTables puede ordenar (sin búsqueda activa)
+COLUMNAS_ORDENABLES = {'nombre', 'marca', 'stock', 'precio', 'codigo'}
+
+
+def _entero_param(valor, por_defecto, minimo=0, maximo=None):
+    try:
+        valor = int(valor)
+    except (TypeError, ValueError):
+        return por_defecto
+    valor = max(valor, minimo)
+    return min(valor, maximo) if maximo is not None else valor
+
+
+def _fila_busqueda(entrada):
+    return {
+        "id": entrada.producto_id,
+        "tipo": entrada.tipo,
+        "categoria": CATEGORIAS_PRODUCTO.get(entrada.tipo, entrada.tipo),
+        "codigo": entrada.codigo,
+        "nombre": entrada.nombre,
+        "marca": entrada.marca,
+        "precio": entrada.precio,
+        "stock": entrada.stock,
+    }
+
+
+@solo_lectura
+def buscar_productos(request):
+    """
+    Búsqueda en todos los catálogos de productos.
+    GET: q, tipo (opcional), pagina, por_pagina
+    Retorna resultados ordenados por relevancia y el conteo por categoría (facetas).
+
+    Si la petición trae el parámetro 'draw', responde con el protocolo
+    server-side de DataTables (start, length, search[value], order[0][...]).
+    """
+    tipo = request.GET.get("tipo") or None
+    if tipo and tipo not in CATEGORIAS_PRODUCTO:
+        return JsonResponse({"error": "Tipo de producto inválido."}, status=400)
+
+    if "draw" in request.GET:
+        consulta = request.GET.get("search[value]", "").strip()
+        resultados = buscar_en_indice(consulta, tipo)
+
+        if not consulta:
+            columna = request.GET.get(f"columns[{request.GET.get('order[0][column]', '')}][data]")
+            if columna in COLUMNAS_ORDENABLES:
+                prefijo = "-" if request.GET.get("order[0][dir]") == "desc" else ""
+                resultados = resultados.order_by(f"{prefijo}{columna}", "id")
+
+        inicio = _entero_param(request.GET.get("start"), 0)
+        cantidad = _entero_param(request.GET.get("length"), 10, minimo=1, maximo=MAXIMO_RESULTADOS_POR_PAGINA)
+        total = buscar_en_indice("", tipo).count()
+        filtrados = resultados.count() if consulta else total
+
+        return JsonResponse({
+            "draw": _entero_param(request.GET.get("draw"), 0),
+            "recordsTotal": total,
+            "recordsFiltered": filtrados,
+            "data": [_fila_busqueda(e) for e in resultados[inicio:inicio + cantidad]],
+        })
+
+    consulta = request.GET.get("q", "").strip()
+    por_pagina = _entero_param(
+        request.GET.get("por_pagina"), RESULTADOS_POR_PAGINA, minimo=1, maximo=MAXIMO_RESULTADOS_POR_PAGINA
+    )
+    pagina = _entero_param(request.GET.get("pagina"), 1, minimo=1)
+
+    resultados = buscar_en_indice(consulta, tipo)
+    total = resultados.count()
+    inicio = (pagina - 1) * por_pagina
+
+    return JsonResponse({
+        "q": consulta,
+        "tipo": tipo,
+        "pagina": pagina,
+        "por_pagina": por_pagina,
+        "total": total,
+        "resultados": [_fila_busqueda(e) for e in resultados[inicio:inicio + por_pagina]],
+        # Las facetas siempre cubren todas las categorías para poder cambiar de filtro
+        "facetas": [
+            {"tipo": t, "categoria": CATEGORIAS_PRODUCTO[t], "total": n}
+            for t, n in sorted(facetas(buscar_en_indice(consulta)).items(), key=lambda x: -x[1])
+        ],
+    })
 
 # Endpoint para agregar producto (POST) — usa csrftoken desde JS (recomendado)
 @require_http_methods(["POST"])
@@ -0,0 +1,105 @@
+"""
+Búsqueda indexada de pacientes (mascotas).
+
+Cada mascota guarda una clave normalizada (nombre, raza y propietario en
+minúsculas y sin tildes) y sus palabras en TerminoMascota. La búsqueda compara
+cada palabra de la consulta por prefijo contra el índice de 'termino', por lo
+que no necesita LIKE '%...%' ni JOIN con auth_user.
+
+La normalización es la misma que usa la búsqueda de productos.
+"""
+from django.db import transaction
+from django.db.models import Case, IntegerField, Value, When
+
+from gestorProductos.busqueda import normalizar, tokenizar
+from .models import Mascota, TerminoMascota
+
+
+MAXIMO_TERMINOS_CONSULTA = 4
+LARGO_CLAVE = Mascota._meta.get_field('clave_busqueda').max_length
+
+
+def clave_mascota(mascota, propietario=None):
+    """Construye la clave de búsqueda de una mascota: 'max labrador juanperez juan perez'."""
+    propietario = propietario or mascota.propietario
+    partes = [
+        mascota.nombre,
+        mascota.raza,
+        propietario.username,
+        propietario.first_name,
+        propietario.last_name,
+    ]
+    return ' '.join(normalizar(p) for p in partes if p)[:LARGO_CLAVE]
+
+
+@transaction.atomic
+def indexar_terminos(mascota):
+    """Reemplaza los términos de búsqueda de la mascota según su clave actual."""
+    TerminoMascota.objects.filter(mascota=mascota).delete()
+    TerminoMascota.objects.bulk_create([
+        TerminoMascota(termino=termino, mascota=mascota)
+        for termino in set(tokenizar(mascota.clave_busqueda))
+    ])
+
+
+def reindexar_propietario(propietario):
+    """Recalcula clave y términos de todas las mascotas de un propietario (p. ej. al cambiar su username)."""
+    for mascota in Mascota.objects.filter(propietario=propietario):
+        clave = clave_mascota(mascota, propietario)
+        if clave != mascota.clave_busqueda:
+            Mascota.objects.filter(pk=mascota.pk).update(clave_busqueda=clave)
+            mascota.clave_busqueda = clave
+            indexar_terminos(mascota)
+
+
+def reindexar_mascotas(tamano_lote=1000):
+    """Recalcula clave y términos de todas las mascotas. Retorna la cantidad procesada."""
+    total = 0
+    mascotas = Mascota.objects.select_related('propietario').order_by('pk')
+    with transaction.atomic():
+        TerminoMascota.objects.all().delete()
+        lote_terminos = []
+        for mascota in mascotas.iterator(chunk_size=tamano_lote):
+            clave = clave_mascota(mascota)
+            if clave != mascota.clave_busqueda:
+                Mascota.objects.filter(pk=mascota.pk).update(clave_busqueda=clave)
+            lote_terminos.extend(
+                TerminoMascota(termino=termino, mascota_id=mascota.pk)
+                for termino in set(tokenizar(clave))
+            )
+            if len(lote_terminos) >= tamano_lote:
+                TerminoMascota.objects.bulk_create(lote_terminos)
+                lote_terminos = []
+            total += 1
+        TerminoMascota.objects.bulk_create(lote_terminos)
+    return total
+
+
+def buscar_mascotas(consulta, mascotas=None):
+    """
+    Filtra mascotas cuyo nombre, raza o propietario contenga palabras que
+    empiecen con cada término de la consulta.
+
+    Las mascotas cuya clave completa empieza con la consulta (normalmente
+    el nombre) aparecen primero.
+    """
+    if mascotas is None:
+        mascotas = Mascota.objects.all()
+
+    terminos = tokenizar(consulta)[:MAXIMO_TERMINOS_CONSULTA]
+    if not terminos:
+        return mascotas
+
+    # Un subconsulta por término: cada una es un rango sobre el índice de 'termino'
+    for termino in terminos:
+        mascotas = mascotas.filter(
+            id__in=TerminoMascota.objects.filter(termino__startswith=termino).values('mascota_id')
+        )
+
+    return mascotas.annotate(
+        coincide_inicio=Case(
+            When(clave_busqueda__startswith=' '.join(terminos), then=Value(0)),
+            default=Value(1),
+            output_field=IntegerField(),
+        )
+    ).order_by('coincide_inicio', '-fecha_registro')
@@ -0,0 +1,66 @@
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.contrib.auth.views import redirect_to_login
+from django.shortcuts import redirect
+
+from .roles import usuario_es_veterinario
+
+
+def es_vet_request(request):
+    """Rol de veterinario de la petición (usa request.is_vet si el middleware está activo)."""
+    es_vet = getattr(request, 'is_vet', None)
+    if es_vet is None:
+        es_vet = request.is_vet = usuario_es_veterinario(request.user)
+    return bool(es_vet)
+
+
+def login_requerido(vista):
+    """
+    @login_required que también acepta vistas async (el de Django 5.0 solo
+    envuelve vistas síncronas). En las async el usuario se obtiene con
+    request.auser(), sin bloquear el event loop.
+    """
+    if not iscoroutinefunction(vista):
+        return login_required(vista)
+
+    @wraps(vista)
+    async def envoltura_async(request, *args, **kwargs):
+        usuario = await request.auser()
+        if not usuario.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await vista(request, *args, **kwargs)
+    return envoltura_async
+
+
+def vet_required(vista):
+    """
+    Decorador para vistas del sistema veterinario.
+
+    Si el usuario no es veterinario, muestra un mensaje de error y lo redirige
+    al dashboard de veterinario. Usar junto con @login_required (o
+    @login_requerido si la vista es async):
+
+        @login_required
+        @vet_required
+        def mi_vista(request): ...
+    """
+    if iscoroutinefunction(vista):
+        @wraps(vista)
+        async def envoltura_async(request, *args, **kwargs):
+            # El rol se consulta en la base o en la caché: fuera del event loop
+            if not await sync_to_async(es_vet_request)(request):
+                await sync_to_async(messages.error)(request, "No tienes permisos para acceder a esta sección.")
+                return redirect('vet_veterinario')
+            return await vista(request, *args, **kwargs)
+        return envoltura_async
+
+    @wraps(vista)
+    def envoltura(request, *args, **kwargs):
+        if not es_vet_request(request):
+            messages.error(request, "No tienes permisos para acceder a esta sección.")
+            return redirect('vet_veterinario')
+        return vista(request, *args, **kwargs)
+    return envoltura
@@ -0,0 +1,77 @@
+"""
+Contadores del dashboard de veterinario.
+
+Se calculan con una sola consulta de agregación condicional por tabla y se
+guardan en la caché por unos segundos. Cualquier cambio en Consulta, CitaMedica
+o Mascota invalida la caché (ver signals.py), así que los números se mantienen
+al día aunque el dashboard se cargue constantemente.
+"""
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import CitaMedica, Consulta, Mascota
+
+
+# La clínica es una sola: una clave por día (al cambiar de día se recalcula sola)
+PREFIJO_CLAVE_DASHBOARD = 'dashboard_vet:contadores'
+
+
+def duracion_cache_dashboard():
+    return getattr(settings, 'VET_DASHBOARD_CACHE_SEGUNDOS', 30)
+
+
+def rango_del_dia(fecha=None):
+    """
+    Retorna (inicio, fin) del día local como datetimes con zona horaria.
+    Filtrar con fecha_consulta__gte/__lt usa el índice del campo, a diferencia
+    de fecha_consulta__date, que aplica una función a cada fila.
+    """
+    fecha = fecha or timezone.localdate()
+    inicio = timezone.make_aware(datetime.combine(fecha, time.min))
+    fin = timezone.make_aware(datetime.combine(fecha + timedelta(days=1), time.min))
+    return inicio, fin
+
+
+def clave_dashboard(fecha):
+    return f'{PREFIJO_CLAVE_DASHBOARD}:{fecha.isoformat()}'
+
+
+def calcular_contadores(fecha=None):
+    """Calcula los contadores del dashboard: una consulta por tabla."""
+    fecha = fecha or timezone.localdate()
+    inicio, fin = rango_del_dia(fecha)
+
+    # El WHERE limita la agregación a las filas que cuentan (índice de fecha_consulta
+    # y de estado); sin él se recorrería toda la tabla
+    consultas = Consulta.objects.filter(
+        Q(fecha_consulta__gte=inicio, fecha_consulta__lt=fin) | Q(estado='pendiente')
+    ).aggregate(
+        consultas_hoy=Count('id', filter=Q(fecha_consulta__gte=inicio, fecha_consulta__lt=fin)),
+        consultas_pendientes=Count('id', filter=Q(estado='pendiente')),
+    )
+    return {
+        'total_pacientes': Mascota.objects.filter(activa=True).count(),
+        'consultas_hoy': consultas['consultas_hoy'],
+        'consultas_pendientes': consultas['consultas_pendientes'],
+        'citas_hoy': CitaMedica.objects.filter(fecha=fecha).count(),
+    }
+
+
+def contadores_dashboard():
+    """Retorna los contadores del dashboard desde la caché, calculándolos si no están."""
+    fecha = timezone.localdate()
+    clave = clave_dashboard(fecha)
+    contadores = cache.get(clave)
+    if contadores is None:
+        contadores = calcular_contadores(fecha)
+        cache.set(clave, contadores, duracion_cache_dashboard())
+    return contadores
+
+
+def invalidar_contadores_dashboard():
+    """Descarta los contadores cacheados del día actual."""
+    cache.delete(clave_dashboard(timezone.localdate()))
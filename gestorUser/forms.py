@@ -5,6 +5,7 @@ from .models import (
 )
 from django.forms.widgets import DateInput, TimeInput
 from django.contrib.auth.models import User
+from django.urls import reverse_lazy
 from datetime import time
 
 class CitaMedicaForm(forms.ModelForm):
@@ -31,13 +32,20 @@ class CitaMedicaForm(forms.ModelForm):
     
     4. Validación en tiempo real:
        - El template incluye JavaScript para validación del lado del cliente
+    
+    5. Mascota registrada:
+       - Recibe el usuario que agenda (usuario=request.user) y ofrece sus
+         mascotas activas en el campo 'paciente'
+       - Al elegir una, el nombre y el tipo se copian de la mascota
+       - Si se escribe el nombre de una de sus mascotas, la cita se vincula a ella
     """
     class Meta:
         model = CitaMedica
-        fields = ['mascota', 'tipo_mascota', 'titular', 'fecha', 'hora', 'motivo']
+        fields = ['paciente', 'mascota', 'tipo_mascota', 'titular', 'fecha', 'hora', 'motivo']
         
         # Labels descriptivos para cada campo
         labels = {
+            'paciente': 'Mi Mascota',
             'mascota': 'Nombre de Mascota',
             'tipo_mascota': 'Tipo de Mascota',
             'titular': 'Nombre del Titular',
@@ -48,6 +56,9 @@ class CitaMedicaForm(forms.ModelForm):
         
         # Widgets personalizados con estilos Bootstrap y atributos HTML5
         widgets = {
+            'paciente': forms.Select(attrs={
+                'class': 'form-select',
+            }),
             'mascota': forms.TextInput(attrs={
                 'class': 'form-control',
                 'placeholder': 'Ingrese el nombre de su mascota',
@@ -79,11 +90,16 @@ class CitaMedicaForm(forms.ModelForm):
             }),
         }
     
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, usuario=None, **kwargs):
         """
         Inicialización del formulario con configuraciones dinámicas.
         
+        Parámetros:
+            usuario: Usuario que agenda la cita; sus mascotas activas se
+                     ofrecen en el campo 'paciente'
+        
         Establece:
+        - Mascotas registradas del usuario
         - Campos obligatorios vs opcionales
         - Fecha mínima (hoy) para evitar citas pasadas
         - Horas disponibles (9am-6pm, intervalos de 1 hora)
@@ -102,6 +118,22 @@ class CitaMedicaForm(forms.ModelForm):
         self.fields['titular'].required = False
         self.fields['motivo'].required = False
         
+        # ========== MASCOTAS REGISTRADAS ==========
+        # Solo las mascotas activas del usuario que agenda
+        if usuario is not None and usuario.is_authenticated:
+            mascotas = Mascota.objects.filter(propietario=usuario, activa=True).order_by('nombre')
+        else:
+            mascotas = Mascota.objects.none()
+        self.fields['paciente'].queryset = mascotas
+        self.fields['paciente'].required = False
+        self.fields['paciente'].empty_label = 'Otra mascota (escribir el nombre)...'
+        self.tiene_mascotas = mascotas.exists()
+        if self.tiene_mascotas:
+            # Nombre y tipo se toman de la mascota elegida; se validan en clean()
+            for campo in ('mascota', 'tipo_mascota'):
+                self.fields[campo].required = False
+                self.fields[campo].widget.attrs.pop('required', None)
+        
         # ========== FECHA MÍNIMA ==========
         # Establecer la fecha mínima como hoy para evitar seleccionar fechas pasadas
         from django.utils import timezone
@@ -180,6 +212,26 @@ class CitaMedicaForm(forms.ModelForm):
         fecha = cleaned_data.get('fecha')
         hora = cleaned_data.get('hora')
         
+        # ========== MASCOTA REGISTRADA ==========
+        paciente = cleaned_data.get('paciente')
+        nombre = (cleaned_data.get('mascota') or '').strip()
+        if paciente is None and nombre:
+            # Vincular si el nombre escrito es el de una (y solo una) de sus mascotas
+            coincidencias = list(self.fields['paciente'].queryset.filter(nombre__iexact=nombre)[:2])
+            if len(coincidencias) == 1:
+                paciente = cleaned_data['paciente'] = coincidencias[0]
+        if paciente is not None:
+            cleaned_data['mascota'] = paciente.nombre
+            cleaned_data['tipo_mascota'] = paciente.tipo_mascota
+            # Si el select de tipo no viene en el POST, construct_instance deja el
+            # valor por defecto ('otro'); se asigna también en la instancia
+            self.instance.tipo_mascota = paciente.tipo_mascota
+        elif self.tiene_mascotas:
+            if not nombre:
+                self.add_error('mascota', 'Seleccione una de sus mascotas o escriba el nombre.')
+            if not cleaned_data.get('tipo_mascota'):
+                self.add_error('tipo_mascota', 'Este campo es obligatorio.')
+        
         # Solo validar si ambos campos están presentes
         if fecha and hora:
             from django.utils import timezone
@@ -568,6 +620,47 @@ class FichaClinicaForm(forms.ModelForm):
         return ficha
 
 
+class SelectMascotaRemoto(forms.Select):
+    """
+    Select de mascotas que solo renderiza la opción elegida (y la vacía).
+    Las demás se buscan al escribir con vet_pacientes_api (static/js/select_remoto.js),
+    así que el HTML y el costo de renderizar no crecen con la cantidad de
+    pacientes. Al validar, ModelChoiceField busca solo el id enviado.
+    """
+
+    def __init__(self, attrs=None):
+        super().__init__(attrs={
+            'class': 'form-select',
+            'data-select-remoto': reverse_lazy('vet_pacientes_api'),
+            'data-placeholder': 'Buscar por nombre, raza o propietario...',
+            **(attrs or {}),
+        })
+
+    def _ids_validos(self, valores):
+        """Los ids enviados que son números; uno inválido ya lo reporta el campo al validar."""
+        campo_pk = self.choices.queryset.model._meta.pk
+        ids = []
+        for valor in valores:
+            if not valor:
+                continue
+            try:
+                ids.append(campo_pk.to_python(valor))
+            except forms.ValidationError:
+                continue
+        return ids
+
+    def optgroups(self, name, value, attrs=None):
+        elegidas = self._ids_validos(value)
+        opciones = [self.create_option(name, '', self.choices.field.empty_label or '', not elegidas, 0)]
+        if elegidas:
+            mascotas = self.choices.queryset.filter(pk__in=elegidas).select_related('propietario')
+            for indice, mascota in enumerate(mascotas, 1):
+                opciones.append(self.create_option(
+                    name, mascota.pk, self.choices.field.label_from_instance(mascota), True, indice
+                ))
+        return [(None, opciones, 0)]
+
+
 class ConsultaForm(forms.ModelForm):
     class Meta:
         model = Consulta
@@ -576,21 +669,22 @@ class ConsultaForm(forms.ModelForm):
             'estado', 'costo', 'pagada', 'fecha_consulta'
         ]
         widgets = {
-            'mascota': forms.Select(attrs={'class': 'form-select'}),
+            # Solo la mascota elegida; las demás se buscan con vet_pacientes_api
+            'mascota': SelectMascotaRemoto(),
             'motivo': forms.Textarea(attrs={'class': 'form-control', 'rows': 3}),
             'sintomas': forms.Textarea(attrs={'class': 'form-control', 'rows': 4}),
             'diagnostico': forms.Textarea(attrs={'class': 'form-control', 'rows': 4}),
             'tratamiento': forms.Textarea(attrs={'class': 'form-control', 'rows': 4}),
             'observaciones': forms.Textarea(attrs={'class': 'form-control', 'rows': 4}),
             'estado': forms.Select(attrs={'class': 'form-select'}),
-            'costo': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01'}),
+            'costo': forms.NumberInput(attrs={'class': 'form-control', 'step': '1'}),
             'pagada': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
             'fecha_consulta': forms.DateTimeInput(attrs={'type': 'datetime-local', 'class': 'form-control'}),
         }
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        # Filtrar solo mascotas activas
+        # Filtrar solo mascotas activas (al validar se consulta solo el id enviado)
         if 'mascota' in self.fields:
             self.fields['mascota'].queryset = Mascota.objects.filter(activa=True)
 
@@ -0,0 +1,210 @@
+"""
+Vinculación de prescripciones y egresos con los productos del catálogo.
+
+Prescripcion.medicamento y EgresoMedicamento.medicamento son texto libre. Para
+reportar consumo y cuadrar el stock cada línea guarda además el producto del
+inventario veterinario (Medicamento o Antiparasitario) al que corresponde, en
+producto_tipo/producto_id (mismo esquema que Carrito e ImagenProducto).
+
+El texto se compara con una clave normalizada (minúsculas, sin tildes y solo
+letras y números: 'Amoxicilina 500 mg' -> 'amoxicilina500mg'):
+
+1. Si coincide con el código de un producto, se usa ese producto.
+2. Si no, se busca por nombre; solo se vincula si hay un único producto con
+   ese nombre. Los nombres repetidos se dejan sin vincular.
+
+Lo usan las vistas de recetas y egresos al guardar (una línea, con consultas
+por código y nombre), el comando vincular_medicamentos (líneas antiguas, con
+el índice en memoria) y el comando reporte_medicamentos.
+"""
+import re
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth
+
+from gestorProductos.busqueda import normalizar
+from gestorProductos.catalogo import modelo_por_tipo
+
+from .models import EgresoMedicamento, Prescripcion
+
+
+# Tipos de catalogo.py que forman el inventario veterinario
+TIPOS_INVENTARIO = ('med', 'ap')
+
+
+def clave_medicamento(texto):
+    """'Amoxicilina 500 mg' -> 'amoxicilina500mg'."""
+    return ''.join(re.split(r'[^0-9a-z]+', normalizar(texto)))
+
+
+class IndiceProductos:
+    """
+    Códigos y nombres del inventario veterinario en memoria, para vincular
+    muchas líneas sin una consulta por línea. Se construye con una consulta
+    por tipo de producto.
+    """
+
+    def __init__(self):
+        self.por_codigo = {}
+        self.por_nombre = {}
+        for tipo in TIPOS_INVENTARIO:
+            modelo = modelo_por_tipo(tipo)
+            content_type = ContentType.objects.get_for_model(modelo)
+            for producto_id, codigo, nombre in modelo.objects.values_list('id', 'codigo', 'nombre'):
+                destino = (content_type, producto_id)
+                if clave_medicamento(codigo):
+                    self.por_codigo[clave_medicamento(codigo)] = destino
+                self.por_nombre.setdefault(clave_medicamento(nombre), []).append(destino)
+
+    def buscar(self, texto):
+        """
+        (content_type, producto_id) que corresponde al texto, o None.
+        Retorna 'ambiguo' si el nombre coincide con más de un producto.
+        """
+        clave = clave_medicamento(texto)
+        if not clave:
+            return None
+        if clave in self.por_codigo:
+            return self.por_codigo[clave]
+        candidatos = self.por_nombre.get(clave, [])
+        if len(candidatos) > 1:
+            return 'ambiguo'
+        return candidatos[0] if candidatos else None
+
+
+def buscar_producto(texto):
+    """
+    Producto del inventario veterinario para el texto de una sola línea, o
+    None. Consulta directamente los índices de codigo y nombre en lugar de
+    cargar el inventario: primero el código exacto (una consulta por tipo) y
+    luego el nombre sin distinguir mayúsculas, solo si hay un único producto
+    con ese nombre. Los textos con otra puntuación o espaciado los vincula
+    después el comando vincular_medicamentos (IndiceProductos).
+    """
+    texto = ' '.join((texto or '').split())
+    if not texto:
+        return None
+    modelos = [modelo_por_tipo(tipo) for tipo in TIPOS_INVENTARIO]
+    for modelo in modelos:
+        producto = modelo.objects.filter(codigo=texto).first()
+        if producto is not None:
+            return producto
+
+    candidatos = []
+    for modelo in modelos:
+        candidatos.extend(modelo.objects.filter(nombre__iexact=texto)[:2])
+        if len(candidatos) > 1:
+            return None
+    return candidatos[0] if candidatos else None
+
+
+def vincular_linea(linea, indice=None):
+    """
+    Asigna a una prescripción o egreso (sin guardar) el producto que corresponde
+    a su texto. Retorna el producto del catálogo o None si no hay uno único.
+
+    Sin 'indice' busca solo esa línea en la base (buscar_producto); el índice
+    en memoria es para vincular muchas líneas (vincular_lineas).
+    """
+    if indice is None:
+        producto = buscar_producto(linea.medicamento)
+    else:
+        resultado = indice.buscar(linea.medicamento)
+        if resultado is None or resultado == 'ambiguo':
+            return None
+        content_type, producto_id = resultado
+        producto = content_type.model_class().objects.filter(id=producto_id).first()
+    if producto is not None:
+        linea.producto = producto
+    return producto
+
+
+def vincular_lineas(modelo, lote=500, simular=False):
+    """
+    Vincula por lotes las líneas de 'modelo' (Prescripcion o EgresoMedicamento)
+    que aún no tienen producto. Retorna {'vinculadas', 'ambiguas', 'sin_coincidencia'}.
+    """
+    indice = IndiceProductos()
+    resultado = {'vinculadas': 0, 'ambiguas': 0, 'sin_coincidencia': 0}
+    ultimo_id = 0
+    while True:
+        # Paginación por id: las líneas vinculadas dejan de cumplir el filtro
+        lineas = list(
+            modelo.objects.filter(producto_id__isnull=True, id__gt=ultimo_id)
+            .order_by('id').only('id', 'medicamento')[:lote]
+        )
+        if not lineas:
+            break
+        ultimo_id = lineas[-1].id
+
+        actualizar = []
+        for linea in lineas:
+            encontrado = indice.buscar(linea.medicamento)
+            if encontrado is None:
+                resultado['sin_coincidencia'] += 1
+            elif encontrado == 'ambiguo':
+                resultado['ambiguas'] += 1
+            else:
+                linea.producto_tipo, linea.producto_id = encontrado
+                actualizar.append(linea)
+
+        if actualizar and not simular:
+            with transaction.atomic():
+                modelo.objects.bulk_update(actualizar, ['producto_tipo', 'producto_id'], batch_size=lote)
+        resultado['vinculadas'] += len(actualizar)
+    return resultado
+
+
+def consumo_mensual(desde=None):
+    """
+    Unidades recetadas y egresadas por producto y mes, de las líneas
+    vinculadas. Dos consultas GROUP BY (una por tabla, sobre los índices de
+    producto) más una por tipo de producto para los nombres.
+
+    Retorna una lista ordenada por mes y nombre de dicts con mes (date),
+    tipo, producto_id, codigo, nombre, recetado y egresado.
+    """
+    prescripciones = Prescripcion.objects.filter(producto_id__isnull=False)
+    egresos = EgresoMedicamento.objects.filter(producto_id__isnull=False)
+    if desde:
+        prescripciones = prescripciones.filter(receta__fecha_emision__gte=desde)
+        egresos = egresos.filter(fecha_egreso__gte=desde)
+
+    filas = {}
+    consultas = (
+        ('recetado', prescripciones.annotate(mes=TruncMonth('receta__fecha_emision'))),
+        ('egresado', egresos.annotate(mes=TruncMonth('fecha_egreso'))),
+    )
+    for columna, consulta in consultas:
+        agrupado = consulta.values('mes', 'producto_tipo', 'producto_id').annotate(unidades=Sum('cantidad')).order_by()
+        for grupo in agrupado:
+            mes = grupo['mes'].date() if hasattr(grupo['mes'], 'date') else grupo['mes']
+            clave = (mes, grupo['producto_tipo'], grupo['producto_id'])
+            fila = filas.setdefault(clave, {'recetado': 0, 'egresado': 0})
+            fila[columna] += grupo['unidades'] or 0
+
+    # Nombres y códigos: una consulta por tipo de producto presente
+    ids_por_tipo = {}
+    for _, content_type_id, producto_id in filas:
+        ids_por_tipo.setdefault(content_type_id, set()).add(producto_id)
+    productos = {}
+    for content_type_id, ids in ids_por_tipo.items():
+        modelo = ContentType.objects.get_for_id(content_type_id).model_class()
+        for producto in modelo.objects.filter(id__in=ids).only('id', 'codigo', 'nombre'):
+            productos[(content_type_id, producto.id)] = (modelo._meta.verbose_name, producto.codigo, producto.nombre)
+
+    resultado = []
+    for (mes, content_type_id, producto_id), unidades in filas.items():
+        tipo, codigo, nombre = productos.get((content_type_id, producto_id), ('', '', f'(eliminado #{producto_id})'))
+        resultado.append({
+            'mes': mes,
+            'tipo': tipo,
+            'producto_id': producto_id,
+            'codigo': codigo,
+            'nombre': nombre,
+            **unidades,
+        })
+    resultado.sort(key=lambda fila: (fila['mes'], fila['nombre'].lower()))
+    return resultado
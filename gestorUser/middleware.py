@@ -0,0 +1,27 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.utils.functional import SimpleLazyObject
+
+from .roles import usuario_es_veterinario
+
+
+class RolVeterinarioMiddleware:
+    """
+    Agrega request.is_vet: indica si el usuario actual es veterinario.
+
+    Es perezoso (solo se consulta si alguna vista lo usa) y se resuelve una sola
+    vez por petición. Debe ir después de AuthenticationMiddleware.
+    Funciona con WSGI y con ASGI: las vistas async deben resolverlo fuera del
+    event loop (ver vet_required).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        # En modo async get_response retorna una corrutina, que se entrega tal cual
+        request.is_vet = SimpleLazyObject(lambda: usuario_es_veterinario(request.user))
+        return self.get_response(request)
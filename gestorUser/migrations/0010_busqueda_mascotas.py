@@ -0,0 +1,78 @@
+# Generated by Django 5.0.1 on 2026-10-19 13:57
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Copia fija de gestorUser/busqueda.py (y de la normalización de
+# gestorProductos/busqueda.py) al crear el índice: la migración no debe
+# cambiar si después cambia ese código o el modelo Mascota.
+LARGO_CLAVE = 255
+LARGO_MAXIMO_TERMINO = 50
+PALABRAS_VACIAS = {'de', 'del', 'la', 'el', 'los', 'las', 'y', 'o', 'para', 'con', 'en', 'un', 'una', 'por'}
+TAMANO_LOTE = 1000
+
+
+def normalizar(texto):
+    texto = unicodedata.normalize('NFKD', str(texto or ''))
+    return ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+
+
+def tokenizar(texto):
+    return [
+        termino[:LARGO_MAXIMO_TERMINO]
+        for termino in re.split(r'[^0-9a-z]+', normalizar(texto))
+        if termino and termino not in PALABRAS_VACIAS
+    ]
+
+
+def poblar_claves_busqueda(apps, schema_editor):
+    mascota_modelo = apps.get_model('gestorUser', 'Mascota')
+    termino_mascota = apps.get_model('gestorUser', 'TerminoMascota')
+
+    lote_terminos = []
+    for mascota in mascota_modelo.objects.select_related('propietario').order_by('pk').iterator(chunk_size=TAMANO_LOTE):
+        propietario = mascota.propietario
+        partes = [mascota.nombre, mascota.raza, propietario.username, propietario.first_name, propietario.last_name]
+        clave = ' '.join(normalizar(p) for p in partes if p)[:LARGO_CLAVE]
+        if clave != mascota.clave_busqueda:
+            mascota_modelo.objects.filter(pk=mascota.pk).update(clave_busqueda=clave)
+        lote_terminos.extend(
+            termino_mascota(termino=termino, mascota_id=mascota.pk) for termino in set(tokenizar(clave))
+        )
+        if len(lote_terminos) >= TAMANO_LOTE:
+            termino_mascota.objects.bulk_create(lote_terminos)
+            lote_terminos = []
+    termino_mascota.objects.bulk_create(lote_terminos)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestorUser', '0009_cambiar_fecha_nacimiento_por_edad'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mascota',
+            name='clave_busqueda',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.CreateModel(
+            name='TerminoMascota',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('termino', models.CharField(max_length=50)),
+                ('mascota', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terminos_busqueda', to='gestorUser.mascota')),
+            ],
+            options={
+                'verbose_name': 'Término de Búsqueda de Mascota',
+                'verbose_name_plural': 'Términos de Búsqueda de Mascotas',
+                'unique_together': {('termino', 'mascota')},
+            },
+        ),
+        migrations.RunPython(poblar_claves_busqueda, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.0.1 on 2026-10-19 14:01
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestorUser', '0010_busqueda_mascotas'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='consulta',
+            name='fecha_consulta',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Fecha de Consulta'),
+        ),
+        migrations.AddIndex(
+            model_name='citamedica',
+            index=models.Index(fields=['fecha', 'hora'], name='cita_fecha_hora_idx'),
+        ),
+    ]
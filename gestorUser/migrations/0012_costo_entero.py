@@ -0,0 +1,25 @@
+# Generated by Django 5.0.1 on 2026-10-19 14:40
+
+from django.db import migrations, models
+from django.db.models.functions import Round
+
+
+def redondear_costos(apps, schema_editor):
+    # Pesos chilenos: se redondean antes de quitar los decimales
+    apps.get_model('gestorUser', 'Consulta').objects.update(costo=Round('costo'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestorUser', '0011_indices_fechas'),
+    ]
+
+    operations = [
+        migrations.RunPython(redondear_costos, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='consulta',
+            name='costo',
+            field=models.IntegerField(default=0, verbose_name='Costo de Consulta'),
+        ),
+    ]
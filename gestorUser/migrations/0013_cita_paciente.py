@@ -0,0 +1,25 @@
+# Generated by Django 5.0.1 on 2026-10-19 14:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestorUser', '0012_costo_entero'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='citamedica',
+            name='paciente',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='citas', to='gestorUser.mascota', verbose_name='Paciente'),
+        ),
+        migrations.AddIndex(
+            model_name='citamedica',
+            index=models.Index(fields=['paciente', 'fecha'], name='cita_paciente_fecha_idx'),
+        ),
+    ]
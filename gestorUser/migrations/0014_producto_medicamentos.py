@@ -0,0 +1,45 @@
+# Generated by Django 5.0.1 on 2026-10-19 14:48
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('gestorUser', '0013_cita_paciente'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='egresomedicamento',
+            name='producto_id',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='ID de Producto'),
+        ),
+        migrations.AddField(
+            model_name='egresomedicamento',
+            name='producto_tipo',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='contenttypes.contenttype', verbose_name='Tipo de Producto'),
+        ),
+        migrations.AddField(
+            model_name='prescripcion',
+            name='producto_id',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='ID de Producto'),
+        ),
+        migrations.AddField(
+            model_name='prescripcion',
+            name='producto_tipo',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='contenttypes.contenttype', verbose_name='Tipo de Producto'),
+        ),
+        migrations.AddIndex(
+            model_name='egresomedicamento',
+            index=models.Index(fields=['producto_tipo', 'producto_id', 'fecha_egreso'], name='egreso_producto_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='prescripcion',
+            index=models.Index(fields=['producto_tipo', 'producto_id'], name='prescripcion_producto_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.1 on 2026-10-19 15:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestorUser', '0014_producto_medicamentos'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='consulta',
+            index=models.Index(fields=['estado', 'fecha_consulta'], name='consulta_estado_fecha_idx'),
+        ),
+    ]
@@ -1,5 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 
@@ -14,6 +16,17 @@ class CitaMedica(models.Model):
     ]
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="citas")
     mascota = models.CharField(max_length=100, verbose_name='Nombre de Mascota')
+    # Mascota registrada a la que corresponde la cita. Es opcional porque las citas
+    # antiguas solo guardaban el nombre (ver el comando vincular_citas_mascotas) y
+    # porque un cliente puede agendar para una mascota que aún no está registrada.
+    paciente = models.ForeignKey(
+        'Mascota',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='citas',
+        verbose_name='Paciente'
+    )
     tipo_mascota = models.CharField(max_length=10, choices=TIPO_MASCOTA_CHOICES, default='otro', verbose_name='Tipo de Mascota')
     titular = models.CharField(max_length=100, blank=True, null=True)  # Owner's name
     fecha = models.DateField()
@@ -21,7 +34,12 @@ class CitaMedica(models.Model):
     motivo = models.TextField(blank=True, null=True)
 
     class Meta:
-        pass
+        # Búsquedas por día (dashboard, agenda) y validación de horas ocupadas
+        indexes = [
+            models.Index(fields=['fecha', 'hora'], name='cita_fecha_hora_idx'),
+            # Citas de una mascota ordenadas por fecha (detalle del paciente)
+            models.Index(fields=['paciente', 'fecha'], name='cita_paciente_fecha_idx'),
+        ]
 
     def clean(self):
         """Validación del modelo para citas médicas."""
@@ -225,6 +243,10 @@ class Mascota(models.Model):
     # Permite ocultar mascotas sin perder información médica
     activa = models.BooleanField(default=True, verbose_name='Activa')
     
+    # Clave de búsqueda normalizada (minúsculas, sin tildes) con nombre, raza y propietario
+    # Se recalcula automáticamente al guardar la mascota o al cambiar el propietario (ver busqueda.py)
+    clave_busqueda = models.CharField(max_length=255, blank=True, default='', db_index=True, editable=False)
+    
     class Meta:
         verbose_name = 'Mascota'
         verbose_name_plural = 'Mascotas'
@@ -234,6 +256,25 @@ class Mascota(models.Model):
         return f"{self.nombre} - {self.get_tipo_mascota_display()} de {self.propietario.username}"
 
 
+class TerminoMascota(models.Model):
+    """
+    Términos de búsqueda de una mascota (índice invertido).
+    
+    Cada palabra de la clave de búsqueda se guarda en una fila para poder buscar
+    por prefijo usando el índice de 'termino' ("max lab" encuentra "Max - Labrador").
+    """
+    termino = models.CharField(max_length=50)
+    mascota = models.ForeignKey(Mascota, on_delete=models.CASCADE, related_name='terminos_busqueda')
+    
+    class Meta:
+        verbose_name = 'Término de Búsqueda de Mascota'
+        verbose_name_plural = 'Términos de Búsqueda de Mascotas'
+        unique_together = ('termino', 'mascota')
+    
+    def __str__(self):
+        return f"{self.termino} -> {self.mascota_id}"
+
+
 class FichaClinica(models.Model):
     """
     Modelo para fichas clínicas de las mascotas.
@@ -357,7 +398,7 @@ class Consulta(models.Model):
     )
     
     # Fecha y hora de la consulta (por defecto: ahora)
-    fecha_consulta = models.DateTimeField(default=timezone.now, verbose_name='Fecha de Consulta')
+    fecha_consulta = models.DateTimeField(default=timezone.now, db_index=True, verbose_name='Fecha de Consulta')
     
     # Motivo de la consulta (obligatorio)
     motivo = models.TextField(verbose_name='Motivo de Consulta')
@@ -382,10 +423,8 @@ class Consulta(models.Model):
         verbose_name='Estado'
     )
     
-    # Costo de la consulta (por defecto: 0)
-    costo = models.DecimalField(
-        max_digits=10,      # Máximo 10 dígitos
-        decimal_places=2,   # 2 decimales (para centavos)
+    # Costo de la consulta en pesos chilenos, sin decimales (por defecto: 0)
+    costo = models.IntegerField(
         default=0, 
         verbose_name='Costo de Consulta'
     )
@@ -397,6 +436,8 @@ class Consulta(models.Model):
         verbose_name = 'Consulta'
         verbose_name_plural = 'Consultas'
         ordering = ['-fecha_consulta']
+        # Consultas pendientes (dashboard y filtro del listado), ordenadas por fecha
+        indexes = [models.Index(fields=['estado', 'fecha_consulta'], name='consulta_estado_fecha_idx')]
     
     def __str__(self):
         return f"Consulta de {self.mascota.nombre} - {self.fecha_consulta.strftime('%d/%m/%Y %H:%M')}"
@@ -428,10 +469,18 @@ class Prescripcion(models.Model):
     duracion = models.CharField(max_length=200, verbose_name='Duración')
     cantidad = models.PositiveIntegerField(default=1, verbose_name='Cantidad')
     notas = models.TextField(blank=True, null=True, verbose_name='Notas Adicionales')
+    # Producto del catálogo (Medicamento o Antiparasitario) que corresponde al texto
+    # de 'medicamento'. Opcional: puede recetarse algo que no está en el inventario.
+    # Se completa al guardar y con el comando vincular_medicamentos (ver medicamentos.py)
+    producto_tipo = models.ForeignKey(ContentType, on_delete=models.SET_NULL, null=True, blank=True, verbose_name='Tipo de Producto')
+    producto_id = models.PositiveIntegerField(null=True, blank=True, verbose_name='ID de Producto')
+    producto = GenericForeignKey('producto_tipo', 'producto_id')
     
     class Meta:
         verbose_name = 'Prescripción'
         verbose_name_plural = 'Prescripciones'
+        # Unidades recetadas por producto (reporte_medicamentos)
+        indexes = [models.Index(fields=['producto_tipo', 'producto_id'], name='prescripcion_producto_idx')]
     
     def __str__(self):
         return f"{self.medicamento} - {self.dosis}"
@@ -492,11 +541,17 @@ class EgresoMedicamento(models.Model):
     veterinario = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='egresos_realizados', verbose_name='Veterinario Responsable')
     motivo = models.TextField(verbose_name='Motivo del Egreso')
     paciente = models.CharField(max_length=200, blank=True, null=True, verbose_name='Paciente')
+    # Producto del catálogo al que se le descontó el stock (igual que en Prescripcion)
+    producto_tipo = models.ForeignKey(ContentType, on_delete=models.SET_NULL, null=True, blank=True, verbose_name='Tipo de Producto')
+    producto_id = models.PositiveIntegerField(null=True, blank=True, verbose_name='ID de Producto')
+    producto = GenericForeignKey('producto_tipo', 'producto_id')
     
     class Meta:
         verbose_name = 'Egreso de Medicamento'
         verbose_name_plural = 'Egresos de Medicamentos'
         ordering = ['-fecha_egreso']
+        # Unidades egresadas por producto y mes (reporte_medicamentos)
+        indexes = [models.Index(fields=['producto_tipo', 'producto_id', 'fecha_egreso'], name='egreso_producto_fecha_idx')]
     
     def __str__(self):
         return f"Egreso: {self.medicamento} - Cantidad: {self.cantidad} - {self.fecha_egreso.strftime('%d/%m/%Y')}"
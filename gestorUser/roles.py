@@ -0,0 +1,41 @@
+"""
+Rol de veterinario con caché.
+
+Saber si un usuario es veterinario requiere leer su VeterinarioProfile. Para no
+repetir esa consulta en cada vista, el resultado se guarda en la caché por unos
+segundos y se invalida cuando el perfil se guarda o se elimina (ver signals.py).
+Dentro de una misma petición, RolVeterinarioMiddleware lo resuelve una sola vez.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import VeterinarioProfile
+
+
+def duracion_cache_rol():
+    return getattr(settings, 'VET_ROL_CACHE_SEGUNDOS', 60)
+
+
+def clave_cache_rol(user_id):
+    return f'rol_veterinario:{user_id}'
+
+
+def usuario_es_veterinario(user):
+    """
+    Retorna True si el usuario tiene VeterinarioProfile con es_veterinario=True.
+    Usa la caché para evitar consultar el perfil en cada petición.
+    """
+    if not user.is_authenticated:
+        return False
+
+    clave = clave_cache_rol(user.pk)
+    es_vet = cache.get(clave)
+    if es_vet is None:
+        es_vet = VeterinarioProfile.objects.filter(user_id=user.pk, es_veterinario=True).exists()
+        cache.set(clave, es_vet, duracion_cache_rol())
+    return es_vet
+
+
+def invalidar_rol_veterinario(user_id):
+    """Olvida el rol guardado en la caché para que se vuelva a consultar."""
+    cache.delete(clave_cache_rol(user_id))
@@ -0,0 +1,65 @@
+"""
+Señales de gestorUser.
+
+- Mantienen actualizada la búsqueda de pacientes (ver busqueda.py): la clave
+  de la mascota se recalcula al guardarla y también cuando cambia el nombre
+  de usuario o el nombre del propietario.
+- Invalidan el rol de veterinario cacheado (ver roles.py) cuando cambia el perfil.
+- Invalidan los contadores del dashboard (ver estadisticas.py) cuando cambian
+  consultas, citas o mascotas.
+"""
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .busqueda import clave_mascota, indexar_terminos, reindexar_propietario
+from .estadisticas import invalidar_contadores_dashboard
+from .models import CitaMedica, Consulta, Mascota, VeterinarioProfile
+from .roles import invalidar_rol_veterinario
+
+
+CAMPOS_PROPIETARIO_BUSQUEDA = {'username', 'first_name', 'last_name'}
+
+
+@receiver(pre_save, sender=Mascota, dispatch_uid='mascota_clave_busqueda')
+def actualizar_clave_mascota(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    clave = clave_mascota(instance)
+    # Solo se reindexan los términos si la clave cambió (o si la mascota es nueva)
+    instance._reindexar_terminos = instance._state.adding or clave != instance.clave_busqueda
+    instance.clave_busqueda = clave
+
+
+@receiver(post_save, sender=Mascota, dispatch_uid='mascota_terminos_busqueda')
+def actualizar_terminos_mascota(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    if getattr(instance, '_reindexar_terminos', True):
+        indexar_terminos(instance)
+
+
+@receiver(post_save, sender=User, dispatch_uid='propietario_clave_busqueda')
+def actualizar_busqueda_propietario(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    # Un usuario nuevo no tiene mascotas; el login solo actualiza last_login
+    if raw or created:
+        return
+    if update_fields is not None and not CAMPOS_PROPIETARIO_BUSQUEDA.intersection(update_fields):
+        return
+    reindexar_propietario(instance)
+
+
+@receiver(post_save, sender=VeterinarioProfile, dispatch_uid='perfil_vet_guardado')
+@receiver(post_delete, sender=VeterinarioProfile, dispatch_uid='perfil_vet_eliminado')
+def invalidar_cache_rol(sender, instance, **kwargs):
+    invalidar_rol_veterinario(instance.user_id)
+
+
+@receiver(post_save, sender=Consulta, dispatch_uid='dashboard_consulta_guardada')
+@receiver(post_delete, sender=Consulta, dispatch_uid='dashboard_consulta_eliminada')
+@receiver(post_save, sender=CitaMedica, dispatch_uid='dashboard_cita_guardada')
+@receiver(post_delete, sender=CitaMedica, dispatch_uid='dashboard_cita_eliminada')
+@receiver(post_save, sender=Mascota, dispatch_uid='dashboard_mascota_guardada')
+@receiver(post_delete, sender=Mascota, dispatch_uid='dashboard_mascota_eliminada')
+def invalidar_dashboard(sender, **kwargs):
+    invalidar_contadores_dashboard()
@@ -1,3 +1,435 @@
+from datetime import date, timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .forms import CitaMedicaForm, ConsultaForm
+from gestorProductos.models import Antiparasitario, Medicamento
+
+from .busqueda import buscar_mascotas, reindexar_mascotas
+from .medicamentos import consumo_mensual, vincular_linea
+from .models import CitaMedica, Consulta, EgresoMedicamento, FichaClinica, Prescripcion, Receta, Mascota, TerminoMascota, Tratamiento, Vacuna, VeterinarioProfile
+from .estadisticas import contadores_dashboard
+from .roles import clave_cache_rol
+
+
+class HistorialPacienteTests(TestCase):
+    """El detalle del paciente y de la ficha debe usar las mismas consultas SQL sin importar el historial."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.veterinario = User.objects.create_user('vet_test', password='clave123')
+        VeterinarioProfile.objects.create(user=cls.veterinario, es_veterinario=True)
+        cls.propietario = User.objects.create_user('dueno_test', password='clave123')
+
+    def setUp(self):
+        self.client.force_login(self.veterinario)
+
+    def crear_paciente(self, cantidad_historial):
+        mascota = Mascota.objects.create(propietario=self.propietario, nombre='Firulais', tipo_mascota='perro')
+        ficha = FichaClinica.objects.create(mascota=mascota, veterinario=self.veterinario)
+        hoy = date.today()
+        for i in range(cantidad_historial):
+            Consulta.objects.create(
+                mascota=mascota, veterinario=self.veterinario, motivo=f'Control {i}',
+                fecha_consulta=timezone.now() - timedelta(days=i), costo=10000, pagada=i % 2 == 0
+            )
+            Vacuna.objects.create(
+                mascota=mascota, veterinario=self.veterinario, nombre_vacuna=f'Vacuna {i}',
+                fecha_aplicacion=hoy - timedelta(days=i)
+            )
+            Tratamiento.objects.create(
+                mascota=mascota, veterinario=self.veterinario, nombre_tratamiento=f'Tratamiento {i}',
+                fecha_inicio=hoy - timedelta(days=i), descripcion='Descripción'
+            )
+        return mascota, ficha
+
+    def contar_consultas(self, url):
+        # Partir siempre sin el rol de veterinario en caché para comparar en igualdad de condiciones
+        cache.delete(clave_cache_rol(self.veterinario.pk))
+        with CaptureQueriesContext(connection) as contexto:
+            respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 200)
+        return len(contexto.captured_queries)
+
+    def test_detalle_paciente_cantidad_fija_de_consultas(self):
+        corto, _ = self.crear_paciente(1)
+        largo, _ = self.crear_paciente(40)
+
+        consultas_corto = self.contar_consultas(reverse('vet_paciente_detalle', args=[corto.id]))
+        consultas_largo = self.contar_consultas(reverse('vet_paciente_detalle', args=[largo.id]))
+
+        self.assertEqual(consultas_corto, consultas_largo)
+
+    def test_detalle_ficha_cantidad_fija_de_consultas(self):
+        _, ficha_corta = self.crear_paciente(1)
+        _, ficha_larga = self.crear_paciente(40)
+
+        consultas_corta = self.contar_consultas(reverse('vet_ficha_detalle', args=[ficha_corta.id]))
+        consultas_larga = self.contar_consultas(reverse('vet_ficha_detalle', args=[ficha_larga.id]))
+
+        self.assertEqual(consultas_corta, consultas_larga)
+
+    def test_lista_fichas_cantidad_fija_de_consultas(self):
+        self.crear_paciente(0)
+        consultas_pocas = self.contar_consultas(reverse('vet_fichas_clinicas'))
+        for _ in range(15):
+            self.crear_paciente(0)
+        consultas_muchas = self.contar_consultas(reverse('vet_fichas_clinicas'))
+
+        self.assertEqual(consultas_pocas, consultas_muchas)
+
+    def test_cargar_mas_consultas(self):
+        mascota, _ = self.crear_paciente(25)
+        url = reverse('vet_paciente_historial_api', args=[mascota.id])
+
+        primera = self.client.get(url, {'seccion': 'consultas', 'desde': 10}).json()
+        segunda = self.client.get(url, {'seccion': 'consultas', 'desde': 20}).json()
+
+        self.assertEqual(len(primera['registros']), 10)
+        self.assertTrue(primera['hay_mas'])
+        self.assertEqual(len(segunda['registros']), 5)
+        self.assertFalse(segunda['hay_mas'])
+
+
+class RolVeterinarioTests(TestCase):
+    """El rol de veterinario se consulta una vez y se invalida al cambiar el perfil."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.veterinario = User.objects.create_user('vet_rol', password='clave123')
+        cls.perfil = VeterinarioProfile.objects.create(user=cls.veterinario, es_veterinario=True)
+
+    def setUp(self):
+        cache.delete(clave_cache_rol(self.veterinario.pk))
+        self.client.force_login(self.veterinario)
+
+    def test_rol_cacheado_entre_peticiones(self):
+        url = reverse('vet_pacientes')
+        with CaptureQueriesContext(connection) as primera:
+            self.client.get(url)
+        with CaptureQueriesContext(connection) as segunda:
+            self.client.get(url)
+
+        self.assertEqual(len(segunda.captured_queries), len(primera.captured_queries) - 1)
+
+    def test_cambio_de_perfil_invalida_cache(self):
+        self.assertEqual(self.client.get(reverse('vet_pacientes')).status_code, 200)
+
+        self.perfil.es_veterinario = False
+        self.perfil.save()
+
+        self.assertRedirects(
+            self.client.get(reverse('vet_pacientes')), reverse('vet_veterinario'), fetch_redirect_response=False
+        )
+
+
+class ContadoresDashboardTests(TestCase):
+    """Los contadores del dashboard se cachean y se invalidan al registrar consultas."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.veterinario = User.objects.create_user('vet_dashboard', password='clave123')
+        cls.mascota = Mascota.objects.create(propietario=cls.veterinario, nombre='Michi', tipo_mascota='gato')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_contadores_se_cachean(self):
+        contadores_dashboard()
+        with self.assertNumQueries(0):
+            contadores_dashboard()
+
+    def test_nueva_consulta_invalida_contadores(self):
+        self.assertEqual(contadores_dashboard()['consultas_hoy'], 0)
+
+        Consulta.objects.create(mascota=self.mascota, veterinario=self.veterinario, motivo='Control', estado='pendiente')
+
+        contadores = contadores_dashboard()
+        self.assertEqual(contadores['consultas_hoy'], 1)
+        self.assertEqual(contadores['consultas_pendientes'], 1)
+
+
+class CitaPacienteTests(TestCase):
+    """Las citas se vinculan con la mascota registrada (CitaMedica.paciente)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cliente = User.objects.create_user('cliente_citas', password='clave123')
+        cls.firulais = Mascota.objects.create(propietario=cls.cliente, nombre='Firulais', tipo_mascota='perro')
+        cls.otro = User.objects.create_user('otro_cliente', password='clave123')
+
+    def proximo_dia_habil(self):
+        dia = date.today() + timedelta(days=1)
+        while dia.weekday() >= 5:
+            dia += timedelta(days=1)
+        return dia
+
+    def test_formulario_toma_datos_de_la_mascota_elegida(self):
+        form = CitaMedicaForm(
+            {'paciente': self.firulais.id, 'fecha': self.proximo_dia_habil(), 'hora': '10:00'},
+            usuario=self.cliente,
+        )
+        self.assertTrue(form.is_valid(), form.errors)
+        cita = form.save(commit=False)
+        self.assertEqual(cita.paciente, self.firulais)
+        self.assertEqual((cita.mascota, cita.tipo_mascota), ('Firulais', 'perro'))
+
+    def test_formulario_no_ofrece_mascotas_de_otro_usuario(self):
+        form = CitaMedicaForm(
+            {'paciente': self.firulais.id, 'fecha': self.proximo_dia_habil(), 'hora': '10:00'},
+            usuario=self.otro,
+        )
+        self.assertFalse(form.is_valid())
+        self.assertIn('mascota', form.errors)
+
+    def test_comando_vincula_citas_por_nombre(self):
+        ayer = date.today() - timedelta(days=1)
+        vinculable = CitaMedica.objects.create(user=self.cliente, mascota=' firulais', fecha=ayer, hora='10:00')
+        sin_mascota = CitaMedica.objects.create(user=self.cliente, mascota='Rex', fecha=ayer, hora='11:00')
+        ajena = CitaMedica.objects.create(user=self.otro, mascota='Firulais', fecha=ayer, hora='12:00')
+        Mascota.objects.create(propietario=self.otro, nombre='Firulais', tipo_mascota='gato')
+        Mascota.objects.create(propietario=self.otro, nombre='firulais', tipo_mascota='perro')
+
+        call_command('vincular_citas_mascotas', lote=1, stdout=StringIO())
+
+        vinculable.refresh_from_db()
+        sin_mascota.refresh_from_db()
+        ajena.refresh_from_db()
+        self.assertEqual(vinculable.paciente, self.firulais)
+        self.assertIsNone(sin_mascota.paciente)
+        # Dos mascotas con el mismo nombre: no se adivina cuál es
+        self.assertIsNone(ajena.paciente)
+
+
+class MedicamentosVinculadosTests(TestCase):
+    """Prescripciones y egresos se vinculan con el producto del catálogo por código o nombre."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.veterinario = User.objects.create_user('vet_medicamentos', password='clave123')
+        VeterinarioProfile.objects.create(user=cls.veterinario, es_veterinario=True)
+        mascota = Mascota.objects.create(propietario=cls.veterinario, nombre='Toby', tipo_mascota='perro')
+        consulta = Consulta.objects.create(mascota=mascota, veterinario=cls.veterinario, motivo='Control')
+        cls.receta = Receta.objects.create(consulta=consulta, veterinario=cls.veterinario, instrucciones='Cada 12 horas')
+        cls.amoxicilina = Medicamento.objects.create(codigo='MED-001', nombre='Amoxicilina 500 mg', descripcion='-', precio=5000, stock=20)
+        cls.pipeta = Antiparasitario.objects.create(codigo='AP-7', nombre='Pipeta Perro', descripcion='-', precio=8000, stock=5)
+        # Dos productos con el mismo nombre: no se puede elegir uno
+        Medicamento.objects.create(codigo='MED-002', nombre='Vitamina', descripcion='-', precio=1000)
+        Medicamento.objects.create(codigo='MED-003', nombre='vitamina', descripcion='-', precio=1200)
+
+    def test_comando_vincula_por_codigo_y_nombre(self):
+        por_codigo = Prescripcion.objects.create(receta=self.receta, medicamento='ap7', dosis='1', frecuencia='mensual', duracion='3 meses', cantidad=3)
+        por_nombre = Prescripcion.objects.create(receta=self.receta, medicamento='amoxicilina 500mg', dosis='1', frecuencia='12 h', duracion='7 días', cantidad=14)
+        ambigua = Prescripcion.objects.create(receta=self.receta, medicamento='Vitamina', dosis='1', frecuencia='diaria', duracion='1 mes', cantidad=1)
+        egreso = EgresoMedicamento.objects.create(medicamento='Amoxicilina  500 MG', cantidad=10, motivo='Tratamiento')
+
+        call_command('vincular_medicamentos', lote=1, stdout=StringIO())
+
+        for linea in (por_codigo, por_nombre, ambigua, egreso):
+            linea.refresh_from_db()
+        self.assertEqual(por_codigo.producto, self.pipeta)
+        self.assertEqual(por_nombre.producto, self.amoxicilina)
+        self.assertIsNone(ambigua.producto_id)
+        self.assertEqual(egreso.producto, self.amoxicilina)
+
+        filas = {fila['codigo']: fila for fila in consumo_mensual()}
+        self.assertEqual((filas['MED-001']['recetado'], filas['MED-001']['egresado']), (14, 10))
+        self.assertEqual((filas['AP-7']['recetado'], filas['AP-7']['egresado']), (3, 0))
+
+    def test_egreso_por_codigo_descuenta_stock_del_producto(self):
+        self.client.force_login(self.veterinario)
+        respuesta = self.client.post(reverse('vet_egreso_registrar'), {
+            'medicamento': 'AP-7', 'cantidad': 2, 'motivo': 'Control de pulgas',
+        })
+        self.assertEqual(respuesta.status_code, 302)
+        self.pipeta.refresh_from_db()
+        self.assertEqual(self.pipeta.stock, 3)
+        self.assertEqual(EgresoMedicamento.objects.get().producto, self.pipeta)
+
+    def test_egreso_ambiguo_pide_elegir_el_producto(self):
+        self.client.force_login(self.veterinario)
+        respuesta = self.client.post(reverse('vet_egreso_registrar'), {
+            'medicamento': 'vitam', 'cantidad': 1, 'motivo': 'Suplemento',
+        })
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertContains(respuesta, 'Varios medicamentos coinciden: MED-002 (Vitamina), MED-003 (vitamina)')
+        self.assertFalse(EgresoMedicamento.objects.exists())
+        self.assertEqual(list(Medicamento.objects.filter(nombre__iexact='vitamina').values_list('stock', flat=True)), [0, 0])
+
+    def test_vincular_una_linea_sin_cargar_el_inventario(self):
+        linea = Prescripcion(receta=self.receta, medicamento='amoxicilina 500 MG')
+        # Código en cada tipo y nombre en cada tipo; sin leer todo el inventario
+        with self.assertNumQueries(4):
+            self.assertEqual(vincular_linea(linea), self.amoxicilina)
+        self.assertEqual(linea.producto, self.amoxicilina)
+
+        self.assertEqual(vincular_linea(Prescripcion(medicamento='MED-001')), self.amoxicilina)
+        self.assertIsNone(vincular_linea(Prescripcion(medicamento='VITAMINA')))
+
+
+class VistasAsyncTests(TestCase):
+    """Agenda y horas disponibles (vistas async) con los permisos de siempre, bajo ASGI."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.veterinario = User.objects.create_user('vet_async', password='clave123')
+        VeterinarioProfile.objects.create(user=cls.veterinario, es_veterinario=True)
+        cls.cliente = User.objects.create_user('cliente_async', password='clave123')
+        cls.dia = date.today() + timedelta(days=1)
+        while cls.dia.weekday() >= 5:
+            cls.dia += timedelta(days=1)
+        CitaMedica.objects.create(user=cls.cliente, mascota='Luna', fecha=cls.dia, hora='10:00')
+
+    def setUp(self):
+        cache.clear()
+
+    async def test_agenda_requiere_veterinario(self):
+        url = reverse('vet_agenda_api')
+        respuesta = await self.async_client.get(url)
+        self.assertEqual(respuesta.status_code, 302)
+        self.assertIn(reverse('login'), respuesta['Location'])
+
+        await self.async_client.aforce_login(self.cliente)
+        respuesta = await self.async_client.get(url)
+        self.assertRedirects(respuesta, reverse('vet_veterinario'), fetch_redirect_response=False)
+
+        await self.async_client.aforce_login(self.veterinario)
+        eventos = (await self.async_client.get(url, {'start': self.dia.isoformat()})).json()
+        self.assertEqual([evento['extendedProps']['mascota'] for evento in eventos], ['Luna'])
+
+    async def test_horas_disponibles_excluye_ocupadas(self):
+        await self.async_client.aforce_login(self.cliente)
+        respuesta = await self.async_client.get(reverse('obtener_horas_disponibles'), {'fecha': self.dia.isoformat()})
+        horas = [hora['value'] for hora in respuesta.json()['horas_disponibles']]
+        self.assertNotIn('10:00', horas)
+        self.assertIn('09:00', horas)
+
+
+class BusquedaMascotasTests(TestCase):
+    """buscar_mascotas usa el índice de términos, que las señales mantienen al editar la mascota o su propietario."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.propietario = User.objects.create_user(
+            'jperez', password='clave123', first_name='Juan', last_name='Pérez'
+        )
+        cls.otro = User.objects.create_user('mgonzalez', password='clave123', first_name='María', last_name='González')
+        cls.max = Mascota.objects.create(propietario=cls.propietario, nombre='Max', tipo_mascota='perro', raza='Labrador')
+        cls.luna = Mascota.objects.create(propietario=cls.otro, nombre='Luna', tipo_mascota='gato', raza='Siamés')
+        cls.toby = Mascota.objects.create(propietario=cls.otro, nombre='Toby', tipo_mascota='perro', raza='Maximus')
+
+    def nombres(self, consulta):
+        return [m.nombre for m in buscar_mascotas(consulta)]
+
+    def test_busca_por_nombre_raza_y_propietario(self):
+        # El que empieza con la consulta va primero; 'max' también es prefijo de la raza 'Maximus'
+        self.assertEqual(self.nombres('max'), ['Max', 'Toby'])
+        self.assertEqual(self.nombres('siames'), ['Luna'])
+        self.assertEqual(self.nombres('jperez'), ['Max'])
+        # Nombre y apellido del propietario, sin tildes ni mayúsculas
+        self.assertEqual(self.nombres('juan perez'), ['Max'])
+        self.assertEqual(set(self.nombres('GONZÁLEZ')), {'Luna', 'Toby'})
+        self.assertEqual(self.nombres('luna jperez'), [])
+
+    def test_editar_mascota_reindexa(self):
+        self.max.nombre = 'Rocky'
+        self.max.save()
+
+        self.assertEqual(self.nombres('rocky'), ['Rocky'])
+        self.assertEqual(self.nombres('max'), ['Toby'])
+        self.assertEqual(
+            set(TerminoMascota.objects.filter(mascota=self.max).values_list('termino', flat=True)),
+            {'rocky', 'labrador', 'jperez', 'juan', 'perez'},
+        )
+
+    def test_cambiar_username_del_propietario_reindexa(self):
+        self.propietario.username = 'juanp'
+        self.propietario.save()
+
+        self.max.refresh_from_db()
+        self.assertEqual(self.max.clave_busqueda, 'max labrador juanp juan perez')
+        self.assertEqual(self.nombres('juanp'), ['Max'])
+        self.assertEqual(self.nombres('jperez'), [])
+
+    def test_api_typeahead(self):
+        vet = User.objects.create_user('vet_busqueda', password='clave123')
+        VeterinarioProfile.objects.create(user=vet, es_veterinario=True)
+        self.client.force_login(vet)
+        url = reverse('vet_pacientes_api')
+
+        self.assertEqual(self.client.get(url, {'q': 'm'}).json(), {'resultados': []})
+        self.assertEqual(self.client.get(url, {'q': 'max'}).json()['resultados'][0], {
+            'id': self.max.id,
+            'nombre': 'Max',
+            'tipo_mascota': self.max.get_tipo_mascota_display(),
+            'raza': 'Labrador',
+            'propietario': 'jperez',
+            'url': reverse('vet_paciente_detalle', args=[self.max.id]),
+        })
+
+        # Solo pacientes activos y como máximo 10
+        Mascota.objects.bulk_create([
+            Mascota(propietario=self.otro, nombre=f'Luna {n}', tipo_mascota='gato') for n in range(12)
+        ])
+        reindexar_mascotas()
+        Mascota.objects.filter(pk=self.luna.pk).update(activa=False)
+        resultados = self.client.get(url, {'q': 'luna'}).json()['resultados']
+        self.assertEqual(len(resultados), 10)
+        self.assertNotIn(self.luna.id, [r['id'] for r in resultados])
+
+
+class SelectMascotaRemotoTests(TestCase):
+    """ConsultaForm renderiza solo la mascota elegida y valida solo el id enviado."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.propietario = User.objects.create_user('dueno_select', password='clave123')
+        cls.mascotas = Mascota.objects.bulk_create([
+            Mascota(propietario=cls.propietario, nombre=f'Mascota {n}', tipo_mascota='perro') for n in range(30)
+        ])
+        cls.inactiva = Mascota.objects.create(propietario=cls.propietario, nombre='Retirada', tipo_mascota='gato', activa=False)
+
+    def datos(self, mascota_id):
+        return {'mascota': mascota_id, 'motivo': 'Control', 'estado': 'pendiente', 'costo': 0, 'fecha_consulta': '2026-01-10T10:00'}
+
+    def test_renderiza_solo_la_elegida(self):
+        with self.assertNumQueries(0):
+            html = str(ConsultaForm()['mascota'])
+        self.assertEqual(html.count('<option'), 1)
+        self.assertIn(f'data-select-remoto="{reverse("vet_pacientes_api")}"', html)
+
+        elegida = self.mascotas[7]
+        with self.assertNumQueries(1):
+            html = str(ConsultaForm(initial={'mascota': elegida.pk})['mascota'])
+        self.assertEqual(html.count('<option'), 2)
+        self.assertIn(f'value="{elegida.pk}" selected', html)
+
+    def test_valida_el_id_enviado(self):
+        form = ConsultaForm(self.datos(self.mascotas[-1].pk))
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.cleaned_data['mascota'], self.mascotas[-1])
+
+        self.assertIn('mascota', ConsultaForm(self.datos(self.inactiva.pk)).errors)
+
+    def test_renderiza_con_ids_invalidos(self):
+        for invalido in ('abc', '999999'):
+            form = ConsultaForm(self.datos(invalido))
+            self.assertIn('mascota', form.errors)
+            html = str(form['mascota'])
+            self.assertEqual(html.count('<option'), 1)
 
-# Create your tests here.
+        # La vista vuelve a mostrar el formulario con el error en lugar de fallar
+        vet = User.objects.create_user('vet_select', password='clave123')
+        VeterinarioProfile.objects.create(user=vet, es_veterinario=True)
+        self.client.force_login(vet)
+        respuesta = self.client.post(reverse('vet_consulta_crear'), self.datos('abc'))
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertFalse(Consulta.objects.exists())
@@ -9,7 +9,7 @@ from gestorUser.views import (
     agendar_cita,
     obtener_horas_disponibles,
     # Vistas del sistema de veterinario
-    vet_perfil, vet_pacientes, vet_paciente_detalle, vet_paciente_crear, vet_paciente_editar,
+    vet_perfil, vet_pacientes, vet_pacientes_api, vet_paciente_detalle, vet_paciente_historial_api, vet_paciente_crear, vet_paciente_editar,
     vet_fichas_clinicas, vet_ficha_detalle, vet_ficha_crear, vet_ficha_editar,
     vet_agenda, vet_agenda_api, vet_citas, vet_cita_detalle, vet_cita_eliminar,
     vet_consultas, vet_consulta_detalle, vet_consulta_crear, vet_consulta_crear_ajax, vet_consulta_editar, vet_consulta_completar,
@@ -51,7 +51,9 @@ urlpatterns = [
     
     # Gestión de Pacientes (Mascotas)
     path('vet/pacientes/', vet_pacientes, name='vet_pacientes'),
+    path('vet/pacientes/buscar/', vet_pacientes_api, name='vet_pacientes_api'),
     path('vet/paciente/<int:paciente_id>/', vet_paciente_detalle, name='vet_paciente_detalle'),
+    path('vet/paciente/<int:paciente_id>/historial/', vet_paciente_historial_api, name='vet_paciente_historial_api'),
     path('vet/paciente/crear/', vet_paciente_crear, name='vet_paciente_crear'),
     path('vet/paciente/crear/ajax/', vet_mascota_crear_ajax, name='vet_mascota_crear_ajax'),
     path('vet/paciente/<int:paciente_id>/editar/', vet_paciente_editar, name='vet_paciente_editar'),
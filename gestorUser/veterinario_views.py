@@ -19,19 +19,25 @@ Estructura:
 - Inventario Médico: Control de medicamentos y alertas
 
 Todas las vistas requieren autenticación (@login_required) y verificación
-de que el usuario sea veterinario mediante la función helper.
+de que el usuario sea veterinario mediante el decorador @vet_required.
 """
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.contrib import messages
 from django.utils import timezone
-from django.db.models import Q, Sum
+from django.core.paginator import Paginator
+from django.db.models import Count, OuterRef, Prefetch, Q, Subquery, Sum
 from django.http import JsonResponse
+from django.urls import reverse
 from .models import (
     VeterinarioProfile, Mascota, FichaClinica, Consulta,
     Receta, Prescripcion, Vacuna, Tratamiento, EgresoMedicamento, CitaMedica
 )
+from .busqueda import buscar_mascotas
+from .medicamentos import vincular_linea
+from .decorators import es_vet_request, login_requerido, vet_required
+from .roles import usuario_es_veterinario
 from .forms import (
     VeterinarioProfileForm, MascotaForm, FichaClinicaForm,
     ConsultaForm, RecetaForm, PrescripcionForm, VacunaForm, TratamientoForm,
@@ -42,6 +48,7 @@ from gestorProductos.models import (
     PSProductos, AProductos, AGAProductos, AGCProductos, SnackGProductos,
     SnackPProductos, Shampoo, Cama, Collar, Juguete
 )
+from inventarioVeterinariaPamela.replicas import solo_lectura
 
 
 # ==================== FUNCIONES HELPER ====================
@@ -57,15 +64,10 @@ def es_veterinario(user):
         bool: True si el usuario tiene VeterinarioProfile con es_veterinario=True,
               False en caso contrario (incluye si no tiene perfil)
               
-    Esta función es utilizada por todas las vistas para verificar permisos antes
-    de permitir el acceso a funcionalidades del sistema veterinario.
+    El resultado se guarda en caché por unos segundos (ver roles.py). En las vistas
+    conviene usar request.is_vet, que además se resuelve una sola vez por petición.
     """
-    try:
-        perfil = user.veterinarioprofile  # Accede a la relación OneToOne
-        return perfil.es_veterinario  # Retorna True solo si está activado
-    except VeterinarioProfile.DoesNotExist:
-        # Si no existe el perfil, no es veterinario
-        return False
+    return usuario_es_veterinario(user)
 
 
 def verificar_veterinario(request):
@@ -80,31 +82,79 @@ def verificar_veterinario(request):
         - Si el usuario NO es veterinario, retorna un redirect con mensaje de error
         - Si el usuario ES veterinario, retorna None (continúa el flujo normal)
         
-    Uso:
-        check = verificar_veterinario(request)
-        if check:
-            return check  # Redirige si no es veterinario
-        # Continúa con la lógica de la vista si pasa la verificación
+    En las vistas se usa el decorador @vet_required (decorators.py), que hace
+    esta misma verificación.
     """
-    if not es_veterinario(request.user):
+    if not es_vet_request(request):
         messages.error(request, "No tienes permisos para acceder a esta sección.")
         return redirect('vet_veterinario')  # Redirige al dashboard de veterinario
     return None  # Usuario autorizado, continúa normalmente
 
 
+# Cantidad de registros del historial que se muestran al cargar la página;
+# el resto se pide con "Cargar más" (vet_paciente_historial_api)
+HISTORIAL_POR_PAGINA = 10
+
+# Secciones del historial: related_name en Mascota -> (modelo, orden)
+SECCIONES_HISTORIAL = {
+    'consultas': (Consulta, '-fecha_consulta'),
+    'vacunas': (Vacuna, '-fecha_aplicacion'),
+    'tratamientos': (Tratamiento, '-fecha_inicio'),
+}
+
+
+def prefetch_historial(prefijo='', limite=HISTORIAL_POR_PAGINA):
+    """
+    Construye los Prefetch del historial de una mascota (ficha, consultas, vacunas y tratamientos).
+    
+    Cada sección se carga en una sola consulta, con el veterinario incluido
+    (select_related) y limitada a los últimos 'limite' + 1 registros: el
+    registro extra solo indica si hay más para cargar (ver separar_historial).
+    Así la cantidad de consultas SQL no depende del largo del historial.
+    
+    Parámetros:
+        prefijo: Ruta hasta la mascota (ej: 'mascota__' si se parte desde FichaClinica)
+        limite: Cantidad de registros por sección
+    """
+    prefetches = [
+        Prefetch(
+            f'{prefijo}fichas_clinicas',
+            queryset=FichaClinica.objects.select_related('veterinario').order_by('-fecha_actualizacion')[:1],
+            to_attr='fichas_recientes'
+        ),
+    ]
+    for seccion, (modelo, orden) in SECCIONES_HISTORIAL.items():
+        prefetches.append(Prefetch(
+            f'{prefijo}{seccion}',
+            queryset=modelo.objects.select_related('veterinario').order_by(orden, '-id')[:limite + 1],
+            to_attr=f'{seccion}_recientes'
+        ))
+    return prefetches
+
+
+def separar_historial(mascota, limite=HISTORIAL_POR_PAGINA):
+    """
+    Recorta el historial precargado a 'limite' registros por sección.
+    Retorna un diccionario para el contexto del template:
+    {'consultas': [...], 'hay_mas_consultas': bool, ...}
+    """
+    contexto = {}
+    for seccion in SECCIONES_HISTORIAL:
+        registros = getattr(mascota, f'{seccion}_recientes')
+        contexto[seccion] = registros[:limite]
+        contexto[f'hay_mas_{seccion}'] = len(registros) > limite
+    return contexto
+
+
 # ==================== PERFIL Y CONFIGURACIÓN ====================
 
 @login_required
+@vet_required
 def vet_perfil(request):
     """
     Vista para ver y editar el perfil del veterinario.
     Permite configurar datos profesionales, horarios y especialidades.
     """
-    # Verificar que el usuario es veterinario antes de continuar
-    check = verificar_veterinario(request)
-    if check:
-        return check  # Si no es veterinario, se redirige automáticamente
-    
     # Intentar obtener el perfil de veterinario del usuario actual
     try:
         # Acceder a la relación OneToOne con VeterinarioProfile
@@ -141,16 +191,12 @@ def vet_perfil(request):
 # ==================== GESTIÓN DE PACIENTES (MASCOTAS) ====================
 
 @login_required
+@vet_required
 def vet_pacientes(request):
     """
     Vista para listar todos los pacientes (mascotas) del sistema.
     Incluye funcionalidad de búsqueda por nombre, propietario o raza.
     """
-    # Verificar permisos: solo veterinarios pueden ver esta vista
-    check = verificar_veterinario(request)
-    if check:
-        return check  # Redirige si no es veterinario
-    
     # Obtener el término de búsqueda desde los parámetros GET de la URL
     # Si no hay búsqueda, search será una cadena vacía
     search = request.GET.get('search', '')
@@ -158,19 +204,17 @@ def vet_pacientes(request):
     # Obtener todos los pacientes activos (campo activa=True permite soft delete)
     pacientes = Mascota.objects.filter(activa=True)
     
-    # Si hay un término de búsqueda, filtrar los pacientes
+    # Si hay un término de búsqueda, filtrar usando el índice de términos (ver busqueda.py)
+    # Busca por prefijo en nombre de la mascota, raza y propietario, sin tildes ni mayúsculas
     if search:
-        # Usar Q objects para hacer búsqueda OR en múltiples campos
-        # icontains hace búsqueda case-insensitive (no diferencia mayúsculas/minúsculas)
-        pacientes = pacientes.filter(
-            Q(nombre__icontains=search) |                    # Buscar en nombre de mascota
-            Q(propietario__username__icontains=search) |     # Buscar en username del propietario
-            Q(raza__icontains=search)                        # Buscar en raza
-        )
+        pacientes = buscar_mascotas(search, pacientes)
     
     # Optimizar consulta: select_related trae el propietario en la misma consulta SQL
     # Ordenar por fecha de registro descendente (más recientes primero)
-    pacientes = pacientes.select_related('propietario').order_by('-fecha_registro')
+    # Con búsqueda, buscar_mascotas ya ordena primero las coincidencias por nombre
+    pacientes = pacientes.select_related('propietario')
+    if not search:
+        pacientes = pacientes.order_by('-fecha_registro')
     
     # Renderizar template con la lista de pacientes y el término de búsqueda
     return render(request, 'gestorUser/veterinario/pacientes_lista.html', {
@@ -180,59 +224,129 @@ def vet_pacientes(request):
 
 
 @login_required
+@vet_required
+def vet_pacientes_api(request):
+    """
+    API de búsqueda rápida de pacientes (typeahead) en formato JSON.
+    GET: q (texto a buscar). Devuelve como máximo 10 pacientes activos.
+    """
+    q = request.GET.get('q', '').strip()
+    if len(q) < 2:
+        return JsonResponse({'resultados': []})
+    
+    pacientes = buscar_mascotas(q, Mascota.objects.filter(activa=True)).select_related('propietario')[:10]
+    
+    return JsonResponse({'resultados': [
+        {
+            'id': p.id,
+            'nombre': p.nombre,
+            'tipo_mascota': p.get_tipo_mascota_display(),
+            'raza': p.raza or '',
+            'propietario': p.propietario.username,
+            'url': reverse('vet_paciente_detalle', args=[p.id]),
+        }
+        for p in pacientes
+    ]})
+
+
+@login_required
+@vet_required
 def vet_paciente_detalle(request, paciente_id):
     """
     Vista para ver el detalle completo de un paciente.
     Muestra información básica, ficha clínica, consultas, vacunas y tratamientos.
     """
-    # Verificar permisos de veterinario
-    check = verificar_veterinario(request)
-    if check:
-        return check
-    
-    # Obtener el paciente por su ID, devolver 404 si no existe
-    paciente = get_object_or_404(Mascota, id=paciente_id)
-    
-    # Buscar la ficha clínica del paciente (puede no tener una)
-    # first() devuelve el primer resultado o None si no encuentra
-    ficha_clinica = FichaClinica.objects.filter(mascota=paciente).first()
-    
-    # Obtener las últimas 10 consultas del paciente, ordenadas por fecha descendente (más recientes primero)
-    consultas = Consulta.objects.filter(
-        mascota=paciente
-    ).order_by('-fecha_consulta')[:10]  # Limitar a 10 resultados
-    
-    # Obtener las últimas 10 vacunas aplicadas al paciente, ordenadas por fecha
-    vacunas = Vacuna.objects.filter(
-        mascota=paciente
-    ).order_by('-fecha_aplicacion')[:10]  # Limitar a 10 resultados
-    
-    # Obtener los últimos 10 tratamientos del paciente, ordenados por fecha de inicio
-    tratamientos = Tratamiento.objects.filter(
-        mascota=paciente
-    ).order_by('-fecha_inicio')[:10]  # Limitar a 10 resultados
+    # Obtener el paciente con su propietario y todo el historial precargado
+    # (ficha, consultas, vacunas y tratamientos: una consulta SQL por sección)
+    # más sus próximas citas (índice paciente + fecha de CitaMedica)
+    citas_proximas = Prefetch(
+        'citas',
+        queryset=CitaMedica.objects.filter(fecha__gte=timezone.now().date()).order_by('fecha', 'hora')[:HISTORIAL_POR_PAGINA],
+        to_attr='citas_proximas'
+    )
+    paciente = get_object_or_404(
+        Mascota.objects.select_related('propietario').prefetch_related(*prefetch_historial(), citas_proximas),
+        id=paciente_id
+    )
+    
+    # Ficha clínica más reciente del paciente (puede no tener una)
+    ficha_clinica = paciente.fichas_recientes[0] if paciente.fichas_recientes else None
     
     # Renderizar template con toda la información del paciente
+    # consultas, vacunas y tratamientos: últimos HISTORIAL_POR_PAGINA registros de cada uno
     return render(request, 'gestorUser/veterinario/paciente_detalle.html', {
         'paciente': paciente,          # Información básica del paciente
         'ficha_clinica': ficha_clinica, # Ficha clínica (puede ser None)
-        'consultas': consultas,        # Historial de consultas (últimas 10)
-        'vacunas': vacunas,            # Historial de vacunas (últimas 10)
-        'tratamientos': tratamientos   # Historial de tratamientos (últimos 10)
+        'por_pagina': HISTORIAL_POR_PAGINA,
+        **separar_historial(paciente),
     })
 
 
 @login_required
+@vet_required
+def vet_paciente_historial_api(request, paciente_id):
+    """
+    API para el botón "Cargar más" del historial del paciente.
+    GET: seccion (consultas, vacunas o tratamientos), desde (registros ya mostrados)
+    Devuelve los siguientes HISTORIAL_POR_PAGINA registros en formato JSON.
+    """
+    seccion = request.GET.get('seccion', 'consultas')
+    if seccion not in SECCIONES_HISTORIAL:
+        return JsonResponse({'error': 'Sección inválida'}, status=400)
+    try:
+        desde = max(int(request.GET.get('desde', 0)), 0)
+    except (TypeError, ValueError):
+        desde = 0
+    
+    modelo, orden = SECCIONES_HISTORIAL[seccion]
+    registros = list(
+        modelo.objects.filter(mascota_id=paciente_id)
+        .select_related('veterinario')
+        .order_by(orden, '-id')[desde:desde + HISTORIAL_POR_PAGINA + 1]
+    )
+    hay_mas = len(registros) > HISTORIAL_POR_PAGINA
+    registros = registros[:HISTORIAL_POR_PAGINA]
+    
+    if seccion == 'consultas':
+        datos = [{
+            'id': c.id,
+            'fecha': timezone.localtime(c.fecha_consulta).strftime('%d/%m/%Y %H:%M'),
+            'estado': c.estado,
+            'estado_display': c.get_estado_display(),
+            'motivo': c.motivo,
+            'diagnostico': c.diagnostico or '',
+            'veterinario': c.veterinario.username if c.veterinario else '',
+            'url': reverse('vet_consulta_detalle', args=[c.id]),
+        } for c in registros]
+    elif seccion == 'vacunas':
+        datos = [{
+            'id': v.id,
+            'nombre': v.nombre_vacuna,
+            'fecha': v.fecha_aplicacion.strftime('%d/%m/%Y'),
+            'fecha_proxima': v.fecha_proxima.strftime('%d/%m/%Y') if v.fecha_proxima else '',
+            'veterinario': v.veterinario.username if v.veterinario else '',
+        } for v in registros]
+    else:
+        datos = [{
+            'id': t.id,
+            'nombre': t.nombre_tratamiento,
+            'estado': t.estado,
+            'estado_display': t.get_estado_display(),
+            'descripcion': t.descripcion,
+            'fecha_inicio': t.fecha_inicio.strftime('%d/%m/%Y'),
+            'veterinario': t.veterinario.username if t.veterinario else '',
+        } for t in registros]
+    
+    return JsonResponse({'registros': datos, 'hay_mas': hay_mas})
+
+
+@login_required
+@vet_required
 def vet_paciente_crear(request):
     """
     Vista para crear un nuevo paciente (mascota) en el sistema.
     Permite registrar la información básica de la mascota.
     """
-    # Verificar que el usuario es veterinario
-    check = verificar_veterinario(request)
-    if check:
-        return check
-    
     # Procesar formulario si se envió (método POST)
     if request.method == 'POST':
         # Crear formulario con los datos enviados por el usuario
@@ -266,12 +380,9 @@ def vet_paciente_crear(request):
 
 
 @login_required
+@vet_required
 def vet_paciente_editar(request, paciente_id):
     """Editar paciente existente"""
-    check = verificar_veterinario(request)
-    if check:
-        return check
-    
     paciente = get_object_or_404(Mascota, id=paciente_id)
     
     if request.method == 'POST':
@@ -292,115 +403,96 @@ def vet_paciente_editar(request, paciente_id):
 
 # ==================== FICHAS CLÍNICAS ====================
 
+FICHAS_POR_PAGINA = 25
+
+
 @login_required
+@vet_required
 def vet_fichas_clinicas(request):
     """
     Vista para listar todas las mascotas con sus fichas clínicas.
     Muestra todas las mascotas registradas, indicando si tienen ficha clínica o no.
     Incluye funcionalidad de búsqueda por nombre de mascota.
     """
-    # Verificar permisos de veterinario
-    check = verificar_veterinario(request)
-    if check:
-        return check
+    # Ficha clínica más reciente de cada mascota (el mismo orden que usa el modelo)
+    ultima_ficha = FichaClinica.objects.filter(
+        mascota=OuterRef('pk')
+    ).order_by('-fecha_actualizacion', '-id')
     
-    # Obtener todas las mascotas activas con optimización de consultas
-    # prefetch_related trae las fichas clínicas relacionadas
+    # Obtener las mascotas activas con el id y la fecha de su última ficha anotados
+    # en la misma consulta SQL (sin consultas adicionales por cada mascota)
     mascotas = Mascota.objects.filter(activa=True).select_related(
         'propietario'  # Traer datos del propietario
-    ).prefetch_related(
-        'fichas_clinicas'  # Traer fichas clínicas relacionadas
-    ).order_by('nombre')
+    ).annotate(
+        ultima_ficha_id=Subquery(ultima_ficha.values('id')[:1]),
+        ultima_ficha_fecha=Subquery(ultima_ficha.values('fecha_actualizacion')[:1]),
+    )
     
     # Obtener término de búsqueda desde los parámetros GET de la URL
     search = request.GET.get('search', '')
     
-    # Si hay búsqueda, filtrar mascotas por nombre
+    # Si hay búsqueda, filtrar con el índice de búsqueda de pacientes (nombre, raza o propietario)
     if search:
-        mascotas = mascotas.filter(nombre__icontains=search)
-    
-    # Preparar datos para el template: para cada mascota, obtener su ficha clínica más reciente
-    mascotas_con_ficha = []
-    for mascota in mascotas:
-        # Obtener la ficha clínica más reciente de la mascota (si existe)
-        ficha = mascota.fichas_clinicas.first()  # first() obtiene la más reciente por el ordering del modelo
-        mascotas_con_ficha.append({
-            'mascota': mascota,
-            'ficha': ficha,
-            'tiene_ficha': ficha is not None
-        })
+        mascotas = buscar_mascotas(search, mascotas)
+    else:
+        mascotas = mascotas.order_by('nombre', 'id')
+    
+    # Paginar sobre el queryset anotado: una consulta para el total y otra para la página
+    paginator = Paginator(mascotas, FICHAS_POR_PAGINA)
+    pagina = paginator.get_page(request.GET.get('page'))
     
-    # Renderizar template con la lista de mascotas
+    # Renderizar template con la página de mascotas
     return render(request, 'gestorUser/veterinario/fichas_lista.html', {
-        'mascotas_con_ficha': mascotas_con_ficha,  # Lista de mascotas con sus fichas
+        'mascotas': pagina,   # Mascotas de la página actual (con ultima_ficha_id y ultima_ficha_fecha)
         'search': search   # Término de búsqueda para mantenerlo en el input
     })
 
 
 @login_required
+@vet_required
 def vet_ficha_detalle(request, ficha_id):
     """
     Vista para ver el detalle completo de una ficha clínica.
     Muestra la ficha junto con el historial completo: consultas, vacunas y tratamientos.
     """
-    # Verificar permisos de veterinario
-    check = verificar_veterinario(request)
-    if check:
-        return check
-    
-    # Obtener la ficha clínica por su ID, devolver 404 si no existe
-    ficha = get_object_or_404(FichaClinica, id=ficha_id)
-    
-    # Obtener todas las consultas de la mascota asociada a esta ficha
-    # Ordenadas por fecha descendente (más recientes primero)
-    consultas = Consulta.objects.filter(
-        mascota=ficha.mascota
-    ).order_by('-fecha_consulta')
-    
-    # Obtener todas las vacunas aplicadas a la mascota
-    # Ordenadas por fecha de aplicación descendente
-    vacunas = Vacuna.objects.filter(
-        mascota=ficha.mascota
-    ).order_by('-fecha_aplicacion')
-    
-    # Obtener todos los tratamientos de la mascota
-    # Ordenados por fecha de inicio descendente
-    tratamientos = Tratamiento.objects.filter(
-        mascota=ficha.mascota
-    ).order_by('-fecha_inicio')
+    # Obtener la ficha con su mascota, propietario y veterinario en una sola consulta,
+    # y el historial reciente de la mascota precargado (una consulta por sección)
+    ficha = get_object_or_404(
+        FichaClinica.objects
+        .select_related('mascota__propietario', 'veterinario')
+        .prefetch_related(*prefetch_historial('mascota__')),
+        id=ficha_id
+    )
     
     # ========== CALCULAR RESUMEN FINANCIERO ==========
-    # Calcular totales de costos de las consultas
-    from django.db.models import Sum
-    total_consultas = consultas.count()
-    costo_total = consultas.aggregate(total=Sum('costo'))['total'] or 0
-    costo_pagado = consultas.filter(pagada=True).aggregate(total=Sum('costo'))['total'] or 0
+    # Total de consultas y costos calculados en una sola consulta de agregación
+    resumen = Consulta.objects.filter(mascota_id=ficha.mascota_id).aggregate(
+        total_consultas=Count('id'),
+        costo_total=Sum('costo'),
+        costo_pagado=Sum('costo', filter=Q(pagada=True)),
+    )
+    costo_total = resumen['costo_total'] or 0
+    costo_pagado = resumen['costo_pagado'] or 0
     costo_pendiente = costo_total - costo_pagado
     
     # Renderizar template con toda la información de la ficha clínica
     return render(request, 'gestorUser/veterinario/ficha_detalle.html', {
         'ficha': ficha,              # Información de la ficha clínica
-        'consultas': consultas,      # Historial completo de consultas
-        'vacunas': vacunas,          # Historial completo de vacunas
-        'tratamientos': tratamientos, # Historial completo de tratamientos
-        'total_consultas': total_consultas,  # Total de consultas
+        'total_consultas': resumen['total_consultas'],  # Total de consultas
         'costo_total': costo_total,           # Costo total de todas las consultas
         'costo_pagado': costo_pagado,         # Costo total pagado
-        'costo_pendiente': costo_pendiente    # Costo pendiente de pago
+        'costo_pendiente': costo_pendiente,   # Costo pendiente de pago
+        **separar_historial(ficha.mascota),   # Últimas consultas, vacunas y tratamientos
     })
 
 
 @login_required
+@vet_required
 def vet_ficha_crear(request, paciente_id):
     """
     Vista para crear una nueva ficha clínica para un paciente específico.
     Una mascota solo puede tener una ficha clínica activa.
     """
-    # Verificar permisos de veterinario
-    check = verificar_veterinario(request)
-    if check:
-        return check
-    
     # Obtener el paciente por su ID, devolver 404 si no existe
     paciente = get_object_or_404(Mascota, id=paciente_id)
     
@@ -440,12 +532,9 @@ def vet_ficha_crear(request, paciente_id):
 
 
 @login_required
+@vet_required
 def vet_ficha_editar(request, ficha_id):
     """Editar ficha clínica existente"""
-    check = verificar_veterinario(request)
-    if check:
-        return check
-    
     ficha = get_object_or_404(FichaClinica, id=ficha_id)
     
     if request.method == 'POST':
@@ -469,37 +558,32 @@ def vet_ficha_editar(request, ficha_id):
 # ==================== AGENDA Y CITAS ====================
 
 @login_required
+@vet_required
 def vet_agenda(request):
     """
     Vista de agenda con calendario completo del veterinario.
     Muestra todas las citas en un calendario grande tipo Google Calendar.
     """
-    # Verificar permisos de veterinario
-    check = verificar_veterinario(request)
-    if check:
-        return check
-    
     # Renderizar template con el calendario
     return render(request, 'gestorUser/veterinario/agenda.html', {})
 
 
-@login_required
-def vet_agenda_api(request):
+@login_requerido
+@vet_required
+@solo_lectura
+async def vet_agenda_api(request):
     """
     API para obtener citas en formato JSON para FullCalendar.
     Devuelve todas las citas sin filtros, solo filtradas por rango de fechas para el calendario.
+    Es async: FullCalendar la pide en cada cambio de vista y, bajo ASGI, no ocupa
+    un worker mientras espera a la base de datos.
     """
-    # Verificar permisos de veterinario
-    check = verificar_veterinario(request)
-    if check:
-        return check
-    
     # Obtener parámetros de rango de fechas (necesario para el calendario)
     start = request.GET.get('start')
     end = request.GET.get('end')
     
-    # Obtener todas las citas (sin filtros adicionales)
-    citas = CitaMedica.objects.all().order_by('fecha', 'hora')
+    # Obtener todas las citas (sin filtros adicionales), con dueño y paciente en la misma consulta
+    citas = CitaMedica.objects.select_related('user', 'paciente').order_by('fecha', 'hora')
     
     # Aplicar solo filtro de rango de fechas para optimizar
     if start:
@@ -521,6 +605,8 @@ def vet_agenda_api(request):
     # Colores tipo Google Calendar (suaves y variados)
     colores = ['#4285f4', '#34a853', '#fbbc04', '#ea4335', '#9c27b0', '#00bcd4', '#ff9800', '#795548']
     
+    # Una sola consulta con el ORM async
+    citas = [cita async for cita in citas]
     for idx, cita in enumerate(citas):
         # Determinar color según si la cita es pasada o futura
         cita_datetime = timezone.datetime.combine(cita.fecha, cita.hora)
@@ -544,6 +630,8 @@ def vet_agenda_api(request):
                 'mascota': cita.mascota,
                 'tipo_mascota': cita.get_tipo_mascota_display(),
                 'propietario': cita.user.username,
+                'paciente_id': cita.paciente_id,
+                'url_paciente': reverse('vet_paciente_detalle', args=[cita.paciente_id]) if cita.paciente_id else '',
                 'motivo': cita.motivo or '',
                 'es_pasada': es_pasada,
                 'hora': hora_str,
@@ -554,15 +642,11 @@ def vet_agenda_api(request):
 
 
 @login_required
+@vet_required
 def vet_cita_eliminar(request, cita_id):
     """
     Vista para eliminar/cancelar una cita médica.
     """
-    # Verificar permisos de veterinario
-    check = verificar_veterinario(request)
-    if check:
-        return check
-    
     cita = get_object_or_404(CitaMedica, id=cita_id)
     
     if request.method == 'POST':
@@ -581,12 +665,9 @@ def vet_cita_eliminar(request, cita_id):
 
 
 @login_required
+@vet_required
 def vet_citas(request):
     """Listar todas las citas"""
-    check = verificar_veterinario(request)
-    if check:
-        return check
-    
     estado = request.GET.get('estado', 'todas')
     citas = CitaMedica.objects.all().order_by('-fecha', '-hora')
     
@@ -602,21 +683,17 @@ def vet_citas(request):
 
 
 @login_required
+@vet_required
 def vet_cita_detalle(request, cita_id):
     """Ver detalle de una cita"""
-    check = verificar_veterinario(request)
-    if check:
-        return check
-    
-    cita = get_object_or_404(CitaMedica, id=cita_id)
+    # Dueño y mascota registrada (paciente) en la misma consulta
+    cita = get_object_or_404(CitaMedica.objects.select_related('user', 'paciente'), id=cita_id)
     
     # Buscar si hay consulta relacionada
     consulta = Consulta.objects.filter(cita=cita).first()
     
-    # Buscar mascota relacionada si existe
-    mascota = None
-    if cita.mascota:
-        mascota = Mascota.objects.filter(nombre=cita.mascota, propietario=cita.user).first()
+    # Mascota registrada de la cita (None si la cita solo tiene el nombre)
+    mascota = cita.paciente
     
     return render(request, 'gestorUser/veterinario/cita_detalle.html', {
         'cita': cita,
@@ -628,12 +705,9 @@ def vet_cita_detalle(request, cita_id):
 # ==================== CONSULTAS MÉDICAS ====================
 
 @login_required
+@vet_required
 def vet_consultas(request):
     """Listar todas las consultas"""
-    check = verificar_veterinario(request)
-    if check:
-        return check
-    
     estado = request.GET.get('estado', 'todas')
     mascota_id = request.GET.get('mascota', None)
     
@@ -662,12 +736,9 @@ def vet_consultas(request):
 
 
 @login_required
+@vet_required
 def vet_consulta_crear_ajax(request):
     """Vista AJAX para crear consulta desde modal"""
-    check = verificar_veterinario(request)
-    if check:
-        return check
-    
     if request.method == 'POST':
         form = ConsultaForm(request.POST)
         if form.is_valid():
@@ -694,12 +765,9 @@ def vet_consulta_crear_ajax(request):
 
 
 @login_required
+@vet_required
 def vet_mascota_crear_ajax(request):
     """Vista AJAX para crear mascota rápidamente desde modal"""
-    check = verificar_veterinario(request)
-    if check:
-        return check
-    
     if request.method == 'POST':
         form = MascotaForm(request.POST)
         if form.is_valid():
@@ -741,12 +809,9 @@ def vet_mascota_crear_ajax(request):
 
 
 @login_required
+@vet_required
 def vet_consulta_detalle(request, consulta_id):
     """Ver detalle completo de una consulta"""
-    check = verificar_veterinario(request)
-    if check:
-        return check
-    
     consulta = get_object_or_404(Consulta, id=consulta_id)
     recetas = Receta.objects.filter(consulta=consulta).prefetch_related('prescripciones')
     
@@ -757,6 +822,7 @@ def vet_consulta_detalle(request, consulta_id):
 
 
 @login_required
+@vet_required
 def vet_consulta_crear(request, paciente_id=None, cita_id=None):
     """
     Vista para crear una nueva consulta médica.
@@ -766,11 +832,6 @@ def vet_consulta_crear(request, paciente_id=None, cita_id=None):
     - paciente_id: ID de la mascota para crear consulta directamente
     - cita_id: ID de la cita para convertirla en consulta
     """
-    # Verificar permisos de veterinario
-    check = verificar_veterinario(request)
-    if check:
-        return check
-    
     # Inicializar variables que pueden venir de diferentes fuentes
     paciente = None  # Mascota a la que se le hará la consulta
     cita = None      # Cita médica relacionada (si existe)
@@ -786,15 +847,10 @@ def vet_consulta_crear(request, paciente_id=None, cita_id=None):
         # Si viene desde una cita médica (convertir cita en consulta)
         cita_id = request.resolver_match.kwargs.get('cita_id')
         if cita_id:
-            # Obtener la cita médica
-            cita = get_object_or_404(CitaMedica, id=cita_id)
-            # Intentar encontrar la mascota relacionada con la cita
-            # La cita tiene el nombre de la mascota como string, buscamos el objeto Mascota
-            if cita.mascota:
-                paciente = Mascota.objects.filter(
-                    nombre=cita.mascota,  # Nombre de la mascota en la cita
-                    propietario=cita.user  # Mismo propietario que la cita
-                ).first()  # first() devuelve None si no encuentra
+            # Obtener la cita médica junto con su mascota registrada
+            cita = get_object_or_404(CitaMedica.objects.select_related('paciente'), id=cita_id)
+            # La mascota de la consulta es el paciente de la cita (None si no está vinculada)
+            paciente = cita.paciente
     
     # Procesar formulario si se envió (POST)
     if request.method == 'POST':
@@ -841,12 +897,9 @@ def vet_consulta_crear(request, paciente_id=None, cita_id=None):
 
 
 @login_required
+@vet_required
 def vet_consulta_editar(request, consulta_id):
     """Editar consulta existente"""
-    check = verificar_veterinario(request)
-    if check:
-        return check
-    
     consulta = get_object_or_404(Consulta, id=consulta_id)
     
     if request.method == 'POST':
@@ -868,12 +921,9 @@ def vet_consulta_editar(request, consulta_id):
 
 
 @login_required
+@vet_required
 def vet_consulta_completar(request, consulta_id):
     """Marcar consulta como completada"""
-    check = verificar_veterinario(request)
-    if check:
-        return check
-    
     consulta = get_object_or_404(Consulta, id=consulta_id)
     consulta.estado = 'completada'
     consulta.save()
@@ -884,12 +934,9 @@ def vet_consulta_completar(request, consulta_id):
 # ==================== RECETAS Y PRESCRIPCIONES ====================
 
 @login_required
+@vet_required
 def vet_recetas(request):
     """Listar todas las recetas"""
-    check = verificar_veterinario(request)
-    if check:
-        return check
-    
     recetas = Receta.objects.select_related('consulta', 'veterinario').order_by('-fecha_emision')
     
     return render(request, 'gestorUser/veterinario/recetas_lista.html', {
@@ -898,12 +945,9 @@ def vet_recetas(request):
 
 
 @login_required
+@vet_required
 def vet_receta_detalle(request, receta_id):
     """Ver detalle de una receta"""
-    check = verificar_veterinario(request)
-    if check:
-        return check
-    
     receta = get_object_or_404(Receta, id=receta_id)
     prescripciones = Prescripcion.objects.filter(receta=receta)
     
@@ -914,16 +958,12 @@ def vet_receta_detalle(request, receta_id):
 
 
 @login_required
+@vet_required
 def vet_receta_crear(request, consulta_id):
     """
     Vista para crear una nueva receta médica asociada a una consulta.
     La receta se crea primero y luego se pueden agregar prescripciones de medicamentos.
     """
-    # Verificar permisos de veterinario
-    check = verificar_veterinario(request)
-    if check:
-        return check
-    
     # Obtener la consulta a la que se asociará la receta
     consulta = get_object_or_404(Consulta, id=consulta_id)
     
@@ -962,16 +1002,12 @@ def vet_receta_crear(request, consulta_id):
 
 
 @login_required
+@vet_required
 def vet_prescripcion_agregar(request, receta_id):
     """
     Vista para agregar una prescripción (medicamento) a una receta existente.
     Una receta puede tener múltiples prescripciones (varios medicamentos).
     """
-    # Verificar permisos de veterinario
-    check = verificar_veterinario(request)
-    if check:
-        return check
-    
     # Obtener la receta a la que se agregará la prescripción
     receta = get_object_or_404(Receta, id=receta_id)
     
@@ -986,6 +1022,9 @@ def vet_prescripcion_agregar(request, receta_id):
             # Asignar la receta a la que pertenece esta prescripción
             prescripcion.receta = receta
             
+            # Vincular con el producto del inventario si el texto coincide (código o nombre)
+            vincular_linea(prescripcion)
+            
             # Guardar la prescripción en la base de datos
             prescripcion.save()
             
@@ -1008,6 +1047,7 @@ def vet_prescripcion_agregar(request, receta_id):
 # ==================== VACUNAS ====================
 
 @login_required
+@vet_required
 def vet_vacunas(request, paciente_id=None):
     """
     Vista para listar vacunas.
@@ -1016,11 +1056,6 @@ def vet_vacunas(request, paciente_id=None):
     Parámetros:
         paciente_id (opcional): ID del paciente para filtrar vacunas
     """
-    # Verificar permisos de veterinario
-    check = verificar_veterinario(request)
-    if check:
-        return check
-    
     # Si se proporciona paciente_id, mostrar solo vacunas de ese paciente
     if paciente_id:
         # Obtener el paciente por su ID
@@ -1048,12 +1083,9 @@ def vet_vacunas(request, paciente_id=None):
 
 
 @login_required
+@vet_required
 def vet_vacuna_registrar(request, paciente_id):
     """Registrar nueva vacuna"""
-    check = verificar_veterinario(request)
-    if check:
-        return check
-    
     paciente = get_object_or_404(Mascota, id=paciente_id)
     
     if request.method == 'POST':
@@ -1077,12 +1109,9 @@ def vet_vacuna_registrar(request, paciente_id):
 # ==================== TRATAMIENTOS ====================
 
 @login_required
+@vet_required
 def vet_tratamientos(request, paciente_id=None):
     """Listar tratamientos (por paciente o todos)"""
-    check = verificar_veterinario(request)
-    if check:
-        return check
-    
     if paciente_id:
         paciente = get_object_or_404(Mascota, id=paciente_id)
         tratamientos = Tratamiento.objects.filter(mascota=paciente).order_by('-fecha_inicio')
@@ -1097,12 +1126,9 @@ def vet_tratamientos(request, paciente_id=None):
 
 
 @login_required
+@vet_required
 def vet_tratamiento_registrar(request, paciente_id):
     """Registrar nuevo tratamiento"""
-    check = verificar_veterinario(request)
-    if check:
-        return check
-    
     paciente = get_object_or_404(Mascota, id=paciente_id)
     
     if request.method == 'POST':
@@ -1126,17 +1152,14 @@ def vet_tratamiento_registrar(request, paciente_id):
 # ==================== INVENTARIO MÉDICO ====================
 
 @login_required
+@vet_required
+@solo_lectura
 def vet_inventario(request):
     """
     Vista para ver el inventario completo de todos los productos.
     Muestra todos los productos (medicamentos, alimentos, accesorios, etc.)
     ordenados alfabéticamente con sus stocks disponibles.
     """
-    # Verificar permisos de veterinario
-    check = verificar_veterinario(request)
-    if check:
-        return check
-    
     # ========== OBTENER TODOS LOS PRODUCTOS AGRUPADOS POR CATEGORÍA ==========
     # Diccionario para almacenar productos agrupados por categoría
     productos_por_categoria = {}
@@ -1149,9 +1172,6 @@ def vet_inventario(request):
         
         productos_categoria = []
         for producto in queryset:
-            # Normalizar precio (algunos son Integer, otros DecimalField)
-            precio = float(producto.precio)
-            
             # Normalizar descripción (algunos son CharField, otros TextField)
             descripcion = getattr(producto, 'descripcion', '')
             if not descripcion:
@@ -1165,7 +1185,7 @@ def vet_inventario(request):
                 'nombre': producto.nombre,
                 'marca': marca,
                 'descripcion': descripcion,
-                'precio': precio,
+                'precio': producto.precio,
                 'stock': producto.stock,
                 'tipo': tipo_producto,
                 'objeto': producto  # Guardar referencia al objeto original
@@ -1218,17 +1238,14 @@ def vet_inventario(request):
 
 
 @login_required
+@vet_required
+@solo_lectura
 def vet_inventario_alertas(request):
     """
     Vista para ver alertas de productos con stock bajo o crítico.
     Muestra solo productos con stock menor a 20 unidades (críticos < 10 y bajos 10-19),
     agrupados por categoría para facilitar la visualización rápida.
     """
-    # Verificar permisos de veterinario
-    check = verificar_veterinario(request)
-    if check:
-        return check
-    
     # ========== OBTENER PRODUCTOS CON STOCK BAJO O CRÍTICO AGRUPADOS POR CATEGORÍA ==========
     # Diccionario para almacenar productos agrupados por categoría
     productos_por_categoria = {}
@@ -1245,9 +1262,6 @@ def vet_inventario_alertas(request):
         
         productos_categoria = []
         for producto in productos_filtrados:
-            # Normalizar precio (algunos son Integer, otros DecimalField)
-            precio = float(producto.precio)
-            
             # Normalizar descripción (algunos son CharField, otros TextField)
             descripcion = getattr(producto, 'descripcion', '')
             if not descripcion:
@@ -1261,7 +1275,7 @@ def vet_inventario_alertas(request):
                 'nombre': producto.nombre,
                 'marca': marca,
                 'descripcion': descripcion,
-                'precio': precio,
+                'precio': producto.precio,
                 'stock': producto.stock,
                 'tipo': tipo_producto,
                 'objeto': producto  # Guardar referencia al objeto original
@@ -1308,17 +1322,17 @@ def vet_inventario_alertas(request):
     })
 
 
+# Medicamentos que se sugieren cuando el nombre del egreso coincide con varios
+MAXIMO_SUGERENCIAS_EGRESO = 5
+
+
 @login_required
+@vet_required
 def vet_egreso_registrar(request):
     """
     Vista para registrar el egreso (salida) de medicamentos del inventario.
     Cuando se registra un egreso, se actualiza automáticamente el stock del medicamento.
     """
-    # Verificar que el usuario es veterinario
-    check = verificar_veterinario(request)
-    if check:
-        return check
-    
     # Procesar formulario si se envió (POST)
     if request.method == 'POST':
         # Crear formulario con los datos enviados
@@ -1331,14 +1345,24 @@ def vet_egreso_registrar(request):
             egreso.veterinario = request.user
             
             # ========== ACTUALIZAR STOCK DEL MEDICAMENTO ==========
-            # Obtener el nombre del medicamento del formulario
-            medicamento_nombre = egreso.medicamento
-            
-            # Buscar el medicamento en el inventario por nombre (búsqueda parcial)
-            # first() devuelve el primer resultado o None si no encuentra
-            medicamento = Medicamento.objects.filter(
-                nombre__icontains=medicamento_nombre
-            ).first()
+            # Buscar el producto del inventario por código o nombre exacto (ver medicamentos.py)
+            # y dejarlo vinculado en el egreso
+            medicamento = vincular_linea(egreso)
+            if medicamento is None:
+                # Búsqueda parcial por nombre, solo si identifica un único medicamento
+                coincidencias = list(
+                    Medicamento.objects.filter(nombre__icontains=egreso.medicamento).order_by('nombre', 'codigo')[:MAXIMO_SUGERENCIAS_EGRESO]
+                )
+                if len(coincidencias) == 1:
+                    medicamento = egreso.producto = coincidencias[0]
+                elif coincidencias:
+                    # Varios medicamentos coinciden: pedir que se elija uno en lugar de guardar sin descontar stock
+                    sugerencias = ', '.join(f'{m.codigo} ({m.nombre})' for m in coincidencias)
+                    form.add_error(
+                        'medicamento',
+                        f"Varios medicamentos coinciden: {sugerencias}. Ingrese el código o el nombre completo."
+                    )
+                    return render(request, 'gestorUser/veterinario/egreso_form.html', {'form': form})
             
             if medicamento:
                 # Si el medicamento existe en el inventario, verificar stock disponible
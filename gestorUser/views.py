@@ -9,6 +9,7 @@ from django.contrib.auth.models import User
 from django.contrib.auth.mixins import LoginRequiredMixin
 from .forms import CustomUserCreationForm, CustomUserChangeForm
 from .models import VeterinarioProfile
+from .decorators import es_vet_request, login_requerido
 
 @login_required
 def vet_veterinario(request):
@@ -17,45 +18,23 @@ def vet_veterinario(request):
     Muestra estadísticas, consultas recientes y citas próximas.
     """
     # ========== VERIFICACIÓN DE PERMISOS ==========
-    # Verificar que el usuario tiene perfil de veterinario activo
-    es_vet = False
-    try:
-        # Intentar obtener el perfil de veterinario del usuario
-        perfil = VeterinarioProfile.objects.get(user=request.user)
-        es_vet = perfil.es_veterinario  # True solo si está activado
-    except VeterinarioProfile.DoesNotExist:
-        # Si no tiene perfil, no es veterinario
-        es_vet = False
-    
+    # request.is_vet: rol resuelto una vez por petición y cacheado (RolVeterinarioMiddleware)
     # Si NO es veterinario, redirigir a vista de cliente con mensaje de advertencia
-    if not es_vet:
+    if not es_vet_request(request):
         from django.contrib import messages
         messages.warning(request, "No tienes permisos para acceder al panel de veterinario.")
         return redirect('vet_inicio')  # Redirigir a vista de cliente
     
     # ========== CARGAR DATOS DEL DASHBOARD ==========
     # Importar modelos y utilidades necesarias
-    from .models import Mascota, Consulta, CitaMedica, Receta
-    from django.db.models import Count, Q
+    from .models import Consulta, CitaMedica
+    from .estadisticas import contadores_dashboard
     from django.utils import timezone
     
     # ========== CALCULAR ESTADÍSTICAS ==========
-    # Total de pacientes activos en el sistema
-    total_pacientes = Mascota.objects.filter(activa=True).count()
-    
-    # Consultas realizadas hoy (filtrando por fecha de consulta)
-    # fecha_consulta__date: compara solo la fecha (sin hora) con la fecha actual
-    consultas_hoy = Consulta.objects.filter(
-        fecha_consulta__date=timezone.now().date()
-    ).count()
-    
-    # Consultas pendientes de atender (estado='pendiente')
-    consultas_pendientes = Consulta.objects.filter(estado='pendiente').count()
-    
-    # Citas médicas agendadas para hoy
-    citas_hoy = CitaMedica.objects.filter(
-        fecha=timezone.now().date()
-    ).count()
+    # Total de pacientes activos, consultas de hoy, consultas pendientes y citas de hoy.
+    # Se calculan con una consulta por tabla y se cachean unos segundos (ver estadisticas.py)
+    contadores = contadores_dashboard()
     
     # Últimas 5 consultas realizadas (más recientes primero)
     # select_related optimiza la consulta trayendo la mascota en la misma query
@@ -65,15 +44,12 @@ def vet_veterinario(request):
     
     # Próximas 5 citas médicas (fecha mayor o igual a hoy, ordenadas por fecha y hora)
     citas_proximas = CitaMedica.objects.filter(
-        fecha__gte=timezone.now().date()  # fecha mayor o igual a hoy
+        fecha__gte=timezone.localdate()  # fecha mayor o igual a hoy (en la zona horaria local)
     ).order_by('fecha', 'hora')[:5]  # Ordenar por fecha y hora, limitar a 5
     
     # Renderizar template del dashboard con todas las estadísticas
     return render(request, 'gestorUser/veterinario/dashboard.html', {
-        'total_pacientes': total_pacientes,          # Total de pacientes activos
-        'consultas_hoy': consultas_hoy,              # Consultas del día
-        'consultas_pendientes': consultas_pendientes, # Consultas sin atender
-        'citas_hoy': citas_hoy,                      # Citas del día
+        **contadores,                                # total_pacientes, consultas_hoy, consultas_pendientes, citas_hoy
         'consultas_recientes': consultas_recientes,  # Últimas consultas
         'citas_proximas': citas_proximas,            # Próximas citas
     })
@@ -105,15 +81,8 @@ def vetInicio(request):
         - citas_usuario: Lista de citas agendadas por el usuario
     """
     # ========== VERIFICACIÓN DE TIPO DE USUARIO ==========
-    # Verificar si el usuario es veterinario mediante su perfil
-    es_vet = False
-    try:
-        # Intentar obtener el perfil de veterinario del usuario
-        perfil = VeterinarioProfile.objects.get(user=request.user)
-        es_vet = perfil.es_veterinario  # True si está activado como veterinario
-    except VeterinarioProfile.DoesNotExist:
-        # Si no tiene perfil, definitivamente no es veterinario
-        es_vet = False
+    # Verificar si el usuario es veterinario (request.is_vet, cacheado por RolVeterinarioMiddleware)
+    es_vet = es_vet_request(request)
     
     # ========== REDIRECCIÓN PARA VETERINARIOS ==========
     # Si es veterinario, redirigir a su dashboard específico
@@ -131,7 +100,7 @@ def vetInicio(request):
     
     # Inicializar variables para el formulario de citas
     citas_usuario = []
-    formulario_cita = CitaMedicaForm()  # Formulario vacío para nueva cita
+    formulario_cita = CitaMedicaForm(usuario=request.user)  # Formulario vacío para nueva cita
     
     # Si el usuario está autenticado, obtener sus citas agendadas
     if request.user.is_authenticated:
@@ -152,14 +121,7 @@ def index(request):
         # Veterinarios → vet_veterinario, Clientes → vet_inicio
         if not (request.user.is_superuser or request.user.is_staff):
             # Verificar si es veterinario
-            es_vet = False
-            try:
-                perfil = VeterinarioProfile.objects.get(user=request.user)
-                es_vet = perfil.es_veterinario
-            except VeterinarioProfile.DoesNotExist:
-                es_vet = False
-            
-            if es_vet:
+            if es_vet_request(request):
                 return redirect('vet_veterinario')
             else:
                 return redirect('vet_inicio')
@@ -200,17 +162,8 @@ def login_redirect(request):
     
     # ========== PRIORIDAD 2: VETERINARIOS ==========
     # Verificar si el usuario tiene perfil de veterinario activo
-    es_veterinario = False
-    try:
-        # Acceder a la relación OneToOne (si no existe, lanza DoesNotExist)
-        perfil = request.user.veterinarioprofile
-        es_veterinario = perfil.es_veterinario  # True solo si está activado
-    except VeterinarioProfile.DoesNotExist:
-        # Si no tiene perfil de veterinario, no es veterinario
-        es_veterinario = False
-    
     # Si es veterinario, redirigir a su dashboard
-    if es_veterinario:
+    if es_vet_request(request):
         return redirect('vet_veterinario')  # URL: /vet_veterinario/
     
     # ========== PRIORIDAD 3: CLIENTES ==========
@@ -374,7 +327,7 @@ from gestorProductos.models import Medicamento, Antiparasitario
 def gestionar_citas(request):
     citas = CitaMedica.objects.filter(user=request.user).order_by('fecha', 'hora')
     if request.method == 'POST':
-        form = CitaMedicaForm(request.POST)
+        form = CitaMedicaForm(request.POST, usuario=request.user)
         if form.is_valid():
             cita = form.save(commit=False)
             cita.user = request.user
@@ -388,7 +341,7 @@ def gestionar_citas(request):
         else:
             messages.error(request, "Por favor corrige los errores en el formulario.")
     else:
-        form = CitaMedicaForm()
+        form = CitaMedicaForm(usuario=request.user)
     return render(request, 'gestorProductos/vetInicio.html', {'formulario_cita': form, 'citas_usuario': citas})
 
 
@@ -430,7 +383,7 @@ def agendar_cita(request):
     # ========== PROCESAMIENTO DE FORMULARIO (POST) ==========
     if request.method == 'POST':
         # Crear instancia del formulario con los datos enviados
-        form = CitaMedicaForm(request.POST)
+        form = CitaMedicaForm(request.POST, usuario=request.user)
         
         if form.is_valid():
             # Guardar sin commit para poder modificar antes de guardar en BD
@@ -510,7 +463,7 @@ def agendar_cita(request):
                 messages.error(request, "Por favor corrige los errores en el formulario.")
     else:
         # ========== MOSTRAR FORMULARIO VACÍO (GET) ==========
-        form = CitaMedicaForm()
+        form = CitaMedicaForm(usuario=request.user)
 
     # Renderizar template con el formulario y la lista de citas
     return render(request, 'gestorUser/agendar_cita.html', {
@@ -519,12 +472,15 @@ def agendar_cita(request):
     })
 
 
-@login_required
-def obtener_horas_disponibles(request):
+@login_requerido
+async def obtener_horas_disponibles(request):
     """
     Vista AJAX para obtener las horas disponibles para una fecha específica.
     Excluye las horas que ya están ocupadas.
     
+    Es async: las horas ocupadas se leen con el ORM async, así que bajo ASGI
+    la petición no ocupa un worker mientras espera a la base de datos.
+    
     Parámetros GET:
         fecha: Fecha en formato YYYY-MM-DD
     
@@ -566,10 +522,10 @@ def obtener_horas_disponibles(request):
         (time(18, 0), '18:00'),
     ]
     
-    # Obtener horas ocupadas para esta fecha
-    horas_ocupadas = CitaMedica.objects.filter(
-        fecha=fecha
-    ).values_list('hora', flat=True)
+    # Obtener horas ocupadas para esta fecha (índice fecha + hora)
+    horas_ocupadas = {
+        hora async for hora in CitaMedica.objects.filter(fecha=fecha).values_list('hora', flat=True)
+    }
     
     # Filtrar horas disponibles (excluir ocupadas)
     horas_disponibles = [
@@ -0,0 +1,22 @@
+from django.contrib.staticfiles.apps import StaticFilesConfig
+
+
+class ArchivosEstaticosConfig(StaticFilesConfig):
+    """
+    staticfiles sin los archivos de desarrollo de static/: fuentes SCSS/LESS,
+    demos de la plantilla SB Admin 2 y variantes de Font Awesome que las
+    páginas no usan (solo se usa css/all.min.css con sus webfonts).
+    collectstatic no los copia, así no se comprimen ni se publican.
+
+    Django compara los directorios solo por su nombre y los archivos también
+    por su ruta completa, por eso las rutas terminan en '/*'.
+    """
+    ignore_patterns = StaticFilesConfig.ignore_patterns + [
+        'scss',
+        'less',
+        'js/demo/*',
+        'vendor/fontawesome-free/js/*',
+        'vendor/fontawesome-free/metadata/*',
+        'vendor/fontawesome-free/sprites/*',
+        'vendor/fontawesome-free/svgs/*',
+    ]
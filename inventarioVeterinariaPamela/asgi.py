@@ -3,6 +3,11 @@ ASGI config for inventarioVeterinariaPamela project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Despliegue ASGI (ver README, "Despliegue con ASGI"):
+
+    pip install -r requirements-asgi.txt
+    uvicorn inventarioVeterinariaPamela.asgi:application --workers 4
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
 """
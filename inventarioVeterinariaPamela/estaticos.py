@@ -0,0 +1,36 @@
+"""
+WhiteNoiseMiddleware que funciona también en modo async (ASGI).
+
+El middleware de WhiteNoise solo es síncrono: bajo ASGI, Django tendría que
+pasar cada petición a un hilo para atravesarlo, también las de las vistas
+async. Esta versión busca el archivo en el diccionario que WhiteNoise arma al
+iniciar (sin E/S) y solo usa un hilo para abrir y servir los estáticos.
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from whitenoise.middleware import WhiteNoiseMiddleware as WhiteNoiseMiddlewareBase
+
+
+class WhiteNoiseMiddleware(WhiteNoiseMiddlewareBase):
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            # Desarrollo: busca en disco en cada petición
+            static_file = await sync_to_async(self.find_file, thread_sensitive=False)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve, thread_sensitive=False)(static_file, request)
+        return await self.get_response(request)
@@ -0,0 +1,11 @@
+"""
+Backend de base de datos para MySQL/MariaDB (PyMySQL).
+
+Extiende el backend 'django.db.backends.mysql' con:
+- compatibilidad con MariaDB 10.4 (sin RETURNING ni verificación de versión),
+  antes aplicada con parches en settings.py
+- pool opcional de conexiones (OPTIONS['pool_size']), útil en despliegues ASGI
+- métricas de conexiones por proceso (ver metricas.py)
+
+Uso en settings.py:  'ENGINE': 'inventarioVeterinariaPamela.mariadb'
+"""
@@ -0,0 +1,81 @@
+import logging
+
+try:
+    import pymysql  # type: ignore
+    pymysql.install_as_MySQLdb()
+except ImportError:
+    # Sin PyMySQL se usa mysqlclient, si está instalado
+    pass
+
+from django.db import NotSupportedError
+from django.db.backends.mysql import base, features, operations
+
+from . import metricas
+from .pool import obtener_pool
+
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseFeatures(features.DatabaseFeatures):
+    # MariaDB < 10.5 no soporta la cláusula RETURNING que Django 5.0 usa en los INSERT.
+    # Consecuencia: bulk_create no asigna los ids a los objetos creados.
+    can_return_columns_from_insert = False
+    can_return_rows_from_bulk_insert = False
+
+
+class DatabaseOperations(operations.DatabaseOperations):
+
+    def return_insert_columns(self, fields):
+        return '', ()
+
+    def fetch_returned_insert_rows(self, cursor):
+        return []
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    Backend MySQL con compatibilidad para MariaDB 10.4, pool opcional y métricas.
+
+    OPTIONS['pool_size'] > 0 activa el pool de conexiones del proceso; se
+    recomienda usarlo con CONN_MAX_AGE = 0 (ASGI), ya que con conexiones
+    persistentes cada hilo conserva la suya.
+    """
+    features_class = DatabaseFeatures
+    ops_class = DatabaseOperations
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        # No es un parámetro de PyMySQL: se retira antes de conectar
+        self.tamano_pool = params.pop('pool_size', 0)
+        return params
+
+    def get_new_connection(self, conn_params):
+        if not self.tamano_pool:
+            return self._abrir_conexion(conn_params)
+        pool = obtener_pool(self.alias, self.tamano_pool)
+        return pool.obtener(lambda: self._abrir_conexion(conn_params))
+
+    def _abrir_conexion(self, conn_params):
+        metricas.incrementar('conexiones_nuevas')
+        return super().get_new_connection(conn_params)
+
+    def _close(self):
+        if self.connection is not None and getattr(self, 'tamano_pool', 0):
+            with self.wrap_database_errors:
+                obtener_pool(self.alias, self.tamano_pool).devolver(self.connection)
+            return
+        return super()._close()
+
+    def is_usable(self):
+        usable = super().is_usable()
+        if not usable:
+            metricas.incrementar('chequeos_fallidos')
+        return usable
+
+    def check_database_version_supported(self):
+        try:
+            super().check_database_version_supported()
+        except NotSupportedError as error:
+            # MariaDB 10.4 funciona con este backend aunque Django 5.0 pida 10.5
+            logger.warning('Versión de base de datos no soportada oficialmente: %s', error)
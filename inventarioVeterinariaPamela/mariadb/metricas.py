@@ -0,0 +1,47 @@
+"""
+Contadores de conexiones a la base de datos del proceso actual.
+
+- peticiones: peticiones HTTP atendidas
+- conexiones_nuevas: conexiones abiertas contra el servidor (handshake TCP + autenticación)
+- pool_reutilizadas: conexiones tomadas del pool en lugar de abrir una nueva
+- pool_devueltas / pool_descartadas: conexiones devueltas al pool o cerradas por estar lleno
+- chequeos_fallidos: conexiones persistentes descartadas por CONN_HEALTH_CHECKS
+
+La proporción de peticiones que reutilizan una conexión (persistente o del
+pool) es 1 - conexiones_nuevas / peticiones.
+"""
+import threading
+from collections import Counter
+
+from django.core.signals import request_started
+
+
+_contadores = Counter()
+_lock = threading.Lock()
+
+
+def incrementar(nombre, cantidad=1):
+    with _lock:
+        _contadores[nombre] += cantidad
+
+
+def obtener_metricas():
+    """Retorna una copia de los contadores y la tasa de reutilización de conexiones."""
+    with _lock:
+        metricas = dict(_contadores)
+    peticiones = metricas.get('peticiones', 0)
+    nuevas = metricas.get('conexiones_nuevas', 0)
+    metricas['tasa_reutilizacion'] = round(1 - nuevas / peticiones, 4) if peticiones else None
+    return metricas
+
+
+def reiniciar_metricas():
+    with _lock:
+        _contadores.clear()
+
+
+def _contar_peticion(**kwargs):
+    incrementar('peticiones')
+
+
+request_started.connect(_contar_peticion, dispatch_uid='mariadb_metricas_peticiones')
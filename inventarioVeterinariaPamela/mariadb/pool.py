@@ -0,0 +1,73 @@
+"""
+Pool de conexiones PyMySQL compartido por los hilos de un proceso.
+
+Con ASGI cada petición puede atenderse en un hilo distinto, por lo que las
+conexiones persistentes de Django (una por hilo) se reutilizan poco. El pool
+conserva hasta 'tamano' conexiones abiertas: al cerrar, Django devuelve la
+conexión al pool y la siguiente petición, en cualquier hilo, la toma de ahí.
+"""
+import queue
+import threading
+
+from . import metricas
+
+
+class PoolConexiones:
+
+    def __init__(self, tamano):
+        self.tamano = tamano
+        self._libres = queue.LifoQueue(maxsize=tamano)
+
+    def obtener(self, crear):
+        """Retorna una conexión libre que siga viva o, si no hay, una nueva creada con crear()."""
+        while True:
+            try:
+                conexion = self._libres.get_nowait()
+            except queue.Empty:
+                return crear()
+            try:
+                conexion.ping(reconnect=False)
+            except Exception:
+                metricas.incrementar('chequeos_fallidos')
+                self._cerrar(conexion)
+                continue
+            metricas.incrementar('pool_reutilizadas')
+            return conexion
+
+    def devolver(self, conexion):
+        """Deja la conexión disponible para otra petición (o la cierra si el pool está lleno)."""
+        try:
+            # No traspasar una transacción abierta a la siguiente petición
+            conexion.rollback()
+            self._libres.put_nowait(conexion)
+        except Exception:  # pool lleno o conexión caída
+            metricas.incrementar('pool_descartadas')
+            self._cerrar(conexion)
+        else:
+            metricas.incrementar('pool_devueltas')
+
+    def cerrar_todo(self):
+        while True:
+            try:
+                self._cerrar(self._libres.get_nowait())
+            except queue.Empty:
+                return
+
+    @staticmethod
+    def _cerrar(conexion):
+        try:
+            conexion.close()
+        except Exception:
+            pass
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def obtener_pool(alias, tamano):
+    """Un pool por alias de base de datos y proceso."""
+    with _pools_lock:
+        if alias not in _pools:
+            _pools[alias] = PoolConexiones(tamano)
+        return _pools[alias]
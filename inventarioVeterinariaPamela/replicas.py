@@ -0,0 +1,160 @@
+"""
+Lecturas en réplica de la base de datos.
+
+Por defecto todas las consultas van a la base principal ('default'). Las
+vistas de solo lectura (listados, reportes, APIs JSON) se marcan con
+@solo_lectura y sus lecturas van a la réplica ('replica'), si está
+configurada en DATABASES.
+
+Para no mostrar datos desactualizados a quien acaba de escribir, cuando una
+petición escribe en la base se guarda la hora en la sesión y durante los
+siguientes DB_REPLICA_VENTANA_PRIMARIA segundos todas sus lecturas van a la
+principal (ReplicaMiddleware).
+
+Fuera de las vistas (comandos, exportaciones) se puede usar
+'with lectura_en_replica():' o 'with usar_primaria():'.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+
+ALIAS_PRINCIPAL = 'default'
+ALIAS_REPLICA = 'replica'
+CLAVE_SESION = '_db_ultima_escritura'
+
+# True dentro de una vista @solo_lectura o de lectura_en_replica()
+_lectura_en_replica = ContextVar('lectura_en_replica', default=False)
+# True cuando la petición en curso debe leer de la principal (escribió hace poco)
+_forzar_primaria = ContextVar('forzar_primaria', default=False)
+# Se marca cuando la petición en curso escribe en la base de datos
+_hubo_escritura = ContextVar('hubo_escritura', default=None)
+
+
+def replica_configurada():
+    return ALIAS_REPLICA in connections.settings
+
+
+def alias_lectura():
+    """Alias de base de datos que se usa para leer en el contexto actual."""
+    if _lectura_en_replica.get() and not _forzar_primaria.get() and replica_configurada():
+        return ALIAS_REPLICA
+    return ALIAS_PRINCIPAL
+
+
+@contextmanager
+def lectura_en_replica():
+    token = _lectura_en_replica.set(True)
+    try:
+        yield
+    finally:
+        _lectura_en_replica.reset(token)
+
+
+@contextmanager
+def usar_primaria():
+    token = _forzar_primaria.set(True)
+    try:
+        yield
+    finally:
+        _forzar_primaria.reset(token)
+
+
+def solo_lectura(vista):
+    """Decorador: las lecturas de la vista van a la réplica (salvo que el usuario haya escrito hace poco)."""
+    if iscoroutinefunction(vista):
+        @wraps(vista)
+        async def envoltura_async(request, *args, **kwargs):
+            with lectura_en_replica():
+                return await vista(request, *args, **kwargs)
+        return envoltura_async
+
+    @wraps(vista)
+    def envoltura(request, *args, **kwargs):
+        with lectura_en_replica():
+            return vista(request, *args, **kwargs)
+    return envoltura
+
+
+# ==================== ROUTER ====================
+
+class RouterReplicas:
+    """Lecturas según el contexto (ver alias_lectura); escrituras siempre en la principal."""
+
+    def db_for_read(self, model, **hints):
+        return alias_lectura()
+
+    def db_for_write(self, model, **hints):
+        marca = _hubo_escritura.get()
+        if marca is not None:
+            marca.append(model._meta.label)
+        return ALIAS_PRINCIPAL
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # La réplica contiene los mismos datos que la principal
+        return True
+
+
+# ==================== MIDDLEWARE ====================
+
+class ReplicaMiddleware:
+    """
+    Mantiene en la base principal las lecturas de quien escribió hace menos
+    de DB_REPLICA_VENTANA_PRIMARIA segundos. Debe ir después de SessionMiddleware.
+    Sin réplica configurada no se activa. Funciona con WSGI y con ASGI.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not replica_configurada():
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.ventana = getattr(settings, 'DB_REPLICA_VENTANA_PRIMARIA', 5)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def escribio_hace_poco(self, request):
+        ultima_escritura = request.session.get(CLAVE_SESION)
+        return ultima_escritura is not None and time.time() - ultima_escritura < self.ventana
+
+    @staticmethod
+    def marcar_escritura(request):
+        request.session[CLAVE_SESION] = time.time()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        escrituras = []
+        token_escritura = _hubo_escritura.set(escrituras)
+        token_primaria = _forzar_primaria.set(self.escribio_hace_poco(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            _forzar_primaria.reset(token_primaria)
+            _hubo_escritura.reset(token_escritura)
+
+        if escrituras:
+            self.marcar_escritura(request)
+        return response
+
+    async def __acall__(self, request):
+        # La sesión (caché o base de datos) se lee y escribe fuera del event loop
+        escrituras = []
+        token_escritura = _hubo_escritura.set(escrituras)
+        token_primaria = _forzar_primaria.set(await sync_to_async(self.escribio_hace_poco)(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            _forzar_primaria.reset(token_primaria)
+            _hubo_escritura.reset(token_escritura)
+
+        if escrituras:
+            await sync_to_async(self.marcar_escritura)(request)
+        return response
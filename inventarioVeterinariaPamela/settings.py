@@ -24,6 +24,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -50,17 +51,25 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
-    'django.contrib.staticfiles',
+    # runserver deja los estáticos a WhiteNoise, igual que en producción
+    'whitenoise.runserver_nostatic',
+    # django.contrib.staticfiles con patrones de archivos a ignorar (ver apps.py)
+    'inventarioVeterinariaPamela.apps.ArchivosEstaticosConfig',
     'gestorUser',
     'gestorProductos',
 ]
 
 MIDDLEWARE = [
+    'gestorProductos.rendimiento.RendimientoMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # WhiteNoise con soporte async (ver estaticos.py)
+    'inventarioVeterinariaPamela.estaticos.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'inventarioVeterinariaPamela.replicas.ReplicaMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'gestorUser.middleware.RolVeterinarioMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -69,7 +78,8 @@ ROOT_URLCONF = 'inventarioVeterinariaPamela.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates que además mide el tiempo de renderizado (ver gestorProductos/rendimiento.py)
+        'BACKEND': 'gestorProductos.rendimiento.DjangoTemplatesMedidas',
         'DIRS': [TEMPLATES_DIR, 'gestorProductos/templates', 'gestorUser/templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -89,62 +99,56 @@ WSGI_APPLICATION = 'inventarioVeterinariaPamela.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
-try:
-    import pymysql  # type: ignore
-    pymysql.install_as_MySQLdb()
-except ImportError:
-    # PyMySQL no está instalado, pero esto solo se necesita para MySQL
-    pass 
+# Backend propio (inventarioVeterinariaPamela/mariadb): MySQL/MariaDB vía PyMySQL con
+# compatibilidad para MariaDB 10.4, pool opcional de conexiones y métricas de reutilización.
+#
+# Variables de entorno:
+#   DB_CONN_MAX_AGE       segundos que se conserva una conexión entre peticiones (0 = cerrar siempre)
+#   DB_CONN_HEALTH_CHECKS 1/0: verificar la conexión persistente antes de reutilizarla
+#   DB_POOL_SIZE          conexiones en el pool del proceso (0 = sin pool). Para ASGI se recomienda
+#                         DB_POOL_SIZE > 0 con DB_CONN_MAX_AGE=0
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 60))
+DB_CONN_HEALTH_CHECKS = os.environ.get('DB_CONN_HEALTH_CHECKS', '1').lower() not in ('0', 'false', 'no')
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 0))
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.mysql',
+        'ENGINE': 'inventarioVeterinariaPamela.mariadb',
         'NAME': 'veterinaria_pamela',  # Nombre de la base de datos en XAMPP
         'USER': 'root',                 # Usuario por defecto de XAMPP
         'PASSWORD': '',                  # Contraseña por defecto de XAMPP (vacía)
         'HOST': 'localhost',            # Host local
         'PORT': '3306',                 # Puerto por defecto de MySQL en XAMPP
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': DB_CONN_HEALTH_CHECKS,
         'OPTIONS': {
             'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
+            'pool_size': DB_POOL_SIZE,
         },
     }
 }
 
-# Deshabilitar verificación de versión de MariaDB (workaround para MariaDB 10.4)
-# Nota: En producción, se recomienda actualizar a MariaDB 10.5+ o MySQL 8.0+
-import django.db.backends.mysql.base
-original_check = django.db.backends.mysql.base.DatabaseWrapper.check_database_version_supported
-def patched_check(self):
-    try:
-        return original_check(self)
-    except Exception:
-        # Ignorar error de versión para MariaDB 10.4
-        pass
-django.db.backends.mysql.base.DatabaseWrapper.check_database_version_supported = patched_check
-
-# Deshabilitar RETURNING clause para MariaDB/MySQL (no soportado en versiones < 10.5.0)
-# Django 5.0 intenta usar RETURNING pero MariaDB 10.4 no lo soporta
-import django.db.backends.mysql.operations
-import django.db.backends.mysql.features
-
-# Deshabilitar soporte de RETURNING en las características de la base de datos
-django.db.backends.mysql.features.DatabaseFeatures.can_return_columns_from_insert = False
-django.db.backends.mysql.features.DatabaseFeatures.can_return_rows_from_bulk_insert = False
-
-# Parchear return_insert_columns para que no devuelva RETURNING
-original_return_insert = django.db.backends.mysql.operations.DatabaseOperations.return_insert_columns
-def patched_return_insert(self, fields):
-    # MariaDB/MySQL no soporta RETURNING en versiones antiguas
-    # Devolver cadena vacía en lugar de la cláusula RETURNING
-    return "", ()
-django.db.backends.mysql.operations.DatabaseOperations.return_insert_columns = patched_return_insert
-
-# Parchear fetch_returned_insert_rows para manejar el caso cuando no hay RETURNING
-original_fetch_returned = django.db.backends.mysql.operations.DatabaseOperations.fetch_returned_insert_rows
-def patched_fetch_returned(self, cursor):
-    # Cuando no hay RETURNING, devolver lista vacía
-    return []
-django.db.backends.mysql.operations.DatabaseOperations.fetch_returned_insert_rows = patched_fetch_returned
+# Réplica de solo lectura (opcional) para listados, reportes y APIs JSON marcados con @solo_lectura.
+# Se activa definiendo DB_REPLICA_HOST o DB_REPLICA_NAME; el resto de la configuración se toma de
+# 'default' salvo DB_REPLICA_PORT, DB_REPLICA_USER y DB_REPLICA_PASSWORD. Ver inventarioVeterinariaPamela/replicas.py
+if os.environ.get('DB_REPLICA_HOST') or os.environ.get('DB_REPLICA_NAME'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.environ.get('DB_REPLICA_NAME', DATABASES['default']['NAME']),
+        'HOST': os.environ.get('DB_REPLICA_HOST', DATABASES['default']['HOST']),
+        'PORT': os.environ.get('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'USER': os.environ.get('DB_REPLICA_USER', DATABASES['default']['USER']),
+        'PASSWORD': os.environ.get('DB_REPLICA_PASSWORD', DATABASES['default']['PASSWORD']),
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+        # En los tests la réplica usa la misma base que 'default'
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['inventarioVeterinariaPamela.replicas.RouterReplicas']
+
+# Segundos que las lecturas de un usuario siguen yendo a la principal después de que escribe
+DB_REPLICA_VENTANA_PRIMARIA = int(os.environ.get('DB_REPLICA_VENTANA_PRIMARIA', 5))
+
 
 
 # Password validation
@@ -183,6 +187,65 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# En producción (DEBUG = False) 'python manage.py collectstatic' copia los archivos a
+# STATIC_ROOT con el hash del contenido en el nombre (styles.4f2a1c.css) y genera
+# versiones .gz y .br. WhiteNoise los sirve desde la aplicación, comprimidos según
+# Accept-Encoding y con caché de un año (immutable): un cambio genera otro nombre.
+# En desarrollo se usan los nombres originales, sin necesidad de collectstatic.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': (
+            'django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+            else 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+        ),
+    },
+}
+# Solo se publican los archivos con hash; los originales quedan fuera de STATIC_ROOT
+WHITENOISE_KEEP_ONLY_HASHED_FILES = True
+
+# Bundles de JS/CSS (gestorProductos/bundles.py). Cada template carga los que usa con
+# {% bundle_css 'nombre' %} / {% bundle_js 'nombre' %}. En producción se cargan los archivos
+# generados por 'python manage.py construir_bundles' (antes de collectstatic): un archivo por
+# bundle en lugar de uno por librería. 'diferido': <script defer>, para lo que no se usa
+# antes de $(document).ready.
+BUNDLES = {
+    # Plantilla SB Admin 2 (base/base.html y base/base_login.html)
+    'admin': {
+        'css': ['vendor/fontawesome-free/css/all.min.css', 'css/sb-admin-2.min.css'],
+        'js': [
+            'vendor/jquery/jquery.min.js',
+            'vendor/bootstrap/js/bootstrap.bundle.min.js',
+            'vendor/jquery-easing/jquery.easing.min.js',
+            'js/sb-admin-2.min.js',
+        ],
+    },
+    'tablas': {
+        'css': ['vendor/datatables/dataTables.bootstrap4.min.css'],
+        'js': ['vendor/datatables/jquery.dataTables.min.js', 'vendor/datatables/dataTables.bootstrap4.min.js'],
+        'diferido': True,
+    },
+    # Carrito sin recargar la página en el catálogo y en verCarrito.html
+    'carrito': {
+        'js': ['js/carrito.js'],
+        'diferido': True,
+    },
+    # Búsqueda de mascotas en los selects de los formularios de veterinario (SelectMascotaRemoto)
+    'select_remoto': {
+        'js': ['js/select_remoto.js'],
+        'diferido': True,
+    },
+    # Los gráficos usan la API de Chart.js 3+; static/vendor/chart.js es la versión 2
+    'graficos': {
+        'js': ['https://cdn.jsdelivr.net/npm/chart.js'],
+        'diferido': True,
+    },
+}
+BUNDLES_COMPILADOS = not DEBUG
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
@@ -205,8 +268,50 @@ CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'unique-snowflake',
-    }
+    },
+    # Versiones y fechas de modificación del catálogo (gestorProductos/cache_catalogo.py):
+    # invalidan la grilla cacheada y deciden los ETag, así que todos los procesos deben
+    # ver los mismos valores. Con más de un proceso (gunicorn/uvicorn --workers) definir
+    # CACHE_CATALOGO_REDIS, p. ej. redis://127.0.0.1:6379/1 (ver README).
+    'catalogo': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['CACHE_CATALOGO_REDIS'],
+    } if os.environ.get('CACHE_CATALOGO_REDIS') else {
+        # Solo sirve con un proceso (runserver, un worker)
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'catalogo',
+    },
+}
+
+# Segundos que se cachea el rol de veterinario de cada usuario (gestorUser/roles.py).
+# Se invalida al guardar el perfil; con varios procesos y caché en memoria, este
+# tiempo es el máximo que tarda un cambio de rol en verse en los demás procesos.
+VET_ROL_CACHE_SEGUNDOS = 60
+
+# Segundos que se cachean los contadores del dashboard de veterinario (gestorUser/estadisticas.py)
+VET_DASHBOARD_CACHE_SEGUNDOS = 30
+
+# Segundos que se cachea la grilla de productos de cada página del catálogo
+# (gestorProductos/cache_catalogo.py). Se invalida al guardar productos o imágenes.
+CATALOGO_CACHE_SEGUNDOS = 3600
+# max-age de las APIs JSON del catálogo: durante este tiempo el navegador o un proxy
+# las reutilizan sin consultar; después revalidan con ETag / Last-Modified (304)
+CATALOGO_HTTP_MAX_AGE = 60
+# Segundos que se cachean nombre, precio e imagen de los productos del carrito
+# (gestorProductos/carrito.py). La sesión solo guarda tipo, id y cantidad.
+CARRITO_PRECIOS_SEGUNDOS = 300
+
+# Instrumentación de rendimiento (gestorProductos/rendimiento.py)
+# Mide consultas SQL y tiempos por vista; ver resultados con: python manage.py perf_report
+PERF_INSTRUMENTACION = DEBUG
+PERF_STATS_ARCHIVO = BASE_DIR / 'perf_stats.sqlite3'
+PERF_STATS_MAX_FILAS = 50000
+# Máximo de consultas SQL por vista (nombre de URL); '*' aplica a las demás
+PERF_PRESUPUESTO_CONSULTAS = {
+    '*': 40,
 }
+# 'log' registra una advertencia; 'raise' lanza PresupuestoConsultasExcedido (útil en tests)
+PERF_PRESUPUESTO_EXCEDIDO = 'log'
 
 # La sesión expira cuando se cierra el navegador
 SESSION_EXPIRE_AT_BROWSER_CLOSE = True
@@ -15,12 +15,15 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
 from django.urls import path,include
 from django.views.generic.base import TemplateView
 from gestorProductos.views import logout_view
 from gestorUser.views import index, vetInicio, vet_veterinario, login_redirect
 from django.shortcuts import redirect
 from django.contrib.auth.views import LoginView
+from inventarioVeterinariaPamela.mariadb.metricas import obtener_metricas
 
 
 def root_redirect(request):
@@ -33,11 +36,18 @@ def root_redirect(request):
         return redirect('login')
 
 
+@staff_member_required
+def metricas_conexiones(request):
+    """Contadores de conexiones a la base de datos del proceso que atiende la petición."""
+    return JsonResponse(obtener_metricas())
+
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('index', index, name='admin_index'),
     path('accounts/', include("django.contrib.auth.urls")),
     path('logout', logout_view, name='logout'),
+    path('db/metricas/', metricas_conexiones, name='metricas_conexiones'),
     path('login_redirect/', login_redirect, name='login_redirect'),
     path('vet_inicio/', vetInicio, name='vet_inicio'),
     path('vet_veterinario/', vet_veterinario, name='vet_veterinario'),
@@ -0,0 +1,127 @@
+/*
+ * Carrito sin recargar la página (mejora progresiva).
+ *
+ * Los formularios con el atributo data-carrito y el formulario #formAgregar de
+ * las páginas del catálogo se envían a la API JSON del carrito en lugar de
+ * recargar la página. La URL de la API es data-api o, si no está, la del
+ * formulario con /carrito/ reemplazado por /carrito/api/.
+ * Sin JavaScript, o si la API no responde, el formulario se envía como siempre.
+ */
+(function () {
+    'use strict';
+
+    function urlApi(form) {
+        return form.dataset.api || form.action.replace('/carrito/', '/carrito/api/');
+    }
+
+    // Mismo formato que {{ valor|floatformat:0 }}: pesos chilenos, sin decimales
+    function formatearPrecio(valor) {
+        return Math.round(Number(valor)).toString();
+    }
+
+    function mostrarAviso(mensaje, tipo) {
+        let contenedor = document.getElementById('avisos-carrito');
+        if (!contenedor) {
+            contenedor = document.createElement('div');
+            contenedor.id = 'avisos-carrito';
+            contenedor.className = 'position-fixed top-0 end-0 p-3';
+            contenedor.style.zIndex = 1080;
+            document.body.appendChild(contenedor);
+        }
+        const aviso = document.createElement('div');
+        aviso.className = 'alert alert-' + tipo + ' alert-dismissible fade show shadow';
+        aviso.setAttribute('role', 'alert');
+        aviso.textContent = mensaje;
+        const cerrar = document.createElement('button');
+        cerrar.type = 'button';
+        cerrar.className = 'btn-close';
+        cerrar.setAttribute('data-bs-dismiss', 'alert');
+        aviso.appendChild(cerrar);
+        contenedor.appendChild(aviso);
+        setTimeout(function () { aviso.remove(); }, 4000);
+    }
+
+    function actualizarContador(cantidad) {
+        document.querySelectorAll('a[href="/productos/carrito/"]').forEach(function (enlace) {
+            let contador = enlace.querySelector('[data-carrito-cantidad]');
+            if (!contador) {
+                contador = document.createElement('span');
+                contador.className = 'badge rounded-pill bg-danger ms-1';
+                contador.setAttribute('data-carrito-cantidad', '');
+                enlace.appendChild(contador);
+            }
+            contador.textContent = cantidad;
+        });
+    }
+
+    // Página del carrito: fila de la línea modificada y total
+    function actualizarLinea(datos) {
+        const fila = datos.clave && document.querySelector('[data-linea="' + CSS.escape(datos.clave) + '"]');
+        if (fila && !datos.linea) {
+            fila.remove();
+        } else if (fila) {
+            fila.querySelector('[data-cantidad]').textContent = datos.linea.cantidad;
+            fila.querySelector('[data-subtotal]').textContent = formatearPrecio(datos.linea.subtotal);
+            const decrementar = fila.querySelector('[data-decrementar]');
+            if (decrementar) {
+                decrementar.disabled = datos.linea.cantidad <= 1;
+            }
+        }
+        document.querySelectorAll('[data-carrito-total]').forEach(function (elemento) {
+            elemento.textContent = formatearPrecio(datos.total);
+        });
+        if (fila && datos.lineas === 0) {
+            // Mostrar el mensaje de carrito vacío
+            window.location.reload();
+        }
+    }
+
+    function procesar(form, datos) {
+        actualizarLinea(datos);
+        actualizarContador(datos.cantidad_productos);
+        if (datos.mensaje) {
+            mostrarAviso(datos.mensaje, 'success');
+        }
+        const modal = form.closest('.modal');
+        if (modal && window.bootstrap) {
+            bootstrap.Modal.getOrCreateInstance(modal).hide();
+        }
+    }
+
+    document.addEventListener('submit', function (evento) {
+        const form = evento.target;
+        if (!form.matches('[data-carrito], #formAgregar') || !window.fetch) {
+            return;
+        }
+        evento.preventDefault();
+        if (form.dataset.confirmar && !window.confirm(form.dataset.confirmar)) {
+            return;
+        }
+
+        const botones = form.querySelectorAll('button');
+        botones.forEach(function (boton) { boton.disabled = true; });
+
+        fetch(urlApi(form), {
+            method: 'POST',
+            body: new FormData(form),
+            credentials: 'same-origin',
+            headers: { 'Accept': 'application/json', 'X-Requested-With': 'XMLHttpRequest' },
+        })
+            .then(function (respuesta) {
+                return respuesta.json().then(function (datos) {
+                    return { ok: respuesta.ok, datos: datos };
+                });
+            })
+            .then(function (resultado) {
+                botones.forEach(function (boton) { boton.disabled = false; });
+                if (resultado.ok) {
+                    procesar(form, resultado.datos);
+                } else {
+                    mostrarAviso(resultado.datos.error || 'No se pudo actualizar el carrito.', 'danger');
+                }
+            }, function () {
+                // Sin respuesta JSON (red, CSRF vencido...): envío normal del formulario
+                form.submit();
+            });
+    });
+})();
@@ -0,0 +1,92 @@
+/*
+ * Selects con búsqueda remota (mejora progresiva).
+ *
+ * Los <select data-select-remoto="<url>"> llegan solo con la opción elegida
+ * (SelectMascotaRemoto en gestorUser/forms.py). Este script agrega encima un
+ * campo de búsqueda: al escribir dos o más letras consulta la URL (?q=...) y
+ * reemplaza las opciones por los resultados, conservando la que estaba
+ * elegida. La API responde {"resultados": [{id, nombre, tipo_mascota,
+ * propietario, ...}]} (vet_pacientes_api).
+ */
+(function () {
+    'use strict';
+
+    const ESPERA_MS = 250;
+    const MINIMO_LETRAS = 2;
+
+    // Mismo texto que Mascota.__str__
+    function etiqueta(resultado) {
+        return resultado.nombre + ' - ' + resultado.tipo_mascota + ' de ' + resultado.propietario;
+    }
+
+    function mostrarResultados(select, buscador, resultados) {
+        const elegida = select.value;
+        Array.from(select.options).forEach(function (opcion) {
+            if (opcion.value && opcion.value !== elegida) {
+                opcion.remove();
+            }
+        });
+        resultados.forEach(function (resultado) {
+            if (String(resultado.id) !== elegida) {
+                select.add(new Option(etiqueta(resultado), resultado.id));
+            }
+        });
+        buscador.classList.toggle('is-invalid', resultados.length === 0);
+        if (resultados.length) {
+            select.value = String(resultados[0].id);
+            select.dispatchEvent(new Event('change', { bubbles: true }));
+        }
+    }
+
+    function buscar(select, buscador) {
+        const texto = buscador.value.trim();
+        if (select.peticionRemota) {
+            select.peticionRemota.abort();
+        }
+        if (texto.length < MINIMO_LETRAS) {
+            buscador.classList.remove('is-invalid');
+            return;
+        }
+        const controlador = new AbortController();
+        select.peticionRemota = controlador;
+        fetch(select.dataset.selectRemoto + '?q=' + encodeURIComponent(texto), {
+            headers: { 'Accept': 'application/json' },
+            signal: controlador.signal,
+        })
+            .then(function (respuesta) {
+                return respuesta.ok ? respuesta.json() : Promise.reject(respuesta.status);
+            })
+            .then(function (datos) {
+                mostrarResultados(select, buscador, datos.resultados || []);
+            })
+            .catch(function () {
+                // Petición cancelada por una búsqueda más nueva o error de red: se deja el select como está
+            });
+    }
+
+    function preparar(select) {
+        const buscador = document.createElement('input');
+        buscador.type = 'search';
+        buscador.className = 'form-control form-control-sm mb-1';
+        buscador.placeholder = select.dataset.placeholder || 'Buscar...';
+        buscador.autocomplete = 'off';
+        buscador.setAttribute('aria-label', buscador.placeholder);
+        select.parentNode.insertBefore(buscador, select);
+
+        let temporizador = null;
+        buscador.addEventListener('input', function () {
+            clearTimeout(temporizador);
+            temporizador = setTimeout(function () { buscar(select, buscador); }, ESPERA_MS);
+        });
+        // Enter busca de inmediato en lugar de enviar el formulario
+        buscador.addEventListener('keydown', function (evento) {
+            if (evento.key === 'Enter') {
+                evento.preventDefault();
+                clearTimeout(temporizador);
+                buscar(select, buscador);
+            }
+        });
+    }
+
+    document.querySelectorAll('select[data-select-remoto]').forEach(preparar);
+})();